@@ -34,6 +34,59 @@ router.post('/', validateActivityLog, async (req, res) => {
   }
 });
 
+// Create many activity logs in one request (used by batching clients such as the RBAC service).
+// Every entry is validated first and only valid ones are inserted. When some entries fail, the
+// response is 207 with their indices, each marked `retryable` (a write error) or not (invalid
+// entry), so the client resends just the retryable ones instead of the whole batch.
+router.post('/bulk', async (req, res) => {
+  const entries = req.body;
+
+  if (!Array.isArray(entries) || entries.length === 0) {
+    return res.status(400).json({ error: 'Request body must be a non-empty array of activity logs' });
+  }
+
+  const ipAddress = req.headers['x-forwarded-for'] || req.connection.remoteAddress;
+  const userAgent = req.headers['user-agent'];
+
+  const failed = [];
+  const valid = []; // { index, doc } in request order
+  entries.forEach((entry, index) => {
+    if (!entry || typeof entry !== 'object' || !entry.userId || !entry.action) {
+      failed.push({ index, error: 'userId and action are required fields', retryable: false });
+      return;
+    }
+    const doc = new Activity({ ...entry, ipAddress, userAgent });
+    const error = doc.validateSync();
+    if (error) {
+      failed.push({ index, error: error.message, retryable: false });
+    } else {
+      valid.push({ index, doc });
+    }
+  });
+
+  if (valid.length === 0) {
+    return res.status(400).json({ error: 'No valid activity logs in the request', failed });
+  }
+
+  let inserted = valid.length;
+  try {
+    // Documents are already validated; the driver reports write errors by position in this array
+    await Activity.collection.insertMany(valid.map(({ doc }) => doc.toObject()), { ordered: false });
+  } catch (error) {
+    if (!error.writeErrors) {
+      // Nothing is known to be stored (e.g. the database is unreachable): the client may resend the batch
+      return res.status(503).json({ error: error.message });
+    }
+    for (const writeError of [].concat(error.writeErrors)) {
+      inserted -= 1;
+      failed.push({ index: valid[writeError.index].index, error: writeError.errmsg, retryable: true });
+    }
+  }
+
+  failed.sort((a, b) => a.index - b.index);
+  res.status(failed.length ? 207 : 201).json({ inserted, failed });
+});
+
 // Get all activity logs (with pagination)
 router.get('/', async (req, res) => {
   try {
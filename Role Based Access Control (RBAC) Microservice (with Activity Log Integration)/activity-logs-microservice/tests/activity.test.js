@@ -78,6 +78,45 @@ describe('Activity Logs API', () => {
     });
   });
   
+  // Test creating activity logs in bulk
+  describe('POST /api/activities/bulk', () => {
+    it('should create all activity logs in the array', async () => {
+      const entries = [
+        { userId: 'user1', action: 'other', details: { rbac_action: 'CHECK_PERMISSION' } },
+        { userId: 'user2', action: 'permission_change' }
+      ];
+
+      const response = await request(app)
+        .post('/api/activities/bulk')
+        .send(entries)
+        .expect(201);
+
+      expect(response.body.inserted).toBe(2);
+      expect(await Activity.countDocuments()).toBe(2);
+    });
+
+    it('should insert the valid entries and return 207 with the invalid ones', async () => {
+      const response = await request(app)
+        .post('/api/activities/bulk')
+        .send([{ userId: 'user1', action: 'login' }, { action: 'login' }, { userId: 'user3', action: 'not_an_action' }])
+        .expect(207);
+
+      expect(response.body.inserted).toBe(1);
+      expect(response.body.failed.map(failure => [failure.index, failure.retryable])).toEqual([[1, false], [2, false]]);
+      expect(await Activity.countDocuments()).toBe(1);
+    });
+
+    it('should return 400 if no entry is valid', async () => {
+      const response = await request(app)
+        .post('/api/activities/bulk')
+        .send([{ action: 'login' }])
+        .expect(400);
+
+      expect(response.body.failed).toHaveLength(1);
+      expect(await Activity.countDocuments()).toBe(0);
+    });
+  });
+
   // Test retrieving activity logs
   describe('GET /api/activities', () => {
     it('should retrieve all activity logs with pagination', async () => {
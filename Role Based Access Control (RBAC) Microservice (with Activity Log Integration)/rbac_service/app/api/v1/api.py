@@ -2,7 +2,8 @@
 from fastapi import APIRouter
 
 # Import the routers from the endpoint modules
-from app.api.v1.endpoints import check, manage
+from app.api.v1.endpoints import check, check_async, manage, manage_async, changesets, jobs, diagnostics, policy
+from app.core.config import settings
 
 # Create the main router for API version 1
 api_router = APIRouter()
@@ -10,11 +11,30 @@ api_router = APIRouter()
 # Include the check router
 # All routes defined in check.router will be available under the main router
 # Tags are used for grouping endpoints in the OpenAPI documentation
-api_router.include_router(check.router, tags=["Permission Check"])
+# With DATABASE_ASYNC_ENABLED the async (event-loop) variants serve the same paths
+if settings.DATABASE_ASYNC_ENABLED:
+    api_router.include_router(check_async.router, tags=["Permission Check"])
+else:
+    api_router.include_router(check.router, tags=["Permission Check"])
 
 # Include the management router
 # All routes defined in manage.router will be available under the main router
+# With DATABASE_ASYNC_ENABLED the async list/get endpoints are matched first and shadow their sync twins
+if settings.DATABASE_ASYNC_ENABLED:
+    api_router.include_router(manage_async.router, tags=["Management"])
 api_router.include_router(manage.router, tags=["Management"])
 
+# Include the changeset router (many management operations applied atomically)
+api_router.include_router(changesets.router, tags=["Management"])
+
+# Include the background job router (chunked long-running admin operations)
+api_router.include_router(jobs.router, tags=["Jobs"])
+
+# Include the policy export router (snapshot + deltas for sidecars and downstream caches)
+api_router.include_router(policy.router, tags=["Policy Export"])
+
+# Include the diagnostics router (cache/queue stats used for sizing and debugging)
+api_router.include_router(diagnostics.router, tags=["Diagnostics"])
+
 # You could add more routers here as your API grows
 # e.g., api_router.include_router(permissions.router, prefix="/permissions", tags=["Permissions"])
\ No newline at end of file
@@ -0,0 +1,48 @@
+# app/api/v1/endpoints/changesets.py
+# Applies an ordered list of management operations in one transaction, so admin
+# tooling can sync hundreds of policy edits in one round trip, all or nothing.
+from collections import Counter
+
+from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from sqlalchemy.orm import Session
+
+from app.db.session import get_db
+from app.schemas.rbac import ChangesetRequest, ChangesetResponse
+from app.crud import rbac as crud
+from app.crud.changesets import ChangesetError
+from app.core.logging_client import log_activity, ACTION_APPLY_CHANGESET
+
+router = APIRouter()
+
+@router.post(
+    "/changesets",
+    response_model=ChangesetResponse,
+    summary="Apply Changeset",
+    description=(
+        "Applies create_role, create_permission, assign_permission / remove_permission and "
+        "assign_role / remove_role operations in order, in one transaction. Every operation is "
+        "validated first; if any is invalid nothing is applied and the response (400) lists each "
+        "failure by index. Returns the policy epoch after commit."
+    ),
+    responses={400: {"description": "One or more operations are invalid; `detail` is a list of {index, detail}"}}
+)
+def apply_changeset_endpoint(
+    *,
+    db: Session = Depends(get_db),
+    changeset_in: ChangesetRequest,
+    background_tasks: BackgroundTasks
+) -> ChangesetResponse:
+    try:
+        epoch, results = crud.apply_changeset(db=db, operations=changeset_in.operations)
+    except ChangesetError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=exc.errors)
+
+    # One event summarizing the changeset instead of one per operation
+    background_tasks.add_task(
+        log_activity,
+        action=ACTION_APPLY_CHANGESET,
+        status="success",
+        resource_type="Changeset",
+        details={"epoch": epoch, "operations": dict(Counter(op.op for op in changeset_in.operations))}
+    )
+    return ChangesetResponse(epoch=epoch, results=results)
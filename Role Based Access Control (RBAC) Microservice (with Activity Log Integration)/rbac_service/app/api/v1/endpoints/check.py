@@ -1,17 +1,116 @@
 # app/api/v1/endpoints/check.py
 # Add BackgroundTasks import
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Query, Header, Response
 from sqlalchemy.orm import Session
+from typing import Dict, List, Optional, Tuple
 # No asyncio needed now
 
-from app.db.session import get_db
-from app.schemas.rbac import CheckRequest, CheckResponse
-from app.core.security import check_user_permission
+from app.db.session import get_db, get_read_db
+from app.schemas.rbac import (
+    CheckRequest, CheckResponse,
+    BatchCheckRequest, BatchCheckResponse, BatchCheckResultItem
+)
+from app.core.security import check_user_permission_cached, check_user_permissions_batch
+from app.core.policy_epoch import policy_epoch
+from app.core.config import settings
 # Import the logging helper function and constant
-from app.core.logging_client import log_activity, ACTION_CHECK_PERMISSION
+from app.core.logging_client import log_activity, ACTION_CHECK_PERMISSION, ACTION_CHECK_PERMISSION_BATCH
+from app.core.check_aggregator import check_event_aggregator
+from app.core.invalidation import flush_policy_caches
+from app.core import metrics
 
 router = APIRouter()
 
+# --- Helpers shared with the async check endpoints (check_async.py) ---
+
+def log_check_result(background_tasks: BackgroundTasks, request_data: CheckRequest, allowed: bool) -> None:
+    """Queues the CHECK_PERMISSION activity event for a single check, unless it is rolled into a window summary."""
+    metrics.record_check_decision(allowed)
+    if check_event_aggregator.record(request_data.user_id, request_data.permission, allowed):
+        return
+    background_tasks.add_task(
+        log_activity,
+        action=ACTION_CHECK_PERMISSION,
+        user_id=request_data.user_id,
+        status="success" if allowed else "failure",
+        resource_type="PermissionCheck",
+        resource_id=request_data.permission,
+        details={"result_allowed": allowed}
+    )
+
+def epoch_etag(epoch: int) -> str:
+    """Strong ETag for a GET /check response: the decision can only change with the epoch."""
+    return f'"rbac-epoch-{epoch}"'
+
+def check_cache_headers(epoch: int) -> Dict[str, str]:
+    """ETag/Cache-Control headers that let gateways cache GET /check and revalidate by epoch."""
+    max_age = settings.CHECK_HTTP_MAX_AGE_SECONDS
+    return {
+        "ETag": epoch_etag(epoch),
+        "Cache-Control": f"max-age={max_age}, must-revalidate" if max_age > 0 else "no-cache",
+    }
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header (possibly a list, possibly weak) matches `etag`."""
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in [candidate.removeprefix("W/") for candidate in candidates]
+
+def revalidation_epoch(epoch: int, missed: bool) -> int:
+    """
+    Takes the DB epoch read for a conditional GET /check. If it shows a change
+    this process never heard about (notifications off, non-Postgres, or one
+    lost), the in-process caches are stale too, so they are dropped before deciding.
+    """
+    if missed:
+        flush_policy_caches()
+        policy_epoch.advance(epoch)
+    return epoch
+
+def not_modified_response(epoch: int) -> Response:
+    metrics.record_not_modified()
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=check_cache_headers(epoch))
+
+GET_CHECK_RESPONSES = {304: {"description": "Policy unchanged since the epoch in If-None-Match"}}
+
+def build_batch_response(
+    background_tasks: BackgroundTasks,
+    pairs: List[Tuple[str, str]],
+    decisions: List[bool]
+) -> BatchCheckResponse:
+    """Builds the batch response and queues one aggregated activity event for the whole batch."""
+    results = [
+        BatchCheckResultItem(user_id=user_id, permission=permission, allowed=allowed)
+        for (user_id, permission), allowed in zip(pairs, decisions)
+    ]
+
+    # --- Log one aggregated event for the whole batch instead of one per pair ---
+    user_ids = sorted({user_id for user_id, _ in pairs})
+    allowed_count = sum(decisions)
+    metrics.record_batch_decisions(allowed_count, len(pairs) - allowed_count)
+    background_tasks.add_task(
+        log_activity,
+        action=ACTION_CHECK_PERMISSION_BATCH,
+        user_id=user_ids[0] if len(user_ids) == 1 else "SYSTEM",
+        status="success",
+        resource_type="PermissionCheck",
+        details={
+            "checks": len(pairs),
+            "allowed": allowed_count,
+            "denied": len(pairs) - allowed_count,
+            "user_ids": user_ids,
+            "denied_checks": [
+                {"user_id": user_id, "permission": permission}
+                for (user_id, permission), allowed in zip(pairs, decisions) if not allowed
+            ]
+        }
+    )
+    # ----------------------------------------------------------------------------
+
+    return BatchCheckResponse(results=results)
+
+
 @router.post(
     "/check",
     response_model=CheckResponse,
@@ -20,26 +119,71 @@ router = APIRouter()
 )
 def check_permission_endpoint( # <--- Back to def
     *,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     request_data: CheckRequest,
     background_tasks: BackgroundTasks # <--- Add BackgroundTasks dependency
 ) -> CheckResponse:
-    allowed = check_user_permission(
+    # Read before deciding, so the epoch reported is never newer than the decision
+    epoch = policy_epoch.get(db)
+    # Served from the in-process permission cache; misses fall through to the DB
+    allowed = check_user_permission_cached(
         db=db,
         user_id=request_data.user_id,
         permission_name=request_data.permission
     )
 
     # --- (Optional) Log Check Result using BackgroundTasks ---
-    background_tasks.add_task( # <--- Use add_task
-        log_activity,
-        action=ACTION_CHECK_PERMISSION,
-        user_id=request_data.user_id,
-        status="success" if allowed else "failure",
-        resource_type="PermissionCheck",
-        resource_id=request_data.permission,
-        details={"result_allowed": allowed}
-    )
+    log_check_result(background_tasks, request_data, allowed)
     # ---------------------------------------------------------
 
-    return CheckResponse(allowed=allowed)
\ No newline at end of file
+    return CheckResponse(allowed=allowed, epoch=epoch)
+
+@router.get(
+    "/check",
+    response_model=CheckResponse,
+    responses=GET_CHECK_RESPONSES,
+    summary="Check User Permission (cacheable)",
+    description="GET form of /check for HTTP caches: responses carry an epoch ETag and revalidate with If-None-Match (304 while the policy is unchanged)."
+)
+def check_permission_get_endpoint(
+    *,
+    db: Session = Depends(get_read_db),
+    primary: Session = Depends(get_db), # The same session get_read_db falls back to
+    user_id: str = Query(..., description="ID of the user performing the action"),
+    permission: str = Query(..., description="Permission name required (e.g., resource:action)"),
+    if_none_match: Optional[str] = Header(None),
+    response: Response,
+    background_tasks: BackgroundTasks
+):
+    if if_none_match:
+        # Revalidation is answered from the primary: neither a possibly stale in-process
+        # epoch nor a replica that hasn't applied the latest bump may confirm a cached decision
+        db = primary
+        epoch = revalidation_epoch(*policy_epoch.refresh(db))
+    else:
+        epoch = policy_epoch.get(db)
+    if etag_matches(if_none_match, epoch_etag(epoch)):
+        # Nothing changed since the caller's copy; no decision is evaluated or logged
+        return not_modified_response(epoch)
+
+    request_data = CheckRequest(user_id=user_id, permission=permission)
+    allowed = check_user_permission_cached(db=db, user_id=user_id, permission_name=permission)
+    log_check_result(background_tasks, request_data, allowed)
+    response.headers.update(check_cache_headers(epoch))
+    return CheckResponse(allowed=allowed, epoch=epoch)
+
+@router.post(
+    "/check/batch",
+    response_model=BatchCheckResponse,
+    summary="Check Many User Permissions",
+    description="Resolve many (user, permission) pairs with a single query. Results are returned in request order."
+)
+def check_permissions_batch_endpoint(
+    *,
+    db: Session = Depends(get_read_db),
+    request_data: BatchCheckRequest,
+    background_tasks: BackgroundTasks
+) -> BatchCheckResponse:
+    pairs = [(check.user_id, check.permission) for check in request_data.checks]
+    decisions = check_user_permissions_batch(db=db, checks=pairs)
+    return build_batch_response(background_tasks, pairs, decisions)
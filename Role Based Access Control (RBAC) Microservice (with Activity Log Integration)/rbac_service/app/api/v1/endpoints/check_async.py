@@ -0,0 +1,87 @@
+# app/api/v1/endpoints/check_async.py
+# Async versions of the check endpoints, mounted instead of check.py when
+# settings.DATABASE_ASYNC_ENABLED is true. They run on the event loop with an
+# AsyncSession, so /check concurrency is bounded by the DB pool rather than
+# Starlette's threadpool. Reads go to replicas like the sync endpoints (get_async_read_db).
+from fastapi import APIRouter, Depends, BackgroundTasks, Query, Header, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+
+from app.db.session import get_async_db, get_async_read_db
+from app.schemas.rbac import CheckRequest, CheckResponse, BatchCheckRequest, BatchCheckResponse
+from app.core.security import check_user_permission_cached_async, check_user_permissions_batch_async
+from app.core.policy_epoch import policy_epoch
+from app.api.v1.endpoints.check import (
+    log_check_result, build_batch_response,
+    epoch_etag, etag_matches, check_cache_headers, not_modified_response, revalidation_epoch, GET_CHECK_RESPONSES
+)
+
+router = APIRouter()
+
+@router.post(
+    "/check",
+    response_model=CheckResponse,
+    summary="Check User Permission",
+    description="Check if a user has the specified permission based on their roles."
+)
+async def check_permission_endpoint(
+    *,
+    db: AsyncSession = Depends(get_async_read_db),
+    request_data: CheckRequest,
+    background_tasks: BackgroundTasks
+) -> CheckResponse:
+    epoch = await policy_epoch.get_async(db)
+    allowed = await check_user_permission_cached_async(
+        db=db,
+        user_id=request_data.user_id,
+        permission_name=request_data.permission
+    )
+    log_check_result(background_tasks, request_data, allowed)
+    return CheckResponse(allowed=allowed, epoch=epoch)
+
+@router.get(
+    "/check",
+    response_model=CheckResponse,
+    responses=GET_CHECK_RESPONSES,
+    summary="Check User Permission (cacheable)",
+    description="GET form of /check for HTTP caches: responses carry an epoch ETag and revalidate with If-None-Match (304 while the policy is unchanged)."
+)
+async def check_permission_get_endpoint(
+    *,
+    db: AsyncSession = Depends(get_async_read_db),
+    primary: AsyncSession = Depends(get_async_db),
+    user_id: str = Query(..., description="ID of the user performing the action"),
+    permission: str = Query(..., description="Permission name required (e.g., resource:action)"),
+    if_none_match: Optional[str] = Header(None),
+    response: Response,
+    background_tasks: BackgroundTasks
+):
+    if if_none_match:
+        db = primary # See check.py: revalidation never trusts a replica
+        epoch = revalidation_epoch(*await policy_epoch.refresh_async(db))
+    else:
+        epoch = await policy_epoch.get_async(db)
+    if etag_matches(if_none_match, epoch_etag(epoch)):
+        return not_modified_response(epoch)
+
+    request_data = CheckRequest(user_id=user_id, permission=permission)
+    allowed = await check_user_permission_cached_async(db=db, user_id=user_id, permission_name=permission)
+    log_check_result(background_tasks, request_data, allowed)
+    response.headers.update(check_cache_headers(epoch))
+    return CheckResponse(allowed=allowed, epoch=epoch)
+
+@router.post(
+    "/check/batch",
+    response_model=BatchCheckResponse,
+    summary="Check Many User Permissions",
+    description="Resolve many (user, permission) pairs with a single query. Results are returned in request order."
+)
+async def check_permissions_batch_endpoint(
+    *,
+    db: AsyncSession = Depends(get_async_read_db),
+    request_data: BatchCheckRequest,
+    background_tasks: BackgroundTasks
+) -> BatchCheckResponse:
+    pairs = [(check.user_id, check.permission) for check in request_data.checks]
+    decisions = await check_user_permissions_batch_async(db=db, checks=pairs)
+    return build_batch_response(background_tasks, pairs, decisions)
@@ -0,0 +1,61 @@
+# app/api/v1/endpoints/diagnostics.py
+from fastapi import APIRouter
+from typing import Any, Dict, Optional
+
+from app.core.logging_client import activity_log_shipper
+from app.core.check_aggregator import check_event_aggregator
+from app.core.permission_cache import permission_cache
+from app.core.permission_matrix import permission_matrix
+from app.core.policy_bus import policy_change_listener
+from app.core.job_runner import job_runner
+from app.db.session import replica_router
+
+router = APIRouter()
+
+@router.get(
+    "/diagnostics/permission-cache",
+    summary="Permission Cache Stats",
+    description="Hit/miss counters and occupancy of the in-process effective-permission cache, for sizing."
+)
+def permission_cache_stats() -> Dict[str, Any]:
+    return permission_cache.stats()
+
+@router.get(
+    "/diagnostics/permission-matrix",
+    summary="Permission Matrix Stats",
+    description="Size and reload counters of the bitset evaluation engine (used when PERMISSION_ENGINE=bitset)."
+)
+def permission_matrix_stats() -> Dict[str, Any]:
+    return permission_matrix.stats()
+
+@router.get(
+    "/diagnostics/activity-log",
+    summary="Activity Log Shipper Stats",
+    description="Queue depth and sent/failed/dropped counters of the batching Activity Log shipper, plus check-event aggregation counters."
+)
+def activity_log_stats() -> Dict[str, Any]:
+    return {**activity_log_shipper.stats(), "check_aggregation": check_event_aggregator.stats()}
+
+@router.get(
+    "/diagnostics/policy-bus",
+    summary="Policy Change Listener Stats",
+    description="Connection state and counters of the LISTEN/NOTIFY invalidation listener (null when it is not running)."
+)
+def policy_bus_stats() -> Optional[Dict[str, Any]]:
+    return policy_change_listener.stats() if policy_change_listener is not None else None
+
+@router.get(
+    "/diagnostics/jobs",
+    summary="Job Runner Stats",
+    description="Worker count and chunk/outcome counters of this process's background job runner."
+)
+def job_runner_stats() -> Dict[str, Any]:
+    return job_runner.stats()
+
+@router.get(
+    "/diagnostics/replicas",
+    summary="Read Replica Stats",
+    description="Health, lag and read counters of the configured read replicas, and how many reads went to the primary instead."
+)
+def replica_stats() -> Dict[str, Any]:
+    return replica_router.stats()
@@ -0,0 +1,110 @@
+# app/api/v1/endpoints/jobs.py
+# Heavy admin operations (deleting a widely held role, assigning or revoking a
+# role for very many users, rebuilding effective permissions) run as background
+# jobs: submission returns 202 with the job, progress is polled via GET /jobs/{id}.
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, status, Path, BackgroundTasks
+from sqlalchemy.orm import Session
+
+from app.db.session import get_db
+from app.schemas.rbac import JobRequest, JobResponse
+from app.crud import rbac as crud
+from app.crud import jobs
+from app.models.rbac import Job
+from app.core.job_runner import job_runner
+from app.core.logging_client import log_activity, ACTION_SUBMIT_JOB
+
+router = APIRouter()
+
+def submit_job(
+    db: Session,
+    background_tasks: BackgroundTasks,
+    *,
+    kind: str,
+    params: Dict[str, Any],
+    progress_total: Optional[int] = None
+) -> Job:
+    """Queues a job, nudges this process's workers and logs the submission."""
+    job = jobs.submit(db, kind=kind, params=params, progress_total=progress_total)
+    job_runner.wake()
+    background_tasks.add_task(
+        log_activity,
+        action=ACTION_SUBMIT_JOB,
+        status="success",
+        resource_type="Job",
+        resource_id=str(job.job_id),
+        details={"kind": kind, "role_id": params.get("role_id"), "progress_total": progress_total}
+    )
+    return job
+
+@router.post(
+    "/jobs",
+    response_model=JobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Submit Job",
+    description=(
+        "Queues a long-running operation: `delete_role`, `assign_role_to_users` / `remove_role_from_users` "
+        "(up to 1,000,000 user IDs) or `rebuild_effective_permissions`. Jobs run in chunks of "
+        "JOB_CHUNK_ROWS users, each in its own short transaction, so the changes become visible "
+        "progressively. Poll GET /jobs/{job_id} for progress."
+    )
+)
+def submit_job_endpoint(
+    *,
+    db: Session = Depends(get_db),
+    job_in: JobRequest,
+    background_tasks: BackgroundTasks
+) -> JobResponse:
+    params: Dict[str, Any] = {}
+    progress_total = None
+    if job_in.kind != jobs.KIND_REBUILD_EFFECTIVE_PERMISSIONS:
+        if not crud.get_role(db=db, role_id=job_in.role_id):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Role not found")
+        params["role_id"] = str(job_in.role_id)
+    if job_in.kind == jobs.KIND_DELETE_ROLE:
+        progress_total = crud.count_role_holders(db=db, role_id=job_in.role_id)
+    elif job_in.kind in (jobs.KIND_ASSIGN_ROLE_TO_USERS, jobs.KIND_REMOVE_ROLE_FROM_USERS):
+        params["user_ids"] = job_in.user_ids
+        progress_total = len(job_in.user_ids)
+    return submit_job(db, background_tasks, kind=job_in.kind, params=params, progress_total=progress_total)
+
+@router.get(
+    "/jobs/{job_id}",
+    response_model=JobResponse,
+    summary="Get Job",
+    description="Status and progress of a background job."
+)
+def get_job_endpoint(
+    *,
+    db: Session = Depends(get_db),
+    job_id: UUID = Path(..., description="The ID of the job")
+) -> JobResponse:
+    job = jobs.get_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job
+
+@router.post(
+    "/jobs/{job_id}/cancel",
+    response_model=JobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Cancel Job",
+    description=(
+        "Cancels a queued job at once, or stops a running one after its current chunk "
+        "(chunks already committed stay applied). 409 if the job has already finished."
+    ),
+    responses={409: {"description": "The job has already finished"}}
+)
+def cancel_job_endpoint(
+    *,
+    db: Session = Depends(get_db),
+    job_id: UUID = Path(..., description="The ID of the job")
+) -> JobResponse:
+    job = jobs.get_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    if job.status in jobs.FINISHED_STATUSES:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Job already {job.status}")
+    return jobs.request_cancel(db, job=job)
@@ -2,32 +2,65 @@
 # Corrected version using BackgroundTasks
 
 # Add BackgroundTasks to imports, ensure asyncio is NOT imported directly here
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Path, Body, BackgroundTasks
+import json
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Path, Body, BackgroundTasks, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional, TypeVar
 from uuid import UUID
 
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.schemas.rbac import (
     RoleCreate, RoleResponse, RoleUpdate,
     PermissionCreate, PermissionResponse, PermissionUpdate,
     RolePermissionAssignment,
     UserRoleAssignment,
-    UserRoleResponseItem
+    UserRoleResponseItem,
+    BulkUserRoleRequest, BulkUserRoleResponse, BulkUserRoleResultItem,
+    JobResponse
 )
 from app.crud import rbac as crud
+from app.crud import reverse_lookups
+from app.crud import jobs
+from app.api.v1.endpoints.jobs import submit_job
 from app.models.rbac import Role, Permission
+from app.core.config import settings
+from app.core.policy_bus import stage_policy_change
+from app.core.pagination import NEXT_PAGE_HEADER, InvalidCursor, encode_cursor, decode_cursor
 # Import the logging helper function and constants (log_activity is still async)
 from app.core.logging_client import (
     log_activity,
     ACTION_CREATE_ROLE, ACTION_UPDATE_ROLE, ACTION_DELETE_ROLE,
     ACTION_CREATE_PERMISSION, ACTION_UPDATE_PERMISSION, ACTION_DELETE_PERMISSION,
     ACTION_ASSIGN_PERMISSION_TO_ROLE, ACTION_REMOVE_PERMISSION_FROM_ROLE,
-    ACTION_ASSIGN_ROLE_TO_USER, ACTION_REMOVE_ROLE_FROM_USER
+    ACTION_ASSIGN_ROLE_TO_USER, ACTION_REMOVE_ROLE_FROM_USER,
+    ACTION_BULK_ASSIGN_ROLE_TO_USERS, ACTION_BULK_REMOVE_ROLE_FROM_USERS
 )
 
 router = APIRouter()
 
+T = TypeVar("T")
+
+# --- Keyset pagination helpers for the list endpoints ---
+
+CURSOR_DESCRIPTION = f"{NEXT_PAGE_HEADER} from the previous page; pages by name after it (`skip` is ignored)"
+
+def _cursor_after(kind: str, cursor: Optional[str]) -> Optional[str]:
+    if cursor is None:
+        return None
+    try:
+        return str(decode_cursor(kind, cursor)["after"])
+    except (InvalidCursor, KeyError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid page cursor")
+
+def _page(response: Response, kind: str, rows: List[T], limit: int, name_of: Callable[[T], str]) -> List[T]:
+    """Trims the limit+1 probe row and, if there was one, advertises the next page's cursor."""
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_PAGE_HEADER] = encode_cursor(kind, after=name_of(rows[-1]))
+    return rows
+
 # === Role Endpoints ===
 
 @router.post(
@@ -68,16 +101,19 @@ def create_new_role( # Using def
     "/roles",
     response_model=List[RoleResponse],
     summary="List Roles",
-    description="Get a list of all roles with pagination."
+    description=f"Get a page of roles ordered by name. When more exist, the {NEXT_PAGE_HEADER} response header holds the `cursor` for the next page."
 )
 def list_all_roles(
     *,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
+    response: Response,
     skip: int = Query(0, ge=0, description="Number of records to skip"),
-    limit: int = Query(100, ge=1, le=200, description="Maximum number of records")
+    limit: int = Query(100, ge=1, le=200, description="Maximum number of records"),
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION)
 ) -> List[RoleResponse]:
-    roles = crud.get_roles(db=db, skip=skip, limit=limit)
-    return roles
+    # One row past the limit tells us whether there is a next page
+    roles = crud.get_roles(db=db, skip=skip, limit=limit + 1, after_name=_cursor_after("roles", cursor))
+    return _page(response, "roles", roles, limit, lambda role: role.role_name)
 
 @router.get(
     "/roles/{role_id}",
@@ -87,7 +123,7 @@ def list_all_roles(
 )
 def get_role_by_id_endpoint(
     *,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     role_id: UUID = Path(..., description="The ID of the role to retrieve")
 ) -> RoleResponse:
     role = crud.get_role(db=db, role_id=role_id)
@@ -136,15 +172,36 @@ def update_existing_role( # Using def
 @router.delete(
     "/roles/{role_id}",
     status_code=status.HTTP_204_NO_CONTENT,
+    response_model=None,
     summary="Delete Role",
-    description="Delete a specific role by its ID."
+    description=(
+        "Delete a specific role by its ID. With `background=true` the role is deleted by a background "
+        "job instead (202 with the job): holders lose it in chunks, so a widely held role doesn't "
+        "hold locks for the whole delete."
+    ),
+    responses={202: {"model": JobResponse, "description": "Deletion queued as a background job"}}
 )
 def delete_existing_role( # Using def
     *,
     db: Session = Depends(get_db),
     role_id: UUID = Path(..., description="The ID of the role to delete"),
+    background: bool = Query(False, description="Delete in chunks as a background job"),
     background_tasks: BackgroundTasks # Add BackgroundTasks dependency
-) -> None:
+) -> Optional[Response]:
+    if background:
+        if not crud.get_role(db=db, role_id=role_id):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Role not found")
+        job = submit_job(
+            db, background_tasks, kind=jobs.KIND_DELETE_ROLE, params={"role_id": str(role_id)},
+            progress_total=crud.count_role_holders(db=db, role_id=role_id)
+        )
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content=jsonable_encoder(JobResponse.model_validate(job))
+        )
+
+    # Every user holding the role loses its permissions
+    stage_policy_change(db, role_ids=[role_id])
     deleted = crud.delete_role(db=db, role_id=role_id)
     if not deleted:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Role not found")
@@ -199,16 +256,20 @@ def create_new_permission( # Using def
     "/permissions",
     response_model=List[PermissionResponse],
     summary="List Permissions",
-    description="Get a list of all permissions with pagination."
+    description=f"Get a page of permissions ordered by name. When more exist, the {NEXT_PAGE_HEADER} response header holds the `cursor` for the next page."
 )
 def list_all_permissions(
     *,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
+    response: Response,
     skip: int = Query(0, ge=0, description="Number of records to skip"),
-    limit: int = Query(100, ge=1, le=200, description="Maximum number of records")
+    limit: int = Query(100, ge=1, le=200, description="Maximum number of records"),
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION)
 ) -> List[PermissionResponse]:
-    permissions = crud.get_permissions(db=db, skip=skip, limit=limit)
-    return permissions
+    permissions = crud.get_permissions(
+        db=db, skip=skip, limit=limit + 1, after_name=_cursor_after("permissions", cursor)
+    )
+    return _page(response, "permissions", permissions, limit, lambda permission: permission.permission_name)
 
 @router.get(
     "/permissions/{permission_id}",
@@ -218,7 +279,7 @@ def list_all_permissions(
 )
 def get_permission_by_id_endpoint(
     *,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     permission_id: UUID = Path(..., description="The ID of the permission to retrieve")
 ) -> PermissionResponse:
     permission = crud.get_permission(db=db, permission_id=permission_id)
@@ -250,6 +311,10 @@ def update_existing_permission( # Using def
                  detail=f"Permission with name '{permission_in.permission_name}' already exists.",
              )
 
+    # Renaming or enabling/disabling changes the effective permissions of every role holding it
+    if permission_in.permission_name is not None or permission_in.is_enabled is not None:
+        stage_policy_change(db, role_ids=[role.role_id for role in db_permission.roles])
+
     updated_permission = crud.update_permission(db=db, db_permission=db_permission, permission_in=permission_in)
 
     # --- Log Success using BackgroundTasks ---
@@ -332,6 +397,7 @@ def assign_permission_to_role_endpoint( # Using def
     if not permission.is_enabled:
          raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cannot assign a disabled permission.") # Corrected
 
+    stage_policy_change(db, role_ids=[role_id])
     updated_role = crud.assign_permission_to_role(db=db, role=role, permission=permission)
 
     # --- Log Success using BackgroundTasks ---
@@ -366,6 +432,7 @@ def remove_permission_from_role_endpoint( # Using def
     if not permission:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Permission not found")
 
+    stage_policy_change(db, role_ids=[role_id])
     updated_role = crud.remove_permission_from_role(db=db, role=role, permission=permission)
 
     # --- Log Success using BackgroundTasks ---
@@ -404,6 +471,7 @@ def assign_role_to_user_endpoint( # Using def
     if not role:
          raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Role not found")
 
+    stage_policy_change(db, user_ids=[user_id])
     crud.assign_role_to_user(db=db, user_id=user_id, role_id=role.role_id)
 
     # --- Log Success using BackgroundTasks ---
@@ -436,6 +504,7 @@ def remove_role_from_user_endpoint( # Using def
     if not role:
          raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Role not found")
 
+    stage_policy_change(db, user_ids=[user_id])
     crud.remove_role_from_user(db=db, user_id=user_id, role_id=role_id)
 
     # --- Log Success using BackgroundTasks ---
@@ -458,8 +527,178 @@ def remove_role_from_user_endpoint( # Using def
 )
 def list_user_roles_endpoint(
     *,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     user_id: str = Path(...)
 ) -> List[RoleResponse]:
     roles = crud.get_user_roles(db=db, user_id=user_id)
-    return roles
\ No newline at end of file
+    return roles
+
+# --- Bulk User-Role Assignment Endpoints ---
+
+# User IDs listed in the single aggregated activity event per bulk request
+BULK_ACTIVITY_MAX_USER_IDS = 100
+
+def _bulk_response(
+    role_id: UUID,
+    user_ids: List[str],
+    changed: List[str],
+    changed_status: str,
+    unchanged_status: str
+) -> BulkUserRoleResponse:
+    changed_set = set(changed)
+    return BulkUserRoleResponse(
+        role_id=role_id,
+        changed=len(changed_set),
+        unchanged=len(user_ids) - len(changed_set),
+        results=[
+            BulkUserRoleResultItem(user_id=user_id, status=changed_status if user_id in changed_set else unchanged_status)
+            for user_id in user_ids
+        ]
+    )
+
+def _bulk_activity_details(role: Role, requested: int, changed: List[str]) -> dict:
+    return {
+        "role_name": role.role_name,
+        "requested": requested,
+        "changed": len(changed),
+        "user_ids": changed[:BULK_ACTIVITY_MAX_USER_IDS],
+        "user_ids_truncated": len(changed) > BULK_ACTIVITY_MAX_USER_IDS
+    }
+
+@router.post(
+    "/roles/{role_id}/users:bulk",
+    response_model=BulkUserRoleResponse,
+    summary="Bulk Assign Role to Users",
+    description="Assign a role to up to 10,000 users in one transaction. Users who already hold it are reported as `already_assigned`."
+)
+def bulk_assign_role_to_users_endpoint(
+    *,
+    db: Session = Depends(get_db),
+    role_id: UUID = Path(..., description="ID of the role to assign"),
+    bulk_in: BulkUserRoleRequest,
+    background_tasks: BackgroundTasks
+) -> BulkUserRoleResponse:
+    role = crud.get_role(db=db, role_id=role_id)
+    if not role:
+         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Role not found")
+
+    user_ids = list(dict.fromkeys(bulk_in.user_ids)) # Distinct, in request order
+    stage_policy_change(db, user_ids=user_ids)
+    assigned = crud.bulk_assign_role_to_users(db=db, role_id=role_id, user_ids=user_ids)
+
+    # One event for the whole request instead of one per user
+    background_tasks.add_task(
+        log_activity,
+        action=ACTION_BULK_ASSIGN_ROLE_TO_USERS,
+        status="success",
+        resource_type="UserRoleAssignment",
+        resource_id=str(role_id),
+        details=_bulk_activity_details(role, len(user_ids), assigned)
+    )
+    return _bulk_response(role_id, user_ids, assigned, "assigned", "already_assigned")
+
+@router.post(
+    "/roles/{role_id}/users:bulk-revoke",
+    response_model=BulkUserRoleResponse,
+    summary="Bulk Remove Role from Users",
+    description="Revoke a role from up to 10,000 users in one transaction. Users who don't hold it are reported as `not_assigned`."
+)
+def bulk_remove_role_from_users_endpoint(
+    *,
+    db: Session = Depends(get_db),
+    role_id: UUID = Path(..., description="ID of the role to revoke"),
+    bulk_in: BulkUserRoleRequest,
+    background_tasks: BackgroundTasks
+) -> BulkUserRoleResponse:
+    role = crud.get_role(db=db, role_id=role_id)
+    if not role:
+         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Role not found")
+
+    user_ids = list(dict.fromkeys(bulk_in.user_ids))
+    stage_policy_change(db, user_ids=user_ids)
+    revoked = crud.bulk_remove_role_from_users(db=db, role_id=role_id, user_ids=user_ids)
+
+    background_tasks.add_task(
+        log_activity,
+        action=ACTION_BULK_REMOVE_ROLE_FROM_USERS,
+        status="success",
+        resource_type="UserRoleAssignment",
+        resource_id=str(role_id),
+        details=_bulk_activity_details(role, len(user_ids), revoked)
+    )
+    return _bulk_response(role_id, user_ids, revoked, "revoked", "not_assigned")
+
+# --- Reverse Lookups (who holds a role / a permission) ---
+
+HOLDERS_LIMIT_DESCRIPTION = "Stop after this many users and end the stream with a `next_cursor` line (default: all users)"
+HOLDERS_CURSOR_DESCRIPTION = "`next_cursor` from the last line of the previous stream; resumes after its user"
+
+def _ndjson_holders(db: Session, kind: str, holders: Iterator[Dict[str, Any]], limit: Optional[int]) -> StreamingResponse:
+    """One JSON object per line; `holders` was asked for limit+1 rows, the extra one only signals a next page."""
+    def lines() -> Iterator[bytes]:
+        # The dependency's cleanup may run before the body is streamed, so release the session here too
+        try:
+            last_user_id = None
+            for count, holder in enumerate(holders):
+                if count == limit:
+                    yield (json.dumps({"next_cursor": encode_cursor(kind, after=last_user_id)}) + "\n").encode()
+                    break
+                last_user_id = holder["user_id"]
+                yield (json.dumps(holder) + "\n").encode()
+        finally:
+            db.close()
+    return StreamingResponse(lines(), media_type=reverse_lookups.NDJSON_MEDIA_TYPE)
+
+@router.get(
+    "/roles/{role_id}/users",
+    summary="List Role Holders",
+    description=(
+        "Streams the users holding a role as NDJSON, one `{\"user_id\", \"assigned_at\"}` object per line "
+        "in user_id order."
+    ),
+    response_class=StreamingResponse,
+    responses={200: {"content": {reverse_lookups.NDJSON_MEDIA_TYPE: {}}}}
+)
+def list_role_holders_endpoint(
+    *,
+    db: Session = Depends(get_read_db),
+    role_id: UUID = Path(..., description="The ID of the role"),
+    limit: Optional[int] = Query(None, ge=1, description=HOLDERS_LIMIT_DESCRIPTION),
+    cursor: Optional[str] = Query(None, description=HOLDERS_CURSOR_DESCRIPTION)
+) -> StreamingResponse:
+    after_user_id = _cursor_after("role_users", cursor)
+    if not crud.get_role(db=db, role_id=role_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Role not found")
+    holders = reverse_lookups.iter_role_holders(
+        db, role_id=role_id, after_user_id=after_user_id,
+        limit=limit + 1 if limit else None, chunk_rows=settings.POLICY_SNAPSHOT_CHUNK_ROWS
+    )
+    return _ndjson_holders(db, "role_users", holders, limit)
+
+@router.get(
+    "/permissions/{permission_id}/users",
+    summary="List Permission Holders",
+    description=(
+        "Streams the users who effectively hold a permission as NDJSON, one `{\"user_id\", \"role_ids\"}` "
+        "object per line in user_id order; `role_ids` are the user's roles granting it. "
+        "A disabled permission has no holders."
+    ),
+    response_class=StreamingResponse,
+    responses={200: {"content": {reverse_lookups.NDJSON_MEDIA_TYPE: {}}}}
+)
+def list_permission_holders_endpoint(
+    *,
+    db: Session = Depends(get_read_db),
+    permission_id: UUID = Path(..., description="The ID of the permission"),
+    limit: Optional[int] = Query(None, ge=1, description=HOLDERS_LIMIT_DESCRIPTION),
+    cursor: Optional[str] = Query(None, description=HOLDERS_CURSOR_DESCRIPTION)
+) -> StreamingResponse:
+    after_user_id = _cursor_after("permission_users", cursor)
+    permission = crud.get_permission(db=db, permission_id=permission_id)
+    if not permission:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Permission not found")
+    holders = reverse_lookups.iter_permission_holders(
+        db, permission_id=permission_id, permission_name=permission.permission_name, after_user_id=after_user_id,
+        limit=limit + 1 if limit else None, chunk_rows=settings.POLICY_SNAPSHOT_CHUNK_ROWS
+    )
+    return _ndjson_holders(db, "permission_users", holders, limit)
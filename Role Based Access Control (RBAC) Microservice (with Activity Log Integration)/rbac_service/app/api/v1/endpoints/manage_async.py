@@ -0,0 +1,99 @@
+# app/api/v1/endpoints/manage_async.py
+# Async versions of the read-only management endpoints (role, permission and
+# user-role listings and lookups), mounted ahead of manage.py when
+# settings.DATABASE_ASYNC_ENABLED is true so they serve those paths on the event
+# loop. Reads go to replicas like the sync endpoints (get_async_read_db). Writes
+# and the streaming holder lookups stay on manage.py.
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Path, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from uuid import UUID
+
+from app.db.session import get_async_read_db
+from app.schemas.rbac import RoleResponse, PermissionResponse
+from app.crud import rbac_async as crud
+from app.api.v1.endpoints.manage import CURSOR_DESCRIPTION, _cursor_after, _page
+from app.core.pagination import NEXT_PAGE_HEADER
+
+router = APIRouter()
+
+@router.get(
+    "/roles",
+    response_model=List[RoleResponse],
+    summary="List Roles",
+    description=f"Get a page of roles ordered by name. When more exist, the {NEXT_PAGE_HEADER} response header holds the `cursor` for the next page."
+)
+async def list_all_roles(
+    *,
+    db: AsyncSession = Depends(get_async_read_db),
+    response: Response,
+    skip: int = Query(0, ge=0, description="Number of records to skip"),
+    limit: int = Query(100, ge=1, le=200, description="Maximum number of records"),
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION)
+) -> List[RoleResponse]:
+    roles = await crud.get_roles(db=db, skip=skip, limit=limit + 1, after_name=_cursor_after("roles", cursor))
+    return _page(response, "roles", roles, limit, lambda role: role.role_name)
+
+@router.get(
+    "/roles/{role_id}",
+    response_model=RoleResponse,
+    summary="Get Role by ID",
+    description="Get details for a specific role by its ID."
+)
+async def get_role_by_id_endpoint(
+    *,
+    db: AsyncSession = Depends(get_async_read_db),
+    role_id: UUID = Path(..., description="The ID of the role to retrieve")
+) -> RoleResponse:
+    role = await crud.get_role(db=db, role_id=role_id)
+    if not role:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Role not found")
+    return role
+
+@router.get(
+    "/permissions",
+    response_model=List[PermissionResponse],
+    summary="List Permissions",
+    description=f"Get a page of permissions ordered by name. When more exist, the {NEXT_PAGE_HEADER} response header holds the `cursor` for the next page."
+)
+async def list_all_permissions(
+    *,
+    db: AsyncSession = Depends(get_async_read_db),
+    response: Response,
+    skip: int = Query(0, ge=0, description="Number of records to skip"),
+    limit: int = Query(100, ge=1, le=200, description="Maximum number of records"),
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION)
+) -> List[PermissionResponse]:
+    permissions = await crud.get_permissions(
+        db=db, skip=skip, limit=limit + 1, after_name=_cursor_after("permissions", cursor)
+    )
+    return _page(response, "permissions", permissions, limit, lambda permission: permission.permission_name)
+
+@router.get(
+    "/permissions/{permission_id}",
+    response_model=PermissionResponse,
+    summary="Get Permission by ID",
+    description="Get details for a specific permission by its ID."
+)
+async def get_permission_by_id_endpoint(
+    *,
+    db: AsyncSession = Depends(get_async_read_db),
+    permission_id: UUID = Path(..., description="The ID of the permission to retrieve")
+) -> PermissionResponse:
+    permission = await crud.get_permission(db=db, permission_id=permission_id)
+    if not permission:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Permission not found")
+    return permission
+
+@router.get(
+    "/users/{user_id}/roles",
+    response_model=List[RoleResponse],
+    summary="List User's Roles",
+    description="Get a list of all roles assigned to a specific user."
+)
+async def list_user_roles_endpoint(
+    *,
+    db: AsyncSession = Depends(get_async_read_db),
+    user_id: str = Path(...)
+) -> List[RoleResponse]:
+    return await crud.get_user_roles(db=db, user_id=user_id)
@@ -0,0 +1,113 @@
+# app/api/v1/endpoints/policy.py
+# Bulk policy export for sidecars and downstream caches: bootstrap from
+# /policy/snapshot, then poll /policy/changes?since=<epoch> for deltas.
+# /policy/import reconciles the whole policy with a desired-state file.
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Body, Header, BackgroundTasks
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from typing import Iterator, Optional
+
+from app.db.session import get_db
+from app.schemas.rbac import PolicyChangesResponse, PolicyImportReport
+from app.crud import policy_export, policy_import
+from app.crud import rbac as crud
+from app.core.config import settings
+from app.core.logging_client import log_activity, ACTION_IMPORT_POLICY
+
+# Content types that select a policy file format when `format` isn't given
+IMPORT_FORMATS_BY_MEDIA_TYPE = {
+    "text/csv": policy_import.FORMAT_CSV,
+    "application/yaml": policy_import.FORMAT_YAML,
+    "application/x-yaml": policy_import.FORMAT_YAML,
+    "text/yaml": policy_import.FORMAT_YAML,
+    "text/x-yaml": policy_import.FORMAT_YAML,
+}
+
+router = APIRouter()
+
+@router.get(
+    "/policy/snapshot",
+    summary="Policy Snapshot",
+    description=(
+        "Streams roles, enabled permissions, role_permissions and user_roles as length-prefixed "
+        "msgpack frames, tagged with the policy epoch they were read at."
+    ),
+    response_class=StreamingResponse,
+    responses={200: {"content": {policy_export.SNAPSHOT_MEDIA_TYPE: {}}}}
+)
+def get_policy_snapshot(*, db: Session = Depends(get_db)) -> StreamingResponse:
+    def frames() -> Iterator[bytes]:
+        # The dependency's cleanup may run before the body is streamed, so release the session here too
+        try:
+            yield from policy_export.snapshot_frames(db, chunk_rows=settings.POLICY_SNAPSHOT_CHUNK_ROWS)
+        finally:
+            db.close()
+    return StreamingResponse(frames(), media_type=policy_export.SNAPSHOT_MEDIA_TYPE)
+
+@router.get(
+    "/policy/changes",
+    response_model=PolicyChangesResponse,
+    summary="Policy Changes",
+    description="Deltas committed after epoch `since`, oldest first. 410 means `since` is no longer retained: re-bootstrap from the snapshot.",
+    responses={410: {"description": "`since` is outside the retained change history"}}
+)
+def get_policy_changes(
+    *,
+    db: Session = Depends(get_db),
+    since: int = Query(..., ge=0, description="Epoch the consumer is at (the snapshot header epoch, or the last `epoch` returned)"),
+    limit: int = Query(1000, ge=1, le=10000, description="Maximum number of changes (pages end on a write boundary)")
+) -> PolicyChangesResponse:
+    try:
+        change_set = policy_export.get_changes(db, since=since, limit=limit)
+    except policy_export.ChangesUnavailable as exc:
+        raise HTTPException(status_code=status.HTTP_410_GONE, detail=str(exc))
+    return PolicyChangesResponse(
+        since=change_set.since, epoch=change_set.epoch, changes=change_set.changes, has_more=change_set.has_more
+    )
+
+@router.post(
+    "/policy/import",
+    response_model=PolicyImportReport,
+    summary="Import Policy",
+    description=(
+        "Reconciles roles, permissions, role links and user assignments with a desired-state YAML or CSV "
+        "file (the request body). The file is staged, diffed against the live tables in SQL and only the "
+        "delta is applied, in one transaction. With `dry_run` nothing is written and the report lists what "
+        "would change. With `prune=false` live objects missing from the file are kept."
+    ),
+    responses={400: {"description": "The file is malformed or inconsistent; `detail` lists the problems"}}
+)
+def import_policy_endpoint(
+    *,
+    db: Session = Depends(get_db),
+    policy_file: bytes = Body(..., media_type="application/yaml", description="YAML or CSV policy file"),
+    content_type: Optional[str] = Header(None),
+    file_format: Optional[str] = Query(None, alias="format", description="yaml | csv (default: from Content-Type, else yaml)"),
+    dry_run: bool = Query(False, description="Report the changes without applying them"),
+    prune: bool = Query(True, description="Delete live roles, permissions, links and assignments missing from the file"),
+    sample: int = Query(100, ge=0, le=10000, description="Changes listed per category in the report"),
+    background_tasks: BackgroundTasks
+) -> PolicyImportReport:
+    if len(policy_file) > settings.POLICY_IMPORT_MAX_BYTES:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Policy file too large")
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    try:
+        policy = policy_import.parse(
+            policy_file.decode("utf-8"),
+            file_format or IMPORT_FORMATS_BY_MEDIA_TYPE.get(media_type, policy_import.FORMAT_YAML)
+        )
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=["Policy file must be UTF-8"])
+    except policy_import.PolicyFileError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=exc.errors)
+
+    diff, epoch = crud.import_policy(db=db, policy=policy, dry_run=dry_run, prune=prune)
+    if epoch is not None:
+        background_tasks.add_task(
+            log_activity,
+            action=ACTION_IMPORT_POLICY,
+            status="success",
+            resource_type="Policy",
+            details={"epoch": epoch, "prune": prune, "counts": diff.counts()}
+        )
+    return PolicyImportReport(dry_run=dry_run, prune=prune, epoch=epoch, **diff.report(sample))
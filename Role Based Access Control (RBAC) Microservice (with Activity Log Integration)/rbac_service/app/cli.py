@@ -0,0 +1,73 @@
+# app/cli.py
+# Maintenance commands, run from the rbac_service root:
+#   python -m app.cli rebuild-effective-permissions
+#   python -m app.cli import-policy policy.yaml [--dry-run] [--no-prune]
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from app.db.session import SessionLocal
+from app.crud import rbac as crud
+from app.crud import policy_import
+
+
+def rebuild_effective_permissions_command(args: argparse.Namespace) -> int:
+    """Recomputes user_effective_permissions from user_roles/role_permissions (recovers from drift)."""
+    db = SessionLocal()
+    try:
+        rows = crud.rebuild_effective_permissions(db)
+    finally:
+        db.close()
+    print(f"Rebuilt user_effective_permissions: {rows} rows")
+    return 0
+
+
+def import_policy_command(args: argparse.Namespace) -> int:
+    """Reconciles the live policy with a YAML/CSV desired-state file and prints the change report."""
+    path = Path(args.file)
+    file_format = args.format or (policy_import.FORMAT_CSV if path.suffix.lower() == ".csv" else policy_import.FORMAT_YAML)
+    try:
+        policy = policy_import.parse(path.read_text(encoding="utf-8"), file_format)
+    except policy_import.PolicyFileError as exc:
+        for error in exc.errors:
+            print(f"{path}: {error}", file=sys.stderr)
+        return 2
+    db = SessionLocal()
+    try:
+        diff, epoch = crud.import_policy(db, policy=policy, dry_run=args.dry_run, prune=not args.no_prune)
+    finally:
+        db.close()
+    report = {"dry_run": args.dry_run, "prune": not args.no_prune, "epoch": epoch, **diff.report(args.sample)}
+    print(json.dumps(report, indent=2, default=str))
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="RBAC service maintenance commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    rebuild_parser = subparsers.add_parser(
+        "rebuild-effective-permissions",
+        help="Recompute the user_effective_permissions table from scratch"
+    )
+    rebuild_parser.set_defaults(handler=rebuild_effective_permissions_command)
+
+    import_parser = subparsers.add_parser(
+        "import-policy",
+        help="Reconcile roles, permissions and assignments with a YAML/CSV desired-state file"
+    )
+    import_parser.add_argument("file", help="Policy file (.yaml/.yml or .csv)")
+    import_parser.add_argument("--format", choices=[policy_import.FORMAT_YAML, policy_import.FORMAT_CSV],
+                               help="File format (default: from the file extension)")
+    import_parser.add_argument("--dry-run", action="store_true", help="Report the changes without applying them")
+    import_parser.add_argument("--no-prune", action="store_true", help="Keep live objects that are missing from the file")
+    import_parser.add_argument("--sample", type=int, default=100, help="Changes listed per category (default: 100)")
+    import_parser.set_defaults(handler=import_policy_command)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,313 @@
+# app/core/activity_spool.py
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".jsonl"
+CHECKPOINT_FILE = "checkpoint.json"
+
+
+class SpoolCursor(NamedTuple):
+    """Read position returned by `ActivitySpool.read`, handed back to `commit` once delivered."""
+    segment: int
+    offset: int
+    records: int
+
+
+class ActivitySpool:
+    """
+    Append-only, segment-rotated on-disk spool for activity events that could
+    not be delivered to the Activity Log service.
+
+    Each record is one JSON line `{"t": <spooled_at>, "e": <event>}`. Writes go
+    through a buffered file handle and are fsynced once per `append` call, so
+    a batch of events costs one fsync. Segments roll over at
+    `segment_max_bytes`; once the spool exceeds `max_total_bytes` the oldest
+    segment is discarded (and counted in `dropped`).
+
+    Events keep the `timestamp` they were built with (events without one
+    get the spool time), so replay never restamps them. They are read back oldest-first; the read position is persisted in a
+    checkpoint file on `commit`, so replay is at-least-once across restarts.
+    All methods are thread-safe (callers run them via `asyncio.to_thread`).
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        *,
+        segment_max_bytes: int = 8 * 1024 * 1024,
+        max_total_bytes: int = 256 * 1024 * 1024,
+        fsync: bool = True
+    ):
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self.max_total_bytes = max_total_bytes
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+        self._sizes: Dict[int, int] = {
+            seq: os.path.getsize(self._segment_path(seq)) for seq in self._list_segments()
+        }
+        self._writer = None
+        self._writer_segment: Optional[int] = None
+        self._read_segment, self._read_offset = self._load_checkpoint()
+        self._pending = self._count_pending()
+        self._oldest_spooled_at: Optional[float] = None
+        self.spooled = 0
+        self.replayed = 0
+        self.dropped = 0
+        self.fsyncs = 0
+
+    # --- Writing ---
+
+    def append(self, events: List[Dict[str, Any]]) -> None:
+        """Appends events to the newest segment and fsyncs them as one batch."""
+        if not events:
+            return
+        spooled_at = time.time()
+        records = [
+            (json.dumps({"t": spooled_at, "e": event}, separators=(",", ":")) + "\n").encode()
+            for event in events
+        ]
+        with self._lock:
+            self._enforce_cap(sum(len(record) for record in records))
+            for record in records:
+                writer = self._current_writer()
+                writer.write(record)
+                self._sizes[self._writer_segment] += len(record)
+            self._sync_writer()
+            self._pending += len(records)
+            self.spooled += len(records)
+
+    def _current_writer(self):
+        # Caller must hold self._lock
+        if self._writer is not None and self._sizes[self._writer_segment] >= self.segment_max_bytes:
+            self._close_writer()
+        if self._writer is None:
+            segments = sorted(self._sizes)
+            if segments and self._sizes[segments[-1]] < self.segment_max_bytes and segments[-1] >= self._read_segment:
+                segment = segments[-1]
+            else:
+                segment = max(segments[-1] + 1 if segments else 0, self._read_segment)
+                self._sizes[segment] = 0
+            self._writer = open(self._segment_path(segment), "ab")
+            self._writer_segment = segment
+        return self._writer
+
+    def _sync_writer(self) -> None:
+        if self._writer is None:
+            return
+        self._writer.flush()
+        if self.fsync:
+            os.fsync(self._writer.fileno())
+            self.fsyncs += 1
+
+    def _close_writer(self) -> None:
+        if self._writer is None:
+            return
+        self._sync_writer()
+        self._writer.close()
+        self._writer = None
+        self._writer_segment = None
+
+    def _enforce_cap(self, incoming_bytes: int) -> None:
+        # Caller must hold self._lock. Drops whole segments, oldest first.
+        while self._sizes and sum(self._sizes.values()) + incoming_bytes > self.max_total_bytes:
+            oldest = min(self._sizes)
+            start = self._read_offset if oldest == self._read_segment else 0
+            lost = self._count_records(oldest, start)
+            logger.warning(f"Activity spool over {self.max_total_bytes} bytes; dropping {lost} spooled events")
+            self._delete_segment(oldest)
+            self._pending -= lost
+            self.dropped += lost
+            self._oldest_spooled_at = None
+
+    # --- Reading ---
+
+    def read(self, max_events: int) -> tuple:
+        """
+        Returns up to `max_events` of the oldest undelivered events and the
+        cursor to `commit` once they have been delivered. Reads at most one
+        segment per call; a torn (unterminated) last line is left for later.
+        """
+        with self._lock:
+            self._skip_drained_segments()
+            segment = self._read_segment
+            if segment not in self._sizes:
+                return [], SpoolCursor(segment, self._read_offset, 0)
+            if segment == self._writer_segment:
+                self._writer.flush()
+            events: List[Dict[str, Any]] = []
+            records = 0
+            offset = self._read_offset
+            with open(self._segment_path(segment), "rb") as reader:
+                reader.seek(offset)
+                while len(events) < max_events:
+                    line = reader.readline()
+                    if not line.endswith(b"\n"):
+                        break
+                    offset += len(line)
+                    records += 1
+                    try:
+                        record = json.loads(line)
+                        event = record["e"]
+                        # Payloads normally carry their own timestamp; for any that don't, the
+                        # spool time is far closer than the replay time the service would assign
+                        if isinstance(event, dict) and "timestamp" not in event and "t" in record:
+                            event["timestamp"] = _isoformat(record["t"])
+                        events.append(event)
+                    except (ValueError, KeyError):
+                        logger.error(f"Skipping corrupt record in activity spool segment {segment}")
+            return events, SpoolCursor(segment, offset, records)
+
+    def commit(self, cursor: SpoolCursor) -> None:
+        """Marks everything up to `cursor` as delivered and persists the read position."""
+        with self._lock:
+            if cursor.segment != self._read_segment or cursor.offset < self._read_offset:
+                return
+            self._read_offset = cursor.offset
+            self._pending -= cursor.records
+            self.replayed += cursor.records
+            self._oldest_spooled_at = None
+            self._skip_drained_segments()
+            self._save_checkpoint()
+
+    def _skip_drained_segments(self) -> None:
+        # Caller must hold self._lock. Deletes fully-read segments and moves to the next one.
+        while self._read_segment in self._sizes and self._read_offset >= self._sizes[self._read_segment]:
+            drained = self._read_segment
+            later = [seq for seq in self._sizes if seq > drained]
+            if not later and self._pending:
+                break
+            self._delete_segment(drained)
+        if self._read_segment not in self._sizes:
+            later = [seq for seq in self._sizes if seq > self._read_segment]
+            if later:
+                self._read_segment, self._read_offset = min(later), 0
+
+    def _delete_segment(self, segment: int) -> None:
+        # Caller must hold self._lock
+        if segment == self._writer_segment:
+            self._close_writer()
+        os.remove(self._segment_path(segment))
+        del self._sizes[segment]
+        if segment == self._read_segment:
+            later = [seq for seq in self._sizes if seq > segment]
+            self._read_segment = min(later) if later else segment + 1
+            self._read_offset = 0
+            self._save_checkpoint()
+
+    # --- Bookkeeping ---
+
+    @property
+    def depth(self) -> int:
+        """Number of spooled events not yet delivered."""
+        return self._pending
+
+    def lag_seconds(self) -> float:
+        """Age of the oldest undelivered event (0 when the spool is empty)."""
+        with self._lock:
+            if not self._pending:
+                return 0.0
+            if self._oldest_spooled_at is None:
+                self._oldest_spooled_at = self._peek_spooled_at()
+            if self._oldest_spooled_at is None:
+                return 0.0
+            return max(0.0, time.time() - self._oldest_spooled_at)
+
+    def _peek_spooled_at(self) -> Optional[float]:
+        # Caller must hold self._lock
+        for segment in sorted(seq for seq in self._sizes if seq >= self._read_segment):
+            if segment == self._writer_segment:
+                self._writer.flush()
+            with open(self._segment_path(segment), "rb") as reader:
+                reader.seek(self._read_offset if segment == self._read_segment else 0)
+                line = reader.readline()
+            if line.endswith(b"\n"):
+                try:
+                    return float(json.loads(line)["t"])
+                except (ValueError, KeyError, TypeError):
+                    return None
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        lag = self.lag_seconds()
+        with self._lock:
+            return {
+                "directory": self.directory,
+                "depth": self._pending,
+                "lag_seconds": lag,
+                "bytes": sum(self._sizes.values()),
+                "max_bytes": self.max_total_bytes,
+                "segments": len(self._sizes),
+                "spooled": self.spooled,
+                "replayed": self.replayed,
+                "dropped": self.dropped,
+                "fsyncs": self.fsyncs,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_writer()
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"{SEGMENT_PREFIX}{segment:012d}{SEGMENT_SUFFIX}")
+
+    def _list_segments(self) -> List[int]:
+        segments = []
+        for name in os.listdir(self.directory):
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX):
+                try:
+                    segments.append(int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]))
+                except ValueError:
+                    continue
+        return sorted(segments)
+
+    def _count_records(self, segment: int, start: int) -> int:
+        with open(self._segment_path(segment), "rb") as reader:
+            reader.seek(start)
+            return reader.read().count(b"\n")
+
+    def _count_pending(self) -> int:
+        return sum(
+            self._count_records(seq, self._read_offset if seq == self._read_segment else 0)
+            for seq in self._sizes if seq >= self._read_segment
+        )
+
+    def _load_checkpoint(self) -> tuple:
+        path = os.path.join(self.directory, CHECKPOINT_FILE)
+        first_segment = min(self._sizes) if self._sizes else 0
+        try:
+            with open(path) as handle:
+                checkpoint = json.load(handle)
+            segment, offset = int(checkpoint["segment"]), int(checkpoint["offset"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return first_segment, 0
+        if segment not in self._sizes:
+            # Checkpointed segment is gone; resume at the next one that exists
+            later = [seq for seq in self._sizes if seq > segment]
+            return (min(later) if later else segment), 0
+        return segment, min(offset, self._sizes[segment])
+
+    def _save_checkpoint(self) -> None:
+        # Written to a temp file and renamed so a crash never leaves a torn checkpoint
+        path = os.path.join(self.directory, CHECKPOINT_FILE)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as handle:
+            json.dump({"segment": self._read_segment, "offset": self._read_offset}, handle)
+            handle.flush()
+            if self.fsync:
+                os.fsync(handle.fileno())
+        os.replace(tmp_path, path)
+
+
+def _isoformat(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).isoformat()
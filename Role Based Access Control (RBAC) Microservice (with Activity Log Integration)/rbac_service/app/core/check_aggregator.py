@@ -0,0 +1,167 @@
+# app/core/check_aggregator.py
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Tuple
+
+from app.core.config import settings
+from app.core.logging_client import log_activity, ACTION_CHECK_PERMISSION_SUMMARY
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _CheckTally:
+    count: int
+    first_at: float
+    last_at: float
+
+
+class CheckEventAggregator:
+    """
+    Rolls CHECK_PERMISSION activity events up per (user_id, permission, allowed).
+
+    While running, `record` absorbs each check into an in-memory tally and a
+    background task emits one CHECK_PERMISSION_SUMMARY event per key every
+    `window_seconds`, carrying the count and first/last timestamps.
+    `record` returns False when the caller should log the check itself:
+    window 0 (aggregation off), aggregator not started or stopping, denials
+    with `pass_denials`, or more than `max_keys` distinct keys in the window.
+    """
+
+    def __init__(self, window_seconds: float = 0.0, pass_denials: bool = False, max_keys: int = 10000):
+        self.window_seconds = window_seconds
+        self.pass_denials = pass_denials
+        self.max_keys = max_keys
+        self._tallies: Dict[Tuple[str, str, bool], _CheckTally] = {}
+        self._lock = threading.Lock() # Sync /check runs on the threadpool
+        self._task: "asyncio.Task | None" = None
+        self._stopping: "asyncio.Event | None" = None
+        # Cleared under the lock when stop() begins, so no check lands after the final drain
+        self._accepting = False
+        self.aggregated = 0
+        self.passed_through = 0
+        self.summaries_emitted = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.window_seconds > 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def record(self, user_id: str, permission: str, allowed: bool) -> bool:
+        """Counts one check. Returns True if it was aggregated, False if it must be logged per call."""
+        if self.pass_denials and not allowed:
+            self.passed_through += 1
+            return False
+        key = (user_id, permission, allowed)
+        now = time.time()
+        with self._lock:
+            if not self._accepting:
+                self.passed_through += 1
+                return False
+            tally = self._tallies.get(key)
+            if tally is None:
+                if len(self._tallies) >= self.max_keys:
+                    self.passed_through += 1
+                    return False
+                self._tallies[key] = _CheckTally(count=1, first_at=now, last_at=now)
+            else:
+                tally.count += 1
+                tally.last_at = now
+            self.aggregated += 1
+        return True
+
+    def drain(self) -> List[Dict[str, Any]]:
+        """Takes the current window's tallies as keyword arguments for `log_activity`."""
+        with self._lock:
+            tallies, self._tallies = self._tallies, {}
+        return [
+            {
+                "action": ACTION_CHECK_PERMISSION_SUMMARY,
+                "user_id": user_id,
+                "status": "success" if allowed else "failure",
+                "resource_type": "PermissionCheck",
+                "resource_id": permission,
+                "details": {
+                    "result_allowed": allowed,
+                    "count": tally.count,
+                    "first_at": _isoformat(tally.first_at),
+                    "last_at": _isoformat(tally.last_at),
+                    "window_seconds": self.window_seconds,
+                }
+            }
+            for (user_id, permission, allowed), tally in tallies.items()
+        ]
+
+    async def emit(self) -> int:
+        """Logs one summary event per key in the current window. Returns how many were emitted."""
+        summaries = self.drain()
+        for summary in summaries:
+            await log_activity(**summary)
+        self.summaries_emitted += len(summaries)
+        return len(summaries)
+
+    async def start(self) -> None:
+        if self.running or not self.enabled:
+            return
+        self._stopping = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="check-event-aggregator")
+        with self._lock:
+            self._accepting = True
+
+    async def stop(self) -> None:
+        """Stops the window timer and emits whatever is left in the current window."""
+        if not self.running:
+            return
+        with self._lock:
+            self._accepting = False
+        self._stopping.set()
+        await self._task
+        self._task = None
+
+    async def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.window_seconds)
+            except asyncio.TimeoutError:
+                pass
+            await self._emit_logged()
+        # stop() may land before the first wait; always flush the open window
+        await self._emit_logged()
+
+    async def _emit_logged(self) -> None:
+        try:
+            await self.emit()
+        except Exception as exc:
+            logger.error(f"Emitting check summaries failed: {exc}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            open_keys = len(self._tallies)
+        return {
+            "window_seconds": self.window_seconds,
+            "pass_denials": self.pass_denials,
+            "running": self.running,
+            "open_keys": open_keys,
+            "aggregated": self.aggregated,
+            "passed_through": self.passed_through,
+            "summaries_emitted": self.summaries_emitted,
+        }
+
+
+def _isoformat(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).isoformat()
+
+
+# Process-wide aggregator, started by the app lifespan when the window is > 0
+check_event_aggregator = CheckEventAggregator(
+    window_seconds=settings.ACTIVITY_LOG_CHECK_WINDOW_SECONDS,
+    pass_denials=settings.ACTIVITY_LOG_CHECK_PASS_DENIALS,
+    max_keys=settings.ACTIVITY_LOG_CHECK_MAX_KEYS
+)
@@ -0,0 +1,29 @@
+# app/core/invalidation.py
+from typing import Iterable
+from uuid import UUID
+
+from app.core.permission_cache import permission_cache
+from app.core.permission_matrix import permission_matrix
+from app.core.policy_epoch import policy_epoch
+
+
+def invalidate_policy(*, user_ids: Iterable[str] = (), role_ids: Iterable[UUID] = ()) -> None:
+    """
+    Drops the in-process policy state affected by a committed write.
+
+    User-level changes (role assignments) only touch the permission cache;
+    role-level changes (role permissions, deletes, permission flips) also
+    mark the bitset matrix stale.
+    """
+    user_ids = list(user_ids)
+    role_ids = list(role_ids)
+    permission_cache.invalidate(user_ids=user_ids, role_ids=role_ids)
+    if role_ids:
+        permission_matrix.invalidate()
+
+
+def flush_policy_caches() -> None:
+    """Drops all in-process policy state (used when targeted invalidations may have been missed)."""
+    permission_cache.clear()
+    permission_matrix.invalidate()
+    policy_epoch.reset()
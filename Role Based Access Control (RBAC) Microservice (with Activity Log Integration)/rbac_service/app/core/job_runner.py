@@ -0,0 +1,172 @@
+# app/core/job_runner.py
+import asyncio
+import logging
+import socket
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.logging_client import activity_log_shipper, build_activity_payload, ACTION_FINISH_JOB
+from app.crud import jobs
+from app.db.session import SessionLocal
+from app.models.rbac import Job
+
+logger = logging.getLogger(__name__)
+
+
+class JobRunner:
+    """
+    Pool of worker threads executing background jobs (app/crud/jobs.py).
+
+    Each worker claims the oldest runnable job from the jobs table and runs it
+    chunk by chunk, on its own session. Between chunks it stops early if the
+    job was cancelled (marking it cancelled) or the app is shutting down
+    (handing it back to the queue). Workers poll every `poll_interval`
+    seconds; `wake()` lets a submission in this process skip the wait. Any
+    number of processes can run workers against the same database.
+    Started/stopped by the FastAPI lifespan in app/main.py.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        *,
+        workers: int = 2,
+        poll_interval: float = 1.0,
+        chunk_rows: int = 1000,
+        chunk_pause: float = 0.0,
+        stale_after: float = 300.0
+    ):
+        self.session_factory = session_factory
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.chunk_rows = chunk_rows
+        self.chunk_pause = chunk_pause
+        self.stale_after = stale_after
+        self._threads: List[threading.Thread] = []
+        self._stopping = threading.Event()
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self.succeeded = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.requeued = 0
+        self.chunks = 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._threads)
+
+    async def start(self) -> None:
+        if self.running or self.workers <= 0:
+            return
+        self._stopping.clear()
+        prefix = f"{socket.gethostname()}:{id(self):x}"
+        self._threads = [
+            threading.Thread(target=self._work, args=(f"{prefix}:{index}",), name=f"job-worker-{index}", daemon=True)
+            for index in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    async def stop(self) -> None:
+        """Lets each worker finish its current chunk; unfinished jobs go back to the queue."""
+        if not self.running:
+            return
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            await asyncio.to_thread(thread.join)
+        self._threads = []
+
+    def wake(self) -> None:
+        self._wakeup.set()
+
+    def run_pending(self, db: Session, *, worker_id: str = "inline") -> Optional[Job]:
+        """Claims one runnable job and runs it until it finishes or stops. Returns it, or None if none was waiting."""
+        job = jobs.claim(db, worker_id=worker_id, stale_after_seconds=self.stale_after)
+        if job is not None:
+            self._execute(db, job)
+        return job
+
+    def _work(self, worker_id: str) -> None:
+        while not self._stopping.is_set():
+            try:
+                with self.session_factory() as db:
+                    job = self.run_pending(db, worker_id=worker_id)
+            except Exception:
+                logger.exception("Job worker %s could not claim a job", worker_id)
+                job = None
+            if job is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+
+    def _execute(self, db: Session, job: Job) -> None:
+        job_id, kind, params = job.job_id, job.kind, job.params
+        try:
+            while True:
+                if job.cancel_requested: # Re-read after each chunk's commit
+                    jobs.finish(db, job_id=job_id, status=jobs.JOB_CANCELLED)
+                    self._finished(job_id, kind, jobs.JOB_CANCELLED)
+                    return
+                if self._stopping.is_set():
+                    jobs.requeue(db, job_id=job_id)
+                    with self._lock:
+                        self.requeued += 1
+                    return
+                finished = jobs.run_chunk(db, job=job, params=params, chunk_rows=self.chunk_rows)
+                with self._lock:
+                    self.chunks += 1
+                if finished:
+                    self._finished(job_id, kind, jobs.JOB_SUCCEEDED)
+                    return
+                if self.chunk_pause:
+                    time.sleep(self.chunk_pause)
+        except Exception as exc:
+            logger.exception("Job %s (%s) failed", job_id, kind)
+            db.rollback() # Earlier chunks stay committed; the job records how far it got
+            jobs.finish(db, job_id=job_id, status=jobs.JOB_FAILED, error=f"{type(exc).__name__}: {exc}")
+            self._finished(job_id, kind, jobs.JOB_FAILED)
+
+    def _finished(self, job_id: Any, kind: str, status: str) -> None:
+        with self._lock:
+            if status == jobs.JOB_SUCCEEDED:
+                self.succeeded += 1
+            elif status == jobs.JOB_FAILED:
+                self.failed += 1
+            else:
+                self.cancelled += 1
+        # Worker threads have no BackgroundTasks; hand the event straight to the shipper
+        if activity_log_shipper.running:
+            activity_log_shipper.enqueue(build_activity_payload(
+                ACTION_FINISH_JOB,
+                status="failure" if status == jobs.JOB_FAILED else "success",
+                resource_type="Job",
+                resource_id=str(job_id),
+                details={"kind": kind, "job_status": status}
+            ))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": len(self._threads),
+            "running": self.running,
+            "chunks": self.chunks,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "requeued": self.requeued,
+        }
+
+
+# Process-wide worker pool, started by the app lifespan
+job_runner = JobRunner(
+    SessionLocal,
+    workers=settings.JOB_WORKERS,
+    poll_interval=settings.JOB_POLL_INTERVAL_SECONDS,
+    chunk_rows=settings.JOB_CHUNK_ROWS,
+    chunk_pause=settings.JOB_CHUNK_PAUSE_SECONDS,
+    stale_after=settings.JOB_STALE_AFTER_SECONDS
+)
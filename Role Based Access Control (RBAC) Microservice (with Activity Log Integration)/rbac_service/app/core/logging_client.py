@@ -1,9 +1,17 @@
 # app/core/logging_client.py
+import asyncio
 import httpx
 import os
-from typing import Optional, Dict, Any
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, Deque, List
 import logging # Use standard Python logging for errors here
 
+from app.core.activity_spool import ActivitySpool
+from app.core.circuit_breaker import CircuitBreaker, STATE_OPEN
+from app.core.config import settings
+
 # Configure logging for this module
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
@@ -12,6 +20,8 @@ logging.basicConfig(level=logging.INFO)
 # IMPORTANT: Replace 'activity-logs' with the actual service name from Team 9's docker-compose.yml
 # Consider managing this via your main settings (app/core/config.py) instead.
 ACTIVITY_LOG_SERVICE_URL = os.getenv("ACTIVITY_LOG_SERVICE_URL", "http://activity-logs-service:3000/api/activities")
+# Bulk endpoint (accepts a JSON array of log entries) used by the batching shipper below
+ACTIVITY_LOG_BULK_URL = os.getenv("ACTIVITY_LOG_BULK_URL", ACTIVITY_LOG_SERVICE_URL.rstrip("/") + "/bulk")
 
 
 # Define constants for your RBAC actions
@@ -25,7 +35,15 @@ ACTION_ASSIGN_PERMISSION_TO_ROLE = "ASSIGN_PERMISSION_TO_ROLE"
 ACTION_REMOVE_PERMISSION_FROM_ROLE = "REMOVE_PERMISSION_FROM_ROLE"
 ACTION_ASSIGN_ROLE_TO_USER = "ASSIGN_ROLE_TO_USER"
 ACTION_REMOVE_ROLE_FROM_USER = "REMOVE_ROLE_FROM_USER"
+ACTION_BULK_ASSIGN_ROLE_TO_USERS = "BULK_ASSIGN_ROLE_TO_USERS"
+ACTION_BULK_REMOVE_ROLE_FROM_USERS = "BULK_REMOVE_ROLE_FROM_USERS"
+ACTION_APPLY_CHANGESET = "APPLY_CHANGESET"
+ACTION_IMPORT_POLICY = "IMPORT_POLICY"
+ACTION_SUBMIT_JOB = "SUBMIT_JOB"
+ACTION_FINISH_JOB = "FINISH_JOB"
 ACTION_CHECK_PERMISSION = "CHECK_PERMISSION"
+ACTION_CHECK_PERMISSION_BATCH = "CHECK_PERMISSION_BATCH"
+ACTION_CHECK_PERMISSION_SUMMARY = "CHECK_PERMISSION_SUMMARY"
 
 # Map RBAC actions to the enum values Team 9 expects, if possible
 # If an exact match isn't available, use 'other' and put details in the 'details' field.
@@ -41,22 +59,44 @@ ACTION_MAP = {
     ACTION_REMOVE_PERMISSION_FROM_ROLE: "permission_change", # Matches Team 9's enum
     ACTION_ASSIGN_ROLE_TO_USER: "other",
     ACTION_REMOVE_ROLE_FROM_USER: "other",
+    ACTION_BULK_ASSIGN_ROLE_TO_USERS: "other",
+    ACTION_BULK_REMOVE_ROLE_FROM_USERS: "other",
+    ACTION_APPLY_CHANGESET: "permission_change", # Matches Team 9's enum
+    ACTION_IMPORT_POLICY: "permission_change", # Matches Team 9's enum
+    ACTION_SUBMIT_JOB: "other",
+    ACTION_FINISH_JOB: "other",
     ACTION_CHECK_PERMISSION: "other",
+    ACTION_CHECK_PERMISSION_BATCH: "other",
+    ACTION_CHECK_PERMISSION_SUMMARY: "other",
 }
 
-async def log_activity(
+# High-volume, low-value events; shed first when the shipper queue overflows
+CHECK_ACTIONS = {ACTION_CHECK_PERMISSION, ACTION_CHECK_PERMISSION_BATCH, ACTION_CHECK_PERMISSION_SUMMARY}
+
+# What the shipper does with a new event when its queue is full
+OVERFLOW_DROP_OLDEST = "drop_oldest"
+OVERFLOW_DROP_CHECKS_FIRST = "drop_checks_first"
+OVERFLOW_SPILL_TO_DISK = "spill_to_disk"
+OVERFLOW_POLICIES = {OVERFLOW_DROP_OLDEST, OVERFLOW_DROP_CHECKS_FIRST, OVERFLOW_SPILL_TO_DISK}
+
+def build_activity_payload(
     action: str,
-    user_id: Optional[str] = "SYSTEM", # Default to SYSTEM if no specific user involved
-    status: str = "success", # 'success' or 'failure'
+    user_id: Optional[str] = "SYSTEM",
+    status: str = "success",
     resource_type: Optional[str] = None,
     resource_id: Optional[str] = None,
     details: Optional[Dict[str, Any]] = None
-):
-    """Sends a log entry to the Activity Log service."""
+) -> Dict[str, Any]:
+    """
+    Builds the JSON body the Activity Log service expects for one event.
 
+    `timestamp` is when the event happened; it travels with the payload through
+    the shipper queue and the spool, so delivery delays never shift it.
+    """
     mapped_action = ACTION_MAP.get(action, "other")
 
     payload = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
         "userId": user_id,
         "action": mapped_action,
         "status": status,
@@ -67,16 +107,379 @@ async def log_activity(
     if mapped_action == "other":
          payload["details"]["rbac_action"] = action # Add specific action if using 'other'
 
-    payload = {k: v for k, v in payload.items() if v is not None}
+    return {k: v for k, v in payload.items() if v is not None}
 
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(ACTIVITY_LOG_SERVICE_URL, json=payload, timeout=5.0)
+
+def is_retryable_status(status_code: int) -> bool:
+    """Whether an error response may succeed on resend; other 4xx reject the payload itself (e.g. 400, 413)."""
+    return status_code >= 500 or status_code in (408, 429)
+
+
+def is_check_event(payload: Dict[str, Any]) -> bool:
+    """Whether a built payload is a permission-check event (see CHECK_ACTIONS)."""
+    return (payload.get("details") or {}).get("rbac_action") in CHECK_ACTIONS
+
+
+class ActivityLogShipper:
+    """
+    Long-lived, batching sender for activity events.
+
+    Events are queued in memory and POSTed as JSON arrays to the bulk endpoint
+    over one pooled `httpx.AsyncClient`, whenever `batch_size` events are
+    waiting or every `flush_interval` seconds. Started/stopped by the FastAPI
+    lifespan in app/main.py.
+
+    With a `spool`, batches that fail to deliver are written to disk instead
+    of being lost, and replayed oldest-first once the service answers again.
+    While anything is spooled, new batches are spooled behind it so the
+    Activity Log service still receives events in order.
+
+    A batch the service rejects outright (a 4xx other than 408/429) would be
+    rejected again on every resend, so it is logged, counted as `rejected`
+    and dropped rather than spooled; only transport errors and retryable
+    statuses are spooled. A 207 means the service stored part of the batch:
+    only the entries it marks `retryable` are spooled for resending.
+
+    Sends go through a `CircuitBreaker`: while it is open, batches are not
+    attempted at all (they are spooled, or lost) so a dead service costs no
+    timeouts. The queue never grows past `max_queue_size`; `overflow_policy`
+    decides what gives: the oldest event, check events first, or the oldest
+    batch spilled to the spool.
+    """
+
+    def __init__(
+        self,
+        *,
+        bulk_url: str,
+        batch_size: int = 100,
+        flush_interval: float = 1.0,
+        max_queue_size: int = 10000,
+        timeout: float = 5.0,
+        max_connections: int = 10,
+        spool: Optional[ActivitySpool] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        overflow_policy: str = OVERFLOW_DROP_OLDEST,
+        transport: Optional[httpx.AsyncBaseTransport] = None # For tests
+    ):
+        self.bulk_url = bulk_url
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue_size = max_queue_size
+        self.timeout = timeout
+        self.max_connections = max_connections
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown activity log overflow policy: {overflow_policy}")
+        if overflow_policy == OVERFLOW_SPILL_TO_DISK and spool is None:
+            logger.warning("ACTIVITY_LOG_OVERFLOW_POLICY=spill_to_disk needs ACTIVITY_LOG_SPOOL_DIR; dropping oldest instead")
+            overflow_policy = OVERFLOW_DROP_OLDEST
+        self.spool = spool
+        self.breaker = breaker or CircuitBreaker()
+        self.overflow_policy = overflow_policy
+        self._transport = transport
+        self._queue: Deque[Dict[str, Any]] = deque()
+        self._queue_lock = threading.Lock() # enqueue() runs on threadpool threads too
+        # Oldest events moved out of a full queue, waiting to be written to the spool
+        self._spill: List[Dict[str, Any]] = []
+        self._client: Optional[httpx.AsyncClient] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+        self.sent = 0
+        self.failed = 0
+        self.rejected = 0
+        self.dropped = 0
+        self.dropped_checks = 0
+        self.spilled = 0
+        self.short_circuited = 0
+        self.batches_sent = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._client = httpx.AsyncClient(
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+            transport=self._transport
+        )
+        self._task = asyncio.create_task(self._run(), name="activity-log-shipper")
+
+    async def stop(self) -> None:
+        """Flushes whatever is queued, then closes the connection pool."""
+        if not self.running:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        await self._task
+        await self._client.aclose()
+        self._task = None
+        self._client = None
+        if self.spool is not None:
+            self.spool.close()
+
+    def enqueue(self, payload: Dict[str, Any]) -> None:
+        """Queues one event without blocking. Safe to call from threadpool threads."""
+        with self._queue_lock:
+            if len(self._queue) >= self.max_queue_size and not self._make_room(payload):
+                return
+            self._queue.append(payload)
+            queued = len(self._queue)
+        if queued >= self.batch_size or self._spill:
+            self._notify()
+
+    def _make_room(self, payload: Dict[str, Any]) -> bool:
+        # Caller must hold self._queue_lock. Returns False if `payload` itself is dropped.
+        if self.overflow_policy == OVERFLOW_DROP_CHECKS_FIRST:
+            if is_check_event(payload):
+                self._count_drop(payload)
+                return False
+            for index, queued in enumerate(self._queue):
+                if is_check_event(queued):
+                    del self._queue[index]
+                    self._count_drop(queued)
+                    return True
+        elif self.overflow_policy == OVERFLOW_SPILL_TO_DISK and len(self._spill) < self.max_queue_size:
+            # Move the oldest batch aside; the run loop writes it to disk off the request path
+            for _ in range(min(self.batch_size, len(self._queue))):
+                self._spill.append(self._queue.popleft())
+            return True
+        self._count_drop(self._queue.popleft())
+        return True
+
+    def _count_drop(self, payload: Dict[str, Any]) -> None:
+        self.dropped += 1
+        if is_check_event(payload):
+            self.dropped_checks += 1
+
+    def _notify(self) -> None:
+        if self._loop is None or self._wakeup is None:
+            return
+        try:
+            current_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            current_loop = None
+        if current_loop is self._loop:
+            self._wakeup.set()
+        else:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self._write_spill()
+                await self.flush()
+                if self.spool is not None and self.spool.depth:
+                    await self.replay()
+            except Exception as exc:
+                logger.error(f"Activity log shipper flush failed: {exc}")
+        await self._write_spill()
+        await self.flush()
+
+    async def _write_spill(self) -> None:
+        with self._queue_lock:
+            spill, self._spill = self._spill, []
+        if spill:
+            await asyncio.to_thread(self.spool.append, spill)
+            self.spilled += len(spill)
+
+    async def flush(self) -> None:
+        """Sends everything currently queued, in batches of `batch_size`."""
+        while True:
+            with self._queue_lock:
+                batch: List[Dict[str, Any]] = []
+                while self._queue and len(batch) < self.batch_size:
+                    batch.append(self._queue.popleft())
+            if not batch:
+                return
+            await self._deliver(batch)
+
+    async def _deliver(self, batch: List[Dict[str, Any]]) -> None:
+        if self.spool is not None and self.spool.depth:
+            # Older events are still on disk; drain them first to keep ordering
+            await self.replay()
+            if self.spool.depth:
+                await asyncio.to_thread(self.spool.append, batch)
+                return
+        unsent = await self._send_batch(batch)
+        if unsent and self.spool is not None:
+            await asyncio.to_thread(self.spool.append, unsent)
+
+    async def replay(self) -> int:
+        """Re-sends spooled events oldest-first until the spool is empty or a send fails."""
+        replayed = 0
+        if self.breaker.state == STATE_OPEN:
+            return replayed # Don't read from disk just to be short-circuited
+        while self.spool.depth:
+            events, cursor = await asyncio.to_thread(self.spool.read, self.batch_size)
+            unsent = await self._send_batch(events) if events else []
+            if events and len(unsent) == len(events):
+                break
+            if not cursor.records:
+                break # Nothing readable yet (e.g. a torn last line)
+            await asyncio.to_thread(self.spool.commit, cursor)
+            replayed += len(events) - len(unsent)
+            if unsent:
+                # Partly stored: only the entries that failed go back, behind the rest of the spool
+                await asyncio.to_thread(self.spool.append, unsent)
+                break
+        return replayed
+
+    async def _send_batch(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Returns the events to spool and resend: none once the batch is stored or rejected for good."""
+        if not self.breaker.allow_request():
+            self.short_circuited += len(batch)
+            return batch
+        try:
+            response = await self._client.post(self.bulk_url, json=batch)
             response.raise_for_status()
-            logger.info(f"Activity logged successfully: {action} by {user_id} status {status}")
+            self.breaker.record_success()
+            self.batches_sent += 1
+            if response.status_code == 207:
+                return self._partial_failures(batch, response)
+            self.sent += len(batch)
+            logger.debug(f"Activity batch logged successfully: {len(batch)} events")
+            return []
+        except httpx.RequestError as exc:
+            self.breaker.record_failure()
+            self.failed += len(batch)
+            logger.error(f"Error sending {len(batch)} logs to Activity Service: {exc}")
+        except httpx.HTTPStatusError as exc:
+            status_code = exc.response.status_code
+            if not is_retryable_status(status_code):
+                # The service is up; resending the same batch would only be rejected again
+                self.breaker.record_success()
+                self.rejected += len(batch)
+                logger.error(f"Activity Service rejected a batch of {len(batch)}, dropping it: {status_code} - {exc.response.text[:500]}")
+                return []
+            self.breaker.record_failure()
+            self.failed += len(batch)
+            logger.error(f"Activity Service returned error for a batch of {len(batch)}: {status_code} - {exc.response.text}")
+        except Exception as exc:
+            # Anything else must still settle the breaker, or a failed half-open probe would never be cleared
+            self.breaker.record_failure()
+            self.failed += len(batch)
+            logger.error(f"Unexpected error sending {len(batch)} logs to Activity Service: {exc!r}")
+        return batch
+
+    def _partial_failures(self, batch: List[Dict[str, Any]], response: httpx.Response) -> List[Dict[str, Any]]:
+        """A 207 from the bulk endpoint: the rest of the batch is stored; returns the failed entries worth resending."""
+        try:
+            failures = [failure for failure in response.json().get("failed") or [] if 0 <= failure.get("index", -1) < len(batch)]
+        except (ValueError, AttributeError):
+            failures = []
+        retry = [batch[failure["index"]] for failure in failures if failure.get("retryable")]
+        self.sent += len(batch) - len(failures)
+        self.failed += len(retry)
+        self.rejected += len(failures) - len(retry)
+        if failures:
+            logger.error(
+                f"Activity Service stored {len(batch) - len(failures)} of {len(batch)} events; "
+                f"resending {len(retry)}, dropping {len(failures) - len(retry)}: {failures[0].get('error')}"
+            )
+        return retry
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "queue_depth": len(self._queue),
+            "max_queue_size": self.max_queue_size,
+            "overflow_policy": self.overflow_policy,
+            "sent": self.sent,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "dropped": self.dropped,
+            "dropped_checks": self.dropped_checks,
+            "spilled": self.spilled,
+            "short_circuited": self.short_circuited,
+            "batches_sent": self.batches_sent,
+            "breaker": self.breaker.stats(),
+            "spool": self.spool.stats() if self.spool is not None else None,
+        }
+
+
+def _build_spool() -> Optional[ActivitySpool]:
+    """The on-disk spool configured by ACTIVITY_LOG_SPOOL_DIR, or None when spooling is off."""
+    if not settings.ACTIVITY_LOG_SPOOL_DIR:
+        return None
+    return ActivitySpool(
+        settings.ACTIVITY_LOG_SPOOL_DIR,
+        segment_max_bytes=settings.ACTIVITY_LOG_SPOOL_SEGMENT_BYTES,
+        max_total_bytes=settings.ACTIVITY_LOG_SPOOL_MAX_BYTES,
+        fsync=settings.ACTIVITY_LOG_SPOOL_FSYNC
+    )
+
+
+# Process-wide shipper, started by the app lifespan
+activity_log_shipper = ActivityLogShipper(
+    bulk_url=ACTIVITY_LOG_BULK_URL,
+    batch_size=settings.ACTIVITY_LOG_BATCH_SIZE,
+    flush_interval=settings.ACTIVITY_LOG_FLUSH_INTERVAL_SECONDS,
+    max_queue_size=settings.ACTIVITY_LOG_QUEUE_MAX_SIZE,
+    timeout=settings.ACTIVITY_LOG_TIMEOUT_SECONDS,
+    max_connections=settings.ACTIVITY_LOG_MAX_CONNECTIONS,
+    spool=_build_spool(),
+    breaker=CircuitBreaker(
+        failure_threshold=settings.ACTIVITY_LOG_BREAKER_FAILURE_THRESHOLD,
+        reset_timeout=settings.ACTIVITY_LOG_BREAKER_RESET_SECONDS
+    ),
+    overflow_policy=settings.ACTIVITY_LOG_OVERFLOW_POLICY
+)
+
+
+async def log_activity(
+    action: str,
+    user_id: Optional[str] = "SYSTEM", # Default to SYSTEM if no specific user involved
+    status: str = "success", # 'success' or 'failure'
+    resource_type: Optional[str] = None,
+    resource_id: Optional[str] = None,
+    details: Optional[Dict[str, Any]] = None
+):
+    """Sends a log entry to the Activity Log service (queued on the shipper when it is running)."""
+
+    payload = build_activity_payload(action, user_id, status, resource_type, resource_id, details)
+
+    if activity_log_shipper.running:
+        activity_log_shipper.enqueue(payload)
+        return
+
+    # Outside the app lifespan (scripts, one-off tools) fall back to a single direct POST,
+    # skipped outright while the breaker is open so a dead service costs no timeouts
+    breaker = activity_log_shipper.breaker
+    try:
+        if breaker.allow_request():
+            async with httpx.AsyncClient() as client:
+                response = await client.post(ACTIVITY_LOG_SERVICE_URL, json=payload, timeout=settings.ACTIVITY_LOG_TIMEOUT_SECONDS)
+                response.raise_for_status()
+                breaker.record_success()
+                logger.info(f"Activity logged successfully: {action} by {user_id} status {status}")
+                return
+        else:
+            logger.warning(f"Activity log circuit open; not sending action '{action}'")
     except httpx.RequestError as exc:
+        breaker.record_failure()
         logger.error(f"Error sending log to Activity Service for action '{action}': {exc}")
     except httpx.HTTPStatusError as exc:
+        if not is_retryable_status(exc.response.status_code):
+            breaker.record_success()
+            logger.error(f"Activity Service rejected action '{action}', dropping it: {exc.response.status_code} - {exc.response.text[:500]}")
+            return
+        breaker.record_failure()
         logger.error(f"Activity Service returned error for action '{action}': {exc.response.status_code} - {exc.response.text}")
     except Exception as exc:
-        logger.error(f"An unexpected error occurred during activity logging for action '{action}': {exc}")
\ No newline at end of file
+        breaker.record_failure()
+        logger.error(f"An unexpected error occurred during activity logging for action '{action}': {exc}")
+    # Keep the event for the shipper to replay on the next app start
+    if activity_log_shipper.spool is not None:
+        await asyncio.to_thread(activity_log_shipper.spool.append, [payload])
@@ -0,0 +1,281 @@
+# app/core/metrics.py
+# Prometheus instrumentation, served at GET /metrics (app/main.py):
+# - request latency per route template, plus DB queries/time per request
+# - /check decisions (single, batch, 304 revalidations)
+# - every SQL statement's duration, via SQLAlchemy cursor events
+# - connection pool occupancy and checkout wait time, per engine
+# - Activity Log shipper queue depth, delivery counters and breaker state
+# Counters that other components already keep (shipper, permission cache)
+# are read at scrape time by a collector rather than duplicated here.
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, Optional, Tuple, Type
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.circuit_breaker import STATE_CLOSED
+from app.core.logging_client import activity_log_shipper
+from app.core.permission_cache import permission_cache
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+# Sub-millisecond buckets matter here: a cached /check answers in well under 1ms
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 500)
+
+REQUEST_SECONDS = Histogram(
+    "rbac_http_request_duration_seconds",
+    "Time until the response body was sent, by route template",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS
+)
+REQUEST_DB_QUERIES = Histogram(
+    "rbac_http_request_db_queries",
+    "SQL statements executed while serving a request, by route template",
+    ["method", "route"],
+    buckets=QUERY_COUNT_BUCKETS
+)
+REQUEST_DB_SECONDS = Histogram(
+    "rbac_http_request_db_duration_seconds",
+    "Time spent in SQL statements while serving a request, by route template",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS
+)
+CHECK_DECISIONS = Counter(
+    "rbac_check_decisions_total",
+    "Permission decisions returned by the check endpoints",
+    ["kind", "allowed"]
+)
+CHECK_NOT_MODIFIED = Counter(
+    "rbac_check_not_modified_total",
+    "GET /check revalidations answered with 304 because the policy epoch was unchanged"
+)
+DB_QUERY_SECONDS = Histogram(
+    "rbac_db_query_duration_seconds",
+    "Duration of each SQL statement, by engine and statement type",
+    ["engine", "operation"],
+    buckets=LATENCY_BUCKETS
+)
+DB_POOL_WAIT_SECONDS = Histogram(
+    "rbac_db_pool_checkout_wait_seconds",
+    "Time to get a connection from the pool, including opening a new one",
+    ["engine"],
+    buckets=LATENCY_BUCKETS
+)
+
+OPERATIONS = {"select", "insert", "update", "delete", "with"}
+
+
+def _operation(statement: str) -> str:
+    verb = statement.lstrip()[:6].lower()
+    return verb if verb in OPERATIONS else "other"
+
+
+# --- Per-request query accounting ---
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    seconds: float = 0.0
+
+
+# Set by MetricsMiddleware for the duration of a request; contextvars follow the
+# request into the threadpool that runs sync endpoints and dependencies
+_request_queries: ContextVar[Optional[QueryStats]] = ContextVar("rbac_request_queries", default=None)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    """Queries run so far by the current request, or None outside a request."""
+    return _request_queries.get()
+
+
+# --- Engine instrumentation ---
+
+_engines: Dict[str, Engine] = {}
+
+
+def _timed_pool_class(pool_class: Type[QueuePool], name: str) -> Type[QueuePool]:
+    """
+    Subclass of `pool_class` that times `_do_get` for engine `name`. QueuePool
+    has no event before a checkout starts waiting, so the wait can't be
+    measured from outside; swapping the class (rather than the method)
+    survives engine.dispose(), which recreates the pool from its class.
+    """
+    wait_seconds = DB_POOL_WAIT_SECONDS.labels(engine=name)
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super(timed, self)._do_get()
+        finally:
+            wait_seconds.observe(time.perf_counter() - started)
+
+    timed = type(f"Timed{pool_class.__name__}", (pool_class,), {"_do_get": _do_get})
+    return timed
+
+
+def instrument_engine(engine: Engine, name: str) -> None:
+    """Times every statement run on `engine` and exports its pool stats as `engine=<name>`. Pass `.sync_engine` for an AsyncEngine."""
+    if name in _engines:
+        return
+    _engines[name] = engine
+    if isinstance(engine.pool, QueuePool):
+        engine.pool.__class__ = _timed_pool_class(type(engine.pool), name)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _stop_timer(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["metrics_query_started"].pop()
+        DB_QUERY_SECONDS.labels(engine=name, operation=_operation(statement)).observe(elapsed)
+        stats = _request_queries.get()
+        if stats is not None:
+            stats.count += 1
+            stats.seconds += elapsed
+
+    @event.listens_for(engine, "handle_error")
+    def _drop_timer(exception_context):
+        # after_cursor_execute doesn't fire for a failed statement
+        started = exception_context.connection.info.get("metrics_query_started") if exception_context.connection else None
+        if started:
+            started.pop()
+
+
+# --- Decision counters (called from the helpers shared by check.py and check_async.py) ---
+
+def record_check_decision(allowed: bool) -> None:
+    CHECK_DECISIONS.labels(kind="single", allowed="true" if allowed else "false").inc()
+
+
+def record_batch_decisions(allowed: int, denied: int) -> None:
+    if allowed:
+        CHECK_DECISIONS.labels(kind="batch", allowed="true").inc(allowed)
+    if denied:
+        CHECK_DECISIONS.labels(kind="batch", allowed="false").inc(denied)
+
+
+def record_not_modified() -> None:
+    CHECK_NOT_MODIFIED.inc()
+
+
+# --- Scrape-time gauges for state other components already track ---
+
+class RuntimeCollector(Collector):
+    """Reads pool, Activity Log shipper and permission cache state on each scrape."""
+
+    def collect(self) -> Iterator[Any]:
+        yield from self._pools()
+        yield from self._activity_log()
+        cache = permission_cache.stats()
+        requests = CounterMetricFamily(
+            "rbac_permission_cache_requests", "Effective-permission cache lookups", labels=["result"]
+        )
+        requests.add_metric(["hit"], cache["hits"])
+        requests.add_metric(["miss"], cache["misses"])
+        yield requests
+        yield GaugeMetricFamily("rbac_permission_cache_size", "Users in the effective-permission cache", value=cache["size"])
+
+    def _pools(self) -> Iterator[Any]:
+        gauges = {
+            "checked_out": GaugeMetricFamily("rbac_db_pool_checked_out", "Connections currently checked out", labels=["engine"]),
+            "checked_in": GaugeMetricFamily("rbac_db_pool_checked_in", "Idle connections in the pool", labels=["engine"]),
+            "overflow": GaugeMetricFamily("rbac_db_pool_overflow", "Connections open beyond pool_size (negative while the pool is still filling)", labels=["engine"]),
+            "size": GaugeMetricFamily("rbac_db_pool_size", "Configured pool_size", labels=["engine"]),
+        }
+        for name, engine in _engines.items():
+            pool = engine.pool # Re-read: dispose() replaces it
+            if not isinstance(pool, QueuePool):
+                continue
+            gauges["checked_out"].add_metric([name], pool.checkedout())
+            gauges["checked_in"].add_metric([name], pool.checkedin())
+            gauges["overflow"].add_metric([name], pool.overflow())
+            gauges["size"].add_metric([name], pool.size())
+        yield from gauges.values()
+
+    def _activity_log(self) -> Iterator[Any]:
+        stats = activity_log_shipper.stats()
+        yield GaugeMetricFamily("rbac_activity_log_queue_depth", "Events waiting in the shipper's in-memory queue", value=stats["queue_depth"])
+        events = CounterMetricFamily("rbac_activity_log_events", "Activity Log events by outcome", labels=["outcome"])
+        for outcome in ("sent", "failed", "rejected", "dropped", "spilled", "short_circuited"):
+            events.add_metric([outcome], stats[outcome])
+        yield events
+        yield GaugeMetricFamily(
+            "rbac_activity_log_breaker_open", "1 while the circuit breaker is open or half-open",
+            value=0 if stats["breaker"]["state"] == STATE_CLOSED else 1
+        )
+        if stats["spool"] is not None:
+            yield GaugeMetricFamily("rbac_activity_log_spool_depth", "Events waiting in the on-disk spool", value=stats["spool"]["depth"])
+            yield GaugeMetricFamily(
+                "rbac_activity_log_spool_lag_seconds", "Age of the oldest undelivered event in the spool (0 when empty)",
+                value=stats["spool"]["lag_seconds"]
+            )
+
+
+REGISTRY.register(RuntimeCollector())
+
+
+def render_latest(registry: CollectorRegistry = REGISTRY) -> Tuple[bytes, str]:
+    """The exposition body and its content type."""
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+# --- Request middleware ---
+
+class MetricsMiddleware:
+    """
+    Times each HTTP request up to its last body chunk (so background tasks
+    such as activity logging don't count) and records its DB queries. The
+    route label is the matched path template, which keeps cardinality bounded.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        queries = QueryStats()
+        token = _request_queries.set(queries)
+        status_code = 500
+        observed = False
+
+        def observe() -> None:
+            nonlocal observed
+            if observed:
+                return
+            observed = True
+            route = scope.get("route")
+            path = getattr(route, "path", UNMATCHED_ROUTE)
+            method = scope["method"]
+            REQUEST_SECONDS.labels(method=method, route=path, status=str(status_code)).observe(time.perf_counter() - started)
+            REQUEST_DB_QUERIES.labels(method=method, route=path).observe(queries.count)
+            REQUEST_DB_SECONDS.labels(method=method, route=path).observe(queries.seconds)
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                observe()
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            observe()
+            raise
+        finally:
+            _request_queries.reset(token)
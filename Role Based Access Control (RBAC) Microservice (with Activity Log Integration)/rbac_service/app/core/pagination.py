@@ -0,0 +1,29 @@
+# app/core/pagination.py
+# Opaque keyset-pagination cursors. A cursor is the sort key of the last row on
+# the previous page, so every page is an index range scan ("WHERE key > :last")
+# instead of an OFFSET that reads and discards all earlier rows.
+import base64
+import json
+from typing import Any, Dict
+
+NEXT_PAGE_HEADER = "X-Next-Page-Token"
+
+
+class InvalidCursor(ValueError):
+    """The client sent a cursor this service didn't issue (or one for another listing)."""
+
+
+def encode_cursor(kind: str, **key: Any) -> str:
+    """Encodes the last row's sort key; `kind` keeps cursors of one listing out of another."""
+    payload = json.dumps({"k": kind, **key}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).rstrip(b"=").decode()
+
+
+def decode_cursor(kind: str, cursor: str) -> Dict[str, Any]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        raise InvalidCursor("Malformed page cursor")
+    if not isinstance(payload, dict) or payload.pop("k", None) != kind:
+        raise InvalidCursor("Page cursor does not belong to this listing")
+    return payload
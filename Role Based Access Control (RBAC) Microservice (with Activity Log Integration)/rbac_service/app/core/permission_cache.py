@@ -0,0 +1,151 @@
+# app/core/permission_cache.py
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterable, Optional, Set, Tuple
+from uuid import UUID
+
+from app.core.config import settings
+
+
+@dataclass(frozen=True)
+class CachedPermissions:
+    """A user's effective permission set plus the roles it was computed from."""
+    permission_names: FrozenSet[str]
+    role_ids: FrozenSet[UUID]
+    expires_at: float
+
+
+class PermissionCache:
+    """
+    Bounded LRU + TTL cache of per-user effective permission sets.
+
+    Entries are keyed by user ID. A reverse index (role_id -> user IDs) lets
+    role-level writes invalidate exactly the users holding that role.
+    All methods are thread-safe, since sync endpoints run on the threadpool.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl_seconds: float = 60.0, enabled: bool = True):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self._entries: "OrderedDict[str, CachedPermissions]" = OrderedDict()
+        self._users_by_role: Dict[UUID, Set[str]] = {}
+        self._lock = threading.Lock()
+        # Bumped on every invalidation; a load that started before an
+        # invalidation must not store its (possibly stale) result.
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, user_id: str) -> Optional[FrozenSet[str]]:
+        """Returns the cached permission names for a user, or None on a miss."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry.expires_at <= time.monotonic():
+                self._remove(user_id)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry.permission_names
+
+    def put(
+        self,
+        user_id: str,
+        permission_names: Iterable[str],
+        role_ids: Iterable[UUID],
+        generation: int
+    ) -> None:
+        """
+        Stores a user's effective permissions.
+
+        `generation` must be the value of `self.generation` read *before* the
+        permissions were loaded; the entry is dropped if anything was
+        invalidated in the meantime.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            if generation != self._generation:
+                return
+            if user_id in self._entries:
+                self._remove(user_id)
+            entry = CachedPermissions(
+                permission_names=frozenset(permission_names),
+                role_ids=frozenset(role_ids),
+                expires_at=time.monotonic() + self.ttl_seconds
+            )
+            self._entries[user_id] = entry
+            for role_id in entry.role_ids:
+                self._users_by_role.setdefault(role_id, set()).add(user_id)
+            while len(self._entries) > self.max_size:
+                oldest_user_id = next(iter(self._entries))
+                self._remove(oldest_user_id)
+                self.evictions += 1
+
+    def invalidate(self, *, user_ids: Iterable[str] = (), role_ids: Iterable[UUID] = ()) -> None:
+        """Drops cached entries for the given users and for every user holding the given roles."""
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+            affected = set(user_ids)
+            for role_id in role_ids:
+                affected |= self._users_by_role.get(role_id, set())
+            for user_id in affected:
+                self._remove(user_id)
+
+    def clear(self) -> None:
+        """Drops every entry (e.g. after a bulk policy change)."""
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+            self._entries.clear()
+            self._users_by_role.clear()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    def _remove(self, user_id: str) -> None:
+        # Caller must hold self._lock
+        entry = self._entries.pop(user_id, None)
+        if entry is None:
+            return
+        for role_id in entry.role_ids:
+            users = self._users_by_role.get(role_id)
+            if users is not None:
+                users.discard(user_id)
+                if not users:
+                    del self._users_by_role[role_id]
+
+
+# Process-wide cache used by the /check endpoint
+permission_cache = PermissionCache(
+    max_size=settings.PERMISSION_CACHE_MAX_SIZE,
+    ttl_seconds=settings.PERMISSION_CACHE_TTL_SECONDS,
+    enabled=settings.PERMISSION_CACHE_ENABLED
+)
@@ -0,0 +1,172 @@
+# app/core/permission_matrix.py
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.rbac import Permission, role_permissions_table
+
+
+@dataclass(frozen=True)
+class _MatrixState:
+    """Immutable snapshot of the matrix; swapped as a whole on reload."""
+    bit_by_name: Dict[str, int] = field(default_factory=dict)
+    names: Tuple[str, ...] = ()
+    role_masks: Dict[UUID, int] = field(default_factory=dict)
+    enabled_mask: int = 0
+
+
+class PermissionMatrix:
+    """
+    Bitset evaluation engine for permission checks.
+
+    Every `Permission.permission_id` is interned into a dense bit index and
+    every role is stored as an integer bitmask over those bits. A user's
+    effective rights are the OR of their role masks (ANDed with the mask of
+    enabled permissions), so a check is a single bit test.
+
+    The matrix only holds roles and permissions; user -> role assignments
+    stay in the DB and are fetched with a primary-key prefix lookup.
+    """
+
+    def __init__(self):
+        self._state = _MatrixState()
+        self._stale = True
+        self._lock = threading.Lock()
+        # Bumped by invalidate(); a load racing with a write stays stale
+        self._invalidations = 0
+        self.loads = 0
+        self.last_load_seconds = 0.0
+
+    @classmethod
+    def from_rows(
+        cls,
+        permissions: Iterable[Tuple[UUID, str, bool]],
+        role_permissions: Iterable[Tuple[UUID, UUID]]
+    ) -> "PermissionMatrix":
+        """Builds a matrix from (permission_id, name, is_enabled) and (role_id, permission_id) rows."""
+        matrix = cls()
+        matrix._state = cls._build_state(permissions, role_permissions)
+        matrix._stale = False
+        return matrix
+
+    @staticmethod
+    def _build_state(
+        permissions: Iterable[Tuple[UUID, str, bool]],
+        role_permissions: Iterable[Tuple[UUID, UUID]]
+    ) -> _MatrixState:
+        bit_by_permission_id: Dict[UUID, int] = {}
+        bit_by_name: Dict[str, int] = {}
+        names: List[str] = []
+        enabled_mask = 0
+        for permission_id, permission_name, is_enabled in permissions:
+            bit = len(names)
+            bit_by_permission_id[permission_id] = bit
+            bit_by_name[permission_name] = bit
+            names.append(permission_name)
+            if is_enabled:
+                enabled_mask |= 1 << bit
+
+        role_masks: Dict[UUID, int] = {}
+        for role_id, permission_id in role_permissions:
+            bit = bit_by_permission_id.get(permission_id)
+            if bit is not None:
+                role_masks[role_id] = role_masks.get(role_id, 0) | (1 << bit)
+
+        return _MatrixState(
+            bit_by_name=bit_by_name,
+            names=tuple(names),
+            role_masks=role_masks,
+            enabled_mask=enabled_mask
+        )
+
+    def load(self, db: Session) -> None:
+        """Rebuilds the matrix from the permissions and role_permissions tables (two queries)."""
+        started = time.perf_counter()
+        invalidations = self._invalidations
+        permissions = db.execute(
+            select(Permission.permission_id, Permission.permission_name, Permission.is_enabled)
+        ).all()
+        role_permissions = db.execute(
+            select(role_permissions_table.c.role_id, role_permissions_table.c.permission_id)
+        ).all()
+        self._state = self._build_state(permissions, role_permissions)
+        self._stale = invalidations != self._invalidations
+        self.loads += 1
+        self.last_load_seconds = time.perf_counter() - started
+
+    @property
+    def stale(self) -> bool:
+        return self._stale
+
+    def ensure_loaded(self, db: Session) -> None:
+        """Reloads the matrix if a policy write marked it stale. Only one thread reloads."""
+        if not self._stale:
+            return
+        with self._lock:
+            if self._stale:
+                self.load(db)
+
+    def invalidate(self) -> None:
+        """Marks the matrix stale; the next check reloads it."""
+        self._invalidations += 1
+        self._stale = True
+
+    # --- Evaluation ---
+
+    def user_mask(self, role_ids: Iterable[UUID]) -> int:
+        """OR of the given roles' masks, restricted to enabled permissions."""
+        state = self._state
+        mask = 0
+        for role_id in role_ids:
+            mask |= state.role_masks.get(role_id, 0)
+        return mask & state.enabled_mask
+
+    def bit_for(self, permission_name: str) -> Optional[int]:
+        """The interned bit index of a permission name, or None if unknown."""
+        return self._state.bit_by_name.get(permission_name)
+
+    def has_permission(self, role_ids: Iterable[UUID], permission_name: str) -> bool:
+        bit = self._state.bit_by_name.get(permission_name)
+        if bit is None:
+            return False
+        return bool(self.user_mask(role_ids) >> bit & 1)
+
+    def permissions_of(self, role_ids: Iterable[UUID]) -> FrozenSet[str]:
+        """All enabled permission names granted by the given roles."""
+        state = self._state
+        mask = self.user_mask(role_ids)
+        names = []
+        while mask:
+            low_bit = mask & -mask
+            names.append(state.names[low_bit.bit_length() - 1])
+            mask ^= low_bit
+        return frozenset(names)
+
+    def which_of(self, role_ids: Iterable[UUID], permission_names: Sequence[str]) -> List[bool]:
+        """For each requested permission name, whether the given roles grant it."""
+        state = self._state
+        mask = self.user_mask(role_ids)
+        results = []
+        for permission_name in permission_names:
+            bit = state.bit_by_name.get(permission_name)
+            results.append(bit is not None and bool(mask >> bit & 1))
+        return results
+
+    def stats(self) -> Dict[str, float]:
+        state = self._state
+        return {
+            "permissions": len(state.names),
+            "roles": len(state.role_masks),
+            "stale": self._stale,
+            "loads": self.loads,
+            "last_load_seconds": self.last_load_seconds,
+        }
+
+
+# Process-wide engine used when settings.PERMISSION_ENGINE == "bitset"
+permission_matrix = PermissionMatrix()
@@ -0,0 +1,228 @@
+# app/core/policy_bus.py
+# Cross-process policy invalidation over Postgres LISTEN/NOTIFY.
+#
+# Writers stage the users/roles a change affects on their Session with
+# `stage_policy_change`. When that session commits:
+#   * before_commit: on Postgres, `pg_notify` is issued inside the same
+#     transaction, so other processes hear about the change only if it commits;
+#   * after_commit: this process's caches are invalidated directly.
+# Every worker runs a `PolicyChangeListener` (started by the app lifespan) that
+# applies notifications from other processes, and flushes everything after a
+# (re)connect since notifications sent while disconnected are lost.
+import asyncio
+import json
+import logging
+import uuid
+from typing import Any, Callable, Dict, Iterable, Optional
+from uuid import UUID
+
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.invalidation import invalidate_policy, flush_policy_caches
+from app.core.policy_epoch import policy_epoch
+from app.db.session import replica_router
+
+logger = logging.getLogger(__name__)
+
+POLICY_CHANNEL = "rbac_policy"
+# Postgres rejects NOTIFY payloads of 8000 bytes or more; bigger changes become a full flush
+MAX_PAYLOAD_BYTES = 7900
+# Identifies this process, so it can skip its own notifications (already applied locally)
+PROCESS_ID = uuid.uuid4().hex
+
+_STAGED_KEY = "rbac_policy_changes"
+
+
+def stage_policy_change(
+    db: Session,
+    *,
+    user_ids: Iterable[str] = (),
+    role_ids: Iterable[UUID] = (),
+    epoch: Optional[int] = None
+) -> None:
+    """
+    Records users/roles affected by the session's pending write, and the
+    policy epoch it bumped to (set by app/crud/rbac.py); published when it commits.
+    """
+    staged = db.info.setdefault(_STAGED_KEY, {"user_ids": set(), "role_ids": set(), "epoch": None})
+    staged["user_ids"].update(user_ids)
+    staged["role_ids"].update(role_ids)
+    if epoch is not None:
+        staged["epoch"] = epoch # Later bumps in one transaction are always higher
+
+
+def build_notification(user_ids: Iterable[str], role_ids: Iterable[UUID], epoch: Optional[int] = None) -> str:
+    """Compact JSON payload for one committed change."""
+    payload = json.dumps(
+        {"o": PROCESS_ID, "e": epoch, "u": sorted(user_ids), "r": sorted(str(role_id) for role_id in role_ids)},
+        separators=(",", ":")
+    )
+    if len(payload.encode()) > MAX_PAYLOAD_BYTES:
+        payload = json.dumps({"o": PROCESS_ID, "e": epoch, "all": True}, separators=(",", ":"))
+    return payload
+
+
+@event.listens_for(Session, "before_commit")
+def _publish_staged_changes(session: Session) -> None:
+    staged = session.info.get(_STAGED_KEY)
+    if not staged or not settings.POLICY_NOTIFY_ENABLED or session.get_bind().dialect.name != "postgresql":
+        return
+    payload = build_notification(staged["user_ids"], staged["role_ids"], staged["epoch"])
+    session.execute(select(func.pg_notify(POLICY_CHANNEL, payload)))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_staged_changes(session: Session) -> None:
+    staged = session.info.pop(_STAGED_KEY, None)
+    if not staged:
+        return
+    # Reads go to the primary for a while, so neither the writer nor the caches refilled below see a lagging replica
+    replica_router.note_write()
+    if staged["user_ids"] or staged["role_ids"]:
+        invalidate_policy(user_ids=staged["user_ids"], role_ids=staged["role_ids"])
+    if staged["epoch"] is not None:
+        policy_epoch.advance(staged["epoch"])
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_staged_changes(session: Session, previous_transaction) -> None:
+    session.info.pop(_STAGED_KEY, None)
+
+
+def apply_notification(payload: str) -> bool:
+    """Applies a notification from another process. Returns False if it was ignored."""
+    try:
+        change = json.loads(payload)
+    except ValueError:
+        logger.error(f"Ignoring malformed policy notification: {payload!r}")
+        return False
+    if change.get("o") == PROCESS_ID:
+        return False
+    replica_router.note_write()
+    if change.get("all"):
+        flush_policy_caches()
+    else:
+        invalidate_policy(
+            user_ids=change.get("u", []),
+            role_ids=[UUID(role_id) for role_id in change.get("r", [])]
+        )
+    if change.get("e") is not None:
+        policy_epoch.advance(change["e"])
+    return True
+
+
+def to_listener_dsn(database_url: str) -> str:
+    """A plain libpq DSN (asyncpg doesn't accept SQLAlchemy's `+driver` suffix)."""
+    scheme, sep, rest = database_url.partition("://")
+    return scheme.split("+", 1)[0] + sep + rest
+
+
+async def _asyncpg_connect(dsn: str):
+    import asyncpg # Only needed when the listener runs (Postgres deployments)
+    return await asyncpg.connect(dsn)
+
+
+class PolicyChangeListener:
+    """
+    Background task that LISTENs on the policy channel and applies incoming
+    invalidations. Reconnects after `reconnect_delay` seconds when the
+    connection drops, and flushes all policy caches on every (re)connect.
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        *,
+        channel: str = POLICY_CHANNEL,
+        reconnect_delay: float = 1.0,
+        connect: Callable[[str], Any] = _asyncpg_connect # Injectable for tests
+    ):
+        self.dsn = dsn
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay
+        self._connect = connect
+        self._task: Optional[asyncio.Task] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self.connected = False
+        self.connects = 0
+        self.full_flushes = 0
+        self.received = 0
+        self.applied = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._stopping = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="policy-change-listener")
+
+    async def stop(self) -> None:
+        if not self.running:
+            return
+        self._stopping.set()
+        await self._task
+        self._task = None
+
+    def _on_notification(self, connection, pid, channel, payload) -> None:
+        self.received += 1
+        if apply_notification(payload):
+            self.applied += 1
+
+    async def _run(self) -> None:
+        while not self._stopping.is_set():
+            connection = None
+            try:
+                connection = await self._connect(self.dsn)
+                lost = asyncio.Event()
+                connection.add_termination_listener(lambda _connection: lost.set())
+                await connection.add_listener(self.channel, self._on_notification)
+                self.connected = True
+                self.connects += 1
+                # Anything committed while we were not listening was missed
+                flush_policy_caches()
+                replica_router.note_write()
+                self.full_flushes += 1
+                stop_waiter = asyncio.ensure_future(self._stopping.wait())
+                lost_waiter = asyncio.ensure_future(lost.wait())
+                await asyncio.wait({stop_waiter, lost_waiter}, return_when=asyncio.FIRST_COMPLETED)
+                stop_waiter.cancel()
+                lost_waiter.cancel()
+                if lost.is_set():
+                    logger.warning("Policy change listener lost its connection; reconnecting")
+            except Exception as exc:
+                logger.error(f"Policy change listener connection failed: {exc}")
+            finally:
+                self.connected = False
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.reconnect_delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "connected": self.connected,
+            "channel": self.channel,
+            "connects": self.connects,
+            "full_flushes": self.full_flushes,
+            "received": self.received,
+            "applied": self.applied,
+        }
+
+
+def _build_listener() -> Optional[PolicyChangeListener]:
+    """The process-wide listener, or None when notifications are off or the DB isn't Postgres."""
+    if not settings.POLICY_NOTIFY_ENABLED or not settings.DATABASE_URL.startswith("postgresql"):
+        return None
+    return PolicyChangeListener(to_listener_dsn(settings.DATABASE_URL))
+
+
+# Started by the app lifespan in app/main.py
+policy_change_listener = _build_listener()
@@ -0,0 +1,93 @@
+# app/core/policy_epoch.py
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.crud.policy_epoch import current_statement
+
+
+class PolicyEpochTracker:
+    """
+    Process-local view of the global policy epoch.
+
+    Advanced after every local commit and by notifications from other
+    workers (app/core/policy_bus.py); re-read from the DB when unknown or
+    older than `max_age_seconds`, which bounds staleness if a notification
+    is missed. Conditional GET /check always re-reads it (`refresh`).
+    """
+
+    def __init__(self, max_age_seconds: float = 60.0):
+        self.max_age_seconds = max_age_seconds
+        self._epoch: Optional[int] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+        self.reads = 0
+
+    def _current(self) -> Optional[int]:
+        epoch = self._epoch
+        if epoch is None or time.monotonic() - self._loaded_at > self.max_age_seconds:
+            return None
+        return epoch
+
+    def get(self, db: Session) -> int:
+        epoch = self._current()
+        if epoch is None:
+            epoch = db.execute(current_statement()).scalar_one_or_none() or 0
+            self._store(epoch)
+        return epoch
+
+    async def get_async(self, db: AsyncSession) -> int:
+        epoch = self._current()
+        if epoch is None:
+            epoch = (await db.execute(current_statement())).scalar_one_or_none() or 0
+            self._store(epoch)
+        return epoch
+
+    def refresh(self, db: Session) -> Tuple[int, bool]:
+        """
+        Reads the epoch from the DB whatever its age (used to revalidate
+        conditional GET /check). Also returns whether it is newer than the epoch
+        this process held, i.e. another worker's change was not heard about.
+        """
+        return self._refresh(db.execute(current_statement()).scalar_one_or_none() or 0)
+
+    async def refresh_async(self, db: AsyncSession) -> Tuple[int, bool]:
+        return self._refresh((await db.execute(current_statement())).scalar_one_or_none() or 0)
+
+    def _refresh(self, epoch: int) -> Tuple[int, bool]:
+        with self._lock:
+            self.reads += 1
+            missed = self._epoch is not None and epoch > self._epoch
+            if self._epoch is None or epoch > self._epoch:
+                self._epoch = epoch
+            self._loaded_at = time.monotonic()
+            return self._epoch, missed
+
+    def _store(self, epoch: int) -> None:
+        with self._lock:
+            self.reads += 1
+            self._epoch = epoch
+            self._loaded_at = time.monotonic()
+
+    def advance(self, epoch: int) -> None:
+        """Records a newer epoch (from a commit or a notification); older values are ignored."""
+        with self._lock:
+            if self._epoch is None or epoch > self._epoch:
+                self._epoch = epoch
+            self._loaded_at = time.monotonic()
+
+    def reset(self) -> None:
+        """Forgets the epoch; the next read goes to the DB."""
+        with self._lock:
+            self._epoch = None
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        return {"epoch": self._epoch, "reads": self.reads, "max_age_seconds": self.max_age_seconds}
+
+
+# Process-wide tracker used by /check
+policy_epoch = PolicyEpochTracker(max_age_seconds=settings.POLICY_EPOCH_MAX_AGE_SECONDS)
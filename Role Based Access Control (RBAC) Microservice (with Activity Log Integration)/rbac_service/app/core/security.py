@@ -1,11 +1,52 @@
 # rbac_service/app/core/security.py
 from sqlalchemy.orm import Session
-from sqlalchemy import select, exists, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, exists, and_, tuple_, Select
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Set, Tuple
+from uuid import UUID
 
 # Import the specific tables needed for the check query
-from app.models.rbac import user_roles_table, role_permissions_table, Permission
+from app.models.rbac import (
+    user_roles_table, user_effective_permissions_table
+)
+from app.core.config import settings
+from app.core.permission_cache import permission_cache
+from app.core.permission_matrix import PermissionMatrix, permission_matrix
 
-def check_user_permission(db: Session, *, user_id: str, permission_name: str) -> bool:
+
+def _configured_engine() -> Optional[PermissionMatrix]:
+    """Returns the bitset engine when enabled via settings.PERMISSION_ENGINE, else None (plain SQL)."""
+    if settings.PERMISSION_ENGINE == "bitset":
+        return permission_matrix
+    return None
+
+def _user_role_ids_statement(user_id: str) -> Select:
+    """Role IDs assigned to a user (primary-key prefix lookup on user_roles)."""
+    return select(user_roles_table.c.role_id).where(user_roles_table.c.user_id == user_id)
+
+def _get_user_role_ids(db: Session, user_id: str) -> List[UUID]:
+    return db.execute(_user_role_ids_statement(user_id)).scalars().all()
+
+def _permission_exists_statement(user_id: str, permission_name: str) -> Select:
+    """Builds the query behind `check_user_permission` (shared with the async variant)."""
+    # Single primary-key probe on the denormalized table, which only holds
+    # *enabled* permissions the user has through at least one role.
+    return select(
+        exists().where(
+            and_(
+                user_effective_permissions_table.c.user_id == user_id,
+                user_effective_permissions_table.c.permission_name == permission_name
+            )
+        )
+    )
+
+def check_user_permission(
+    db: Session,
+    *,
+    user_id: str,
+    permission_name: str,
+    engine: Optional[PermissionMatrix] = None
+) -> bool:
     """
     Checks if a user has a specific, *enabled* permission through their assigned roles.
 
@@ -13,45 +54,190 @@ def check_user_permission(db: Session, *, user_id: str, permission_name: str) ->
         db: The SQLAlchemy database session.
         user_id: The ID of the user to check.
         permission_name: The name of the permission required (e.g., 'profile:edit').
+        engine: Optional bitset engine to delegate to. Defaults to the
+            configured engine (see settings.PERMISSION_ENGINE).
 
     Returns:
         True if the user has the permission, False otherwise.
     """
+    engine = engine or _configured_engine()
+    if engine is not None:
+        # Only the user's role IDs come from the DB; the rest is a bit test
+        engine.ensure_loaded(db)
+        return engine.has_permission(_get_user_role_ids(db, user_id), permission_name)
+
+    # Execute the query
+    has_permission = db.execute(_permission_exists_statement(user_id, permission_name)).scalar()
+
+    return has_permission or False # Return True if exists, False otherwise
+
+
+def check_user_permissions_batch(db: Session, *, checks: Sequence[Tuple[str, str]]) -> List[bool]:
+    """
+    Resolves many (user_id, permission_name) pairs with a single set-based query.
+
+    Args:
+        db: The SQLAlchemy database session.
+        checks: The (user_id, permission_name) pairs to check.
+
+    Returns:
+        One boolean per input pair, in the same order.
+    """
+    if not checks:
+        return []
 
-    # 1. Subquery to find the ID of the required *and enabled* permission
-    permission_id_subquery = select(Permission.permission_id)\
+    engine = _configured_engine()
+    if engine is not None:
+        return _check_batch_with_engine(db, engine, checks)
+
+    granted = {tuple(row) for row in db.execute(_batch_grants_statement(checks))}
+    return [pair in granted for pair in checks]
+
+
+def _batch_grants_statement(checks: Sequence[Tuple[str, str]]) -> Select:
+    """Every requested pair present in user_effective_permissions (primary-key lookups)."""
+    return select(user_effective_permissions_table.c.user_id, user_effective_permissions_table.c.permission_name)\
         .where(
-            and_( # <-- Use and_ for multiple conditions
-                Permission.permission_name == permission_name,
-                Permission.is_enabled == True # <-- ADDED check for is_enabled
-            )
-        )\
-        .scalar_subquery() # Get the ID as a scalar value for comparison
-
-    # Return False immediately if the permission doesn't exist or isn't enabled
-    # This requires fetching the subquery result first, slightly less efficient than pure exists check
-    # permission_id = db.execute(select(permission_id_subquery)).scalar_one_or_none()
-    # if permission_id is None:
-    #     return False
-    # -- Alternative: Keep the exists check below, which handles non-existent permission ID implicitly --
-
-    # 2. Subquery to find all role IDs assigned to the user
-    user_role_ids_subquery = select(user_roles_table.c.role_id)\
-        .where(user_roles_table.c.user_id == user_id)\
-        .subquery() # Get the user's roles
-
-    # 3. Main query: Check if any entry exists in role_permissions table linking
-    #    one of the user's roles to the required, enabled permission.
-    permission_exists_query = select(
-        exists().where(
-            and_(
-                role_permissions_table.c.role_id.in_(select(user_role_ids_subquery.c.role_id)), # Role is one of the user's roles
-                role_permissions_table.c.permission_id == permission_id_subquery # Permission matches the required one (which we filtered by enabled status)
-            )
+            tuple_(
+                user_effective_permissions_table.c.user_id,
+                user_effective_permissions_table.c.permission_name
+            ).in_(list(set(checks)))
         )
-    )
 
-    # Execute the query
-    has_permission = db.execute(permission_exists_query).scalar()
 
-    return has_permission or False # Return True if exists, False otherwise
\ No newline at end of file
+def _check_batch_with_engine(db: Session, engine: PermissionMatrix, checks: Sequence[Tuple[str, str]]) -> List[bool]:
+    """Batch check against the bitset engine: one role lookup for all users, then bit tests."""
+    engine.ensure_loaded(db)
+    role_rows = db.execute(_users_role_ids_statement(checks))
+    return _evaluate_batch_with_engine(engine, checks, role_rows)
+
+
+def _users_role_ids_statement(checks: Sequence[Tuple[str, str]]) -> Select:
+    user_ids = {user_id for user_id, _ in checks}
+    return select(user_roles_table.c.user_id, user_roles_table.c.role_id)\
+        .where(user_roles_table.c.user_id.in_(user_ids))
+
+
+def _evaluate_batch_with_engine(
+    engine: PermissionMatrix,
+    checks: Sequence[Tuple[str, str]],
+    role_rows: Iterable[Tuple[str, UUID]]
+) -> List[bool]:
+    role_ids_by_user: Dict[str, Set[UUID]] = {}
+    for user_id, role_id in role_rows:
+        role_ids_by_user.setdefault(user_id, set()).add(role_id)
+
+    user_ids = {user_id for user_id, _ in checks}
+    masks = {user_id: engine.user_mask(role_ids_by_user.get(user_id, ())) for user_id in user_ids}
+    results = []
+    for user_id, permission_name in checks:
+        bit = engine.bit_for(permission_name)
+        results.append(bit is not None and bool(masks[user_id] >> bit & 1))
+    return results
+
+
+def get_user_effective_permissions(db: Session, *, user_id: str) -> Tuple[FrozenSet[str], FrozenSet[UUID]]:
+    """
+    Loads everything a user is allowed to do.
+
+    Args:
+        db: The SQLAlchemy database session.
+        user_id: The ID of the user.
+
+    Returns:
+        A tuple of (enabled permission names, role IDs the user holds).
+        The role IDs are returned so callers can index cached results by role.
+    """
+    role_ids = frozenset(_get_user_role_ids(db, user_id))
+    engine = _configured_engine()
+    if engine is not None:
+        engine.ensure_loaded(db)
+        return engine.permissions_of(role_ids), role_ids
+
+    return frozenset(db.execute(_effective_permission_names_statement(user_id)).scalars()), role_ids
+
+
+def _effective_permission_names_statement(user_id: str) -> Select:
+    """
+    The user's enabled permission names, read from the denormalized table
+    (primary-key prefix lookup) rather than joined from roles at check time.
+    """
+    return select(user_effective_permissions_table.c.permission_name)\
+        .where(user_effective_permissions_table.c.user_id == user_id)
+
+
+def check_user_permission_cached(db: Session, *, user_id: str, permission_name: str) -> bool:
+    """
+    Same answer as `check_user_permission`, served from the in-process
+    permission cache. On a miss the user's full effective permission set is
+    loaded once and cached, so subsequent checks for any permission are hits.
+    """
+    cached = permission_cache.get(user_id)
+    if cached is not None:
+        return permission_name in cached
+
+    generation = permission_cache.generation
+    permission_names, role_ids = get_user_effective_permissions(db, user_id=user_id)
+    permission_cache.put(user_id, permission_names, role_ids, generation)
+    return permission_name in permission_names
+
+
+# --- Async variants (used with the optional async engine, see app/db/session.py) ---
+# They run the same statements as the sync functions above on an AsyncSession.
+# The bitset engine loads through `run_sync`, since the matrix loader is sync.
+
+async def _ensure_engine_loaded_async(db: AsyncSession, engine: PermissionMatrix) -> None:
+    if engine.stale:
+        await db.run_sync(engine.ensure_loaded)
+
+async def check_user_permission_async(
+    db: AsyncSession,
+    *,
+    user_id: str,
+    permission_name: str,
+    engine: Optional[PermissionMatrix] = None
+) -> bool:
+    """Async variant of `check_user_permission`."""
+    engine = engine or _configured_engine()
+    if engine is not None:
+        await _ensure_engine_loaded_async(db, engine)
+        role_ids = (await db.execute(_user_role_ids_statement(user_id))).scalars().all()
+        return engine.has_permission(role_ids, permission_name)
+
+    has_permission = (await db.execute(_permission_exists_statement(user_id, permission_name))).scalar()
+    return has_permission or False
+
+async def check_user_permissions_batch_async(db: AsyncSession, *, checks: Sequence[Tuple[str, str]]) -> List[bool]:
+    """Async variant of `check_user_permissions_batch`."""
+    if not checks:
+        return []
+
+    engine = _configured_engine()
+    if engine is not None:
+        await _ensure_engine_loaded_async(db, engine)
+        role_rows = await db.execute(_users_role_ids_statement(checks))
+        return _evaluate_batch_with_engine(engine, checks, role_rows)
+
+    granted = {tuple(row) for row in await db.execute(_batch_grants_statement(checks))}
+    return [pair in granted for pair in checks]
+
+async def get_user_effective_permissions_async(db: AsyncSession, *, user_id: str) -> Tuple[FrozenSet[str], FrozenSet[UUID]]:
+    """Async variant of `get_user_effective_permissions`."""
+    role_ids = frozenset((await db.execute(_user_role_ids_statement(user_id))).scalars().all())
+    engine = _configured_engine()
+    if engine is not None:
+        await _ensure_engine_loaded_async(db, engine)
+        return engine.permissions_of(role_ids), role_ids
+
+    return frozenset((await db.execute(_effective_permission_names_statement(user_id))).scalars()), role_ids
+
+async def check_user_permission_cached_async(db: AsyncSession, *, user_id: str, permission_name: str) -> bool:
+    """Async variant of `check_user_permission_cached`."""
+    cached = permission_cache.get(user_id)
+    if cached is not None:
+        return permission_name in cached
+
+    generation = permission_cache.generation
+    permission_names, role_ids = await get_user_effective_permissions_async(db, user_id=user_id)
+    permission_cache.put(user_id, permission_names, role_ids, generation)
+    return permission_name in permission_names
@@ -0,0 +1,159 @@
+# app/core/sql_profiler.py
+# Opt-in per-request SQL profiling. When a request is profiled, every
+# statement it runs through a profiled engine is recorded; the response
+# carries X-SQL-Count / X-SQL-Time, and a statement shape repeated more than
+# SQL_PROFILER_REPEAT_THRESHOLD times (the signature of an N+1, such as a lazy
+# relationship loaded per row of a list) is logged as a warning.
+# A request is profiled when SQL_PROFILER_ENABLED is set, when it sends
+# X-SQL-Profile: 1 and SQL_PROFILER_ALLOW_HEADER is set, or while a test is
+# capturing profiles (capture_requests(); see the query_budget fixture).
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_REQUEST_HEADER = "x-sql-profile"
+COUNT_HEADER = "X-SQL-Count"
+TIME_HEADER = "X-SQL-Time" # Milliseconds
+
+_WHITESPACE = re.compile(r"\s+")
+# Expanding IN lists and multi-row VALUES render one placeholder per item
+_PLACEHOLDER_LIST = re.compile(r"\((?:\s*(?:\?|%\(\w+\)s|\$\d+)\s*,)+\s*(?:\?|%\(\w+\)s|\$\d+)\s*\)")
+
+
+def statement_shape(statement: str) -> str:
+    """The statement with whitespace and placeholder lists collapsed, so repeats of one query compare equal."""
+    return _PLACEHOLDER_LIST.sub("(...)", _WHITESPACE.sub(" ", statement).strip())
+
+
+class SQLProfile:
+    """Statements run by one request."""
+
+    def __init__(self, method: str = "", path: str = ""):
+        self.method = method
+        self.path = path
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes: Counter = Counter()
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """Shapes run more than `threshold` times, most repeated first."""
+        return [(shape, times) for shape, times in self.shapes.most_common() if times > threshold]
+
+    def summary(self) -> str:
+        lines = [f"{self.method} {self.path}: {self.count} statements in {self.seconds * 1000:.1f}ms"]
+        lines += [f"  {times}x {shape}" for shape, times in self.shapes.most_common()]
+        return "\n".join(lines)
+
+
+_current_profile: ContextVar[Optional[SQLProfile]] = ContextVar("rbac_sql_profile", default=None)
+
+
+def profile_engine(engine: Engine) -> None:
+    """Records statements run on `engine` into the current request's profile, if it has one."""
+    if getattr(engine, "_sql_profiled", False):
+        return
+    engine._sql_profiled = True
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        if _current_profile.get() is not None:
+            conn.info.setdefault("sql_profile_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _stop(conn, cursor, statement, parameters, context, executemany):
+        profile = _current_profile.get()
+        if profile is not None:
+            profile.record(statement, time.perf_counter() - conn.info["sql_profile_started"].pop())
+
+    @event.listens_for(engine, "handle_error")
+    def _drop(exception_context):
+        started = exception_context.connection.info.get("sql_profile_started") if exception_context.connection else None
+        if started and _current_profile.get() is not None:
+            started.pop()
+
+
+# --- Capturing finished profiles (tests) ---
+
+_captures: List[List[SQLProfile]] = []
+_captures_lock = threading.Lock()
+
+
+@contextmanager
+def capture_requests() -> Iterator[List[SQLProfile]]:
+    """Profiles every request served inside the block and collects the results, in completion order."""
+    profiles: List[SQLProfile] = []
+    with _captures_lock:
+        _captures.append(profiles)
+    try:
+        yield profiles
+    finally:
+        with _captures_lock:
+            _captures.remove(profiles)
+
+
+# --- Middleware ---
+
+class SQLProfilerMiddleware:
+    """
+    Profiles opted-in requests. The headers cover the statements run before
+    the response started; for streamed responses (NDJSON listings, the
+    policy snapshot) the repeat check runs once the body is complete.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    def _wanted(self, scope: Scope) -> bool:
+        if settings.SQL_PROFILER_ENABLED or _captures:
+            return True
+        if not settings.SQL_PROFILER_ALLOW_HEADER:
+            return False
+        return any(name == PROFILE_REQUEST_HEADER.encode() and value.strip() in (b"1", b"true")
+                   for name, value in scope["headers"])
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._wanted(scope):
+            await self.app(scope, receive, send)
+            return
+        profile = SQLProfile(scope["method"], scope["path"])
+        token = _current_profile.set(profile)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [
+                    (COUNT_HEADER.lower().encode(), str(profile.count).encode()),
+                    (TIME_HEADER.lower().encode(), f"{profile.seconds * 1000:.3f}".encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_profile.reset(token)
+            self._finished(profile)
+
+    def _finished(self, profile: SQLProfile) -> None:
+        threshold = settings.SQL_PROFILER_REPEAT_THRESHOLD
+        for shape, times in profile.repeated(threshold):
+            logger.warning(f"Possible N+1 in {profile.method} {profile.path}: statement ran {times} times (threshold {threshold}): {shape}")
+        with _captures_lock:
+            for profiles in _captures:
+                profiles.append(profile)
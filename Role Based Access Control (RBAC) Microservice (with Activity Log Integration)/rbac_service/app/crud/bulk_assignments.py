@@ -0,0 +1,44 @@
+# rbac_service/app/crud/bulk_assignments.py
+# Set-based statements for assigning one role to (or revoking it from) many
+# users at once, shared by the sync (rbac.py) and async (rbac_async.py) CRUD
+# modules. Each statement covers a chunk of users and reports, via RETURNING,
+# which ones it changed, so a whole request is a handful of statements instead
+# of two per user.
+from typing import Iterator, List, Sequence
+from uuid import UUID
+
+from sqlalchemy import delete
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.sql import Executable
+
+from app.models.rbac import user_roles_table
+
+# Users per statement: keeps bind parameters well under SQLite's 32766 and Postgres' 65535
+CHUNK_ROWS = 1000
+
+_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def chunks(user_ids: Sequence[str], size: int = CHUNK_ROWS) -> Iterator[List[str]]:
+    for start in range(0, len(user_ids), size):
+        yield list(user_ids[start:start + size])
+
+
+def assign_statement(dialect_name: str, *, role_id: UUID, user_ids: Sequence[str]) -> Executable:
+    """INSERT ... ON CONFLICT DO NOTHING RETURNING user_id: yields only users that didn't hold the role."""
+    try:
+        dialect_insert = _INSERTS[dialect_name]
+    except KeyError:
+        raise NotImplementedError(f"Bulk role assignment is not supported on {dialect_name}")
+    return dialect_insert(user_roles_table)\
+        .values([{"user_id": user_id, "role_id": role_id} for user_id in user_ids])\
+        .on_conflict_do_nothing(index_elements=[user_roles_table.c.user_id, user_roles_table.c.role_id])\
+        .returning(user_roles_table.c.user_id)
+
+
+def revoke_statement(*, role_id: UUID, user_ids: Sequence[str]) -> Executable:
+    """DELETE ... RETURNING user_id: yields only users that held the role."""
+    return delete(user_roles_table).where(
+        user_roles_table.c.role_id == role_id,
+        user_roles_table.c.user_id.in_(list(user_ids))
+    ).returning(user_roles_table.c.user_id)
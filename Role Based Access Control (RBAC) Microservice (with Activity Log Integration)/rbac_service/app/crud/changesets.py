@@ -0,0 +1,223 @@
+# rbac_service/app/crud/changesets.py
+# Planning for POST /changesets, shared by the sync (rbac.py) and async
+# (rbac_async.py) CRUD modules.
+# A changeset is validated in full against two batched lookups (every referenced
+# role and permission), reduced to its net effect per (role, permission) and
+# (user, role) pair, and turned into a fixed handful of set-based statements,
+# whatever the number of operations.
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from uuid import UUID
+
+from sqlalchemy import delete, insert, or_, select, tuple_
+from sqlalchemy.sql import Executable
+
+from app.models.rbac import Role, Permission, role_permissions_table, user_roles_table
+from app.crud import effective_permissions as effective
+from app.crud import policy_changes as changelog
+from app.crud.bulk_assignments import chunks
+
+Link = Tuple[UUID, UUID] # (role_id, permission_id)
+Assignment = Tuple[str, UUID] # (user_id, role_id)
+
+
+class ChangesetError(Exception):
+    """The changeset was rejected; `errors` holds one {"index", "detail"} per invalid operation."""
+
+    def __init__(self, errors: List[Dict[str, Any]]):
+        super().__init__(f"{len(errors)} invalid operation(s)")
+        self.errors = errors
+
+
+@dataclass
+class ChangesetPlan:
+    """Net effect of a validated changeset."""
+    new_roles: List[Dict[str, Any]] = field(default_factory=list)
+    new_permissions: List[Dict[str, Any]] = field(default_factory=list)
+    links: Dict[Link, bool] = field(default_factory=dict) # Final state wanted per pair
+    assignments: Dict[Assignment, bool] = field(default_factory=dict)
+    enabled: Dict[UUID, bool] = field(default_factory=dict) # Every referenced permission
+    new_role_ids: Set[UUID] = field(default_factory=set)
+    results: List[Dict[str, Any]] = field(default_factory=list)
+
+
+@dataclass
+class ChangesetWrite:
+    """Statements applying a plan, plus what they changed for the change log and invalidation."""
+    statements: List[Executable]
+    changes: List[changelog.Change]
+    user_ids: Set[str]
+    role_ids: Set[UUID]
+
+
+def lookup_statements(operations: Sequence[Any]) -> Tuple[Executable, Executable]:
+    """One SELECT for every role and one for every permission the changeset names or creates."""
+    role_ids, role_names, permission_ids, permission_names = set(), set(), set(), set()
+    for op in operations:
+        if op.op == "create_role":
+            role_names.add(op.role_name)
+        elif op.op == "create_permission":
+            permission_names.add(op.permission_name)
+        else:
+            if op.role_id:
+                role_ids.add(op.role_id)
+            else:
+                role_names.add(op.role_name)
+            if op.op in ("assign_permission", "remove_permission"):
+                if op.permission_id:
+                    permission_ids.add(op.permission_id)
+                else:
+                    permission_names.add(op.permission_name)
+    roles = select(Role.role_id, Role.role_name)\
+        .where(or_(Role.role_id.in_(role_ids), Role.role_name.in_(role_names)))
+    permissions = select(Permission.permission_id, Permission.permission_name, Permission.is_enabled)\
+        .where(or_(Permission.permission_id.in_(permission_ids), Permission.permission_name.in_(permission_names)))
+    return roles, permissions
+
+
+def plan(operations: Sequence[Any], role_rows: Iterable[Any], permission_rows: Iterable[Any]) -> ChangesetPlan:
+    """Validates every operation against the looked-up rows, in order. Raises ChangesetError listing all failures."""
+    role_names: Dict[UUID, str] = {}
+    role_by_name: Dict[str, UUID] = {}
+    for role_id, role_name in role_rows:
+        role_names[role_id], role_by_name[role_name] = role_name, role_id
+    permission_by_name: Dict[str, UUID] = {}
+    result = ChangesetPlan()
+    for permission_id, permission_name, is_enabled in permission_rows:
+        permission_by_name[permission_name] = permission_id
+        result.enabled[permission_id] = is_enabled
+
+    errors: List[Dict[str, Any]] = []
+
+    def resolve_role(op) -> Optional[UUID]:
+        if op.role_id:
+            return op.role_id if op.role_id in role_names else None
+        return role_by_name.get(op.role_name)
+
+    def resolve_permission(op) -> Optional[UUID]:
+        if op.permission_id:
+            return op.permission_id if op.permission_id in result.enabled else None
+        return permission_by_name.get(op.permission_name)
+
+    for index, op in enumerate(operations):
+        item: Dict[str, Any] = {"index": index, "op": op.op}
+        if op.op == "create_role":
+            if op.role_name in role_by_name:
+                errors.append({"index": index, "detail": f"Role name '{op.role_name}' already exists"})
+                continue
+            role_id = uuid.uuid4()
+            role_names[role_id], role_by_name[op.role_name] = op.role_name, role_id
+            result.new_role_ids.add(role_id)
+            result.new_roles.append({"role_id": role_id, "role_name": op.role_name, "description": op.description})
+            item["role_id"] = role_id
+        elif op.op == "create_permission":
+            if op.permission_name in permission_by_name:
+                errors.append({"index": index, "detail": f"Permission name '{op.permission_name}' already exists"})
+                continue
+            permission_id = uuid.uuid4()
+            permission_by_name[op.permission_name], result.enabled[permission_id] = permission_id, op.is_enabled
+            result.new_permissions.append({
+                "permission_id": permission_id, "permission_name": op.permission_name,
+                "description": op.description, "is_enabled": op.is_enabled
+            })
+            item["permission_id"] = permission_id
+        else:
+            role_id = resolve_role(op)
+            if role_id is None:
+                errors.append({"index": index, "detail": "Role not found"})
+                continue
+            item["role_id"] = role_id
+            if op.op in ("assign_permission", "remove_permission"):
+                permission_id = resolve_permission(op)
+                if permission_id is None:
+                    errors.append({"index": index, "detail": "Permission not found"})
+                    continue
+                assign = op.op == "assign_permission"
+                if assign and not result.enabled[permission_id]:
+                    errors.append({"index": index, "detail": "Cannot assign a disabled permission."})
+                    continue
+                result.links[(role_id, permission_id)] = assign
+                item["permission_id"] = permission_id
+            else:
+                result.assignments[(op.user_id, role_id)] = op.op == "assign_role"
+                item["user_id"] = op.user_id
+        result.results.append(item)
+
+    if errors:
+        raise ChangesetError(errors)
+    return result
+
+
+def existing_statements(changeset: ChangesetPlan) -> Tuple[Optional[Executable], Optional[Executable]]:
+    """Current state of the touched pairs that can already exist (pairs on new roles can't)."""
+    links = [pair for pair in changeset.links if pair[0] not in changeset.new_role_ids]
+    assignments = [pair for pair in changeset.assignments if pair[1] not in changeset.new_role_ids]
+    links_stmt = select(role_permissions_table.c.role_id, role_permissions_table.c.permission_id).where(
+        tuple_(role_permissions_table.c.role_id, role_permissions_table.c.permission_id).in_(links)
+    ) if links else None
+    assignments_stmt = select(user_roles_table.c.user_id, user_roles_table.c.role_id).where(
+        tuple_(user_roles_table.c.user_id, user_roles_table.c.role_id).in_(assignments)
+    ) if assignments else None
+    return links_stmt, assignments_stmt
+
+
+def write_statements(
+    changeset: ChangesetPlan,
+    existing_links: Set[Link],
+    existing_assignments: Set[Assignment]
+) -> ChangesetWrite:
+    """Inserts/deletes for the pairs whose state actually changes, then the effective-permission upkeep."""
+    link_adds = [pair for pair, wanted in changeset.links.items() if wanted and pair not in existing_links]
+    link_removes = [pair for pair, wanted in changeset.links.items() if not wanted and pair in existing_links]
+    assign_adds = [pair for pair, wanted in changeset.assignments.items() if wanted and pair not in existing_assignments]
+    assign_removes = [pair for pair, wanted in changeset.assignments.items() if not wanted and pair in existing_assignments]
+
+    statements: List[Executable] = []
+    changes: List[changelog.Change] = []
+    if changeset.new_roles:
+        statements.append(insert(Role).values(changeset.new_roles))
+        changes += [changelog.role_upserted(row["role_id"], row["role_name"]) for row in changeset.new_roles]
+    if changeset.new_permissions:
+        statements.append(insert(Permission).values(changeset.new_permissions))
+        changes += [
+            changelog.permission_upserted(row["permission_id"], row["permission_name"])
+            for row in changeset.new_permissions if row["is_enabled"] # Disabled ones aren't in the snapshot
+        ]
+    if link_adds:
+        statements.append(insert(role_permissions_table).values(
+            [{"role_id": role_id, "permission_id": permission_id} for role_id, permission_id in link_adds]
+        ))
+    if link_removes:
+        statements.append(delete(role_permissions_table).where(
+            tuple_(role_permissions_table.c.role_id, role_permissions_table.c.permission_id).in_(link_removes)
+        ))
+    changes += [
+        changelog.role_permission_changed(op, role_id, permission_id)
+        for op, pairs in ((changelog.OP_UPSERT, link_adds), (changelog.OP_DELETE, link_removes))
+        for role_id, permission_id in pairs if changeset.enabled[permission_id]
+    ]
+    if assign_adds:
+        statements.append(insert(user_roles_table).values(
+            [{"user_id": user_id, "role_id": role_id} for user_id, role_id in assign_adds]
+        ))
+    if assign_removes:
+        statements.append(delete(user_roles_table).where(
+            tuple_(user_roles_table.c.user_id, user_roles_table.c.role_id).in_(assign_removes)
+        ))
+    changes += [
+        changelog.user_role_changed(op, user_id, role_id)
+        for op, pairs in ((changelog.OP_UPSERT, assign_adds), (changelog.OP_DELETE, assign_removes))
+        for user_id, role_id in pairs
+    ]
+
+    # Recompute grants once per relinked role and once per chunk of reassigned users, after all data changes
+    role_ids = {role_id for role_id, _ in link_adds + link_removes}
+    user_ids = {user_id for user_id, _ in assign_adds + assign_removes}
+    for role_id in sorted(role_ids):
+        statements.append(effective.revoke_statement(users_of_role_id=role_id))
+        statements.append(effective.grant_statement(role_id=role_id))
+    for chunk in chunks(sorted(user_ids)):
+        statements.append(effective.revoke_statement(user_ids=chunk))
+        statements.append(effective.grant_statement(user_ids=chunk))
+    return ChangesetWrite(statements=statements, changes=changes, user_ids=user_ids, role_ids=role_ids)
@@ -0,0 +1,151 @@
+# rbac_service/app/crud/effective_permissions.py
+# Statement builders that keep user_effective_permissions in step with
+# user_roles / role_permissions / permissions.is_enabled. They return plain
+# statements that the CRUD modules (rbac.py, rbac_async.py, changesets.py,
+# policy_import.py) execute inside their own transaction, before committing.
+from typing import Iterable, List, Optional
+from uuid import UUID
+
+from sqlalchemy import select, delete, insert, update, exists, and_, union
+from sqlalchemy.sql import Executable
+
+from app.models.rbac import (
+    Permission, user_roles_table, role_permissions_table, user_effective_permissions_table
+)
+
+eff = user_effective_permissions_table
+
+
+def _grants_query(
+    *,
+    user_ids: Optional[Iterable[str]] = None,
+    role_id: Optional[UUID] = None,
+    permission_id: Optional[UUID] = None
+):
+    """(user_id, permission_name) pairs granted through roles, for enabled permissions, narrowed by the filters."""
+    query = select(user_roles_table.c.user_id, Permission.permission_name)\
+        .select_from(
+            user_roles_table
+            .join(role_permissions_table, role_permissions_table.c.role_id == user_roles_table.c.role_id)
+            .join(Permission, Permission.permission_id == role_permissions_table.c.permission_id)
+        )\
+        .where(Permission.is_enabled == True)\
+        .distinct()
+    if user_ids is not None:
+        query = query.where(user_roles_table.c.user_id.in_(list(user_ids)))
+    if role_id is not None:
+        query = query.where(user_roles_table.c.role_id == role_id)
+    if permission_id is not None:
+        query = query.where(role_permissions_table.c.permission_id == permission_id)
+    return query
+
+
+def grant_statement(
+    *,
+    user_ids: Optional[Iterable[str]] = None,
+    role_id: Optional[UUID] = None,
+    permission_id: Optional[UUID] = None
+) -> Executable:
+    """INSERT ... SELECT of newly granted pairs, skipping pairs already present."""
+    grants = _grants_query(user_ids=user_ids, role_id=role_id, permission_id=permission_id).subquery()
+    new_grants = select(grants.c.user_id, grants.c.permission_name).where(
+        ~exists().where(
+            and_(
+                eff.c.user_id == grants.c.user_id,
+                eff.c.permission_name == grants.c.permission_name
+            )
+        )
+    )
+    return insert(eff).from_select(["user_id", "permission_name"], new_grants)
+
+
+def revoke_statement(
+    *,
+    user_ids: Optional[Iterable[str]] = None,
+    users_of_role_id: Optional[UUID] = None,
+    permission_names: Optional[Iterable[str]] = None,
+    permissions_of_role_id: Optional[UUID] = None,
+    excluded_role_id: Optional[UUID] = None
+) -> Executable:
+    """
+    Deletes candidate pairs that are no longer granted by any remaining role.
+
+    Candidates are narrowed by users (explicit IDs or holders of a role) and
+    permissions (explicit names or those of a role). `excluded_role_id` treats
+    that role as already gone, for deletes that haven't happened yet.
+    """
+    still_granted = select(user_roles_table.c.user_id)\
+        .select_from(
+            user_roles_table
+            .join(role_permissions_table, role_permissions_table.c.role_id == user_roles_table.c.role_id)
+            .join(Permission, Permission.permission_id == role_permissions_table.c.permission_id)
+        )\
+        .where(
+            and_(
+                user_roles_table.c.user_id == eff.c.user_id,
+                Permission.permission_name == eff.c.permission_name,
+                Permission.is_enabled == True
+            )
+        )
+    if excluded_role_id is not None:
+        still_granted = still_granted.where(user_roles_table.c.role_id != excluded_role_id)
+
+    conditions = [~still_granted.exists()]
+    if user_ids is not None:
+        conditions.append(eff.c.user_id.in_(list(user_ids)))
+    if users_of_role_id is not None:
+        conditions.append(eff.c.user_id.in_(
+            select(user_roles_table.c.user_id).where(user_roles_table.c.role_id == users_of_role_id)
+        ))
+    if permission_names is not None:
+        conditions.append(eff.c.permission_name.in_(list(permission_names)))
+    if permissions_of_role_id is not None:
+        conditions.append(eff.c.permission_name.in_(
+            select(Permission.permission_name)
+            .join(role_permissions_table, role_permissions_table.c.permission_id == Permission.permission_id)
+            .where(role_permissions_table.c.role_id == permissions_of_role_id)
+        ))
+    return delete(eff).where(and_(*conditions))
+
+
+def permission_changed_statements(
+    *,
+    permission_id: UUID,
+    old_name: str,
+    new_name: str,
+    was_enabled: bool,
+    is_enabled: bool
+) -> List[Executable]:
+    """Statements applying a permission rename and/or is_enabled flip."""
+    statements: List[Executable] = []
+    if was_enabled and not is_enabled:
+        statements.append(delete(eff).where(eff.c.permission_name == old_name))
+    elif was_enabled and old_name != new_name:
+        statements.append(update(eff).where(eff.c.permission_name == old_name).values(permission_name=new_name))
+    elif not was_enabled and is_enabled:
+        statements.append(grant_statement(permission_id=permission_id))
+    return statements
+
+
+def rebuild_statements() -> List[Executable]:
+    """Full rebuild, used to recover from drift (see `python -m app.cli rebuild-effective-permissions`)."""
+    return [
+        delete(eff),
+        insert(eff).from_select(["user_id", "permission_name"], _grants_query()),
+    ]
+
+
+def users_after_statement(after_user_id: Optional[str], limit: int):
+    """
+    The next `limit` user IDs after `after_user_id` that hold a role or an
+    effective grant, in order: the key range of one chunk of a chunked rebuild.
+    """
+    branches = []
+    for column in (user_roles_table.c.user_id, eff.c.user_id):
+        branch = select(column.label("user_id")).distinct().order_by(column).limit(limit)
+        if after_user_id is not None:
+            branch = branch.where(column > after_user_id)
+        branches.append(branch.subquery())
+    # Each branch is an ordered index range, so the union never looks past `limit` rows per table
+    merged = union(*(select(branch.c.user_id) for branch in branches)).subquery()
+    return select(merged.c.user_id).order_by(merged.c.user_id).limit(limit)
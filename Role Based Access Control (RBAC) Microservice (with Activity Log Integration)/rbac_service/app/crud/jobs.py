@@ -0,0 +1,163 @@
+# rbac_service/app/crud/jobs.py
+# Background jobs: submission, claiming, cancellation and the chunked handlers
+# behind each job kind. A handler does one chunk per call in its own short
+# transaction (see the chunked operations in app/crud/rbac.py), so locks are
+# held one chunk at a time and /check traffic interleaves with the work.
+# Chunks are idempotent and progress is committed after each one, so a job
+# requeued after its worker stopped resumes where it left off.
+from datetime import datetime, timedelta, UTC
+from typing import Any, Callable, Dict, Optional
+from uuid import UUID
+
+from sqlalchemy import select, update, or_, and_, func
+from sqlalchemy.orm import Session
+
+from app.models.rbac import Job
+from app.crud import rbac as crud
+from app.core.policy_bus import stage_policy_change
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+FINISHED_STATUSES = {JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED}
+
+KIND_DELETE_ROLE = "delete_role"
+KIND_ASSIGN_ROLE_TO_USERS = "assign_role_to_users"
+KIND_REMOVE_ROLE_FROM_USERS = "remove_role_from_users"
+KIND_REBUILD_EFFECTIVE_PERMISSIONS = "rebuild_effective_permissions"
+
+
+def _now() -> datetime:
+    return datetime.now(UTC)
+
+
+def submit(db: Session, *, kind: str, params: Dict[str, Any], progress_total: Optional[int] = None) -> Job:
+    if kind not in HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    job = Job(kind=kind, status=JOB_QUEUED, params=params, progress_total=progress_total)
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def get_job(db: Session, job_id: UUID) -> Optional[Job]:
+    return db.get(Job, job_id)
+
+
+def request_cancel(db: Session, *, job: Job) -> Job:
+    """Queued jobs are cancelled at once; running ones stop after their current chunk."""
+    if job.status == JOB_QUEUED:
+        job.status, job.finished_at = JOB_CANCELLED, _now()
+    elif job.status == JOB_RUNNING:
+        job.cancel_requested = True
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def claim(db: Session, *, worker_id: str, stale_after_seconds: float) -> Optional[Job]:
+    """
+    Marks the oldest runnable job as running on `worker_id` and returns it.
+    Runnable means queued, or running on a worker that stopped heartbeating.
+    Concurrent workers skip rows another one has locked (Postgres) and the
+    conditional UPDATE makes sure only one of them wins a job either way.
+    """
+    now = _now()
+    runnable = or_(
+        Job.status == JOB_QUEUED,
+        and_(Job.status == JOB_RUNNING, Job.heartbeat_at < now - timedelta(seconds=stale_after_seconds))
+    )
+    job_id = db.execute(
+        select(Job.job_id).where(runnable).order_by(Job.created_at).limit(1).with_for_update(skip_locked=True)
+    ).scalar_one_or_none()
+    claimed = job_id is not None and db.execute(
+        update(Job).where(Job.job_id == job_id, runnable).values(
+            status=JOB_RUNNING, worker_id=worker_id, heartbeat_at=now,
+            started_at=func.coalesce(Job.started_at, now)
+        )
+    ).rowcount == 1
+    db.commit()
+    return db.get(Job, job_id) if claimed else None
+
+
+def run_chunk(db: Session, *, job: Job, params: Dict[str, Any], chunk_rows: int) -> bool:
+    """
+    Runs the next chunk of `job` and commits its progress. Returns True once
+    the job has succeeded. `params` is `job.params`, read once per run by the caller.
+    """
+    finished = HANDLERS[job.kind](db, job, params, chunk_rows)
+    job.heartbeat_at = _now()
+    if finished:
+        job.status, job.finished_at = JOB_SUCCEEDED, job.heartbeat_at
+    db.commit()
+    return finished
+
+
+def finish(db: Session, *, job_id: UUID, status: str, error: Optional[str] = None) -> None:
+    db.execute(update(Job).where(Job.job_id == job_id).values(status=status, error=error, finished_at=_now()))
+    db.commit()
+
+
+def requeue(db: Session, *, job_id: UUID) -> None:
+    """Hands a running job back to the queue (worker shutdown); it resumes from its last chunk."""
+    db.execute(update(Job).where(Job.job_id == job_id, Job.status == JOB_RUNNING).values(status=JOB_QUEUED, worker_id=None))
+    db.commit()
+
+
+# --- Handlers: one chunk per call, True when the job is done ---
+
+Handler = Callable[[Session, Job, Dict[str, Any], int], bool]
+
+
+def _add_to_result(job: Job, key: str, count: int) -> None:
+    result = dict(job.result or {}) # Reassigned, not mutated, so the JSON column is marked dirty
+    result[key] = result.get(key, 0) + count
+    job.result = result
+
+
+def _delete_role(db: Session, job: Job, params: Dict[str, Any], chunk_rows: int) -> bool:
+    """Revokes the role from its holders a chunk at a time, then deletes the (by then cheap to delete) role."""
+    role_id = UUID(params["role_id"])
+    revoked = crud.remove_role_holders_chunk(db, role_id=role_id, limit=chunk_rows)
+    if revoked:
+        job.progress_done += len(revoked)
+        return False
+    stage_policy_change(db, role_ids=[role_id])
+    job.result = {"deleted": crud.delete_role(db, role_id=role_id)}
+    return True
+
+
+def _role_users(assign: bool) -> Handler:
+    def handler(db: Session, job: Job, params: Dict[str, Any], chunk_rows: int) -> bool:
+        role_id, user_ids = UUID(params["role_id"]), params["user_ids"]
+        chunk = user_ids[job.progress_done:job.progress_done + chunk_rows]
+        if chunk:
+            stage_policy_change(db, user_ids=chunk)
+            if assign:
+                changed = crud.bulk_assign_role_to_users(db, role_id=role_id, user_ids=chunk)
+            else:
+                changed = crud.bulk_remove_role_from_users(db, role_id=role_id, user_ids=chunk)
+            job.progress_done += len(chunk)
+            _add_to_result(job, "changed", len(changed))
+        return job.progress_done >= len(user_ids)
+    return handler
+
+
+def _rebuild_effective_permissions(db: Session, job: Job, params: Dict[str, Any], chunk_rows: int) -> bool:
+    after_user_id = (job.checkpoint or {}).get("after_user_id")
+    user_ids = crud.rebuild_effective_permissions_chunk(db, after_user_id=after_user_id, limit=chunk_rows)
+    if user_ids:
+        job.checkpoint = {"after_user_id": user_ids[-1]}
+        job.progress_done += len(user_ids)
+    return len(user_ids) < chunk_rows
+
+
+HANDLERS: Dict[str, Handler] = {
+    KIND_DELETE_ROLE: _delete_role,
+    KIND_ASSIGN_ROLE_TO_USERS: _role_users(assign=True),
+    KIND_REMOVE_ROLE_FROM_USERS: _role_users(assign=False),
+    KIND_REBUILD_EFFECTIVE_PERMISSIONS: _rebuild_effective_permissions,
+}
@@ -0,0 +1,124 @@
+# rbac_service/app/crud/policy_changes.py
+# Statements for the policy_changes delta log, shared by the sync (rbac.py) and
+# async (rbac_async.py) CRUD modules. Writers describe what they changed with
+# the helpers below and hand the list to `_bump_policy_epoch`, which logs it
+# under the new epoch in the same transaction, so the log and the data can
+# never disagree.
+from typing import Any, Dict, List, Optional, Sequence
+from uuid import UUID
+
+from sqlalchemy import delete, insert, literal, null, select, update
+from sqlalchemy.sql import Executable
+
+from app.models.rbac import policy_changes_table, policy_epoch_table, role_permissions_table
+from app.crud.policy_epoch import EPOCH_ROW_ID
+
+Change = Dict[str, Any]
+
+ENTITY_ROLE = "role"
+ENTITY_PERMISSION = "permission"
+ENTITY_ROLE_PERMISSION = "role_permission"
+ENTITY_USER_ROLE = "user_role"
+OP_UPSERT = "upsert"
+OP_DELETE = "delete"
+
+# Old history is pruned once every this many epochs rather than on every write
+PRUNE_EVERY_EPOCHS = 1000
+# Rows per INSERT when one write logs many changes (bulk assignments); 7 binds per row
+LOG_CHUNK_ROWS = 1000
+
+def _change(
+    entity: str,
+    op: str,
+    *,
+    role_id: Optional[UUID] = None,
+    permission_id: Optional[UUID] = None,
+    user_id: Optional[str] = None,
+    name: Optional[str] = None
+) -> Change:
+    # Every row carries every column so a list of changes is one multi-row INSERT
+    return {"entity": entity, "op": op, "role_id": role_id, "permission_id": permission_id, "user_id": user_id, "name": name}
+
+def role_upserted(role_id: UUID, role_name: str) -> Change:
+    return _change(ENTITY_ROLE, OP_UPSERT, role_id=role_id, name=role_name)
+
+def role_deleted(role_id: UUID) -> Change:
+    return _change(ENTITY_ROLE, OP_DELETE, role_id=role_id)
+
+def permission_upserted(permission_id: UUID, permission_name: str) -> Change:
+    return _change(ENTITY_PERMISSION, OP_UPSERT, permission_id=permission_id, name=permission_name)
+
+def permission_deleted(permission_id: UUID) -> Change:
+    return _change(ENTITY_PERMISSION, OP_DELETE, permission_id=permission_id)
+
+def role_permission_changed(op: str, role_id: UUID, permission_id: UUID) -> Change:
+    return _change(ENTITY_ROLE_PERMISSION, op, role_id=role_id, permission_id=permission_id)
+
+def user_role_changed(op: str, user_id: str, role_id: UUID) -> Change:
+    return _change(ENTITY_USER_ROLE, op, role_id=role_id, user_id=user_id)
+
+def permission_updated(
+    *,
+    permission_id: UUID,
+    old_name: str,
+    new_name: str,
+    was_enabled: bool,
+    is_enabled: bool
+) -> List[Change]:
+    """
+    Snapshot-level effect of a permission update: the snapshot only holds
+    enabled permissions, so disabling reads as a delete and enabling as an
+    upsert (whose role links are re-logged with `relink_statement`).
+    """
+    if was_enabled and not is_enabled:
+        return [permission_deleted(permission_id)]
+    if is_enabled and (not was_enabled or old_name != new_name):
+        return [permission_upserted(permission_id, new_name)]
+    return []
+
+def log_statement(epoch: int, changes: Sequence[Change]) -> Executable:
+    return insert(policy_changes_table).values([dict(change, epoch=epoch) for change in changes])
+
+def log_statements(epoch: int, changes: Sequence[Change]) -> List[Executable]:
+    """`log_statement` split into chunks that stay within the drivers' bind parameter limits."""
+    return [
+        log_statement(epoch, changes[start:start + LOG_CHUNK_ROWS])
+        for start in range(0, len(changes), LOG_CHUNK_ROWS)
+    ]
+
+def relink_statement(epoch: int, permission_id: UUID) -> Executable:
+    """Logs an upsert for every role link of a (re-enabled) permission."""
+    links = select(
+        literal(epoch), literal(ENTITY_ROLE_PERMISSION), literal(OP_UPSERT),
+        role_permissions_table.c.role_id, role_permissions_table.c.permission_id, null(), null()
+    ).where(role_permissions_table.c.permission_id == permission_id)
+    return insert(policy_changes_table).from_select(
+        ["epoch", "entity", "op", "role_id", "permission_id", "user_id", "name"], links
+    )
+
+def prune_statements(epoch: int, retention_epochs: int) -> List[Executable]:
+    """Deletes history older than the retention window and records how far it was pruned."""
+    pruned_through = epoch - retention_epochs
+    if pruned_through <= 0:
+        return []
+    return [
+        delete(policy_changes_table).where(policy_changes_table.c.epoch <= pruned_through),
+        update(policy_epoch_table).where(policy_epoch_table.c.id == EPOCH_ROW_ID)
+            .values(changes_pruned_through=pruned_through),
+    ]
+
+def watermarks_statement():
+    """(current epoch, changes_pruned_through) of the counter row."""
+    return select(policy_epoch_table.c.epoch, policy_epoch_table.c.changes_pruned_through)\
+        .where(policy_epoch_table.c.id == EPOCH_ROW_ID)
+
+def changes_statement(since: int, through: int, limit: Optional[int] = None):
+    """Changes with since < epoch <= through, in commit order."""
+    statement = select(
+        policy_changes_table.c.epoch, policy_changes_table.c.entity, policy_changes_table.c.op,
+        policy_changes_table.c.role_id, policy_changes_table.c.permission_id,
+        policy_changes_table.c.user_id, policy_changes_table.c.name
+    ).where(
+        policy_changes_table.c.epoch > since, policy_changes_table.c.epoch <= through
+    ).order_by(policy_changes_table.c.change_id)
+    return statement.limit(limit) if limit is not None else statement
@@ -0,0 +1,24 @@
+# rbac_service/app/crud/policy_epoch.py
+# Statements for the single-row policy_epoch counter, shared by the sync
+# (rbac.py) and async (rbac_async.py) CRUD modules. Bumping takes a row lock
+# until the writer commits, so policy writes serialize on it; they are rare
+# next to checks.
+from sqlalchemy import insert, select, update
+
+from app.models.rbac import policy_epoch_table
+
+EPOCH_ROW_ID = 1
+
+def bump_statement():
+    """Increments the epoch and returns the new value (no row returned if it was never seeded)."""
+    return update(policy_epoch_table)\
+        .where(policy_epoch_table.c.id == EPOCH_ROW_ID)\
+        .values(epoch=policy_epoch_table.c.epoch + 1)\
+        .returning(policy_epoch_table.c.epoch)
+
+def seed_statement(epoch: int):
+    """Creates the counter row (normally done by the migration)."""
+    return insert(policy_epoch_table).values(id=EPOCH_ROW_ID, epoch=epoch)
+
+def current_statement():
+    return select(policy_epoch_table.c.epoch).where(policy_epoch_table.c.id == EPOCH_ROW_ID)
@@ -0,0 +1,111 @@
+# rbac_service/app/crud/policy_export.py
+# Whole-policy snapshot and delta reads for GET /policy/snapshot and /policy/changes.
+#
+# Snapshot wire format: a sequence of frames, each a 4-byte big-endian length
+# followed by one msgpack map:
+#   {"type": "header", "format": SNAPSHOT_FORMAT, "version": 1, "epoch": E, "sections": {name: [columns]}}
+#   {"type": "rows", "section": name, "rows": [[...], ...]}   (repeated, in section order)
+#   {"type": "end", "counts": {name: n}}
+# UUIDs are sent as 16 raw bytes. Only enabled permissions (and links to them) are included.
+import struct
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional
+
+import msgpack
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.crud import policy_changes as changelog
+from app.crud import policy_epoch
+from app.models.rbac import Role, Permission, role_permissions_table, user_roles_table
+
+SNAPSHOT_FORMAT = "rbac-policy-snapshot"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_MEDIA_TYPE = "application/vnd.rbac.policy-snapshot+msgpack"
+
+SECTIONS: Dict[str, List[str]] = {
+    "roles": ["role_id", "role_name"],
+    "permissions": ["permission_id", "permission_name"],
+    "role_permissions": ["role_id", "permission_id"],
+    "user_roles": ["user_id", "role_id"],
+}
+
+def encode_frame(message: Dict[str, Any]) -> bytes:
+    body = msgpack.packb(message, use_bin_type=True)
+    return struct.pack(">I", len(body)) + body
+
+def _section_statements():
+    # Ordered by key so consecutive snapshots of the same epoch are byte-identical
+    return {
+        "roles": select(Role.role_id, Role.role_name).order_by(Role.role_id),
+        "permissions": select(Permission.permission_id, Permission.permission_name)
+            .where(Permission.is_enabled.is_(True)).order_by(Permission.permission_id),
+        "role_permissions": select(role_permissions_table.c.role_id, role_permissions_table.c.permission_id)
+            .join(Permission, Permission.permission_id == role_permissions_table.c.permission_id)
+            .where(Permission.is_enabled.is_(True))
+            .order_by(role_permissions_table.c.role_id, role_permissions_table.c.permission_id),
+        "user_roles": select(user_roles_table.c.user_id, user_roles_table.c.role_id)
+            .order_by(user_roles_table.c.user_id, user_roles_table.c.role_id),
+    }
+
+def _wire(value: Any) -> Any:
+    return value.bytes if hasattr(value, "bytes") else value # UUID -> 16 bytes
+
+def snapshot_frames(db: Session, *, chunk_rows: int = 1000) -> Iterator[bytes]:
+    """
+    Yields the encoded snapshot frame by frame. Every section is read through
+    a server-side cursor (`yield_per`), `chunk_rows` rows at a time, so neither
+    the ORM nor this process ever holds the whole policy. On Postgres the reads
+    share one REPEATABLE READ transaction, so the rows match the header epoch.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.connection(execution_options={"isolation_level": "REPEATABLE READ", "postgresql_readonly": True})
+    epoch = db.execute(policy_epoch.current_statement()).scalar_one_or_none() or 0
+    yield encode_frame({
+        "type": "header", "format": SNAPSHOT_FORMAT, "version": SNAPSHOT_VERSION,
+        "epoch": epoch, "sections": SECTIONS
+    })
+    counts = {}
+    for section, statement in _section_statements().items():
+        counts[section] = 0
+        result = db.execute(statement, execution_options={"yield_per": chunk_rows})
+        for partition in result.partitions():
+            rows = [[_wire(value) for value in row] for row in partition]
+            counts[section] += len(rows)
+            yield encode_frame({"type": "rows", "section": section, "rows": rows})
+    yield encode_frame({"type": "end", "counts": counts})
+
+class ChangesUnavailable(Exception):
+    """`since` is outside the retained change history; the caller must re-bootstrap from a snapshot."""
+
+@dataclass
+class ChangeSet:
+    since: int
+    epoch: int # Apply `changes`, then resume with since=epoch
+    changes: List[Dict[str, Any]]
+    has_more: bool
+
+def get_changes(db: Session, *, since: int, limit: int) -> ChangeSet:
+    """
+    Deltas committed after epoch `since`, oldest first. Pages end on an epoch
+    boundary so a consumer never applies half of one write; a single write
+    larger than `limit` is returned whole.
+    """
+    row = db.execute(changelog.watermarks_statement()).first()
+    current, pruned_through = (row.epoch, row.changes_pruned_through) if row else (0, 0)
+    if since < pruned_through or since > current:
+        raise ChangesUnavailable(
+            f"Changes since epoch {since} are not available (retained: {pruned_through}..{current})"
+        )
+    rows = db.execute(changelog.changes_statement(since, current, limit=limit + 1)).all()
+    has_more = len(rows) > limit
+    if has_more:
+        cut_epoch = rows[limit].epoch
+        rows = [row for row in rows if row.epoch < cut_epoch]
+        if not rows: # One write alone exceeds the page size
+            rows = db.execute(changelog.changes_statement(cut_epoch - 1, cut_epoch)).all()
+        through = rows[-1].epoch
+    else:
+        through = current
+    changes = [{key: value for key, value in row._asdict().items() if value is not None} for row in rows]
+    return ChangeSet(since=since, epoch=through, changes=changes, has_more=has_more)
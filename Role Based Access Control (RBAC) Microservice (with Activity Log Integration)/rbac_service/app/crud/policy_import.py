@@ -0,0 +1,480 @@
+# rbac_service/app/crud/policy_import.py
+# Declarative policy import for `python -m app.cli import-policy` and POST /policy/import.
+#
+# The desired state (a YAML or CSV file) is bulk-loaded into temporary staging
+# tables (COPY on Postgres), diffed against the live tables in SQL, and the
+# delta applied with set-based statements in the caller's transaction, so
+# reconciling tens of thousands of assignments costs a few dozen statements.
+#
+# YAML:
+#   permissions:
+#     - {name: "doc:read", description: "Read documents", enabled: true}
+#   roles:
+#     - {name: "editor", description: "...", permissions: ["doc:read"]}
+#   users:
+#     alice: ["editor"]
+#
+# CSV (header required; one record per line):
+#   kind,role,permission,user_id,description,is_enabled
+#   permission,,doc:read,,Read documents,true
+#   role,editor,,,Editors,
+#   role_permission,editor,doc:read,,,
+#   user_role,editor,,alice,,
+import csv
+import io
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, UTC
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from uuid import UUID
+
+import yaml
+from pydantic import ValidationError
+from sqlalchemy import Boolean, Column, MetaData, String, Table, delete, exists, insert, select, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Executable
+
+from app.models.rbac import Role, Permission, role_permissions_table, user_roles_table
+from app.schemas.rbac import RoleCreate, PermissionCreate
+from app.crud import effective_permissions as effective
+from app.crud import policy_changes as changelog
+
+FORMAT_YAML = "yaml"
+FORMAT_CSV = "csv"
+CSV_COLUMNS = ["kind", "role", "permission", "user_id", "description", "is_enabled"]
+
+# Rows per INSERT where COPY isn't available, and per multi-row INSERT of new roles/permissions
+LOAD_CHUNK_ROWS = 1000
+# File errors reported before giving up
+MAX_FILE_ERRORS = 20
+
+roles_table = Role.__table__
+permissions_table = Permission.__table__
+
+
+class PolicyFileError(ValueError):
+    """The policy file is malformed or inconsistent; `errors` lists the problems found."""
+
+    def __init__(self, errors: List[str]):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+
+# --- Desired state ---
+
+@dataclass
+class DesiredPolicy:
+    roles: Dict[str, Optional[str]] = field(default_factory=dict) # role_name -> description
+    permissions: Dict[str, Tuple[Optional[str], bool]] = field(default_factory=dict) # name -> (description, is_enabled)
+    role_permissions: Set[Tuple[str, str]] = field(default_factory=set) # (role_name, permission_name)
+    user_roles: Set[Tuple[str, str]] = field(default_factory=set) # (user_id, role_name)
+    errors: List[str] = field(default_factory=list)
+
+    def add_role(self, name: Any, description: Any = None, where: str = "") -> None:
+        if name in self.roles:
+            self.errors.append(f"{where}role '{name}' is declared more than once")
+            return
+        try:
+            role = RoleCreate(role_name=name, description=description)
+        except ValidationError as exc:
+            self.errors.append(f"{where}role {name!r}: {_first_error(exc)}")
+            return
+        self.roles[role.role_name] = role.description
+
+    def add_permission(self, name: Any, description: Any = None, is_enabled: Any = True, where: str = "") -> None:
+        if name in self.permissions:
+            self.errors.append(f"{where}permission '{name}' is declared more than once")
+            return
+        try:
+            permission = PermissionCreate(permission_name=name, description=description, is_enabled=is_enabled)
+        except ValidationError as exc:
+            self.errors.append(f"{where}permission {name!r}: {_first_error(exc)}")
+            return
+        self.permissions[permission.permission_name] = (permission.description, permission.is_enabled)
+
+    def link(self, role_name: str, permission_name: str) -> None:
+        self.role_permissions.add((role_name, permission_name))
+
+    def assign(self, user_id: Any, role_name: str) -> None:
+        self.user_roles.add((str(user_id).strip(), role_name))
+
+    def validate(self) -> "DesiredPolicy":
+        """Checks every link/assignment names a declared role and permission. Raises PolicyFileError."""
+        errors = list(self.errors)
+        for role_name, permission_name in sorted(self.role_permissions):
+            if role_name not in self.roles:
+                errors.append(f"role '{role_name}' (linked to '{permission_name}') is not declared")
+            elif permission_name not in self.permissions:
+                errors.append(f"permission '{permission_name}' (linked from '{role_name}') is not declared")
+            elif not self.permissions[permission_name][1]:
+                errors.append(f"role '{role_name}' links disabled permission '{permission_name}'")
+        for user_id, role_name in sorted(self.user_roles):
+            if not user_id:
+                errors.append(f"blank user_id assigned to '{role_name}'")
+            elif role_name not in self.roles:
+                errors.append(f"role '{role_name}' (assigned to '{user_id}') is not declared")
+        if errors:
+            raise PolicyFileError(errors[:MAX_FILE_ERRORS])
+        return self
+
+
+def _first_error(exc: ValidationError) -> str:
+    error = exc.errors()[0]
+    return f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+
+
+def parse_yaml(text: str) -> DesiredPolicy:
+    try:
+        document = yaml.safe_load(text) or {}
+    except yaml.YAMLError as exc:
+        raise PolicyFileError([f"invalid YAML: {exc}"])
+    if not isinstance(document, dict):
+        raise PolicyFileError(["the top level must be a mapping with roles / permissions / users"])
+    policy = DesiredPolicy()
+    for index, item in enumerate(document.get("permissions") or []):
+        if not isinstance(item, dict):
+            policy.errors.append(f"permissions[{index}] must be a mapping")
+            continue
+        policy.add_permission(item.get("name"), item.get("description"), item.get("enabled", True), f"permissions[{index}]: ")
+    for index, item in enumerate(document.get("roles") or []):
+        if not isinstance(item, dict):
+            policy.errors.append(f"roles[{index}] must be a mapping")
+            continue
+        policy.add_role(item.get("name"), item.get("description"), f"roles[{index}]: ")
+        for permission_name in item.get("permissions") or []:
+            policy.link(item.get("name"), permission_name)
+    users = document.get("users") or {}
+    if not isinstance(users, dict):
+        raise PolicyFileError(["users must map user IDs to lists of role names"])
+    for user_id, role_names in users.items():
+        for role_name in role_names or []:
+            policy.assign(user_id, role_name)
+    return policy.validate()
+
+
+def parse_csv(text: str) -> DesiredPolicy:
+    reader = csv.DictReader(io.StringIO(text))
+    missing = set(CSV_COLUMNS[:4]) - set(reader.fieldnames or [])
+    if missing:
+        raise PolicyFileError([f"CSV header is missing columns: {', '.join(sorted(missing))}"])
+    policy = DesiredPolicy()
+    for line, row in enumerate(reader, start=2):
+        kind = (row.get("kind") or "").strip()
+        role_name, permission_name = (row.get("role") or "").strip(), (row.get("permission") or "").strip()
+        if kind == "role":
+            policy.add_role(role_name, row.get("description") or None, f"line {line}: ")
+        elif kind == "permission":
+            enabled = (row.get("is_enabled") or "true").strip().lower() not in ("false", "0", "no")
+            policy.add_permission(permission_name, row.get("description") or None, enabled, f"line {line}: ")
+        elif kind == "role_permission":
+            policy.link(role_name, permission_name)
+        elif kind == "user_role":
+            policy.assign(row.get("user_id") or "", role_name)
+        else:
+            policy.errors.append(f"line {line}: unknown kind {kind!r}")
+    return policy.validate()
+
+
+def parse(text: str, file_format: str) -> DesiredPolicy:
+    if file_format == FORMAT_YAML:
+        return parse_yaml(text)
+    if file_format == FORMAT_CSV:
+        return parse_csv(text)
+    raise PolicyFileError([f"unsupported format {file_format!r} (expected yaml or csv)"])
+
+
+# --- Staging ---
+
+_staging_metadata = MetaData()
+
+def _staging_table(name: str, *columns: Column) -> Table:
+    # Per-connection, and dropped on commit on Postgres even if the explicit drop is skipped
+    return Table(name, _staging_metadata, *columns, prefixes=["TEMPORARY"], postgresql_on_commit="DROP")
+
+staged_roles = _staging_table(
+    "staged_roles", Column("role_name", String(50), primary_key=True), Column("description", String(255))
+)
+staged_permissions = _staging_table(
+    "staged_permissions",
+    Column("permission_name", String(100), primary_key=True),
+    Column("description", String(255)),
+    Column("is_enabled", Boolean, nullable=False)
+)
+staged_role_permissions = _staging_table(
+    "staged_role_permissions",
+    Column("role_name", String(50), primary_key=True),
+    Column("permission_name", String(100), primary_key=True)
+)
+staged_user_roles = _staging_table(
+    "staged_user_roles", Column("user_id", String, primary_key=True), Column("role_name", String(50), primary_key=True)
+)
+STAGING_TABLES = [staged_roles, staged_permissions, staged_role_permissions, staged_user_roles]
+
+
+def stage(db: Session, policy: DesiredPolicy) -> None:
+    """Creates the staging tables on the session's connection and bulk-loads the desired state."""
+    # Temporary tables live as long as the pooled connection; a failed import (or SQLite,
+    # which runs the CREATE outside the transaction) can leave them behind
+    drop_staging(db)
+    connection = db.connection()
+    for table in STAGING_TABLES:
+        table.create(connection)
+    _load(connection, staged_roles, list(policy.roles.items()))
+    _load(connection, staged_permissions, [(name, desc, enabled) for name, (desc, enabled) in policy.permissions.items()])
+    _load(connection, staged_role_permissions, sorted(policy.role_permissions))
+    _load(connection, staged_user_roles, sorted(policy.user_roles))
+
+
+def drop_staging(db: Session) -> None:
+    connection = db.connection()
+    for table in reversed(STAGING_TABLES):
+        table.drop(connection, checkfirst=True)
+
+
+def _load(connection: Connection, table: Table, rows: List[Tuple[Any, ...]]) -> None:
+    if not rows:
+        return
+    if connection.dialect.name == "postgresql":
+        cursor = connection.connection.cursor()
+        try:
+            if hasattr(cursor, "copy_expert"): # psycopg2
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(rows) # None -> empty unquoted field -> NULL
+                buffer.seek(0)
+                columns = ", ".join(table.columns.keys())
+                cursor.copy_expert(f"COPY {table.name} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+                return
+        finally:
+            cursor.close()
+    keys = table.columns.keys()
+    for start in range(0, len(rows), LOAD_CHUNK_ROWS):
+        connection.execute(insert(table), [dict(zip(keys, row)) for row in rows[start:start + LOAD_CHUNK_ROWS]])
+
+
+# --- Diff ---
+
+@dataclass
+class PolicyDiff:
+    roles_created: List[Dict[str, Any]] = field(default_factory=list)
+    roles_updated: List[Dict[str, Any]] = field(default_factory=list)
+    roles_deleted: List[Dict[str, Any]] = field(default_factory=list)
+    permissions_created: List[Dict[str, Any]] = field(default_factory=list)
+    permissions_updated: List[Dict[str, Any]] = field(default_factory=list)
+    permissions_deleted: List[Dict[str, Any]] = field(default_factory=list)
+    links_added: List[Dict[str, Any]] = field(default_factory=list)
+    links_removed: List[Dict[str, Any]] = field(default_factory=list)
+    assignments_added: List[Dict[str, Any]] = field(default_factory=list)
+    assignments_removed: List[Dict[str, Any]] = field(default_factory=list)
+
+    CATEGORIES = (
+        "roles_created", "roles_updated", "roles_deleted",
+        "permissions_created", "permissions_updated", "permissions_deleted",
+        "links_added", "links_removed", "assignments_added", "assignments_removed",
+    )
+
+    def counts(self) -> Dict[str, int]:
+        return {category: len(getattr(self, category)) for category in self.CATEGORIES}
+
+    @property
+    def empty(self) -> bool:
+        return not any(self.counts().values())
+
+    def report(self, sample: int = 100) -> Dict[str, Any]:
+        """Counts plus up to `sample` entries per category, names only (IDs of new objects aren't final in a dry run)."""
+        changes = {}
+        for category in self.CATEGORIES:
+            changes[category] = [
+                {key: value for key, value in item.items() if not key.endswith("_id") or key == "user_id"}
+                for item in getattr(self, category)[:sample]
+            ]
+        return {
+            "counts": self.counts(),
+            "changes": changes,
+            "truncated": any(len(getattr(self, category)) > sample for category in self.CATEGORIES),
+        }
+
+
+def _rows(db: Session, statement) -> List[Dict[str, Any]]:
+    return [dict(row) for row in db.execute(statement).mappings()]
+
+
+def compute_diff(db: Session, *, prune: bool = True) -> PolicyDiff:
+    """
+    Compares the staged state with the live tables, matching roles and
+    permissions by name. Without `prune`, live objects missing from the file
+    are left alone instead of being deleted.
+    """
+    r, p, rp, ur = roles_table, permissions_table, role_permissions_table, user_roles_table
+    sr, sp, srp, sur = staged_roles, staged_permissions, staged_role_permissions, staged_user_roles
+    diff = PolicyDiff()
+
+    diff.roles_created = _rows(db, select(sr.c.role_name, sr.c.description)
+        .where(~exists().where(r.c.role_name == sr.c.role_name)).order_by(sr.c.role_name))
+    diff.roles_updated = _rows(db, select(r.c.role_id, r.c.role_name, sr.c.description)
+        .join(sr, sr.c.role_name == r.c.role_name)
+        .where(r.c.description.is_distinct_from(sr.c.description)).order_by(r.c.role_name))
+    diff.permissions_created = _rows(db, select(sp.c.permission_name, sp.c.description, sp.c.is_enabled)
+        .where(~exists().where(p.c.permission_name == sp.c.permission_name)).order_by(sp.c.permission_name))
+    diff.permissions_updated = _rows(db, select(
+            p.c.permission_id, p.c.permission_name, sp.c.description, sp.c.is_enabled, p.c.is_enabled.label("was_enabled")
+        ).join(sp, sp.c.permission_name == p.c.permission_name)
+        .where(p.c.description.is_distinct_from(sp.c.description) | (p.c.is_enabled != sp.c.is_enabled))
+        .order_by(p.c.permission_name))
+    # New roles/permissions have no live row yet, so their IDs come back NULL and are filled in by assign_ids
+    diff.links_added = _rows(db, select(srp.c.role_name, srp.c.permission_name, r.c.role_id, p.c.permission_id)
+        .select_from(srp.outerjoin(r, r.c.role_name == srp.c.role_name).outerjoin(p, p.c.permission_name == srp.c.permission_name))
+        .where(~exists().where(rp.c.role_id == r.c.role_id, rp.c.permission_id == p.c.permission_id))
+        .order_by(srp.c.role_name, srp.c.permission_name))
+    diff.assignments_added = _rows(db, select(sur.c.user_id, sur.c.role_name, r.c.role_id)
+        .select_from(sur.outerjoin(r, r.c.role_name == sur.c.role_name))
+        .where(~exists().where(ur.c.user_id == sur.c.user_id, ur.c.role_id == r.c.role_id))
+        .order_by(sur.c.role_name, sur.c.user_id))
+    if prune:
+        diff.roles_deleted = _rows(db, select(r.c.role_id, r.c.role_name)
+            .where(~exists().where(sr.c.role_name == r.c.role_name)).order_by(r.c.role_name))
+        diff.permissions_deleted = _rows(db, select(p.c.permission_id, p.c.permission_name, p.c.is_enabled)
+            .where(~exists().where(sp.c.permission_name == p.c.permission_name)).order_by(p.c.permission_name))
+        diff.links_removed = _rows(db, select(r.c.role_name, p.c.permission_name, rp.c.role_id, rp.c.permission_id)
+            .select_from(rp.join(r, r.c.role_id == rp.c.role_id).join(p, p.c.permission_id == rp.c.permission_id))
+            .where(~exists().where(srp.c.role_name == r.c.role_name, srp.c.permission_name == p.c.permission_name))
+            .order_by(r.c.role_name, p.c.permission_name))
+        diff.assignments_removed = _rows(db, select(ur.c.user_id, r.c.role_name, ur.c.role_id)
+            .select_from(ur.join(r, r.c.role_id == ur.c.role_id))
+            .where(~exists().where(sur.c.user_id == ur.c.user_id, sur.c.role_name == r.c.role_name))
+            .order_by(r.c.role_name, ur.c.user_id))
+    return diff
+
+
+def assign_ids(diff: PolicyDiff) -> None:
+    """Gives new roles/permissions their UUIDs and fills them into the links/assignments that name them."""
+    new_roles = {row["role_name"]: row.setdefault("role_id", uuid.uuid4()) for row in diff.roles_created}
+    new_permissions = {row["permission_name"]: row.setdefault("permission_id", uuid.uuid4()) for row in diff.permissions_created}
+    for row in diff.links_added + diff.assignments_added:
+        if row["role_id"] is None:
+            row["role_id"] = new_roles[row["role_name"]]
+    for row in diff.links_added:
+        if row["permission_id"] is None:
+            row["permission_id"] = new_permissions[row["permission_name"]]
+
+
+# --- Apply ---
+
+def apply_statements(diff: PolicyDiff) -> List[Executable]:
+    """Set-based statements turning the live tables into the staged state (after `assign_ids`)."""
+    r, p, rp, ur = roles_table, permissions_table, role_permissions_table, user_roles_table
+    sr, sp, srp, sur = staged_roles, staged_permissions, staged_role_permissions, staged_user_roles
+    now = datetime.now(UTC)
+    statements: List[Executable] = []
+
+    # Removals first, so deleted roles/permissions have no links left
+    if diff.assignments_removed:
+        statements.append(delete(ur).where(~exists(
+            select(sur.c.user_id).select_from(sur.join(r, r.c.role_name == sur.c.role_name))
+            .where(sur.c.user_id == ur.c.user_id, r.c.role_id == ur.c.role_id)
+        )))
+    if diff.links_removed:
+        statements.append(delete(rp).where(~exists(
+            select(srp.c.role_name)
+            .select_from(srp.join(r, r.c.role_name == srp.c.role_name).join(p, p.c.permission_name == srp.c.permission_name))
+            .where(r.c.role_id == rp.c.role_id, p.c.permission_id == rp.c.permission_id)
+        )))
+    if diff.roles_deleted:
+        statements.append(delete(r).where(~exists().where(sr.c.role_name == r.c.role_name)))
+    if diff.permissions_deleted:
+        statements.append(delete(p).where(~exists().where(sp.c.permission_name == p.c.permission_name)))
+
+    for start in range(0, len(diff.roles_created), LOAD_CHUNK_ROWS):
+        statements.append(insert(r).values([
+            {"role_id": row["role_id"], "role_name": row["role_name"], "description": row["description"]}
+            for row in diff.roles_created[start:start + LOAD_CHUNK_ROWS]
+        ]))
+    if diff.roles_updated:
+        statements.append(update(r).where(r.c.role_name == sr.c.role_name)
+            .where(r.c.description.is_distinct_from(sr.c.description))
+            .values(description=sr.c.description, updated_at=now))
+    for start in range(0, len(diff.permissions_created), LOAD_CHUNK_ROWS):
+        statements.append(insert(p).values([
+            {key: row[key] for key in ("permission_id", "permission_name", "description", "is_enabled")}
+            for row in diff.permissions_created[start:start + LOAD_CHUNK_ROWS]
+        ]))
+    if diff.permissions_updated:
+        statements.append(update(p).where(p.c.permission_name == sp.c.permission_name)
+            .where(p.c.description.is_distinct_from(sp.c.description) | (p.c.is_enabled != sp.c.is_enabled))
+            .values(description=sp.c.description, is_enabled=sp.c.is_enabled, updated_at=now))
+
+    if diff.links_added:
+        statements.append(insert(rp).from_select(["role_id", "permission_id"],
+            select(r.c.role_id, p.c.permission_id)
+            .select_from(srp.join(r, r.c.role_name == srp.c.role_name).join(p, p.c.permission_name == srp.c.permission_name))
+            .where(~exists().where(rp.c.role_id == r.c.role_id, rp.c.permission_id == p.c.permission_id))))
+    if diff.assignments_added:
+        statements.append(insert(ur).from_select(["user_id", "role_id"],
+            select(sur.c.user_id, r.c.role_id)
+            .select_from(sur.join(r, r.c.role_name == sur.c.role_name))
+            .where(~exists().where(ur.c.user_id == sur.c.user_id, ur.c.role_id == r.c.role_id))))
+
+    # An import can touch any share of the policy; a full rebuild is two statements either way
+    statements.extend(effective.rebuild_statements())
+    return statements
+
+
+def policy_changes(diff: PolicyDiff) -> Tuple[List[changelog.Change], List[UUID]]:
+    """
+    Change-log entries for the diff, plus the permissions being re-enabled
+    (their role links are re-logged with `changelog.relink_statement`).
+    """
+    changes: List[changelog.Change] = []
+    relinked: List[UUID] = []
+    deleted_roles = {row["role_id"] for row in diff.roles_deleted}
+    # Links of these permissions are implied by the permission's own entry
+    implied: Set[UUID] = {row["permission_id"] for row in diff.permissions_deleted}
+    enabled = {row["permission_name"]: row["is_enabled"] for row in diff.permissions_created}
+
+    changes += [changelog.role_upserted(row["role_id"], row["role_name"]) for row in diff.roles_created]
+    changes += [changelog.role_deleted(row["role_id"]) for row in diff.roles_deleted]
+    changes += [
+        changelog.permission_upserted(row["permission_id"], row["permission_name"])
+        for row in diff.permissions_created if row["is_enabled"]
+    ]
+    for row in diff.permissions_updated:
+        enabled[row["permission_name"]] = row["is_enabled"]
+        changes += changelog.permission_updated(
+            permission_id=row["permission_id"], old_name=row["permission_name"], new_name=row["permission_name"],
+            was_enabled=row["was_enabled"], is_enabled=row["is_enabled"]
+        )
+        if row["was_enabled"] != row["is_enabled"]:
+            implied.add(row["permission_id"])
+            if row["is_enabled"]:
+                relinked.append(row["permission_id"])
+    changes += [changelog.permission_deleted(row["permission_id"]) for row in diff.permissions_deleted]
+
+    for op, rows in ((changelog.OP_DELETE, diff.links_removed), (changelog.OP_UPSERT, diff.links_added)):
+        for row in rows:
+            if row["permission_id"] in implied or row["role_id"] in deleted_roles:
+                continue
+            if op == changelog.OP_UPSERT and not enabled.get(row["permission_name"], True):
+                continue # The file can't link disabled permissions, but stay consistent with the snapshot
+            changes.append(changelog.role_permission_changed(op, row["role_id"], row["permission_id"]))
+    changes += [
+        changelog.user_role_changed(changelog.OP_DELETE, row["user_id"], row["role_id"])
+        for row in diff.assignments_removed if row["role_id"] not in deleted_roles
+    ]
+    changes += [changelog.user_role_changed(changelog.OP_UPSERT, row["user_id"], row["role_id"]) for row in diff.assignments_added]
+    return changes, relinked
+
+
+def affected(diff: PolicyDiff) -> Tuple[Set[str], Set[UUID]]:
+    """Users and roles whose cached permissions the import invalidates."""
+    user_ids = {row["user_id"] for row in diff.assignments_added + diff.assignments_removed}
+    role_ids = {row["role_id"] for row in diff.links_added + diff.links_removed + diff.roles_deleted}
+    return user_ids, role_ids
+
+
+def needs_full_flush(diff: PolicyDiff) -> bool:
+    """Permission flips and deletes reach every role linking them, which the diff doesn't list."""
+    return bool(diff.permissions_updated or diff.permissions_deleted)
+
+
+def all_role_ids_statement():
+    return select(roles_table.c.role_id)
@@ -1,12 +1,38 @@
 # rbac_service/app/crud/rbac.py
-from sqlalchemy.orm import Session
-from sqlalchemy import select, delete, insert, text, exists, and_ # Added exists, and_
-from typing import List, Optional, Dict, Any # Added Dict, Any
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import select, delete, insert, text, exists, and_, func # Added exists, and_
+from typing import List, Optional, Dict, Any, Sequence, Tuple # Added Dict, Any
 from uuid import UUID
 
 # Import models, schemas, and association tables
 from app.models.rbac import Role, Permission, user_roles_table, role_permissions_table # Import table
 from app.schemas.rbac import RoleCreate, RoleUpdate, PermissionCreate, PermissionUpdate # Import Update Schemas
+# Keeps the denormalized user_effective_permissions table in step with every write below
+from app.crud import effective_permissions as effective
+from app.crud import policy_epoch
+# Deltas served by GET /policy/changes, logged in the same transaction as each write
+from app.crud import policy_changes as changelog
+from app.crud import bulk_assignments as bulk
+from app.crud import changesets
+from app.crud import policy_import
+from app.crud import reverse_lookups
+from app.core.config import settings
+from app.core.policy_bus import stage_policy_change
+
+def _bump_policy_epoch(db: Session, changes: Sequence[changelog.Change] = ()) -> int:
+    """Advances the global policy epoch inside the caller's transaction and logs `changes` under it."""
+    epoch = db.execute(policy_epoch.bump_statement()).scalar_one_or_none()
+    if epoch is None: # Row not seeded (tables created without migrations)
+        epoch = 1
+        db.execute(policy_epoch.seed_statement(epoch))
+    for stmt in changelog.log_statements(epoch, changes):
+        db.execute(stmt)
+    if epoch % changelog.PRUNE_EVERY_EPOCHS == 0:
+        for stmt in changelog.prune_statements(epoch, settings.POLICY_CHANGE_LOG_RETENTION_EPOCHS):
+            db.execute(stmt)
+    # Published to other workers and applied locally when the transaction commits
+    stage_policy_change(db, epoch=epoch)
+    return epoch
 
 # --- Role CRUD ---
 
@@ -19,15 +45,25 @@ def get_role_by_name(db: Session, role_name: str) -> Optional[Role]:
     statement = select(Role).where(Role.role_name == role_name)
     return db.execute(statement).scalar_one_or_none()
 
-def get_roles(db: Session, skip: int = 0, limit: int = 100) -> List[Role]:
-    """Gets a list of roles with pagination."""
-    statement = select(Role).offset(skip).limit(limit).order_by(Role.role_name)
+def get_roles(db: Session, skip: int = 0, limit: int = 100, *, after_name: Optional[str] = None) -> List[Role]:
+    """
+    Gets a page of roles ordered by name, with their permissions eager-loaded
+    (one extra SELECT ... IN for the whole page instead of one per role).
+    Pass `after_name` (the last name of the previous page) for keyset paging.
+    """
+    statement = select(Role).options(selectinload(Role.permissions)).order_by(Role.role_name).limit(limit)
+    if after_name is not None:
+        statement = statement.where(Role.role_name > after_name)
+    else:
+        statement = statement.offset(skip)
     return db.execute(statement).scalars().all()
 
 def create_role(db: Session, *, role_in: RoleCreate) -> Role:
     """Creates a new role."""
     db_role = Role(**role_in.model_dump())
     db.add(db_role)
+    db.flush() # Assigns role_id for the change log
+    _bump_policy_epoch(db, [changelog.role_upserted(db_role.role_id, db_role.role_name)])
     db.commit()
     db.refresh(db_role)
     return db_role
@@ -39,6 +75,7 @@ def update_role(db: Session, *, db_role: Role, role_in: RoleUpdate) -> Role:
     for field, value in update_data.items():
         setattr(db_role, field, value)
     db.add(db_role) # Add to session to track changes
+    _bump_policy_epoch(db, [changelog.role_upserted(db_role.role_id, db_role.role_name)])
     db.commit()
     db.refresh(db_role)
     return db_role
@@ -47,8 +84,13 @@ def delete_role(db: Session, *, role_id: UUID) -> bool:
     """Deletes a role by its ID. Returns True if deleted, False otherwise."""
     db_role = db.get(Role, role_id)
     if db_role:
+        # Revoke what only this role granted while its assignments still exist
+        db.execute(effective.revoke_statement(
+            users_of_role_id=role_id, permissions_of_role_id=role_id, excluded_role_id=role_id
+        ))
         # Cascading deletes in the DB should handle association tables
         db.delete(db_role)
+        _bump_policy_epoch(db, [changelog.role_deleted(role_id)])
         db.commit()
         return True
     return False
@@ -64,25 +106,52 @@ def get_permission_by_name(db: Session, permission_name: str) -> Optional[Permis
      statement = select(Permission).where(Permission.permission_name == permission_name)
      return db.execute(statement).scalar_one_or_none()
 
-def get_permissions(db: Session, skip: int = 0, limit: int = 100) -> List[Permission]:
-    """Gets a list of permissions with pagination."""
-    statement = select(Permission).offset(skip).limit(limit).order_by(Permission.permission_name)
+def get_permissions(db: Session, skip: int = 0, limit: int = 100, *, after_name: Optional[str] = None) -> List[Permission]:
+    """Gets a page of permissions ordered by name; `after_name` as in get_roles."""
+    statement = select(Permission).order_by(Permission.permission_name).limit(limit)
+    if after_name is not None:
+        statement = statement.where(Permission.permission_name > after_name)
+    else:
+        statement = statement.offset(skip)
     return db.execute(statement).scalars().all()
 
 def create_permission(db: Session, *, permission_in: PermissionCreate) -> Permission:
     """Creates a new permission."""
     db_permission = Permission(**permission_in.model_dump())
     db.add(db_permission)
+    db.flush() # Assigns permission_id for the change log
+    changes = [changelog.permission_upserted(db_permission.permission_id, db_permission.permission_name)]
+    # Disabled permissions are not part of the snapshot
+    _bump_policy_epoch(db, changes if db_permission.is_enabled else [])
     db.commit()
     db.refresh(db_permission)
     return db_permission
 
 def update_permission(db: Session, *, db_permission: Permission, permission_in: PermissionUpdate) -> Permission:
     """Updates an existing permission."""
+    old_name, was_enabled = db_permission.permission_name, db_permission.is_enabled
     update_data = permission_in.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_permission, field, value)
     db.add(db_permission) # Add to session to track changes
+    db.flush() # Grants below read the new name / is_enabled
+    for stmt in effective.permission_changed_statements(
+        permission_id=db_permission.permission_id,
+        old_name=old_name,
+        new_name=db_permission.permission_name,
+        was_enabled=was_enabled,
+        is_enabled=db_permission.is_enabled
+    ):
+        db.execute(stmt)
+    epoch = _bump_policy_epoch(db, changelog.permission_updated(
+        permission_id=db_permission.permission_id,
+        old_name=old_name,
+        new_name=db_permission.permission_name,
+        was_enabled=was_enabled,
+        is_enabled=db_permission.is_enabled
+    ))
+    if db_permission.is_enabled and not was_enabled:
+        db.execute(changelog.relink_statement(epoch, db_permission.permission_id))
     db.commit()
     db.refresh(db_permission)
     return db_permission
@@ -107,6 +176,7 @@ def delete_permission(db: Session, *, permission_id: UUID) -> bool:
 
     # If not assigned, proceed with deletion
     db.delete(db_permission)
+    _bump_policy_epoch(db, [changelog.permission_deleted(permission_id)])
     db.commit()
     return True
 
@@ -118,6 +188,11 @@ def assign_permission_to_role(db: Session, *, role: Role, permission: Permission
     if permission not in role.permissions:
         role.permissions.append(permission)
         db.add(role)
+        db.flush() # Write the role_permissions row before deriving grants from it
+        db.execute(effective.grant_statement(role_id=role.role_id, permission_id=permission.permission_id))
+        link = changelog.role_permission_changed(changelog.OP_UPSERT, role.role_id, permission.permission_id)
+        # Links to disabled permissions are not part of the snapshot
+        _bump_policy_epoch(db, [link] if permission.is_enabled else [])
         db.commit()
         db.refresh(role)
     return role
@@ -127,6 +202,11 @@ def remove_permission_from_role(db: Session, *, role: Role, permission: Permissi
     if permission in role.permissions:
         role.permissions.remove(permission)
         db.add(role)
+        db.flush()
+        db.execute(effective.revoke_statement(
+            users_of_role_id=role.role_id, permission_names=[permission.permission_name]
+        ))
+        _bump_policy_epoch(db, [changelog.role_permission_changed(changelog.OP_DELETE, role.role_id, permission.permission_id)])
         db.commit()
         db.refresh(role)
     return role
@@ -144,6 +224,8 @@ def assign_role_to_user(db: Session, *, user_id: str, role_id: UUID) -> None:
     if not exists_result:
         insert_stmt = insert(user_roles_table).values(user_id=user_id, role_id=role_id)
         db.execute(insert_stmt)
+        db.execute(effective.grant_statement(user_ids=[user_id], role_id=role_id))
+        _bump_policy_epoch(db, [changelog.user_role_changed(changelog.OP_UPSERT, user_id, role_id)])
         db.commit()
 
 def remove_role_from_user(db: Session, *, user_id: str, role_id: UUID) -> None:
@@ -153,9 +235,133 @@ def remove_role_from_user(db: Session, *, user_id: str, role_id: UUID) -> None:
          user_roles_table.c.role_id == role_id
     )
     db.execute(delete_stmt)
+    db.execute(effective.revoke_statement(user_ids=[user_id], permissions_of_role_id=role_id))
+    _bump_policy_epoch(db, [changelog.user_role_changed(changelog.OP_DELETE, user_id, role_id)])
+    db.commit()
+
+def bulk_assign_role_to_users(db: Session, *, role_id: UUID, user_ids: Sequence[str]) -> List[str]:
+    """
+    Assigns a role to many users in one transaction with set-based statements.
+    Returns the users that didn't already hold it (existing assignments are left alone).
+    """
+    dialect_name = db.get_bind().dialect.name
+    assigned: List[str] = []
+    for chunk in bulk.chunks(user_ids):
+        assigned.extend(db.execute(bulk.assign_statement(dialect_name, role_id=role_id, user_ids=chunk)).scalars().all())
+    if assigned:
+        for chunk in bulk.chunks(assigned):
+            db.execute(effective.grant_statement(user_ids=chunk, role_id=role_id))
+        _bump_policy_epoch(db, [changelog.user_role_changed(changelog.OP_UPSERT, user_id, role_id) for user_id in assigned])
     db.commit()
+    return assigned
+
+def bulk_remove_role_from_users(db: Session, *, role_id: UUID, user_ids: Sequence[str]) -> List[str]:
+    """Revokes a role from many users in one transaction. Returns the users that held it."""
+    revoked: List[str] = []
+    for chunk in bulk.chunks(user_ids):
+        revoked.extend(db.execute(bulk.revoke_statement(role_id=role_id, user_ids=chunk)).scalars().all())
+    if revoked:
+        for chunk in bulk.chunks(revoked):
+            db.execute(effective.revoke_statement(user_ids=chunk, permissions_of_role_id=role_id))
+        _bump_policy_epoch(db, [changelog.user_role_changed(changelog.OP_DELETE, user_id, role_id) for user_id in revoked])
+    db.commit()
+    return revoked
 
 def get_user_roles(db: Session, *, user_id: str) -> List[Role]:
     """Gets all roles assigned to a specific user."""
-    stmt = select(Role).join(user_roles_table).where(user_roles_table.c.user_id == user_id).order_by(Role.role_name)
-    return db.execute(stmt).scalars().all()
\ No newline at end of file
+    stmt = select(Role).options(selectinload(Role.permissions))\
+        .join(user_roles_table).where(user_roles_table.c.user_id == user_id).order_by(Role.role_name)
+    return db.execute(stmt).scalars().all()
+
+# --- Changesets ---
+
+def apply_changeset(db: Session, *, operations: Sequence[Any]) -> Tuple[int, List[Dict[str, Any]]]:
+    """
+    Validates and applies a list of changeset operations in one transaction.
+    Returns (policy epoch after commit, per-operation results); raises
+    changesets.ChangesetError, with nothing written, if any operation is invalid.
+    """
+    roles_stmt, permissions_stmt = changesets.lookup_statements(operations)
+    plan = changesets.plan(operations, db.execute(roles_stmt).all(), db.execute(permissions_stmt).all())
+    links_stmt, assignments_stmt = changesets.existing_statements(plan)
+    write = changesets.write_statements(
+        plan,
+        existing_links={tuple(row) for row in db.execute(links_stmt)} if links_stmt is not None else set(),
+        existing_assignments={tuple(row) for row in db.execute(assignments_stmt)} if assignments_stmt is not None else set()
+    )
+    if not write.statements: # Everything was already in the requested state
+        return db.execute(policy_epoch.current_statement()).scalar_one_or_none() or 0, plan.results
+    for stmt in write.statements:
+        db.execute(stmt)
+    stage_policy_change(db, user_ids=write.user_ids, role_ids=write.role_ids)
+    epoch = _bump_policy_epoch(db, write.changes)
+    db.commit()
+    return epoch, plan.results
+
+# --- Declarative import ---
+
+def import_policy(
+    db: Session,
+    *,
+    policy: policy_import.DesiredPolicy,
+    dry_run: bool = False,
+    prune: bool = True
+) -> Tuple[policy_import.PolicyDiff, Optional[int]]:
+    """
+    Reconciles the live policy with a desired state in one transaction: stages
+    it, diffs it in SQL and applies only the delta. Returns (diff, new epoch);
+    the epoch is None for a dry run or when nothing changed.
+    """
+    policy_import.stage(db, policy) # Created in this transaction, so a rollback drops them too
+    diff = policy_import.compute_diff(db, prune=prune)
+    if dry_run or diff.empty:
+        policy_import.drop_staging(db)
+        return diff, None
+    policy_import.assign_ids(diff)
+    for stmt in policy_import.apply_statements(diff):
+        db.execute(stmt)
+    user_ids, role_ids = policy_import.affected(diff)
+    if policy_import.needs_full_flush(diff):
+        role_ids |= set(db.execute(policy_import.all_role_ids_statement()).scalars())
+    stage_policy_change(db, user_ids=user_ids, role_ids=role_ids)
+    changes, relinked = policy_import.policy_changes(diff)
+    epoch = _bump_policy_epoch(db, changes)
+    for permission_id in relinked:
+        db.execute(changelog.relink_statement(epoch, permission_id))
+    policy_import.drop_staging(db)
+    db.commit()
+    return diff, epoch
+
+def rebuild_effective_permissions(db: Session) -> int:
+    """Recomputes user_effective_permissions from scratch. Returns the number of rows written."""
+    delete_stmt, insert_stmt = effective.rebuild_statements()
+    db.execute(delete_stmt)
+    inserted = db.execute(insert_stmt).rowcount
+    _bump_policy_epoch(db)
+    db.commit()
+    return inserted
+
+# --- Chunked operations (one short transaction per call, run by background jobs in app/crud/jobs.py) ---
+
+def count_role_holders(db: Session, *, role_id: UUID) -> int:
+    stmt = select(func.count()).select_from(user_roles_table).where(user_roles_table.c.role_id == role_id)
+    return db.execute(stmt).scalar_one()
+
+def remove_role_holders_chunk(db: Session, *, role_id: UUID, limit: int) -> List[str]:
+    """Revokes the role from up to `limit` of its holders. Returns them; [] once nobody holds it."""
+    user_ids = db.execute(reverse_lookups.role_holders_statement(role_id, limit=limit)).scalars().all()
+    if not user_ids:
+        return []
+    stage_policy_change(db, user_ids=user_ids)
+    return bulk_remove_role_from_users(db, role_id=role_id, user_ids=user_ids)
+
+def rebuild_effective_permissions_chunk(db: Session, *, after_user_id: Optional[str], limit: int) -> List[str]:
+    """Recomputes the effective permissions of the next `limit` users after `after_user_id`. Returns them; [] when done."""
+    user_ids = db.execute(effective.users_after_statement(after_user_id, limit)).scalars().all()
+    if user_ids:
+        stage_policy_change(db, user_ids=user_ids)
+        db.execute(effective.revoke_statement(user_ids=user_ids))
+        db.execute(effective.grant_statement(user_ids=user_ids))
+        _bump_policy_epoch(db)
+        db.commit()
+    return user_ids
@@ -0,0 +1,304 @@
+# rbac_service/app/crud/rbac_async.py
+# Async variants of app/crud/rbac.py for use with an AsyncSession.
+# Relationships can't be lazy-loaded under asyncio, so every function that
+# returns a Role eager-loads Role.permissions (needed by RoleResponse).
+# Unlike the sync module, whose callers (app/api/v1/endpoints/manage.py) stage
+# the affected users/roles themselves, every write here stages them with
+# `stage_policy_change`, so the caches are invalidated when it commits.
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy import select, delete, insert, exists
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from app.models.rbac import Role, Permission, user_roles_table, role_permissions_table
+from app.schemas.rbac import RoleCreate, RoleUpdate, PermissionCreate, PermissionUpdate
+from app.crud import effective_permissions as effective
+from app.crud import policy_epoch
+# Deltas served by GET /policy/changes, logged in the same transaction as each write
+from app.crud import policy_changes as changelog
+from app.crud import bulk_assignments as bulk
+from app.crud import changesets
+from app.core.config import settings
+from app.core.policy_bus import stage_policy_change
+
+async def _refresh_role(db: AsyncSession, db_role: Role) -> None:
+    """Refreshes a role's columns and its permissions collection after a commit."""
+    await db.refresh(db_role)
+    await db.refresh(db_role, attribute_names=["permissions"])
+
+async def _bump_policy_epoch(db: AsyncSession, changes: Sequence[changelog.Change] = ()) -> int:
+    """Advances the global policy epoch inside the caller's transaction and logs `changes` under it."""
+    epoch = (await db.execute(policy_epoch.bump_statement())).scalar_one_or_none()
+    if epoch is None: # Row not seeded (tables created without migrations)
+        epoch = 1
+        await db.execute(policy_epoch.seed_statement(epoch))
+    for stmt in changelog.log_statements(epoch, changes):
+        await db.execute(stmt)
+    if epoch % changelog.PRUNE_EVERY_EPOCHS == 0:
+        for stmt in changelog.prune_statements(epoch, settings.POLICY_CHANGE_LOG_RETENTION_EPOCHS):
+            await db.execute(stmt)
+    stage_policy_change(db.sync_session, epoch=epoch)
+    return epoch
+
+# --- Role CRUD ---
+
+async def get_role(db: AsyncSession, role_id: UUID) -> Optional[Role]:
+    """Gets a single role by its ID."""
+    return await db.get(Role, role_id, options=[selectinload(Role.permissions)])
+
+async def get_role_by_name(db: AsyncSession, role_name: str) -> Optional[Role]:
+    """Gets a single role by its name."""
+    statement = select(Role).options(selectinload(Role.permissions)).where(Role.role_name == role_name)
+    return (await db.execute(statement)).scalar_one_or_none()
+
+async def get_roles(db: AsyncSession, skip: int = 0, limit: int = 100, *, after_name: Optional[str] = None) -> List[Role]:
+    """Gets a page of roles ordered by name; `after_name` for keyset paging as in rbac.get_roles."""
+    statement = select(Role).options(selectinload(Role.permissions)).order_by(Role.role_name).limit(limit)
+    if after_name is not None:
+        statement = statement.where(Role.role_name > after_name)
+    else:
+        statement = statement.offset(skip)
+    return (await db.execute(statement)).scalars().all()
+
+async def create_role(db: AsyncSession, *, role_in: RoleCreate) -> Role:
+    """Creates a new role."""
+    db_role = Role(**role_in.model_dump())
+    db.add(db_role)
+    await db.flush() # Assigns role_id for the change log
+    await _bump_policy_epoch(db, [changelog.role_upserted(db_role.role_id, db_role.role_name)])
+    await db.commit()
+    await _refresh_role(db, db_role)
+    return db_role
+
+async def update_role(db: AsyncSession, *, db_role: Role, role_in: RoleUpdate) -> Role:
+    """Updates an existing role."""
+    update_data = role_in.model_dump(exclude_unset=True)
+    for field, value in update_data.items():
+        setattr(db_role, field, value)
+    db.add(db_role)
+    await _bump_policy_epoch(db, [changelog.role_upserted(db_role.role_id, db_role.role_name)])
+    await db.commit()
+    await _refresh_role(db, db_role)
+    return db_role
+
+async def delete_role(db: AsyncSession, *, role_id: UUID) -> bool:
+    """Deletes a role by its ID. Returns True if deleted, False otherwise."""
+    db_role = await db.get(Role, role_id)
+    if db_role:
+        stage_policy_change(db.sync_session, role_ids=[role_id])
+        await db.execute(effective.revoke_statement(
+            users_of_role_id=role_id, permissions_of_role_id=role_id, excluded_role_id=role_id
+        ))
+        # Cascading deletes in the DB should handle association tables
+        await db.delete(db_role)
+        await _bump_policy_epoch(db, [changelog.role_deleted(role_id)])
+        await db.commit()
+        return True
+    return False
+
+# --- Permission CRUD ---
+
+async def get_permission(db: AsyncSession, permission_id: UUID) -> Optional[Permission]:
+    """Gets a single permission by its ID."""
+    return await db.get(Permission, permission_id)
+
+async def get_permission_by_name(db: AsyncSession, permission_name: str) -> Optional[Permission]:
+    """Gets a single permission by its name."""
+    statement = select(Permission).where(Permission.permission_name == permission_name)
+    return (await db.execute(statement)).scalar_one_or_none()
+
+async def get_permissions(db: AsyncSession, skip: int = 0, limit: int = 100, *, after_name: Optional[str] = None) -> List[Permission]:
+    """Gets a page of permissions ordered by name; `after_name` as in get_roles."""
+    statement = select(Permission).order_by(Permission.permission_name).limit(limit)
+    if after_name is not None:
+        statement = statement.where(Permission.permission_name > after_name)
+    else:
+        statement = statement.offset(skip)
+    return (await db.execute(statement)).scalars().all()
+
+async def create_permission(db: AsyncSession, *, permission_in: PermissionCreate) -> Permission:
+    """Creates a new permission."""
+    db_permission = Permission(**permission_in.model_dump())
+    db.add(db_permission)
+    await db.flush() # Assigns permission_id for the change log
+    changes = [changelog.permission_upserted(db_permission.permission_id, db_permission.permission_name)]
+    # Disabled permissions are not part of the snapshot
+    await _bump_policy_epoch(db, changes if db_permission.is_enabled else [])
+    await db.commit()
+    await db.refresh(db_permission)
+    return db_permission
+
+async def update_permission(db: AsyncSession, *, db_permission: Permission, permission_in: PermissionUpdate) -> Permission:
+    """Updates an existing permission."""
+    old_name, was_enabled = db_permission.permission_name, db_permission.is_enabled
+    update_data = permission_in.model_dump(exclude_unset=True)
+    if "permission_name" in update_data or "is_enabled" in update_data:
+        # Renaming or enabling/disabling changes the effective permissions of every role holding it
+        holders = select(role_permissions_table.c.role_id).where(role_permissions_table.c.permission_id == db_permission.permission_id)
+        stage_policy_change(db.sync_session, role_ids=(await db.execute(holders)).scalars().all())
+    for field, value in update_data.items():
+        setattr(db_permission, field, value)
+    db.add(db_permission)
+    await db.flush()
+    for stmt in effective.permission_changed_statements(
+        permission_id=db_permission.permission_id,
+        old_name=old_name,
+        new_name=db_permission.permission_name,
+        was_enabled=was_enabled,
+        is_enabled=db_permission.is_enabled
+    ):
+        await db.execute(stmt)
+    epoch = await _bump_policy_epoch(db, changelog.permission_updated(
+        permission_id=db_permission.permission_id,
+        old_name=old_name,
+        new_name=db_permission.permission_name,
+        was_enabled=was_enabled,
+        is_enabled=db_permission.is_enabled
+    ))
+    if db_permission.is_enabled and not was_enabled:
+        await db.execute(changelog.relink_statement(epoch, db_permission.permission_id))
+    await db.commit()
+    await db.refresh(db_permission)
+    return db_permission
+
+async def delete_permission(db: AsyncSession, *, permission_id: UUID) -> bool:
+    """
+    Deletes a permission by its ID ONLY if it's not assigned to any roles.
+    Returns True if deleted, False otherwise (or if not found).
+    """
+    db_permission = await db.get(Permission, permission_id)
+    if not db_permission:
+        return False
+
+    assignment_exists_stmt = select(exists().where(role_permissions_table.c.permission_id == permission_id))
+    if (await db.execute(assignment_exists_stmt)).scalar():
+        return False
+
+    await db.delete(db_permission)
+    await _bump_policy_epoch(db, [changelog.permission_deleted(permission_id)])
+    await db.commit()
+    return True
+
+# --- Role-Permission Assignment CRUD ---
+# `role` must come from get_role/get_role_by_name above so its permissions are loaded.
+
+async def assign_permission_to_role(db: AsyncSession, *, role: Role, permission: Permission) -> Role:
+    """Assigns a permission to a role. Returns the updated Role."""
+    if permission not in role.permissions:
+        stage_policy_change(db.sync_session, role_ids=[role.role_id])
+        role.permissions.append(permission)
+        db.add(role)
+        await db.flush()
+        await db.execute(effective.grant_statement(role_id=role.role_id, permission_id=permission.permission_id))
+        link = changelog.role_permission_changed(changelog.OP_UPSERT, role.role_id, permission.permission_id)
+        # Links to disabled permissions are not part of the snapshot
+        await _bump_policy_epoch(db, [link] if permission.is_enabled else [])
+        await db.commit()
+        await _refresh_role(db, role)
+    return role
+
+async def remove_permission_from_role(db: AsyncSession, *, role: Role, permission: Permission) -> Role:
+    """Removes a permission from a role. Returns the updated Role."""
+    if permission in role.permissions:
+        stage_policy_change(db.sync_session, role_ids=[role.role_id])
+        role.permissions.remove(permission)
+        db.add(role)
+        await db.flush()
+        await db.execute(effective.revoke_statement(
+            users_of_role_id=role.role_id, permission_names=[permission.permission_name]
+        ))
+        await _bump_policy_epoch(db, [changelog.role_permission_changed(changelog.OP_DELETE, role.role_id, permission.permission_id)])
+        await db.commit()
+        await _refresh_role(db, role)
+    return role
+
+# --- User-Role Assignment CRUD ---
+
+async def assign_role_to_user(db: AsyncSession, *, user_id: str, role_id: UUID) -> None:
+    """Assigns a role to a user (inserts into user_roles table)."""
+    check_stmt = select(user_roles_table).where(
+        user_roles_table.c.user_id == user_id,
+        user_roles_table.c.role_id == role_id
+    )
+    if not (await db.execute(check_stmt)).first():
+        stage_policy_change(db.sync_session, user_ids=[user_id])
+        await db.execute(insert(user_roles_table).values(user_id=user_id, role_id=role_id))
+        await db.execute(effective.grant_statement(user_ids=[user_id], role_id=role_id))
+        await _bump_policy_epoch(db, [changelog.user_role_changed(changelog.OP_UPSERT, user_id, role_id)])
+        await db.commit()
+
+async def remove_role_from_user(db: AsyncSession, *, user_id: str, role_id: UUID) -> None:
+    """Removes a role from a user (deletes from user_roles table)."""
+    delete_stmt = delete(user_roles_table).where(
+         user_roles_table.c.user_id == user_id,
+         user_roles_table.c.role_id == role_id
+    )
+    stage_policy_change(db.sync_session, user_ids=[user_id])
+    await db.execute(delete_stmt)
+    await db.execute(effective.revoke_statement(user_ids=[user_id], permissions_of_role_id=role_id))
+    await _bump_policy_epoch(db, [changelog.user_role_changed(changelog.OP_DELETE, user_id, role_id)])
+    await db.commit()
+
+async def bulk_assign_role_to_users(db: AsyncSession, *, role_id: UUID, user_ids: Sequence[str]) -> List[str]:
+    """Assigns a role to many users in one transaction. Returns the users that didn't already hold it."""
+    dialect_name = db.get_bind().dialect.name
+    assigned: List[str] = []
+    for chunk in bulk.chunks(user_ids):
+        result = await db.execute(bulk.assign_statement(dialect_name, role_id=role_id, user_ids=chunk))
+        assigned.extend(result.scalars().all())
+    if assigned:
+        stage_policy_change(db.sync_session, user_ids=assigned)
+        for chunk in bulk.chunks(assigned):
+            await db.execute(effective.grant_statement(user_ids=chunk, role_id=role_id))
+        await _bump_policy_epoch(db, [changelog.user_role_changed(changelog.OP_UPSERT, user_id, role_id) for user_id in assigned])
+    await db.commit()
+    return assigned
+
+async def bulk_remove_role_from_users(db: AsyncSession, *, role_id: UUID, user_ids: Sequence[str]) -> List[str]:
+    """Revokes a role from many users in one transaction. Returns the users that held it."""
+    revoked: List[str] = []
+    for chunk in bulk.chunks(user_ids):
+        revoked.extend((await db.execute(bulk.revoke_statement(role_id=role_id, user_ids=chunk))).scalars().all())
+    if revoked:
+        stage_policy_change(db.sync_session, user_ids=revoked)
+        for chunk in bulk.chunks(revoked):
+            await db.execute(effective.revoke_statement(user_ids=chunk, permissions_of_role_id=role_id))
+        await _bump_policy_epoch(db, [changelog.user_role_changed(changelog.OP_DELETE, user_id, role_id) for user_id in revoked])
+    await db.commit()
+    return revoked
+
+async def get_user_roles(db: AsyncSession, *, user_id: str) -> List[Role]:
+    """Gets all roles assigned to a specific user."""
+    stmt = select(Role).options(selectinload(Role.permissions))\
+        .join(user_roles_table).where(user_roles_table.c.user_id == user_id).order_by(Role.role_name)
+    return (await db.execute(stmt)).scalars().all()
+
+# --- Changesets ---
+
+async def apply_changeset(db: AsyncSession, *, operations: Sequence[Any]) -> Tuple[int, List[Dict[str, Any]]]:
+    """Async `rbac.apply_changeset`."""
+    roles_stmt, permissions_stmt = changesets.lookup_statements(operations)
+    role_rows = (await db.execute(roles_stmt)).all()
+    plan = changesets.plan(operations, role_rows, (await db.execute(permissions_stmt)).all())
+    links_stmt, assignments_stmt = changesets.existing_statements(plan)
+    existing_links = {tuple(row) for row in await db.execute(links_stmt)} if links_stmt is not None else set()
+    existing_assignments = {tuple(row) for row in await db.execute(assignments_stmt)} if assignments_stmt is not None else set()
+    write = changesets.write_statements(plan, existing_links, existing_assignments)
+    if not write.statements:
+        return (await db.execute(policy_epoch.current_statement())).scalar_one_or_none() or 0, plan.results
+    for stmt in write.statements:
+        await db.execute(stmt)
+    stage_policy_change(db.sync_session, user_ids=write.user_ids, role_ids=write.role_ids)
+    epoch = await _bump_policy_epoch(db, write.changes)
+    await db.commit()
+    return epoch, plan.results
+
+async def rebuild_effective_permissions(db: AsyncSession) -> int:
+    """Recomputes user_effective_permissions from scratch. Returns the number of rows written."""
+    delete_stmt, insert_stmt = effective.rebuild_statements()
+    await db.execute(delete_stmt)
+    inserted = (await db.execute(insert_stmt)).rowcount
+    await _bump_policy_epoch(db)
+    await db.commit()
+    return inserted
@@ -0,0 +1,73 @@
+# rbac_service/app/crud/reverse_lookups.py
+# "Who holds role R" and "who can do permission P", for GET /roles/{id}/users
+# and /permissions/{id}/users. Each listing is a range scan of an index that
+# leads on the looked-up key and then user_id (see app/models/rbac.py), read in
+# user_id order from just after the cursor's user_id through a server-side
+# cursor, so neither deep pages nor very large results cost more than the rows
+# actually sent.
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.rbac import role_permissions_table, user_roles_table, user_effective_permissions_table
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+eff = user_effective_permissions_table
+
+
+def role_holders_statement(role_id: UUID, *, after_user_id: Optional[str] = None, limit: Optional[int] = None):
+    query = select(user_roles_table.c.user_id, user_roles_table.c.assigned_at)\
+        .where(user_roles_table.c.role_id == role_id)
+    if after_user_id is not None:
+        query = query.where(user_roles_table.c.user_id > after_user_id)
+    return query.order_by(user_roles_table.c.user_id).limit(limit)
+
+
+def permission_holders_statement(permission_name: str, *, after_user_id: Optional[str] = None, limit: Optional[int] = None):
+    # Effective grants only exist for enabled permissions, so a disabled one has no holders
+    query = select(eff.c.user_id).where(eff.c.permission_name == permission_name)
+    if after_user_id is not None:
+        query = query.where(eff.c.user_id > after_user_id)
+    return query.order_by(eff.c.user_id).limit(limit)
+
+
+def granting_roles_statement(permission_id: UUID, user_ids: Sequence[str]):
+    """(user_id, role_id) for each of the users' roles that carries the permission."""
+    return select(user_roles_table.c.user_id, user_roles_table.c.role_id)\
+        .join(role_permissions_table, role_permissions_table.c.role_id == user_roles_table.c.role_id)\
+        .where(role_permissions_table.c.permission_id == permission_id, user_roles_table.c.user_id.in_(list(user_ids)))\
+        .order_by(user_roles_table.c.user_id, user_roles_table.c.role_id)
+
+
+def iter_role_holders(
+    db: Session, *, role_id: UUID, after_user_id: Optional[str] = None,
+    limit: Optional[int] = None, chunk_rows: int = 1000
+) -> Iterator[Dict[str, Any]]:
+    result = db.execute(
+        role_holders_statement(role_id, after_user_id=after_user_id, limit=limit),
+        execution_options={"yield_per": chunk_rows}
+    )
+    for partition in result.partitions():
+        for user_id, assigned_at in partition:
+            yield {"user_id": user_id, "assigned_at": assigned_at.isoformat() if assigned_at else None}
+
+
+def iter_permission_holders(
+    db: Session, *, permission_id: UUID, permission_name: str, after_user_id: Optional[str] = None,
+    limit: Optional[int] = None, chunk_rows: int = 1000
+) -> Iterator[Dict[str, Any]]:
+    """Each holder with the roles granting the permission: one extra query per chunk, not per user."""
+    result = db.execute(
+        permission_holders_statement(permission_name, after_user_id=after_user_id, limit=limit),
+        execution_options={"yield_per": chunk_rows}
+    )
+    for partition in result.partitions():
+        user_ids = [user_id for user_id, in partition]
+        role_ids: Dict[str, List[str]] = {user_id: [] for user_id in user_ids}
+        for user_id, role_id in db.execute(granting_roles_statement(permission_id, user_ids)):
+            role_ids[user_id].append(str(role_id))
+        for user_id in user_ids:
+            yield {"user_id": user_id, "role_ids": role_ids[user_id]}
@@ -0,0 +1,41 @@
+"""Add user_effective_permissions table
+
+Revision ID: 5c1f9a7e2b40
+Revises: 37d3b7e1fc0d
+Create Date: 2026-10-16 09:12:41.204113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1f9a7e2b40'
+down_revision: Union[str, None] = '37d3b7e1fc0d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('user_effective_permissions',
+    sa.Column('user_id', sa.String(), nullable=False),
+    sa.Column('permission_name', sa.String(length=100), nullable=False),
+    sa.PrimaryKeyConstraint('user_id', 'permission_name')
+    )
+    # Backfill from the existing assignments; afterwards app/crud/rbac.py keeps it up to date
+    op.execute(
+        """
+        INSERT INTO user_effective_permissions (user_id, permission_name)
+        SELECT DISTINCT ur.user_id, p.permission_name
+        FROM user_roles ur
+        JOIN role_permissions rp ON rp.role_id = ur.role_id
+        JOIN permissions p ON p.permission_id = rp.permission_id
+        WHERE p.is_enabled
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('user_effective_permissions')
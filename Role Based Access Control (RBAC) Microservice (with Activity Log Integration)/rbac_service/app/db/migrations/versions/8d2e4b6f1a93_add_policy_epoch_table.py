@@ -0,0 +1,31 @@
+"""Add policy_epoch table
+
+Revision ID: 8d2e4b6f1a93
+Revises: 5c1f9a7e2b40
+Create Date: 2026-10-16 14:03:27.518920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d2e4b6f1a93'
+down_revision: Union[str, None] = '5c1f9a7e2b40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('policy_epoch',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('epoch', sa.BigInteger(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute("INSERT INTO policy_epoch (id, epoch) VALUES (1, 0)")
+
+
+def downgrade() -> None:
+    op.drop_table('policy_epoch')
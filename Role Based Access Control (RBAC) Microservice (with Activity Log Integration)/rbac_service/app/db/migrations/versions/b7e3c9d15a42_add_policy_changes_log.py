@@ -0,0 +1,42 @@
+"""Add policy_changes log
+
+Revision ID: b7e3c9d15a42
+Revises: 8d2e4b6f1a93
+Create Date: 2026-10-16 16:41:09.204117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e3c9d15a42'
+down_revision: Union[str, None] = '8d2e4b6f1a93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('policy_changes',
+    sa.Column('change_id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), autoincrement=True, nullable=False),
+    sa.Column('epoch', sa.BigInteger(), nullable=False),
+    sa.Column('entity', sa.String(length=20), nullable=False),
+    sa.Column('op', sa.String(length=10), nullable=False),
+    sa.Column('role_id', postgresql.UUID(as_uuid=True), nullable=True),
+    sa.Column('permission_id', postgresql.UUID(as_uuid=True), nullable=True),
+    sa.Column('user_id', sa.String(), nullable=True),
+    sa.Column('name', sa.String(length=100), nullable=True),
+    sa.PrimaryKeyConstraint('change_id')
+    )
+    op.create_index(op.f('ix_policy_changes_epoch'), 'policy_changes', ['epoch'], unique=False)
+    op.add_column('policy_epoch', sa.Column('changes_pruned_through', sa.BigInteger(), server_default='0', nullable=False))
+    # No history exists before this revision: deltas can only be served from the current epoch on
+    op.execute("UPDATE policy_epoch SET changes_pruned_through = epoch")
+
+
+def downgrade() -> None:
+    op.drop_column('policy_epoch', 'changes_pruned_through')
+    op.drop_index(op.f('ix_policy_changes_epoch'), table_name='policy_changes')
+    op.drop_table('policy_changes')
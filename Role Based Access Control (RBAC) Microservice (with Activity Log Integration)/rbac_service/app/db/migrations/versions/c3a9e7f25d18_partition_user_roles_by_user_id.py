@@ -0,0 +1,98 @@
+"""Hash-partition user_roles by user_id
+
+Revision ID: c3a9e7f25d18
+Revises: f8b2d4a61c39
+Create Date: 2026-10-16 22:41:08.163529
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3a9e7f25d18'
+down_revision: Union[str, None] = 'f8b2d4a61c39'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Override with `alembic -x user_roles_partitions=N upgrade head`
+DEFAULT_PARTITIONS = 16
+
+# user_roles keeps its name, columns, primary key, foreign key and index names, so the
+# ORM mapping and every query are unaffected. Lookups by user_id (the primary key
+# prefix) are pruned to a single partition; lookups by role_id probe the
+# ix_user_roles_role_id_user_id index of every partition.
+#
+# The replacement is built and filled as user_roles_new while user_roles is held in
+# SHARE ROW EXCLUSIVE mode: writes to it are blocked for the whole copy, reads are not.
+# Only the final drop-and-rename swap takes an ACCESS EXCLUSIVE lock, which then blocks
+# reads too until the migration commits. On a large table, run it in a maintenance
+# window. To change the partition count later, downgrade to f8b2d4a61c39 and upgrade
+# again with a different -x user_roles_partitions.
+
+
+def _partition_count() -> int:
+    # The alembic command's -x key=value arguments; there are none when upgrade() is run programmatically
+    cmd_opts = getattr(op.get_context().config, 'cmd_opts', None)
+    x_args = dict(arg.split('=', 1) for arg in getattr(cmd_opts, 'x', None) or [] if '=' in arg)
+    partitions = int(x_args.get('user_roles_partitions', DEFAULT_PARTITIONS))
+    if partitions < 1:
+        raise ValueError(f"user_roles_partitions must be at least 1, got {partitions}")
+    return partitions
+
+
+def _create_user_roles(table: str, **kw) -> None:
+    op.create_table(table,
+    sa.Column('user_id', sa.String(), nullable=False),
+    sa.Column('role_id', sa.UUID(as_uuid=True), nullable=False),
+    sa.Column('assigned_at', sa.DateTime(), nullable=True),
+    # ON DELETE CASCADE as set by 37d3b7e1fc0d: crud.delete_role relies on it
+    sa.ForeignKeyConstraint(['role_id'], ['roles.role_id'], name=f'{table}_role_id_fkey', ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'role_id', name=f'{table}_pkey'),
+    **kw
+    )
+
+
+def _fill_and_swap(partitions: int = 0) -> None:
+    """Copies user_roles into user_roles_new, then replaces user_roles with it under the original names."""
+    op.execute('INSERT INTO user_roles_new (user_id, role_id, assigned_at) SELECT user_id, role_id, assigned_at FROM user_roles')
+    # Built after the copy; on a partitioned table this creates one index per partition
+    op.create_index('ix_user_roles_new_role_id_user_id', 'user_roles_new', ['role_id', 'user_id'], unique=False)
+
+    op.drop_table('user_roles') # Dropping a partitioned parent drops its partitions
+    op.rename_table('user_roles_new', 'user_roles')
+    op.execute('ALTER INDEX user_roles_new_pkey RENAME TO user_roles_pkey')
+    op.execute('ALTER TABLE user_roles RENAME CONSTRAINT user_roles_new_role_id_fkey TO user_roles_role_id_fkey')
+    op.execute('ALTER INDEX ix_user_roles_new_role_id_user_id RENAME TO ix_user_roles_role_id_user_id')
+    for remainder in range(partitions):
+        op.rename_table(f'user_roles_new_p{remainder}', f'user_roles_p{remainder}')
+        op.execute(f'ALTER INDEX user_roles_new_p{remainder}_pkey RENAME TO user_roles_p{remainder}_pkey')
+        op.execute(
+            f'ALTER INDEX user_roles_new_p{remainder}_role_id_user_id_idx RENAME TO user_roles_p{remainder}_role_id_user_id_idx'
+        )
+    op.execute('ANALYZE user_roles')
+
+
+def upgrade() -> None:
+    # Declarative partitioning is Postgres-only; elsewhere user_roles stays a plain table
+    if op.get_context().dialect.name != 'postgresql':
+        return
+    partitions = _partition_count()
+
+    op.execute('LOCK TABLE user_roles IN SHARE ROW EXCLUSIVE MODE')
+    _create_user_roles('user_roles_new', postgresql_partition_by='HASH (user_id)')
+    for remainder in range(partitions):
+        op.execute(
+            f'CREATE TABLE user_roles_new_p{remainder} PARTITION OF user_roles_new '
+            f'FOR VALUES WITH (MODULUS {partitions}, REMAINDER {remainder})'
+        )
+    _fill_and_swap(partitions)
+
+
+def downgrade() -> None:
+    if op.get_context().dialect.name != 'postgresql':
+        return
+    op.execute('LOCK TABLE user_roles IN SHARE ROW EXCLUSIVE MODE')
+    _create_user_roles('user_roles_new')
+    _fill_and_swap()
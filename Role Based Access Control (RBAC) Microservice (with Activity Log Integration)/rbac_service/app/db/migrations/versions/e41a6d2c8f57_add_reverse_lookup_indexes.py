@@ -0,0 +1,37 @@
+"""Add reverse lookup indexes
+
+Revision ID: e41a6d2c8f57
+Revises: b7e3c9d15a42
+Create Date: 2026-10-16 19:02:37.518240
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e41a6d2c8f57'
+down_revision: Union[str, None] = 'b7e3c9d15a42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ('ix_user_roles_role_id_user_id', 'user_roles', ['role_id', 'user_id']),
+    ('ix_role_permissions_permission_id_role_id', 'role_permissions', ['permission_id', 'role_id']),
+    ('ix_user_effective_permissions_permission_name_user_id', 'user_effective_permissions', ['permission_name', 'user_id']),
+]
+
+
+def upgrade() -> None:
+    # CONCURRENTLY can't run inside a transaction, and keeps writes to these tables flowing while it builds
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
@@ -0,0 +1,220 @@
+# app/db/replicas.py
+# Read-replica routing for read-only endpoints (see get_read_db in app/db/session.py).
+import asyncio
+import itertools
+import logging
+import time
+from functools import partial
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+
+logger = logging.getLogger(__name__)
+
+# Seconds the replica is behind the primary; 0 when it has replayed everything it received
+# (an idle primary leaves pg_last_xact_replay_timestamp() old without any real lag)
+POSTGRES_LAG_QUERY = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+
+class Replica:
+    def __init__(self, name: str, engine: Engine, async_engine_factory: Optional[Callable[[], AsyncEngine]] = None):
+        self.name = name
+        self.engine = engine
+        self.sessionmaker = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        self.async_engine: Optional[AsyncEngine] = None
+        self._async_engine_factory = async_engine_factory
+        self._async_sessionmaker: Optional[async_sessionmaker] = None
+        self.healthy = True
+        self.reads = 0
+        self.ejections = 0
+        self.lag_seconds: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    def async_session(self) -> AsyncSession:
+        # Built on first use so the asyncio driver is only needed with DATABASE_ASYNC_ENABLED
+        if self._async_sessionmaker is None:
+            if self._async_engine_factory is None:
+                raise RuntimeError(f"Read replica {self.name} has no async engine factory")
+            self.async_engine = self._async_engine_factory()
+            self._async_sessionmaker = async_sessionmaker(bind=self.async_engine, autoflush=False, expire_on_commit=False)
+        return self._async_sessionmaker()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "healthy": self.healthy,
+            "reads": self.reads,
+            "ejections": self.ejections,
+            "lag_seconds": self.lag_seconds,
+            "last_error": self.last_error,
+        }
+
+
+class ReplicaRouter:
+    """
+    Hands out replica sessions round-robin, skipping ejected replicas.
+
+    A replica is ejected when a connection to it fails or a health probe
+    finds it unreachable or lagging more than `max_lag_seconds`; a later
+    probe that succeeds readmits it. For `read_your_writes_seconds` after a
+    policy write (`note_write`), reads stay on the primary, so neither the
+    writer nor the permission caches refilled after the invalidation see
+    pre-write data; `max_lag_seconds` must be smaller for that to hold once
+    the window ends (Settings checks it). With no healthy replica, reads fall back to the primary.
+    Probes run every `health_check_interval` seconds once `start()` is
+    awaited (app lifespan). `async_session()` makes the same choice for
+    AsyncSession callers, on engines from `async_engine_factory`.
+    """
+
+    def __init__(
+        self,
+        urls: Sequence[str],
+        engine_factory: Callable[[str, str], Engine],
+        *,
+        async_engine_factory: Optional[Callable[[str, str], AsyncEngine]] = None,
+        read_your_writes_seconds: float = 5.0,
+        health_check_interval: float = 5.0,
+        max_lag_seconds: float = 2.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.replicas: List[Replica] = [
+            Replica(
+                f"replica{index}", engine_factory(f"replica{index}", url),
+                partial(async_engine_factory, f"replica{index}", url) if async_engine_factory else None
+            )
+            for index, url in enumerate(urls)
+        ]
+        self.read_your_writes_seconds = read_your_writes_seconds
+        self.health_check_interval = health_check_interval
+        self.max_lag_seconds = max_lag_seconds
+        self.clock = clock
+        self._turn = itertools.count()
+        self._last_write_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+        self.primary_reads = 0 # Reads sent to the primary while replicas are configured
+        self.fallbacks = 0 # ... of which because no replica was healthy
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    def note_write(self) -> None:
+        """Opens the write window for the whole process; there is no per-caller tracking."""
+        self._last_write_at = self.clock()
+
+    def in_write_window(self) -> bool:
+        return self._last_write_at is not None and self.clock() - self._last_write_at < self.read_your_writes_seconds
+
+    def _rotation(self) -> Iterator[Replica]:
+        # Healthy replicas in round-robin order, each at most once; none inside the write window
+        if self.in_write_window():
+            return
+        for _ in range(len(self.replicas)):
+            replica = self.replicas[next(self._turn) % len(self.replicas)]
+            if replica.healthy:
+                yield replica
+
+    def _read_from_primary(self) -> None:
+        if not self.in_write_window():
+            self.fallbacks += 1
+        self.primary_reads += 1
+
+    def session(self) -> Optional[Session]:
+        """A connected session on the next healthy replica, or None when the read should go to the primary."""
+        if not self.replicas:
+            return None
+        for replica in self._rotation():
+            db = replica.sessionmaker()
+            try:
+                db.connection() # Fail over here rather than midway through the endpoint
+            except SQLAlchemyError as exc:
+                db.close()
+                self.eject(replica, exc)
+                continue
+            replica.reads += 1
+            return db
+        self._read_from_primary()
+        return None
+
+    async def async_session(self) -> Optional[AsyncSession]:
+        """`session()` for AsyncSession callers."""
+        if not self.replicas:
+            return None
+        for replica in self._rotation():
+            db = replica.async_session()
+            try:
+                await db.connection()
+            except SQLAlchemyError as exc:
+                await db.close()
+                self.eject(replica, exc)
+                continue
+            replica.reads += 1
+            return db
+        self._read_from_primary()
+        return None
+
+    def eject(self, replica: Replica, reason: Any) -> None:
+        replica.last_error = str(reason)
+        if replica.healthy:
+            replica.healthy = False
+            replica.ejections += 1
+            logger.warning(f"Ejecting read replica {replica.name}: {reason}")
+
+    def measure_lag(self, conn: Connection) -> Optional[float]:
+        """Replication lag in seconds on Postgres; None (just a liveness probe) elsewhere."""
+        if conn.dialect.name == "postgresql":
+            return float(conn.execute(POSTGRES_LAG_QUERY).scalar_one() or 0)
+        conn.execute(text("SELECT 1"))
+        return None
+
+    def check_health(self) -> None:
+        """Probes every replica once, ejecting or readmitting it."""
+        for replica in self.replicas:
+            try:
+                with replica.engine.connect() as conn:
+                    replica.lag_seconds = self.measure_lag(conn)
+            except SQLAlchemyError as exc:
+                self.eject(replica, exc)
+                continue
+            if self.max_lag_seconds and replica.lag_seconds is not None and replica.lag_seconds > self.max_lag_seconds:
+                self.eject(replica, f"replication lag {replica.lag_seconds:.1f}s")
+            elif not replica.healthy:
+                replica.healthy, replica.last_error = True, None
+                logger.info(f"Read replica {replica.name} is healthy again")
+
+    async def start(self) -> None:
+        if self.replicas and self.health_check_interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._probe_forever())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _probe_forever(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.check_health)
+            except Exception:
+                logger.exception("Read replica health check failed")
+            await asyncio.sleep(self.health_check_interval)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "in_write_window": self.in_write_window(),
+            "primary_reads": self.primary_reads,
+            "fallbacks": self.fallbacks,
+            "replicas": [replica.stats() for replica in self.replicas],
+        }
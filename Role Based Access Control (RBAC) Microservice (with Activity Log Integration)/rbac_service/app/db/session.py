@@ -1,7 +1,14 @@
 # app/db/session.py
+from functools import lru_cache
+from fastapi import Depends
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
 from app.core.config import settings # Import your settings
+from app.core.metrics import instrument_engine
+from app.core.sql_profiler import profile_engine
+from app.db.replicas import ReplicaRouter
 
 # Create the SQLAlchemy engine using the DATABASE_URL from settings
 # connect_args is often used for SQLite, may not be needed for PostgreSQL
@@ -12,6 +19,9 @@ engine = create_engine(
     # For PostgreSQL, pool size defaults might be sufficient
     # pool_size=5, max_overflow=10
 )
+if settings.METRICS_ENABLED:
+    instrument_engine(engine, "primary")
+profile_engine(engine) # Records nothing unless the request is being profiled
 
 # Create a configured "Session" class
 # autocommit=False and autoflush=False are standard defaults
@@ -27,4 +37,97 @@ def get_db():
     try:
         yield db # Provide the session to the route handler
     finally:
-        db.close() # Ensure the session is closed
\ No newline at end of file
+        db.close() # Ensure the session is closed
+
+# --- Optional read replicas (settings.DATABASE_REPLICA_URLS) ---
+
+def _replica_engine(name: str, url: str):
+    replica_engine = create_engine(url, pool_pre_ping=True)
+    if settings.METRICS_ENABLED:
+        instrument_engine(replica_engine, name)
+    profile_engine(replica_engine)
+    return replica_engine
+
+def _replica_async_engine(name: str, url: str) -> AsyncEngine:
+    async_engine = create_async_engine(to_async_url(url), pool_pre_ping=True)
+    if settings.METRICS_ENABLED:
+        instrument_engine(async_engine.sync_engine, f"{name}_async")
+    profile_engine(async_engine.sync_engine)
+    return async_engine
+
+# Round-robin over healthy replicas; its health checks are started by the app lifespan
+replica_router = ReplicaRouter(
+    settings.DATABASE_REPLICA_URLS,
+    _replica_engine,
+    async_engine_factory=_replica_async_engine,
+    read_your_writes_seconds=settings.READ_YOUR_WRITES_SECONDS,
+    health_check_interval=settings.REPLICA_HEALTH_CHECK_INTERVAL_SECONDS,
+    max_lag_seconds=settings.REPLICA_MAX_LAG_SECONDS
+)
+
+def get_read_db(primary: Session = Depends(get_db)):
+    """
+    FastAPI dependency for read-only endpoints: a session on a healthy read
+    replica, or `primary` when none is configured or healthy, or a policy
+    write happened within READ_YOUR_WRITES_SECONDS. Never write through it.
+    """
+    replica = replica_router.session()
+    if replica is None:
+        yield primary
+        return
+    try:
+        yield replica
+    finally:
+        replica.close()
+
+# --- Optional async engine (settings.DATABASE_ASYNC_ENABLED) ---
+
+# Sync driver -> asyncio driver used when ASYNC_DATABASE_URL is not set explicitly
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def to_async_url(url: str) -> str:
+    """Maps a sync DATABASE_URL (e.g. postgresql://, postgresql+psycopg2://) onto its asyncio driver."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No asyncio driver configured for database backend '{backend}'")
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+# Built lazily so asyncpg/aiosqlite are only required when the async path is used
+@lru_cache(maxsize=1)
+def get_async_engine() -> AsyncEngine:
+    async_engine = create_async_engine(
+        settings.ASYNC_DATABASE_URL or to_async_url(settings.DATABASE_URL),
+        pool_pre_ping=True
+    )
+    if settings.METRICS_ENABLED:
+        instrument_engine(async_engine.sync_engine, "async")
+    profile_engine(async_engine.sync_engine)
+    return async_engine
+
+@lru_cache(maxsize=1)
+def get_async_sessionmaker() -> async_sessionmaker:
+    # expire_on_commit=False: attributes can't be lazily refreshed after commit in async code
+    return async_sessionmaker(bind=get_async_engine(), autoflush=False, expire_on_commit=False)
+
+async def get_async_db():
+    """
+    FastAPI dependency that provides an AsyncSession.
+    Async endpoints using it run on the event loop instead of the threadpool.
+    """
+    async with get_async_sessionmaker()() as db:
+        yield db
+
+async def get_async_read_db(primary: AsyncSession = Depends(get_async_db)):
+    """`get_read_db` for the async endpoints: an AsyncSession on a healthy replica, or `primary`."""
+    replica = await replica_router.async_session()
+    if replica is None:
+        yield primary
+        return
+    try:
+        yield replica
+    finally:
+        await replica.close()
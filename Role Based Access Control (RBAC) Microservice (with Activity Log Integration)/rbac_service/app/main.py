@@ -1,10 +1,40 @@
 # app/main.py
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Response
 
 # Import the main API router from api/v1/api.py
 from app.api.v1.api import api_router
 # Import settings if needed for app configuration, e.g., CORS
-# from app.core.config import settings
+from app.core.config import settings
+from app.core.logging_client import activity_log_shipper
+from app.core.check_aggregator import check_event_aggregator
+from app.core.policy_bus import policy_change_listener
+from app.core.job_runner import job_runner
+from app.db.session import replica_router
+from app.core.metrics import MetricsMiddleware, render_latest
+from app.core.sql_profiler import SQLProfilerMiddleware
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled, batching Activity Log sender per process; flushed on shutdown
+    await activity_log_shipper.start()
+    await check_event_aggregator.start()
+    if policy_change_listener is not None:
+        await policy_change_listener.start()
+    await job_runner.start()
+    await replica_router.start()
+    try:
+        yield
+    finally:
+        await replica_router.stop()
+        # Running jobs stop after their current chunk and are requeued
+        await job_runner.stop()
+        if policy_change_listener is not None:
+            await policy_change_listener.stop()
+        # Emit the last check summaries before the shipper's final flush
+        await check_event_aggregator.stop()
+        await activity_log_shipper.stop()
 
 # Create the FastAPI application instance
 # You can configure title, description, version, etc. for OpenAPI docs
@@ -14,7 +44,8 @@ app = FastAPI(
     version="0.1.0",
     openapi_url="/api/v1/openapi.json", # Default OpenAPI schema path
     docs_url="/api/v1/docs", # Path for Swagger UI
-    redoc_url="/api/v1/redoc" # Path for ReDoc documentation
+    redoc_url="/api/v1/redoc", # Path for ReDoc documentation
+    lifespan=lifespan
 )
 
 # Include the API router
@@ -30,6 +61,18 @@ def read_root():
     """
     return {"status": "OK", "service": "RBAC Service"}
 
+# Opt-in per-request SQL profiling (SQL_PROFILER_* settings); a pass-through for unprofiled requests
+app.add_middleware(SQLProfilerMiddleware)
+
+# Prometheus scrape target; outside /api/v1 like the health check, and not part of the API docs
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        body, content_type = render_latest()
+        return Response(content=body, media_type=content_type)
+
 # Optional: Add CORS middleware if requests will come from different origins (e.g., a frontend app)
 # from fastapi.middleware.cors import CORSMiddleware
 # app.add_middleware(
@@ -2,7 +2,7 @@
 import uuid
 from datetime import datetime, UTC # <-- Import UTC
 from sqlalchemy import (
-    Column, String, ForeignKey, Table, DateTime, UniqueConstraint, Boolean
+    Column, String, ForeignKey, Table, DateTime, UniqueConstraint, Boolean, Integer, BigInteger, Index, JSON, Text
 )
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from sqlalchemy.dialects.postgresql import UUID
@@ -16,17 +16,63 @@ role_permissions_table = Table(
     Column("role_id", UUID(as_uuid=True), ForeignKey("roles.role_id", ondelete="CASCADE"), primary_key=True),
     Column("permission_id", UUID(as_uuid=True), ForeignKey("permissions.permission_id", ondelete="CASCADE"), primary_key=True),
     # Use lambda for default callable
-    Column("assigned_at", DateTime, default=lambda: datetime.now(UTC))
+    Column("assigned_at", DateTime, default=lambda: datetime.now(UTC)),
+    # The primary key leads on role_id; lookups by permission (grants, reverse lookups) need their own
+    Index("ix_role_permissions_permission_id_role_id", "permission_id", "role_id")
 )
 
 # Association Table for the Many-to-Many relationship between Users and Roles
+# On Postgres this is hash-partitioned on user_id (migration c3a9e7f25d18), which
+# the mapping doesn't need to know: lookups by user_id touch a single partition.
 user_roles_table = Table(
     "user_roles",
     Base.metadata,
     Column("user_id", String, primary_key=True),
     Column("role_id", UUID(as_uuid=True), ForeignKey("roles.role_id", ondelete="CASCADE"), primary_key=True),
     # Use lambda for default callable
-    Column("assigned_at", DateTime, default=lambda: datetime.now(UTC))
+    Column("assigned_at", DateTime, default=lambda: datetime.now(UTC)),
+    # The primary key leads on user_id; "who holds role R" needs role_id first
+    Index("ix_user_roles_role_id_user_id", "role_id", "user_id")
+)
+
+# Denormalized (user_id, permission_name) pairs: every *enabled* permission a user
+# holds through any of their roles. Maintained incrementally by app/crud/rbac.py
+# so a permission check is a single primary-key probe.
+user_effective_permissions_table = Table(
+    "user_effective_permissions",
+    Base.metadata,
+    Column("user_id", String, primary_key=True),
+    Column("permission_name", String(100), primary_key=True),
+    # "Who can do permission P", in user_id order
+    Index("ix_user_effective_permissions_permission_name_user_id", "permission_name", "user_id")
+)
+
+# Single-row counter (id = 1) bumped by every write in app/crud/rbac.py.
+# Clients and HTTP caches use it to tell whether a cached decision may be stale.
+policy_epoch_table = Table(
+    "policy_epoch",
+    Base.metadata,
+    Column("id", Integer, primary_key=True),
+    Column("epoch", BigInteger, nullable=False, server_default="0"),
+    # policy_changes rows at or below this epoch have been pruned
+    Column("changes_pruned_through", BigInteger, nullable=False, server_default="0")
+)
+
+# Append-only log of policy deltas, one row per changed snapshot row, tagged with
+# the epoch of the write that made it. Served by GET /policy/changes?since=<epoch>.
+# entity: "role" | "permission" | "role_permission" | "user_role"; op: "upsert" | "delete".
+# Deleting a role or permission (or disabling a permission) implies deleting its links.
+policy_changes_table = Table(
+    "policy_changes",
+    Base.metadata,
+    Column("change_id", BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True),
+    Column("epoch", BigInteger, nullable=False, index=True),
+    Column("entity", String(20), nullable=False),
+    Column("op", String(10), nullable=False),
+    Column("role_id", UUID(as_uuid=True), nullable=True),
+    Column("permission_id", UUID(as_uuid=True), nullable=True),
+    Column("user_id", String, nullable=True),
+    Column("name", String(100), nullable=True) # role_name / permission_name on upserts
 )
 
 class Role(Base):
@@ -60,4 +106,30 @@ class Permission(Base):
         secondary=role_permissions_table,
         back_populates="permissions",
         passive_deletes=True
-    )
\ No newline at end of file
+    )
+
+# Long-running admin operations, executed in chunks by the worker pool in
+# app/core/job_runner.py. kind/params say what to do; checkpoint is the
+# handler's resume state, committed with its progress after every chunk.
+class Job(Base):
+    __tablename__ = "jobs"
+
+    job_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    kind: Mapped[str] = mapped_column(String(50), nullable=False)
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="queued") # queued | running | succeeded | failed | cancelled
+    # Deferred: may hold up to a million user IDs, and the job row is re-read after every chunk
+    params: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict, deferred=True)
+    checkpoint: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    progress_done: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    progress_total: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    result: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    cancel_requested: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    worker_id: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(UTC), nullable=False)
+    started_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    heartbeat_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+    # Workers claim the oldest queued job (and running ones whose worker stopped heartbeating)
+    __table_args__ = (Index("ix_jobs_status_created_at", "status", "created_at"),)
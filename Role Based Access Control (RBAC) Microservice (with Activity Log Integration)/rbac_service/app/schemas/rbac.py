@@ -4,7 +4,7 @@ from pydantic import (
 )
 from uuid import UUID
 from datetime import datetime
-from typing import List, Optional
+from typing import Annotated, Any, Dict, List, Literal, Optional, Union
 
 # --- Permission Schemas ---
 
@@ -79,10 +79,163 @@ class CheckRequest(BaseModel):
 class CheckResponse(BaseModel):
     allowed: bool
     reason: Optional[str] = None
+    epoch: int = Field(..., description="Policy epoch the decision was made at; changes on every policy write")
+
+class BatchCheckRequest(BaseModel):
+    checks: List[CheckRequest] = Field(..., min_length=1, max_length=500, description="(user_id, permission) pairs to resolve")
+
+class BatchCheckResultItem(BaseModel):
+    user_id: str
+    permission: str
+    allowed: bool
+
+class BatchCheckResponse(BaseModel):
+    results: List[BatchCheckResultItem] = Field(..., description="One decision per requested pair, in request order")
+
+# --- Policy Export Schemas ---
+class PolicyChange(BaseModel):
+    epoch: int
+    entity: str = Field(..., description="role | permission | role_permission | user_role")
+    op: str = Field(..., description="upsert | delete (deleting a role or permission also drops its links)")
+    role_id: Optional[UUID] = None
+    permission_id: Optional[UUID] = None
+    user_id: Optional[str] = None
+    name: Optional[str] = Field(None, description="role_name / permission_name on upserts")
+
+class PolicyChangesResponse(BaseModel):
+    since: int
+    epoch: int = Field(..., description="Epoch these changes bring the consumer to; pass it as `since` next")
+    changes: List[PolicyChange]
+    has_more: bool
+
+class PolicyImportReport(BaseModel):
+    dry_run: bool
+    prune: bool = Field(..., description="Whether live objects missing from the file were (or would be) deleted")
+    epoch: Optional[int] = Field(None, description="Policy epoch after the import; null for a dry run or when nothing changed")
+    counts: Dict[str, int] = Field(..., description="Number of changes per category")
+    changes: Dict[str, List[Dict[str, Any]]] = Field(..., description="Up to `sample` changes per category")
+    truncated: bool = Field(..., description="True if any category has more changes than listed")
 
 # --- User Role Schemas ---
 class UserRoleResponseItem(BaseModel):
     role_id: UUID
     role_name: str
     assigned_at: datetime
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+# --- Bulk User-Role Schemas ---
+class BulkUserRoleRequest(BaseModel):
+    user_ids: List[str] = Field(..., min_length=1, max_length=10000, description="Users to assign the role to (or revoke it from)")
+
+    @field_validator("user_ids")
+    @classmethod
+    def user_ids_not_blank(cls, user_ids: List[str]) -> List[str]:
+        if any(not user_id.strip() for user_id in user_ids):
+            raise ValueError("user_ids must not contain blank IDs")
+        return user_ids
+
+class BulkUserRoleResultItem(BaseModel):
+    user_id: str
+    status: str = Field(..., description="assigned | already_assigned (assign); revoked | not_assigned (revoke)")
+
+class BulkUserRoleResponse(BaseModel):
+    role_id: UUID
+    changed: int = Field(..., description="Users whose assignment this request changed")
+    unchanged: int = Field(..., description="Users already in the requested state")
+    results: List[BulkUserRoleResultItem] = Field(..., description="One result per distinct user_id, in request order")
+
+# --- Changeset Schemas ---
+# Roles are referenced by role_id or role_name and permissions by permission_id or
+# permission_name; names may refer to roles/permissions created earlier in the same changeset.
+
+class CreateRoleOp(RoleCreate):
+    op: Literal["create_role"]
+
+class CreatePermissionOp(PermissionCreate):
+    op: Literal["create_permission"]
+
+class RolePermissionOp(BaseModel):
+    op: Literal["assign_permission", "remove_permission"]
+    role_id: Optional[UUID] = None
+    role_name: Optional[str] = None
+    permission_id: Optional[UUID] = None
+    permission_name: Optional[str] = None
+
+    @model_validator(mode='after')
+    def check_identifiers(self) -> 'RolePermissionOp':
+        if not self.role_id and not self.role_name:
+            raise ValueError('Either role_id or role_name must be provided')
+        if not self.permission_id and not self.permission_name:
+            raise ValueError('Either permission_id or permission_name must be provided')
+        return self
+
+class UserRoleOp(BaseModel):
+    op: Literal["assign_role", "remove_role"]
+    user_id: str = Field(..., min_length=1)
+    role_id: Optional[UUID] = None
+    role_name: Optional[str] = None
+
+    @model_validator(mode='after')
+    def check_identifiers(self) -> 'UserRoleOp':
+        if not self.role_id and not self.role_name:
+            raise ValueError('Either role_id or role_name must be provided')
+        return self
+
+ChangesetOperation = Annotated[
+    Union[CreateRoleOp, CreatePermissionOp, RolePermissionOp, UserRoleOp],
+    Field(discriminator="op")
+]
+
+class ChangesetRequest(BaseModel):
+    operations: List[ChangesetOperation] = Field(..., min_length=1, max_length=1000, description="Applied in order, all or nothing")
+
+class ChangesetOperationResult(BaseModel):
+    index: int
+    op: str
+    role_id: Optional[UUID] = None
+    permission_id: Optional[UUID] = None
+    user_id: Optional[str] = None
+
+class ChangesetResponse(BaseModel):
+    epoch: int = Field(..., description="Policy epoch after the changeset was committed")
+    results: List[ChangesetOperationResult] = Field(..., description="Resolved IDs for each operation, in request order")
+
+# --- Background Job Schemas ---
+
+class DeleteRoleJobRequest(BaseModel):
+    kind: Literal["delete_role"]
+    role_id: UUID
+
+class RoleUsersJobRequest(BaseModel):
+    kind: Literal["assign_role_to_users", "remove_role_from_users"]
+    role_id: UUID
+    user_ids: List[str] = Field(..., min_length=1, max_length=1000000)
+
+    @field_validator("user_ids")
+    @classmethod
+    def user_ids_not_blank(cls, user_ids: List[str]) -> List[str]:
+        if any(not user_id.strip() for user_id in user_ids):
+            raise ValueError("user_ids must not contain blank IDs")
+        return list(dict.fromkeys(user_ids))
+
+class RebuildEffectivePermissionsJobRequest(BaseModel):
+    kind: Literal["rebuild_effective_permissions"]
+
+JobRequest = Annotated[
+    Union[DeleteRoleJobRequest, RoleUsersJobRequest, RebuildEffectivePermissionsJobRequest],
+    Field(discriminator="kind")
+]
+
+class JobResponse(BaseModel):
+    job_id: UUID
+    kind: str
+    status: str = Field(..., description="queued | running | succeeded | failed | cancelled")
+    progress_done: int = Field(..., description="Users processed so far")
+    progress_total: Optional[int] = Field(None, description="Users to process, when known up front")
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    cancel_requested: bool
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    model_config = ConfigDict(from_attributes=True)
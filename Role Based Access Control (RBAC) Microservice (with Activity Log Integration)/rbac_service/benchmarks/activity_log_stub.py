@@ -0,0 +1,80 @@
+# benchmarks/activity_log_stub.py
+"""
+Local stand-in for the Activity Log service, so load tests don't need (or
+flood) the real one.
+
+    python benchmarks/activity_log_stub.py --port 3001 --latency-ms 5 --failure-rate 0.01
+
+Then start the RBAC service with
+    ACTIVITY_LOG_SERVICE_URL=http://localhost:3001/api/activities
+
+It accepts POST /api/activities (one event) and /api/activities/bulk (a JSON
+array), counts what it received and discards it. --latency-ms delays each
+response and --failure-rate answers that fraction of requests with 503, to
+exercise the shipper's batching, retries and circuit breaker under load.
+GET /stats returns the counters; POST /stats/reset zeroes them.
+"""
+import argparse
+import asyncio
+import random
+from collections import Counter
+from typing import Any, Dict, List
+
+from fastapi import FastAPI, Request, Response
+
+
+def create_app(latency_ms: float = 0.0, failure_rate: float = 0.0) -> FastAPI:
+    app = FastAPI(title="Activity Log stub")
+    counters: Counter = Counter()
+    actions: Counter = Counter()
+
+    async def _receive(events: List[Dict[str, Any]], response: Response) -> Dict[str, Any]:
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+        if failure_rate and random.random() < failure_rate:
+            counters["rejected_requests"] += 1
+            counters["rejected_events"] += len(events)
+            response.status_code = 503
+            return {"error": "injected failure"}
+        counters["requests"] += 1
+        counters["events"] += len(events)
+        actions.update(event.get("action", "unknown") for event in events)
+        response.status_code = 201
+        return {"received": len(events)}
+
+    @app.post("/api/activities")
+    async def create_activity(request: Request, response: Response) -> Dict[str, Any]:
+        return await _receive([await request.json()], response)
+
+    @app.post("/api/activities/bulk")
+    async def create_activities(request: Request, response: Response) -> Dict[str, Any]:
+        counters["bulk_requests"] += 1
+        return await _receive(await request.json(), response)
+
+    @app.get("/stats")
+    def stats() -> Dict[str, Any]:
+        return {**counters, "actions": dict(actions)}
+
+    @app.post("/stats/reset")
+    def reset() -> Dict[str, Any]:
+        counters.clear()
+        actions.clear()
+        return {}
+
+    return app
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3001)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Delay before each response")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    args = parser.parse_args()
+    uvicorn.run(create_app(args.latency_ms, args.failure_rate), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
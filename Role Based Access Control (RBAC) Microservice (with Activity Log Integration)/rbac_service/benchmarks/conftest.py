@@ -0,0 +1,57 @@
+# benchmarks/conftest.py
+# Micro-benchmarks (pytest-benchmark) against an in-memory SQLite database
+# seeded once per session by benchmarks/seed.py. Not part of the test suite:
+#   python -m pytest benchmarks --benchmark-json=bench.json
+#   python -m pytest benchmarks --benchmark-compare    (against the last saved run, with --benchmark-autosave)
+# Set BENCH_DATABASE_URL to run them against Postgres instead (seeded from
+# scratch: every role, permission and assignment there is deleted first).
+import os
+import random
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+os.environ.setdefault("DATABASE_URL", "sqlite://") # app.core.config requires one; the benchmarks use their own engine
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import StaticPool
+
+from app.db.base import Base
+from app.core.permission_cache import permission_cache
+from app.core.permission_matrix import permission_matrix
+from benchmarks.seed import reset_policy, seed_policy, weighted_permissions, weighted_users
+
+POLICY = {"users": 5000, "roles": 60, "permissions": 400}
+
+@pytest.fixture(scope="session")
+def bench_engine():
+    url = os.getenv("BENCH_DATABASE_URL")
+    if url:
+        engine = create_engine(url)
+    else:
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+@pytest.fixture(scope="session")
+def manifest(bench_engine):
+    with bench_engine.begin() as conn:
+        if os.getenv("BENCH_DATABASE_URL"):
+            reset_policy(conn)
+        return seed_policy(conn, **POLICY)
+
+@pytest.fixture
+def db(bench_engine, manifest) -> Session:
+    permission_cache.clear()
+    permission_matrix.invalidate()
+    with sessionmaker(bind=bench_engine, autoflush=False)() as session:
+        yield session
+
+@pytest.fixture
+def pairs(manifest):
+    """A fixed, skewed sample of (user_id, permission) pairs to cycle through."""
+    rng = random.Random(11)
+    users, permissions = weighted_users(manifest, rng), weighted_permissions(manifest, rng)
+    return [(next(users), next(permissions)) for _ in range(1000)]
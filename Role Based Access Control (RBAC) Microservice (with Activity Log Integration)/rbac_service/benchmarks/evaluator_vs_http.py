@@ -0,0 +1,119 @@
+# benchmarks/evaluator_vs_http.py
+"""
+Embedded PolicyEvaluator vs. the HTTP /check path.
+
+Against a running service (it must already hold a realistic policy):
+    python benchmarks/evaluator_vs_http.py --base-url http://localhost:8000 --checks 20000
+
+Without --base-url, the app is served in-process (ASGI, no sockets) from a
+temporary SQLite database seeded with --users/--roles/--permissions. That
+understates the HTTP cost of a real network hop, so the gap is a lower bound.
+
+Prints one JSON object with checks/second and p50/p99 latency for each path.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1])) # rbac_service/
+
+
+def _seed(http, users: int, roles: int, permissions: int) -> List[str]:
+    from rbac_client import RBACClient
+    sdk = RBACClient(http_client=http)
+    permission_ids = [sdk.create_permission(f"bench:perm{i}")["permission_id"] for i in range(permissions)]
+    role_ids = []
+    for i in range(roles):
+        role_id = sdk.create_role(f"bench-role-{i}")["role_id"]
+        for permission_id in random.sample(permission_ids, k=max(1, permissions // 4)):
+            sdk.assign_permission_to_role(role_id, permission_id=permission_id)
+        role_ids.append(role_id)
+    user_ids = [f"bench-user-{i}" for i in range(users)]
+    for user_id in user_ids:
+        for role_id in random.sample(role_ids, k=min(2, roles)):
+            sdk.assign_role_to_user(user_id, role_id=role_id)
+    return user_ids
+
+
+def _measure(check: Callable[[str, str], bool], pairs: List[Tuple[str, str]]) -> Dict[str, float]:
+    latencies = []
+    started = time.perf_counter()
+    for user_id, permission in pairs:
+        t0 = time.perf_counter_ns()
+        check(user_id, permission)
+        latencies.append(time.perf_counter_ns() - t0)
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "checks": len(pairs),
+        "checks_per_second": round(len(pairs) / elapsed, 1),
+        "p50_us": round(latencies[len(latencies) // 2] / 1000, 2),
+        "p99_us": round(latencies[int(len(latencies) * 0.99) - 1] / 1000, 2),
+        "mean_us": round(statistics.fmean(latencies) / 1000, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", help="Benchmark a running service instead of an in-process one")
+    parser.add_argument("--checks", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--roles", type=int, default=10)
+    parser.add_argument("--permissions", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    if args.base_url:
+        import httpx
+        http = httpx.Client(base_url=args.base_url)
+        user_ids = None # Sampled from the snapshot below
+    else:
+        workdir = tempfile.mkdtemp(prefix="rbac-bench-")
+        os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/bench.db"
+        os.environ.setdefault("PERMISSION_CACHE_ENABLED", "false") # Measure evaluation, not the server's cache
+        from fastapi.testclient import TestClient
+        from app.db.base import Base
+        from app.db.session import engine
+        from app.main import app
+        Base.metadata.create_all(bind=engine)
+        http = TestClient(app).__enter__()
+        user_ids = _seed(http, args.users, args.roles, args.permissions)
+
+    from rbac_client import PolicyEvaluator, RBACClient
+    sdk = RBACClient(http_client=http, cache_ttl_seconds=0)
+    evaluator = PolicyEvaluator()
+    t0 = time.perf_counter()
+    evaluator.sync(sdk)
+    load_seconds = time.perf_counter() - t0
+
+    index = evaluator._index
+    user_ids = user_ids or list(index.user_roles) or ["nobody"]
+    permissions = list(index.bit_by_name) or ["none:none"]
+    pairs = [(random.choice(user_ids), random.choice(permissions)) for _ in range(args.checks)]
+
+    def http_check(user_id: str, permission: str) -> bool:
+        response = http.post("/api/v1/check", json={"user_id": user_id, "permission": permission})
+        return response.json()["allowed"]
+
+    mismatches = sum(evaluator.check(u, p) != http_check(u, p) for u, p in pairs[:200])
+    report = {
+        "policy": evaluator.stats(),
+        "snapshot_load_seconds": round(load_seconds, 4),
+        "sampled_mismatches": mismatches,
+        "evaluator": _measure(evaluator.check, pairs),
+        "http_check": _measure(http_check, pairs),
+    }
+    report["speedup"] = round(report["evaluator"]["checks_per_second"] / report["http_check"]["checks_per_second"], 1)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+# benchmarks/load.py
+"""
+Closed-loop load driver for a running RBAC service.
+
+    python benchmarks/load.py --base-url http://localhost:8000 --manifest bench-manifest.json \\
+        --concurrency 32 --duration 60 --mix check=80,user_roles=10,list_roles=10 \\
+        --out results/after.json --compare results/before.json
+
+--concurrency workers each send one request at a time for --duration seconds
+(after --warmup seconds whose results are discarded), picking a scenario per
+request by the --mix weights:
+    check         POST /api/v1/check
+    check_get     GET  /api/v1/check (cacheable form)
+    check_batch   POST /api/v1/check/batch with --batch-size pairs
+    user_roles    GET  /api/v1/users/{user_id}/roles
+    list_roles    GET  /api/v1/roles?limit=100
+    list_permissions GET /api/v1/permissions?limit=100
+    role_users    GET  /api/v1/roles/{role_id}/users?limit=100 (NDJSON, read to the end)
+Users and permissions are drawn from the manifest written by benchmarks/seed.py,
+with the same popularity skew as the seeded policy.
+
+The report (written to --out, summarised on stdout) holds throughput, error
+counts and p50/p95/p99/max latency per scenario and overall, plus the run
+parameters. --compare prints the change against an earlier report.
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, UTC
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1])) # rbac_service/
+
+from benchmarks.seed import weighted_permissions, weighted_users
+
+Request = Tuple[str, str, Dict[str, Any]] # method, path, httpx request kwargs
+
+
+def _scenarios(manifest: Dict[str, Any], rng: random.Random, batch_size: int) -> Dict[str, Callable[[], Request]]:
+    users = weighted_users(manifest, rng)
+    permissions = weighted_permissions(manifest, rng)
+    role_ids = manifest["role_ids"]
+    return {
+        "check": lambda: ("POST", "/api/v1/check", {"json": {"user_id": next(users), "permission": next(permissions)}}),
+        "check_get": lambda: ("GET", "/api/v1/check", {"params": {"user_id": next(users), "permission": next(permissions)}}),
+        "check_batch": lambda: ("POST", "/api/v1/check/batch", {"json": {"checks": [
+            {"user_id": next(users), "permission": next(permissions)} for _ in range(batch_size)
+        ]}}),
+        "user_roles": lambda: ("GET", f"/api/v1/users/{next(users)}/roles", {}),
+        "list_roles": lambda: ("GET", "/api/v1/roles", {"params": {"limit": 100}}),
+        "list_permissions": lambda: ("GET", "/api/v1/permissions", {"params": {"limit": 100}}),
+        # Popular roles first, like the users holding them
+        "role_users": lambda: ("GET", f"/api/v1/roles/{role_ids[min(int(rng.expovariate(0.3)), len(role_ids) - 1)]}/users",
+                               {"params": {"limit": 100}}),
+    }
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    return sorted_values[max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)]
+
+
+def summarize(latencies: List[float], errors: int, seconds: float) -> Dict[str, Any]:
+    latencies = sorted(latencies)
+    requests = len(latencies) + errors
+    summary: Dict[str, Any] = {
+        "requests": requests,
+        "errors": errors,
+        "throughput_rps": round(requests / seconds, 1) if seconds else 0.0,
+    }
+    if latencies:
+        summary["latency_ms"] = {
+            "p50": round(percentile(latencies, 50), 3),
+            "p95": round(percentile(latencies, 95), 3),
+            "p99": round(percentile(latencies, 99), 3),
+            "max": round(latencies[-1], 3),
+            "mean": round(statistics.fmean(latencies), 3),
+        }
+    return summary
+
+
+async def run(
+    base_url: str,
+    scenarios: Dict[str, Callable[[], Request]],
+    weights: Dict[str, float],
+    *,
+    concurrency: int,
+    duration: float,
+    warmup: float,
+    headers: Dict[str, str],
+    rng: random.Random
+) -> Tuple[Dict[str, List[float]], Dict[str, Dict[str, int]], float]:
+    names, cumulative = list(weights), list(weights.values())
+    latencies: Dict[str, List[float]] = {name: [] for name in names}
+    errors: Dict[str, Dict[str, int]] = {name: {} for name in names}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits, timeout=30.0) as client:
+        started = time.perf_counter()
+        measure_from = started + warmup
+        deadline = measure_from + duration
+
+        async def worker() -> None:
+            while (now := time.perf_counter()) < deadline:
+                name = rng.choices(names, weights=cumulative)[0]
+                method, path, kwargs = scenarios[name]()
+                t0 = time.perf_counter()
+                try:
+                    async with client.stream(method, path, **kwargs) as response:
+                        await response.aread()
+                    failure = None if response.status_code < 400 else str(response.status_code)
+                except httpx.HTTPError as exc:
+                    failure = type(exc).__name__
+                elapsed_ms = (time.perf_counter() - t0) * 1000
+                if t0 < measure_from:
+                    continue
+                if failure is None:
+                    latencies[name].append(elapsed_ms)
+                else:
+                    errors[name][failure] = errors[name].get(failure, 0) + 1
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    measured = time.perf_counter() - measure_from
+    return latencies, errors, measured
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """One line per scenario present in both reports: throughput and latency percentiles, old -> new."""
+    lines = []
+    for name, current in {"overall": report["overall"], **report["scenarios"]}.items():
+        previous = baseline["overall"] if name == "overall" else baseline["scenarios"].get(name)
+        if not previous or "latency_ms" not in previous or "latency_ms" not in current:
+            continue
+        cells = [f"{name:>16}"]
+        pairs = [("rps", previous["throughput_rps"], current["throughput_rps"])]
+        pairs += [(key, previous["latency_ms"][key], current["latency_ms"][key]) for key in ("p50", "p95", "p99")]
+        for key, old, new in pairs:
+            change = f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+            cells.append(f"{key} {old:g} -> {new:g} ({change})")
+        lines.append("  ".join(cells))
+    return lines
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--manifest", default="bench-manifest.json", help="Written by benchmarks/seed.py")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30.0, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Seconds of load before measuring")
+    parser.add_argument("--mix", default="check=80,user_roles=10,list_roles=5,list_permissions=5")
+    parser.add_argument("--batch-size", type=int, default=50, help="Pairs per check_batch request")
+    parser.add_argument("--header", action="append", default=[], help="Extra request header, 'Name: value' (repeatable)")
+    parser.add_argument("--label", help="Free-form name for this run, stored in the report")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", default="load-report.json")
+    parser.add_argument("--compare", help="Earlier report to compare against")
+    args = parser.parse_args()
+
+    manifest = json.loads(Path(args.manifest).read_text(encoding="utf-8"))
+    rng = random.Random(args.seed)
+    scenarios = _scenarios(manifest, rng, args.batch_size)
+    weights = parse_mix(args.mix)
+    unknown = set(weights) - set(scenarios)
+    if unknown:
+        parser.error(f"unknown scenarios in --mix: {', '.join(sorted(unknown))} (choose from {', '.join(scenarios)})")
+    headers = dict(header.split(":", 1) for header in args.header)
+    headers = {name.strip(): value.strip() for name, value in headers.items()}
+
+    started_at = datetime.now(UTC).isoformat()
+    latencies, errors, measured = asyncio.run(run(
+        args.base_url, scenarios, weights, concurrency=args.concurrency, duration=args.duration,
+        warmup=args.warmup, headers=headers, rng=rng
+    ))
+
+    report = {
+        "run": {
+            "label": args.label,
+            "started_at": started_at,
+            "git_revision": _git_revision(),
+            "base_url": args.base_url,
+            "concurrency": args.concurrency,
+            "duration_seconds": round(measured, 2),
+            "warmup_seconds": args.warmup,
+            "mix": weights,
+            "batch_size": args.batch_size,
+            "policy": {key: manifest[key] for key in ("users", "roles", "permissions", "skew", "seed")},
+        },
+        "overall": summarize(
+            [latency for values in latencies.values() for latency in values],
+            sum(sum(counts.values()) for counts in errors.values()),
+            measured
+        ),
+        "scenarios": {
+            name: {**summarize(latencies[name], sum(errors[name].values()), measured), "error_kinds": errors[name]}
+            for name in weights
+        },
+    }
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    print(json.dumps({"overall": report["overall"], "report": str(out)}, indent=2))
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        print("\n".join(compare(report, baseline)))
+
+
+if __name__ == "__main__":
+    main()
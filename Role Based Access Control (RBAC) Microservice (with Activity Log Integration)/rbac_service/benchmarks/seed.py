@@ -0,0 +1,225 @@
+# benchmarks/seed.py
+"""
+Seeds a database with a synthetic but realistically skewed policy.
+
+    python benchmarks/seed.py --database-url sqlite:///bench.db --create-schema \\
+        --users 100000 --roles 200 --permissions 1000 --manifest bench-manifest.json
+
+Popularity follows a Zipf distribution (exponent --skew): a few roles are held
+by most users and a few permissions appear in most roles, with a long tail of
+rarely used ones, as in real deployments. Each role gets a Pareto-distributed
+number of permissions and each user 1 + geometric extra roles, so sizes are
+skewed too. The same --seed always produces the same policy.
+
+Rows are bulk-inserted straight into the tables (not through the API), then
+user_effective_permissions is rebuilt. On Postgres, run the Alembic migrations
+first; --create-schema is meant for a fresh SQLite file. --reset deletes every
+existing role, permission and assignment first. Restart running services
+afterwards: the seed bypasses their permission caches.
+
+The manifest (JSON) records the parameters and names the load driver
+(benchmarks/load.py) needs to pick users and permissions with the same skew.
+"""
+import argparse
+import bisect
+import itertools
+import json
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, UTC
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Sequence
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1])) # rbac_service/
+
+from sqlalchemy import create_engine, delete, insert, update
+from sqlalchemy.engine import Connection
+
+from app.crud import effective_permissions as effective
+from app.crud import policy_epoch
+from app.db.base import Base
+from app.models.rbac import (
+    Permission, Role, policy_epoch_table, role_permissions_table, user_effective_permissions_table, user_roles_table
+)
+
+USER_PREFIX = "bench-user-"
+ROLE_PREFIX = "bench-role-"
+PERMISSION_PREFIX = "bench:perm"
+
+
+class ZipfSampler:
+    """Draws indexes 0..n-1 with probability proportional to 1 / (index + 1) ** skew."""
+
+    def __init__(self, n: int, skew: float, rng: random.Random):
+        self.rng = rng
+        self.cumulative = list(itertools.accumulate(1.0 / (rank + 1) ** skew for rank in range(n)))
+
+    def draw(self) -> int:
+        return bisect.bisect_left(self.cumulative, self.rng.random() * self.cumulative[-1])
+
+    def distinct(self, k: int) -> List[int]:
+        k = min(k, len(self.cumulative))
+        chosen = set()
+        for _ in range(20 * k):
+            if len(chosen) == k:
+                break
+            chosen.add(self.draw())
+        # Drawing the last few from a long, thin tail can take forever; top up with the most popular left
+        chosen.update(itertools.islice((index for index in range(len(self.cumulative)) if index not in chosen), k - len(chosen)))
+        return sorted(chosen)
+
+
+def _chunks(rows: Iterator[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    while chunk := list(itertools.islice(rows, size)):
+        yield chunk
+
+
+def seed_policy(
+    conn: Connection,
+    *,
+    users: int,
+    roles: int,
+    permissions: int,
+    skew: float = 1.1,
+    min_permissions_per_role: int = 3,
+    max_permissions_per_role: int = 50,
+    extra_role_probability: float = 0.35,
+    max_roles_per_user: int = 8,
+    seed: int = 7,
+    chunk_rows: int = 10000
+) -> Dict[str, Any]:
+    """Inserts the policy on `conn` (the caller commits) and returns the manifest."""
+    rng = random.Random(seed)
+    now = datetime.now(UTC)
+    role_ids = [uuid.UUID(int=rng.getrandbits(128), version=4) for _ in range(roles)]
+    permission_ids = [uuid.UUID(int=rng.getrandbits(128), version=4) for _ in range(permissions)]
+    permission_names = [f"{PERMISSION_PREFIX}{i}" for i in range(permissions)]
+
+    conn.execute(insert(Permission), [
+        {"permission_id": permission_id, "permission_name": name, "is_enabled": True, "created_at": now, "updated_at": now}
+        for permission_id, name in zip(permission_ids, permission_names)
+    ])
+    conn.execute(insert(Role), [
+        {"role_id": role_id, "role_name": f"{ROLE_PREFIX}{i}", "created_at": now, "updated_at": now}
+        for i, role_id in enumerate(role_ids)
+    ])
+
+    permission_sampler = ZipfSampler(permissions, skew, rng)
+    links = []
+    for role_id in role_ids:
+        size = min(max_permissions_per_role, int(min_permissions_per_role * rng.paretovariate(1.2)))
+        links += [{"role_id": role_id, "permission_id": permission_ids[index], "assigned_at": now}
+                  for index in permission_sampler.distinct(size)]
+    conn.execute(insert(role_permissions_table), links)
+
+    role_sampler = ZipfSampler(roles, skew, rng)
+
+    def assignments() -> Iterator[Dict[str, Any]]:
+        for i in range(users):
+            count = 1
+            while count < max_roles_per_user and rng.random() < extra_role_probability:
+                count += 1
+            for index in role_sampler.distinct(count):
+                yield {"user_id": f"{USER_PREFIX}{i}", "role_id": role_ids[index], "assigned_at": now}
+
+    assigned = 0
+    for chunk in _chunks(assignments(), chunk_rows):
+        conn.execute(insert(user_roles_table), chunk)
+        assigned += len(chunk)
+
+    delete_stmt, insert_stmt = effective.rebuild_statements()
+    conn.execute(delete_stmt)
+    effective_rows = conn.execute(insert_stmt).rowcount
+    epoch = _advance_epoch(conn)
+
+    return {
+        "users": users,
+        "roles": roles,
+        "permissions": permissions,
+        "skew": skew,
+        "seed": seed,
+        "epoch": epoch,
+        "user_prefix": USER_PREFIX,
+        "permission_names": permission_names,
+        "role_ids": [str(role_id) for role_id in role_ids],
+        "rows": {"role_permissions": len(links), "user_roles": assigned, "user_effective_permissions": effective_rows},
+    }
+
+
+def _advance_epoch(conn: Connection) -> int:
+    """
+    Bumps the policy epoch once for the whole seed. The seeded rows aren't in
+    the change log, so the log is marked as pruned through the new epoch:
+    GET /policy/changes consumers get 410 and re-bootstrap from a snapshot.
+    """
+    epoch = conn.execute(policy_epoch.bump_statement()).scalar_one_or_none()
+    if epoch is None:
+        epoch = 1
+        conn.execute(policy_epoch.seed_statement(epoch))
+    conn.execute(update(policy_epoch_table).where(policy_epoch_table.c.id == policy_epoch.EPOCH_ROW_ID)
+                 .values(changes_pruned_through=epoch))
+    return epoch
+
+
+def reset_policy(conn: Connection) -> None:
+    """Deletes all roles, permissions and assignments."""
+    for table in (user_effective_permissions_table, user_roles_table, role_permissions_table):
+        conn.execute(delete(table))
+    conn.execute(delete(Role))
+    conn.execute(delete(Permission))
+
+
+def weighted_users(manifest: Dict[str, Any], rng: random.Random) -> Iterator[str]:
+    """Endless stream of seeded user IDs; low-numbered users, like popular roles, come up more often."""
+    sampler = ZipfSampler(manifest["users"], manifest["skew"] / 2, rng)
+    while True:
+        yield f"{manifest['user_prefix']}{sampler.draw()}"
+
+
+def weighted_permissions(manifest: Dict[str, Any], rng: random.Random) -> Iterator[str]:
+    names: Sequence[str] = manifest["permission_names"]
+    sampler = ZipfSampler(len(names), manifest["skew"], rng)
+    while True:
+        yield names[sampler.draw()]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="Target database (default: DATABASE_URL from the environment/.env)")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--roles", type=int, default=50)
+    parser.add_argument("--permissions", type=int, default=300)
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent of role/permission popularity (0 = uniform)")
+    parser.add_argument("--min-permissions-per-role", type=int, default=3)
+    parser.add_argument("--max-permissions-per-role", type=int, default=50)
+    parser.add_argument("--max-roles-per-user", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--create-schema", action="store_true", help="Create missing tables from the models (fresh SQLite)")
+    parser.add_argument("--reset", action="store_true", help="Delete the existing policy first")
+    parser.add_argument("--manifest", default="bench-manifest.json", help="Where to write the manifest for benchmarks/load.py")
+    args = parser.parse_args()
+
+    if args.database_url is None:
+        from app.core.config import settings
+        args.database_url = settings.DATABASE_URL
+    engine = create_engine(args.database_url)
+    if args.create_schema:
+        Base.metadata.create_all(bind=engine)
+
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        if args.reset:
+            reset_policy(conn)
+        manifest = seed_policy(
+            conn, users=args.users, roles=args.roles, permissions=args.permissions, skew=args.skew,
+            min_permissions_per_role=args.min_permissions_per_role, max_permissions_per_role=args.max_permissions_per_role,
+            max_roles_per_user=args.max_roles_per_user, seed=args.seed
+        )
+    Path(args.manifest).write_text(json.dumps(manifest), encoding="utf-8")
+    print(json.dumps({"seconds": round(time.perf_counter() - started, 2), "manifest": args.manifest, "rows": manifest["rows"]}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# benchmarks/test_micro.py
+# Per-call cost of the check and CRUD paths. See benchmarks/conftest.py for how to run them.
+import itertools
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.core import security
+from app.core.permission_matrix import permission_matrix
+from app.crud import rbac as crud
+
+def _cycling(pairs):
+    pairs = itertools.cycle(pairs)
+    return lambda: next(pairs)
+
+def test_check_user_permission_sql(benchmark, db: Session, pairs):
+    next_pair = _cycling(pairs)
+    def check():
+        user_id, permission = next_pair()
+        return security.check_user_permission(db, user_id=user_id, permission_name=permission)
+    benchmark(check)
+
+def test_check_user_permission_bitset(benchmark, db: Session, pairs):
+    next_pair = _cycling(pairs)
+    permission_matrix.ensure_loaded(db)
+    def check():
+        user_id, permission = next_pair()
+        return security.check_user_permission(db, user_id=user_id, permission_name=permission, engine=permission_matrix)
+    benchmark(check)
+
+def test_check_user_permission_cached(benchmark, db: Session, pairs):
+    for user_id, permission in pairs: # Warm: measure hits only
+        security.check_user_permission_cached(db, user_id=user_id, permission_name=permission)
+    next_pair = _cycling(pairs)
+    def check():
+        user_id, permission = next_pair()
+        return security.check_user_permission_cached(db, user_id=user_id, permission_name=permission)
+    benchmark(check)
+
+def test_check_batch_100(benchmark, db: Session, pairs):
+    benchmark(security.check_user_permissions_batch, db, checks=pairs[:100])
+
+def test_get_roles_page(benchmark, db: Session):
+    roles = benchmark(crud.get_roles, db, limit=100)
+    assert roles
+
+def test_get_user_roles(benchmark, db: Session, pairs):
+    next_pair = _cycling(pairs)
+    benchmark(lambda: crud.get_user_roles(db, user_id=next_pair()[0]))
+
+def test_assign_and_remove_role(benchmark, db: Session, manifest):
+    role_id = UUID(manifest["role_ids"][-1]) # Rarely held, so the pair below is new
+    def round_trip():
+        crud.assign_role_to_user(db, user_id="bench-writer", role_id=role_id)
+        crud.remove_role_from_user(db, user_id="bench-writer", role_id=role_id)
+    benchmark(round_trip)
+
+def test_bulk_assign_and_revoke_1000_users(benchmark, db: Session, manifest):
+    role_id = UUID(manifest["role_ids"][-1])
+    user_ids = [f"bench-bulk-{i}" for i in range(1000)]
+    def round_trip():
+        crud.bulk_assign_role_to_users(db, role_id=role_id, user_ids=user_ids)
+        crud.bulk_remove_role_from_users(db, role_id=role_id, user_ids=user_ids)
+    benchmark.pedantic(round_trip, rounds=5, iterations=1)
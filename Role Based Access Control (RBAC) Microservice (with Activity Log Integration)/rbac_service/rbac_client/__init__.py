@@ -0,0 +1,10 @@
+# rbac_client/__init__.py
+# Python SDK for the RBAC service (sync and asyncio flavors).
+from rbac_client._common import CheckDecision, RBACClientError
+from rbac_client.async_client import AsyncRBACClient
+from rbac_client.cache import DecisionCache
+from rbac_client.client import RBACClient
+from rbac_client.evaluator import PolicyEvaluator, PolicyRefresher
+
+__all__ = ["RBACClient", "AsyncRBACClient", "DecisionCache", "CheckDecision", "RBACClientError",
+           "PolicyEvaluator", "PolicyRefresher"]
@@ -0,0 +1,80 @@
+# rbac_client/_common.py
+# Pieces shared by the sync and async clients: request shapes, response
+# parsing and the errors they raise.
+import json
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import httpx
+
+DEFAULT_API_PREFIX = "/api/v1"
+CHECK_PATH = "/check"
+CHECK_BATCH_PATH = "/check/batch"
+NEXT_PAGE_HEADER = "X-Next-Page-Token" # Keyset cursor on /roles and /permissions listings
+NEXT_CURSOR_FIELD = "next_cursor" # Last NDJSON line of a truncated /roles/{id}/users or /permissions/{id}/users stream
+MAX_BATCH_SIZE = 500 # Server-side limit of POST /check/batch
+
+_EPOCH_ETAG = re.compile(r'^(?:W/)?"rbac-epoch-(\d+)"$')
+
+
+class RBACClientError(Exception):
+    """The RBAC service answered with an error status."""
+
+    def __init__(self, status_code: int, detail: Any):
+        super().__init__(f"RBAC service returned {status_code}: {detail}")
+        self.status_code = status_code
+        self.detail = detail
+
+
+@dataclass(frozen=True)
+class CheckDecision:
+    allowed: bool
+    epoch: int
+    from_cache: bool = False
+
+
+def epoch_etag(epoch: int) -> str:
+    return f'"rbac-epoch-{epoch}"'
+
+
+def epoch_from_etag(etag: Optional[str]) -> Optional[int]:
+    match = _EPOCH_ETAG.match(etag or "")
+    return int(match.group(1)) if match else None
+
+
+def raise_for_status(response: httpx.Response) -> None:
+    if response.is_success:
+        return
+    try:
+        detail = response.json().get("detail")
+    except ValueError:
+        detail = response.text
+    raise RBACClientError(response.status_code, detail)
+
+
+def response_json(response: httpx.Response) -> Any:
+    raise_for_status(response)
+    if response.status_code == 204 or not response.content:
+        return None
+    return response.json()
+
+
+def check_params(user_id: str, permission: str) -> Dict[str, str]:
+    return {"user_id": user_id, "permission": permission}
+
+
+def batch_chunks(pairs: Sequence[Tuple[str, str]]) -> List[List[Tuple[str, str]]]:
+    return [list(pairs[i:i + MAX_BATCH_SIZE]) for i in range(0, len(pairs), MAX_BATCH_SIZE)]
+
+
+def batch_body(pairs: Sequence[Tuple[str, str]]) -> Dict[str, Any]:
+    return {"checks": [check_params(user_id, permission) for user_id, permission in pairs]}
+
+
+def drop_none(values: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in values.items() if value is not None}
+
+
+def ndjson_item(line: str) -> Optional[Dict[str, Any]]:
+    return json.loads(line) if line.strip() else None
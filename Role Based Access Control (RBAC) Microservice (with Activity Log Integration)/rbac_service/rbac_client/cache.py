@@ -0,0 +1,86 @@
+# rbac_client/cache.py
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+DecisionKey = Tuple[str, str] # (user_id, permission)
+
+
+@dataclass(frozen=True)
+class CachedDecision:
+    allowed: bool
+    epoch: int
+    expires_at: float
+
+
+class DecisionCache:
+    """
+    Client-side LRU + TTL cache of check decisions keyed by (user_id, permission).
+
+    Entries are versioned by the policy epoch they were decided at. Whenever
+    any response reveals a newer epoch (`observe_epoch`), every older entry
+    stops being served fresh; it is kept only so the client can revalidate it
+    cheaply with If-None-Match. Thread-safe.
+    """
+
+    def __init__(self, ttl_seconds: float = 5.0, max_size: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entries: "OrderedDict[DecisionKey, CachedDecision]" = OrderedDict()
+        self._latest_epoch = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def latest_epoch(self) -> int:
+        return self._latest_epoch
+
+    def observe_epoch(self, epoch: int) -> None:
+        with self._lock:
+            if epoch > self._latest_epoch:
+                self._latest_epoch = epoch
+
+    def get(self, key: DecisionKey) -> Optional[CachedDecision]:
+        """A decision that may be used without asking the server, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.expires_at <= time.monotonic() or entry.epoch < self._latest_epoch:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def peek(self, key: DecisionKey) -> Optional[CachedDecision]:
+        """Any entry for `key`, fresh or not (used to revalidate by epoch)."""
+        with self._lock:
+            return self._entries.get(key)
+
+    def put(self, key: DecisionKey, allowed: bool, epoch: int) -> CachedDecision:
+        entry = CachedDecision(allowed=allowed, epoch=epoch, expires_at=time.monotonic() + self.ttl_seconds)
+        with self._lock:
+            if epoch > self._latest_epoch:
+                self._latest_epoch = epoch
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "latest_epoch": self._latest_epoch,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+            }
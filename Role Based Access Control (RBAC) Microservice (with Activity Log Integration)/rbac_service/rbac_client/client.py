@@ -0,0 +1,309 @@
+# rbac_client/client.py
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
+from uuid import UUID
+
+import httpx
+
+from rbac_client._common import (
+    DEFAULT_API_PREFIX, CHECK_PATH, CHECK_BATCH_PATH, NEXT_PAGE_HEADER, NEXT_CURSOR_FIELD, CheckDecision,
+    batch_body, batch_chunks, check_params, drop_none,
+    epoch_etag, epoch_from_etag, ndjson_item, response_json
+)
+from rbac_client.cache import DecisionCache, DecisionKey
+from rbac_client.snapshot import SNAPSHOT_PATH, CHANGES_PATH, iter_frames
+
+T = TypeVar("T")
+
+
+class _Coalescer:
+    """
+    Collapses concurrent identical requests onto one in-flight call: the first
+    caller for a key runs it, every other caller blocks on its result.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight: Dict[Any, Future] = {}
+        self.coalesced = 0
+
+    def run(self, key: Any, call: Callable[[], T]) -> T:
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+            else:
+                self.coalesced += 1
+        if not leader:
+            return future.result()
+        try:
+            result = call()
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+
+class RBACClient:
+    """
+    Synchronous client for the RBAC service.
+
+    Keeps one pooled keep-alive connection set (`httpx.Client`) for its whole
+    lifetime; create it once per process and share it between threads.
+    Permission checks are answered from a local `DecisionCache` while fresh,
+    revalidated with If-None-Match against the policy epoch once expired, and
+    concurrent misses for the same (user_id, permission) share one request.
+    """
+
+    def __init__(
+        self,
+        base_url: str = "http://localhost:8000",
+        *,
+        api_prefix: str = DEFAULT_API_PREFIX,
+        timeout: float = 5.0,
+        max_connections: int = 20,
+        cache_ttl_seconds: float = 5.0,
+        cache_max_size: int = 10000,
+        http_client: Optional[httpx.Client] = None # Injectable (e.g. a TestClient or MockTransport)
+    ):
+        self.api_prefix = api_prefix.rstrip("/")
+        self._owns_http = http_client is None
+        self._http = http_client or httpx.Client(
+            base_url=base_url,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        )
+        self.cache = DecisionCache(ttl_seconds=cache_ttl_seconds, max_size=cache_max_size)
+        self._coalescer = _Coalescer()
+
+    def close(self) -> None:
+        if self._owns_http:
+            self._http.close()
+
+    def __enter__(self) -> "RBACClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    # --- Permission checks ---
+
+    def check(self, user_id: str, permission: str) -> bool:
+        return self.check_decision(user_id, permission).allowed
+
+    def check_decision(self, user_id: str, permission: str) -> CheckDecision:
+        key = (user_id, permission)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return CheckDecision(allowed=cached.allowed, epoch=cached.epoch, from_cache=True)
+        return self._coalescer.run(key, lambda: self._fetch_decision(key))
+
+    def _fetch_decision(self, key: DecisionKey) -> CheckDecision:
+        stale = self.cache.peek(key)
+        headers = {"If-None-Match": epoch_etag(stale.epoch)} if stale is not None else {}
+        response = self._http.get(self._url(CHECK_PATH), params=check_params(*key), headers=headers)
+        if response.status_code == 304 and stale is not None:
+            # Policy unchanged since the cached decision: extend it without a body
+            epoch = epoch_from_etag(response.headers.get("etag"))
+            entry = self.cache.put(key, stale.allowed, epoch if epoch is not None else stale.epoch)
+            return CheckDecision(allowed=entry.allowed, epoch=entry.epoch, from_cache=True)
+        data = response_json(response)
+        self.cache.put(key, data["allowed"], data["epoch"])
+        return CheckDecision(allowed=data["allowed"], epoch=data["epoch"])
+
+    def check_many(self, pairs: Iterable[Tuple[str, str]]) -> Dict[DecisionKey, bool]:
+        """
+        Resolves many (user_id, permission) pairs: cache hits locally, the
+        rest through POST /check/batch in chunks the server accepts.
+        """
+        results: Dict[DecisionKey, bool] = {}
+        misses: List[DecisionKey] = []
+        for key in dict.fromkeys(pairs):
+            cached = self.cache.get(key)
+            if cached is not None:
+                results[key] = cached.allowed
+            else:
+                misses.append(key)
+        for chunk in batch_chunks(misses):
+            data = response_json(self._http.post(self._url(CHECK_BATCH_PATH), json=batch_body(chunk)))
+            # Batch answers carry no epoch, so they are returned but not cached
+            for item in data["results"]:
+                results[(item["user_id"], item["permission"])] = item["allowed"]
+        return results
+
+    # --- Roles ---
+
+    def create_role(self, role_name: str, description: Optional[str] = None) -> Dict[str, Any]:
+        return self._write("POST", "/roles", json=drop_none({"role_name": role_name, "description": description}))
+
+    def list_roles(self, skip: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+        return self._read("/roles", params={"skip": skip, "limit": limit})
+
+    def iter_roles(self, page_size: int = 200) -> Iterator[Dict[str, Any]]:
+        """Every role in name order, following the server's keyset page cursors."""
+        yield from self._iter_pages("/roles", page_size)
+
+    def get_role(self, role_id: UUID) -> Dict[str, Any]:
+        return self._read(f"/roles/{role_id}")
+
+    def update_role(self, role_id: UUID, **changes: Any) -> Dict[str, Any]:
+        return self._write("PUT", f"/roles/{role_id}", json=changes)
+
+    def delete_role(self, role_id: UUID) -> None:
+        self._write("DELETE", f"/roles/{role_id}")
+
+    def iter_role_holders(
+        self, role_id: UUID, page_size: Optional[int] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Users holding the role ({"user_id", "assigned_at"}), streamed in user_id order."""
+        yield from self._iter_holders(f"/roles/{role_id}/users", page_size)
+
+    # --- Permissions ---
+
+    def create_permission(
+        self,
+        permission_name: str,
+        description: Optional[str] = None,
+        is_enabled: bool = True
+    ) -> Dict[str, Any]:
+        body = drop_none({"permission_name": permission_name, "description": description, "is_enabled": is_enabled})
+        return self._write("POST", "/permissions", json=body)
+
+    def list_permissions(self, skip: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+        return self._read("/permissions", params={"skip": skip, "limit": limit})
+
+    def iter_permissions(self, page_size: int = 200) -> Iterator[Dict[str, Any]]:
+        """Every permission in name order, following the server's keyset page cursors."""
+        yield from self._iter_pages("/permissions", page_size)
+
+    def get_permission(self, permission_id: UUID) -> Dict[str, Any]:
+        return self._read(f"/permissions/{permission_id}")
+
+    def update_permission(self, permission_id: UUID, **changes: Any) -> Dict[str, Any]:
+        return self._write("PUT", f"/permissions/{permission_id}", json=changes)
+
+    def delete_permission(self, permission_id: UUID) -> None:
+        self._write("DELETE", f"/permissions/{permission_id}")
+
+    def iter_permission_holders(
+        self, permission_id: UUID, page_size: Optional[int] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Users effectively holding the permission ({"user_id", "role_ids"}), streamed in user_id order."""
+        yield from self._iter_holders(f"/permissions/{permission_id}/users", page_size)
+
+    # --- Assignments ---
+
+    def assign_permission_to_role(
+        self,
+        role_id: UUID,
+        *,
+        permission_id: Optional[UUID] = None,
+        permission_name: Optional[str] = None
+    ) -> Dict[str, Any]:
+        body = drop_none({"permission_id": str(permission_id) if permission_id else None, "permission_name": permission_name})
+        return self._write("POST", f"/roles/{role_id}/permissions", json=body)
+
+    def remove_permission_from_role(self, role_id: UUID, permission_id: UUID) -> None:
+        self._write("DELETE", f"/roles/{role_id}/permissions/{permission_id}")
+
+    def assign_role_to_user(
+        self,
+        user_id: str,
+        *,
+        role_id: Optional[UUID] = None,
+        role_name: Optional[str] = None
+    ) -> Dict[str, Any]:
+        body = drop_none({"role_id": str(role_id) if role_id else None, "role_name": role_name})
+        return self._write("POST", f"/users/{user_id}/roles", json=body)
+
+    def remove_role_from_user(self, user_id: str, role_id: UUID) -> None:
+        self._write("DELETE", f"/users/{user_id}/roles/{role_id}")
+
+    def bulk_assign_role_to_users(self, role_id: UUID, user_ids: List[str]) -> Dict[str, Any]:
+        """One transaction server-side; per-user results say `assigned` or `already_assigned`."""
+        return self._write("POST", f"/roles/{role_id}/users:bulk", json={"user_ids": list(user_ids)})
+
+    def bulk_remove_role_from_users(self, role_id: UUID, user_ids: List[str]) -> Dict[str, Any]:
+        """Per-user results say `revoked` or `not_assigned`."""
+        return self._write("POST", f"/roles/{role_id}/users:bulk-revoke", json={"user_ids": list(user_ids)})
+
+    def get_user_roles(self, user_id: str) -> List[Dict[str, Any]]:
+        return self._read(f"/users/{user_id}/roles")
+
+    # --- Changesets ---
+
+    def apply_changeset(self, operations: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """POST /changesets: applies every operation or none; returns {"epoch", "results"}."""
+        return self._write("POST", "/changesets", json={"operations": operations})
+
+    # --- Policy export ---
+
+    def iter_snapshot(self) -> Iterator[Dict[str, Any]]:
+        """Streams GET /policy/snapshot as decoded frames (header, rows..., end)."""
+        with self._http.stream("GET", self._url(SNAPSHOT_PATH)) as response:
+            if not response.is_success:
+                response.read()
+                response_json(response)
+            yield from iter_frames(response.iter_bytes())
+
+    def get_policy_changes(self, since: int, limit: int = 1000) -> Dict[str, Any]:
+        """Deltas after epoch `since`; raises RBACClientError(410) when a fresh snapshot is needed."""
+        return self._read(CHANGES_PATH, params={"since": since, "limit": limit})
+
+    # --- Plumbing ---
+
+    def _url(self, path: str) -> str:
+        return self.api_prefix + path
+
+    def _read(self, path: str, **kwargs: Any) -> Any:
+        response = self._http.get(self._url(path), **kwargs)
+        return response_json(response)
+
+    def _iter_pages(self, path: str, page_size: int) -> Iterator[Dict[str, Any]]:
+        params: Dict[str, Any] = {"limit": page_size}
+        while True:
+            response = self._http.get(self._url(path), params=params)
+            for item in response_json(response):
+                yield item
+            cursor = response.headers.get(NEXT_PAGE_HEADER)
+            if not cursor:
+                return
+            params["cursor"] = cursor
+
+    def _iter_holders(self, path: str, page_size: Optional[int]) -> Iterator[Dict[str, Any]]:
+        """Reads NDJSON holder streams, resuming from `next_cursor` when `page_size` cut one short."""
+        params: Dict[str, Any] = drop_none({"limit": page_size})
+        while True:
+            cursor = None
+            with self._http.stream("GET", self._url(path), params=params) as response:
+                if not response.is_success:
+                    response.read()
+                    response_json(response)
+                for line in response.iter_lines():
+                    item = ndjson_item(line)
+                    if item is None:
+                        continue
+                    if NEXT_CURSOR_FIELD in item:
+                        cursor = item[NEXT_CURSOR_FIELD]
+                    else:
+                        yield item
+            if not cursor:
+                return
+            params["cursor"] = cursor
+
+    def _write(self, method: str, path: str, **kwargs: Any) -> Any:
+        response = self._http.request(method, self._url(path), **kwargs)
+        data = response_json(response)
+        # Our own write moved the epoch; don't serve decisions that predate it
+        self.cache.clear()
+        return data
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.cache.stats(), "coalesced": self._coalescer.coalesced}
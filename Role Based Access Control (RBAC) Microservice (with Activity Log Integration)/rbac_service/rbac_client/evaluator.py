@@ -0,0 +1,319 @@
+# rbac_client/evaluator.py
+# In-process permission checks from a policy snapshot (GET /policy/snapshot),
+# kept current with deltas (GET /policy/changes). No network or DB access per check.
+import logging
+import threading
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, Iterable, Optional, Tuple
+from uuid import UUID
+
+from rbac_client._common import RBACClientError
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = "rbac-policy-snapshot"
+SNAPSHOT_VERSION = 1
+
+
+@dataclass(frozen=True)
+class _PolicyIndex:
+    """
+    Immutable, compact view of the policy. Permissions are interned into bit
+    positions and each role is an integer bitmask over them, as in the
+    server's bitset engine; users map to the tuple of their role keys.
+    IDs are kept as 16-byte strings, which hash faster than UUID objects.
+    """
+    epoch: int = -1
+    bit_by_name: Dict[str, int] = field(default_factory=dict) # Enabled permissions only
+    bit_by_permission_id: Dict[bytes, int] = field(default_factory=dict)
+    name_by_permission_id: Dict[bytes, str] = field(default_factory=dict)
+    role_masks: Dict[bytes, int] = field(default_factory=dict)
+    user_roles: Dict[str, Tuple[bytes, ...]] = field(default_factory=dict)
+    next_bit: int = 0
+
+    def allows(self, user_id: str, permission: str) -> bool:
+        bit = self.bit_by_name.get(permission)
+        if bit is None:
+            return False
+        role_masks = self.role_masks
+        for role_key in self.user_roles.get(user_id, ()):
+            if role_masks.get(role_key, 0) >> bit & 1:
+                return True
+        return False
+
+
+class _IndexBuilder:
+    """Mutable working copy used to build or patch an index before it is swapped in."""
+
+    def __init__(self, base: _PolicyIndex):
+        self.epoch = base.epoch
+        self.bit_by_name = dict(base.bit_by_name)
+        self.bit_by_permission_id = dict(base.bit_by_permission_id)
+        self.name_by_permission_id = dict(base.name_by_permission_id)
+        self.role_masks = dict(base.role_masks)
+        self.user_roles = dict(base.user_roles)
+        self.next_bit = base.next_bit
+
+    def upsert_role(self, role_key: bytes) -> None:
+        self.role_masks.setdefault(role_key, 0)
+
+    def delete_role(self, role_key: bytes) -> None:
+        self.role_masks.pop(role_key, None)
+        for user_id, role_keys in list(self.user_roles.items()):
+            if role_key in role_keys:
+                self._set_user_roles(user_id, tuple(key for key in role_keys if key != role_key))
+
+    def upsert_permission(self, permission_key: bytes, name: str) -> None:
+        old_name = self.name_by_permission_id.get(permission_key)
+        if old_name is not None and old_name != name:
+            self.bit_by_name.pop(old_name, None)
+        bit = self.bit_by_permission_id.get(permission_key)
+        if bit is None:
+            bit = self.bit_by_permission_id[permission_key] = self.next_bit
+            self.next_bit += 1
+        self.name_by_permission_id[permission_key] = name
+        self.bit_by_name[name] = bit
+
+    def delete_permission(self, permission_key: bytes) -> None:
+        name = self.name_by_permission_id.pop(permission_key, None)
+        if name is not None:
+            self.bit_by_name.pop(name, None)
+        bit = self.bit_by_permission_id.get(permission_key)
+        if bit is not None: # Its links go with it; the bit is kept for a later re-enable
+            clear = ~(1 << bit)
+            self.role_masks = {role_key: mask & clear for role_key, mask in self.role_masks.items()}
+
+    def link(self, role_key: bytes, permission_key: bytes, linked: bool) -> None:
+        bit = self.bit_by_permission_id.get(permission_key)
+        if bit is None:
+            return # Unknown (e.g. disabled) permission: not part of the policy
+        mask = self.role_masks.get(role_key, 0)
+        self.role_masks[role_key] = mask | (1 << bit) if linked else mask & ~(1 << bit)
+
+    def assign(self, user_id: str, role_key: bytes, assigned: bool) -> None:
+        role_keys = self.user_roles.get(user_id, ())
+        if assigned and role_key not in role_keys:
+            self._set_user_roles(user_id, role_keys + (role_key,))
+        elif not assigned and role_key in role_keys:
+            self._set_user_roles(user_id, tuple(key for key in role_keys if key != role_key))
+
+    def _set_user_roles(self, user_id: str, role_keys: Tuple[bytes, ...]) -> None:
+        if role_keys:
+            self.user_roles[user_id] = role_keys
+        else:
+            self.user_roles.pop(user_id, None)
+
+    def build(self) -> _PolicyIndex:
+        return _PolicyIndex(
+            epoch=self.epoch,
+            bit_by_name=self.bit_by_name,
+            bit_by_permission_id=self.bit_by_permission_id,
+            name_by_permission_id=self.name_by_permission_id,
+            role_masks=self.role_masks,
+            user_roles=self.user_roles,
+            next_bit=self.next_bit,
+        )
+
+
+def _key(value: str) -> bytes:
+    return UUID(value).bytes
+
+
+class StaleChangesError(Exception):
+    """A change set doesn't start at the evaluator's epoch (a delta was missed)."""
+
+
+class PolicyEvaluator:
+    """
+    Embedded permission evaluator with the same semantics as the service's
+    /check: a user holds a permission if any of their roles links it and the
+    permission is enabled.
+
+    `load_snapshot` builds a complete index and `apply_changes` patches a copy
+    of the current one; either way the new index replaces the old with one
+    reference assignment, so concurrent `check` calls (which take no lock)
+    see either the old policy or the new one, never a mix.
+    """
+
+    def __init__(self):
+        self._index = _PolicyIndex()
+        self._write_lock = threading.Lock() # Serializes loads/patches, not checks
+        self.snapshots_loaded = 0
+        self.change_sets_applied = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self._index.epoch >= 0
+
+    @property
+    def epoch(self) -> int:
+        return self._index.epoch
+
+    def check(self, user_id: str, permission: str) -> bool:
+        return self._index.allows(user_id, permission)
+
+    def load_snapshot(self, frames: Iterable[Dict[str, Any]]) -> int:
+        """Builds an index from decoded snapshot frames and swaps it in. Returns its epoch."""
+        builder = _IndexBuilder(_PolicyIndex())
+        complete = False
+        for frame in frames:
+            kind = frame["type"]
+            if kind == "header":
+                if frame.get("format") != SNAPSHOT_FORMAT or frame.get("version") != SNAPSHOT_VERSION:
+                    raise ValueError(f"Unsupported snapshot format {frame.get('format')!r} v{frame.get('version')}")
+                builder.epoch = frame["epoch"]
+            elif kind == "rows":
+                self._load_rows(builder, frame["section"], frame["rows"])
+            elif kind == "end":
+                complete = True
+        if not complete:
+            raise ValueError("Snapshot stream was truncated (no end frame)")
+        with self._write_lock:
+            self._index = builder.build()
+            self.snapshots_loaded += 1
+        return builder.epoch
+
+    @staticmethod
+    def _load_rows(builder: _IndexBuilder, section: str, rows) -> None:
+        if section == "roles":
+            for role_key, _name in rows:
+                builder.upsert_role(role_key)
+        elif section == "permissions":
+            for permission_key, name in rows:
+                builder.upsert_permission(permission_key, name)
+        elif section == "role_permissions":
+            for role_key, permission_key in rows:
+                builder.link(role_key, permission_key, True)
+        elif section == "user_roles":
+            user_roles = builder.user_roles
+            for user_id, role_key in rows:
+                user_roles[user_id] = user_roles.get(user_id, ()) + (role_key,)
+
+    def apply_changes(self, change_set: Dict[str, Any]) -> int:
+        """Applies one GET /policy/changes response. Returns the new epoch."""
+        with self._write_lock:
+            current = self._index
+            if change_set["since"] != current.epoch:
+                raise StaleChangesError(f"Changes start at epoch {change_set['since']}, evaluator is at {current.epoch}")
+            if not change_set["changes"]:
+                self._index = replace(current, epoch=change_set["epoch"])
+                return change_set["epoch"]
+            builder = _IndexBuilder(current)
+            for change in change_set["changes"]:
+                self._apply_change(builder, change)
+            builder.epoch = change_set["epoch"]
+            self._index = builder.build()
+            self.change_sets_applied += 1
+            return builder.epoch
+
+    @staticmethod
+    def _apply_change(builder: _IndexBuilder, change: Dict[str, Any]) -> None:
+        entity, upsert = change["entity"], change["op"] == "upsert"
+        if entity == "role":
+            if upsert:
+                builder.upsert_role(_key(change["role_id"]))
+            else:
+                builder.delete_role(_key(change["role_id"]))
+        elif entity == "permission":
+            if upsert:
+                builder.upsert_permission(_key(change["permission_id"]), change["name"])
+            else:
+                builder.delete_permission(_key(change["permission_id"]))
+        elif entity == "role_permission":
+            builder.link(_key(change["role_id"]), _key(change["permission_id"]), upsert)
+        elif entity == "user_role":
+            builder.assign(change["user_id"], _key(change["role_id"]), upsert)
+
+    # --- Refreshing from the service ---
+
+    def sync(self, client) -> int:
+        """
+        Brings the evaluator up to date through an `RBACClient`: a snapshot on
+        first use or when the delta history no longer reaches back far enough
+        (410), otherwise the pending deltas. Returns the new epoch.
+        """
+        if not self.loaded:
+            return self.load_snapshot(client.iter_snapshot())
+        try:
+            while True:
+                change_set = client.get_policy_changes(self.epoch)
+                self.apply_changes(change_set)
+                if not change_set["has_more"]:
+                    return self.epoch
+        except StaleChangesError as exc:
+            reason = exc
+        except RBACClientError as exc:
+            if exc.status_code != 410: # 410: history pruned past our epoch
+                raise
+            reason = exc
+        logger.warning(f"Policy deltas unavailable ({reason}); reloading snapshot")
+        return self.load_snapshot(client.iter_snapshot())
+
+    async def sync_async(self, client) -> int:
+        """`sync` for an `AsyncRBACClient`."""
+        if not self.loaded:
+            return self.load_snapshot([frame async for frame in client.iter_snapshot()])
+        try:
+            while True:
+                change_set = await client.get_policy_changes(self.epoch)
+                self.apply_changes(change_set)
+                if not change_set["has_more"]:
+                    return self.epoch
+        except StaleChangesError as exc:
+            reason = exc
+        except RBACClientError as exc:
+            if exc.status_code != 410: # 410: history pruned past our epoch
+                raise
+            reason = exc
+        logger.warning(f"Policy deltas unavailable ({reason}); reloading snapshot")
+        return self.load_snapshot([frame async for frame in client.iter_snapshot()])
+
+    def stats(self) -> Dict[str, Any]:
+        index = self._index
+        return {
+            "epoch": index.epoch,
+            "permissions": len(index.bit_by_name),
+            "roles": len(index.role_masks),
+            "users": len(index.user_roles),
+            "snapshots_loaded": self.snapshots_loaded,
+            "change_sets_applied": self.change_sets_applied,
+        }
+
+
+class PolicyRefresher:
+    """
+    Daemon thread that calls `evaluator.sync(client)` every `interval_seconds`.
+    Failures are logged and retried on the next tick; checks keep using the
+    last good policy in the meantime.
+    """
+
+    def __init__(self, evaluator: PolicyEvaluator, client, interval_seconds: float = 1.0):
+        self.evaluator = evaluator
+        self.client = client
+        self.interval_seconds = interval_seconds
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.failures = 0
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="rbac-policy-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                self.evaluator.sync(self.client)
+            except Exception as exc:
+                self.failures += 1
+                logger.error(f"Policy refresh failed: {exc}")
+            self._stopping.wait(self.interval_seconds)
@@ -0,0 +1,46 @@
+# rbac_client/snapshot.py
+# Decoder for GET /policy/snapshot: 4-byte big-endian length + msgpack map per frame.
+import struct
+from typing import Any, Dict, Iterable, Iterator, List
+from uuid import UUID
+
+SNAPSHOT_PATH = "/policy/snapshot"
+CHANGES_PATH = "/policy/changes"
+_LENGTH = struct.Struct(">I")
+
+
+class FrameDecoder:
+    """Incremental frame decoder: feed it byte chunks split anywhere, get whole frames back."""
+
+    def __init__(self):
+        import msgpack # Only snapshot consumers need it
+        self._unpackb = msgpack.unpackb
+        self._buffer = bytearray()
+
+    def feed(self, chunk: bytes) -> List[Dict[str, Any]]:
+        self._buffer += chunk
+        frames = []
+        while len(self._buffer) >= _LENGTH.size:
+            (length,) = _LENGTH.unpack_from(self._buffer)
+            end = _LENGTH.size + length
+            if len(self._buffer) < end:
+                break
+            frames.append(self._unpackb(bytes(self._buffer[_LENGTH.size:end]), raw=False))
+            del self._buffer[:end]
+        return frames
+
+    def close(self) -> None:
+        if self._buffer:
+            raise ValueError(f"Snapshot stream ended inside a frame ({len(self._buffer)} trailing bytes)")
+
+
+def iter_frames(chunks: Iterable[bytes]) -> Iterator[Dict[str, Any]]:
+    """Decodes frames from byte chunks (e.g. `response.iter_bytes()`)."""
+    decoder = FrameDecoder()
+    for chunk in chunks:
+        yield from decoder.feed(chunk)
+    decoder.close()
+
+
+def as_uuid(value: bytes) -> UUID:
+    return UUID(bytes=value)
@@ -1,15 +1,26 @@
 # tests/conftest.py
 import pytest
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.pool import StaticPool # Use StaticPool for SQLite in-memory testing
 from fastapi.testclient import TestClient
 import os
+import asyncio
+from contextlib import contextmanager
 
 from app.main import app # Import your FastAPI app
 from app.db.base import Base # Import your Base model
 from app.db.session import get_db # Import the original dependency
 from app.core.config import settings # Import settings
+from app.core.permission_cache import permission_cache
+from app.core.permission_matrix import permission_matrix
+from app.core.policy_epoch import policy_epoch
+from app.core.job_runner import job_runner
+from app.core.sql_profiler import capture_requests, profile_engine
+
+# Worker threads would need their own connections; tests run jobs inline with job_runner.run_pending(db_session)
+job_runner.workers = 0
 
 # --- Start Database Setup ---
 
@@ -33,9 +44,18 @@ else:
     engine = create_engine(
         DATABASE_URL_FOR_TEST, connect_args={"check_same_thread": False}, poolclass=StaticPool
     )
+    # SQLite ignores ON DELETE CASCADE unless foreign keys are switched on per connection
+    @event.listens_for(engine, "connect")
+    def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
     # Create sessionmaker for SQLite database
     TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Requests served by the test client run on this engine, not the app's
+profile_engine(engine)
+
 # Fixture to manage database schema (runs once per session)
 @pytest.fixture(scope="session", autouse=True)
 def setup_db():
@@ -58,6 +78,17 @@ def db_session() -> Session:
     transaction.rollback() # Rollback changes after each test
     connection.close()
 
+# Each test rolls its data back, so cached permission sets must not leak between tests
+@pytest.fixture(scope="function", autouse=True)
+def reset_permission_cache():
+    permission_cache.clear()
+    permission_matrix.invalidate()
+    policy_epoch.reset()
+    yield
+    permission_cache.clear()
+    permission_matrix.invalidate()
+    policy_epoch.reset()
+
 # Fixture to override the get_db dependency
 @pytest.fixture(scope="function")
 def override_get_db(db_session: Session):
@@ -76,4 +107,39 @@ def client(override_get_db) -> TestClient:
     with TestClient(app) as c:
         yield c
 
+# Query budgets: `with query_budget(2): client.get(...)` fails if any request made
+# inside the block runs more than 2 SQL statements, listing what each one ran
+@pytest.fixture(scope="function")
+def query_budget():
+    @contextmanager
+    def _budget(max_statements: int):
+        with capture_requests() as profiles:
+            yield profiles
+        assert profiles, "No requests were made inside the query budget"
+        over = [profile.summary() for profile in profiles if profile.count > max_statements]
+        assert not over, f"Query budget of {max_statements} exceeded:\n" + "\n".join(over)
+    return _budget
+
+# --- Async (aiosqlite) stand-in for the asyncpg engine ---
+
+def run_with_async_session(test_body):
+    """
+    Runs `await test_body(db)` against a fresh in-memory aiosqlite database.
+    Each test gets its own engine and event loop, so no pytest async plugin is needed.
+    """
+    async def _runner():
+        async_engine = create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=StaticPool)
+        async with async_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        try:
+            async with async_sessionmaker(bind=async_engine, expire_on_commit=False)() as db:
+                await test_body(db)
+        finally:
+            await async_engine.dispose()
+    asyncio.run(_runner())
+
+@pytest.fixture(scope="function")
+def async_db_runner():
+    return run_with_async_session
+
 # --- End Database Setup ---
\ No newline at end of file
@@ -0,0 +1,122 @@
+# tests/integration/test_changesets.py
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# client and db_session fixtures are automatically available from conftest.py
+
+def _apply(client: TestClient, *operations):
+    return client.post("/api/v1/changesets", json={"operations": list(operations)})
+
+def _allowed(client: TestClient, user_id: str, permission: str) -> bool:
+    return client.post("/api/v1/check", json={"user_id": user_id, "permission": permission}).json()["allowed"]
+
+def _epoch(client: TestClient) -> int:
+    return client.get("/api/v1/check", params={"user_id": "nobody", "permission": "none"}).json()["epoch"]
+
+def test_changeset_builds_role_with_grants_in_one_epoch(client: TestClient, db_session: Session):
+    before = _epoch(client)
+    response = _apply(
+        client,
+        {"op": "create_role", "role_name": "Course Staff", "description": "TAs"},
+        {"op": "create_permission", "permission_name": "grades:read"},
+        {"op": "create_permission", "permission_name": "grades:write"},
+        {"op": "assign_permission", "role_name": "Course Staff", "permission_name": "grades:read"},
+        {"op": "assign_permission", "role_name": "Course Staff", "permission_name": "grades:write"},
+        {"op": "assign_role", "user_id": "ta-1", "role_name": "Course Staff"},
+        {"op": "assign_role", "user_id": "ta-2", "role_name": "Course Staff"},
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["epoch"] == before + 1 == _epoch(client)
+    role_id = body["results"][0]["role_id"]
+    assert [r["index"] for r in body["results"]] == list(range(7))
+    assert body["results"][5] == {"index": 5, "op": "assign_role", "role_id": role_id, "permission_id": None, "user_id": "ta-1"}
+    assert _allowed(client, "ta-2", "grades:write") is True
+    permissions = client.get(f"/api/v1/roles/{role_id}").json()["permissions"]
+    assert sorted(p["permission_name"] for p in permissions) == ["grades:read", "grades:write"]
+    changes = client.get("/api/v1/policy/changes", params={"since": before}).json()["changes"]
+    assert sorted((c["entity"], c["op"]) for c in changes) == sorted(
+        [("role", "upsert")] + [("permission", "upsert")] * 2 + [("role_permission", "upsert")] * 2 + [("user_role", "upsert")] * 2
+    )
+
+def test_changeset_applies_net_effect_to_existing_policy(client: TestClient, db_session: Session):
+    setup = _apply(
+        client,
+        {"op": "create_role", "role_name": "Reviewer"},
+        {"op": "create_permission", "permission_name": "doc:review"},
+        {"op": "create_permission", "permission_name": "doc:approve"},
+        {"op": "assign_permission", "role_name": "Reviewer", "permission_name": "doc:review"},
+        {"op": "assign_role", "user_id": "rev-1", "role_name": "Reviewer"},
+    ).json()
+    role_id = setup["results"][0]["role_id"]
+
+    response = _apply(
+        client,
+        {"op": "remove_permission", "role_id": role_id, "permission_name": "doc:review"},
+        {"op": "assign_permission", "role_id": role_id, "permission_name": "doc:approve"},
+        {"op": "assign_role", "user_id": "rev-2", "role_id": role_id},
+        {"op": "remove_role", "user_id": "rev-2", "role_id": role_id}, # Cancels the line above
+        {"op": "assign_role", "user_id": "rev-1", "role_name": "Reviewer"}, # Already assigned
+    )
+
+    assert response.status_code == 200
+    assert response.json()["epoch"] == setup["epoch"] + 1
+    assert _allowed(client, "rev-1", "doc:review") is False
+    assert _allowed(client, "rev-1", "doc:approve") is True
+    assert client.get("/api/v1/users/rev-2/roles").json() == []
+
+def test_invalid_changeset_reports_every_failure_and_applies_nothing(client: TestClient, db_session: Session):
+    _apply(client, {"op": "create_permission", "permission_name": "legacy:off", "is_enabled": False})
+    before = _epoch(client)
+
+    response = _apply(
+        client,
+        {"op": "create_role", "role_name": "Half Done"},
+        {"op": "assign_permission", "role_name": "Half Done", "permission_name": "legacy:off"},
+        {"op": "assign_role", "user_id": "u1", "role_name": "No Such Role"},
+        {"op": "create_permission", "permission_name": "legacy:off"},
+        {"op": "remove_permission", "role_name": "Half Done", "permission_name": "missing:perm"},
+    )
+
+    assert response.status_code == 400
+    assert [e["index"] for e in response.json()["detail"]] == [1, 2, 3, 4]
+    assert response.json()["detail"][1]["detail"] == "Role not found"
+    assert _epoch(client) == before
+    assert all(r["role_name"] != "Half Done" for r in client.get("/api/v1/roles").json())
+
+def test_changeset_schema_validation(client: TestClient, db_session: Session):
+    assert _apply(client, {"op": "rename_everything"}).status_code == 422
+    assert _apply(client, {"op": "assign_role", "user_id": "u1"}).status_code == 422 # No role reference
+    assert client.post("/api/v1/changesets", json={"operations": []}).status_code == 422
+
+def test_noop_changeset_keeps_epoch(client: TestClient, db_session: Session):
+    body = _apply(
+        client,
+        {"op": "create_role", "role_name": "Steady"},
+        {"op": "assign_role", "user_id": "steady-user", "role_name": "Steady"},
+    ).json()
+    again = _apply(client, {"op": "assign_role", "user_id": "steady-user", "role_name": "Steady"})
+    assert again.status_code == 200 and again.json()["epoch"] == body["epoch"]
+
+def test_changeset_statement_count_does_not_grow_with_operations(client: TestClient, db_session: Session):
+    from tests.conftest import engine
+
+    def count_statements(size: int, tag: str) -> int:
+        operations = [{"op": "create_role", "role_name": f"Bulk {tag}"}]
+        operations += [{"op": "create_permission", "permission_name": f"{tag}:p{i}"} for i in range(size)]
+        operations += [{"op": "assign_permission", "role_name": f"Bulk {tag}", "permission_name": f"{tag}:p{i}"} for i in range(size)]
+        operations += [{"op": "assign_role", "user_id": f"{tag}-u{i}", "role_name": f"Bulk {tag}"} for i in range(size)]
+        statements = []
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            assert _apply(client, *operations).status_code == 200
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+        return len(statements)
+
+    count_statements(1, "warmup") # Seeds the epoch row
+    assert count_statements(5, "small") == count_statements(100, "large")
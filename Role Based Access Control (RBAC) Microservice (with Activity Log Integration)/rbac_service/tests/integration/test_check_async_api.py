@@ -0,0 +1,49 @@
+# tests/integration/test_check_async_api.py
+# Exercises the async /check router (DATABASE_ASYNC_ENABLED) on aiosqlite.
+import httpx
+from fastapi import FastAPI
+
+from app.api.v1.endpoints import check_async
+from app.db.session import get_async_db
+from app.schemas.rbac import RoleCreate, PermissionCreate
+from app.crud import rbac as crud
+
+
+def build_async_check_app(db) -> FastAPI:
+    async_app = FastAPI()
+    async_app.include_router(check_async.router, prefix="/api/v1")
+
+    async def _override_get_async_db():
+        yield db
+    async_app.dependency_overrides[get_async_db] = _override_get_async_db
+    return async_app
+
+def test_async_check_endpoints(async_db_runner):
+    async def body(db):
+        def seed(session):
+            role = crud.create_role(session, role_in=RoleCreate(role_name="Async API Role"))
+            perm = crud.create_permission(session, permission_in=PermissionCreate(permission_name="async:api"))
+            crud.assign_permission_to_role(session, role=role, permission=perm)
+            crud.assign_role_to_user(session, user_id="async-api-user", role_id=role.role_id)
+        await db.run_sync(seed)
+
+        transport = httpx.ASGITransport(app=build_async_check_app(db))
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+            allowed = await client.post("/api/v1/check", json={"user_id": "async-api-user", "permission": "async:api"})
+            assert allowed.status_code == 200
+            assert allowed.json()["allowed"] is True
+            denied = await client.post("/api/v1/check", json={"user_id": "nobody", "permission": "async:api"})
+            assert denied.json()["allowed"] is False
+
+            batch = await client.post("/api/v1/check/batch", json={"checks": [
+                {"user_id": "async-api-user", "permission": "async:api"},
+                {"user_id": "async-api-user", "permission": "async:none"},
+            ]})
+            assert [r["allowed"] for r in batch.json()["results"]] == [True, False]
+
+            params = {"user_id": "async-api-user", "permission": "async:api"}
+            cached = await client.get("/api/v1/check", params=params)
+            assert cached.json() == {"allowed": True, "reason": None, "epoch": allowed.json()["epoch"]}
+            revalidated = await client.get("/api/v1/check", params=params, headers={"If-None-Match": cached.headers["etag"]})
+            assert revalidated.status_code == 304
+    async_db_runner(body)
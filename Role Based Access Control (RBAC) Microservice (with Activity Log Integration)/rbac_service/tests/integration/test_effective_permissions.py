@@ -0,0 +1,74 @@
+# tests/integration/test_effective_permissions.py
+# Verifies user_effective_permissions stays equal to what the join would compute.
+from sqlalchemy import select, insert
+from sqlalchemy.orm import Session
+
+from app.crud import rbac as crud
+from app.models.rbac import Permission, user_roles_table, role_permissions_table, user_effective_permissions_table
+from app.schemas.rbac import RoleCreate, PermissionCreate, PermissionUpdate
+
+
+def materialized(db: Session) -> set:
+    return set(db.execute(select(user_effective_permissions_table)).all())
+
+def expected(db: Session) -> set:
+    stmt = select(user_roles_table.c.user_id, Permission.permission_name)\
+        .join(role_permissions_table, role_permissions_table.c.role_id == user_roles_table.c.role_id)\
+        .join(Permission, Permission.permission_id == role_permissions_table.c.permission_id)\
+        .where(Permission.is_enabled == True)\
+        .distinct()
+    return set(db.execute(stmt).all())
+
+def test_effective_permissions_maintained_incrementally(db_session: Session):
+    db = db_session
+    reader = crud.create_role(db, role_in=RoleCreate(role_name="Eff Reader"))
+    writer = crud.create_role(db, role_in=RoleCreate(role_name="Eff Writer"))
+    read = crud.create_permission(db, permission_in=PermissionCreate(permission_name="eff:read"))
+    write = crud.create_permission(db, permission_in=PermissionCreate(permission_name="eff:write"))
+
+    # Both roles grant eff:read, so losing one of them must keep it
+    crud.assign_permission_to_role(db, role=reader, permission=read)
+    crud.assign_permission_to_role(db, role=writer, permission=read)
+    crud.assign_permission_to_role(db, role=writer, permission=write)
+    crud.assign_role_to_user(db, user_id="eff-1", role_id=reader.role_id)
+    crud.assign_role_to_user(db, user_id="eff-1", role_id=writer.role_id)
+    crud.assign_role_to_user(db, user_id="eff-2", role_id=writer.role_id)
+    assert materialized(db) == expected(db) == {
+        ("eff-1", "eff:read"), ("eff-1", "eff:write"), ("eff-2", "eff:read"), ("eff-2", "eff:write")
+    }
+
+    crud.remove_role_from_user(db, user_id="eff-1", role_id=writer.role_id)
+    assert materialized(db) == expected(db)
+    assert ("eff-1", "eff:read") in materialized(db)
+
+    crud.remove_permission_from_role(db, role=writer, permission=read)
+    assert materialized(db) == expected(db)
+    assert ("eff-2", "eff:read") not in materialized(db)
+
+    # Disable, rename while disabled, re-enable, rename while enabled
+    crud.update_permission(db, db_permission=write, permission_in=PermissionUpdate(is_enabled=False))
+    assert materialized(db) == expected(db)
+    crud.update_permission(db, db_permission=write, permission_in=PermissionUpdate(permission_name="eff:write2"))
+    crud.update_permission(db, db_permission=write, permission_in=PermissionUpdate(is_enabled=True))
+    assert materialized(db) == expected(db)
+    crud.update_permission(db, db_permission=write, permission_in=PermissionUpdate(permission_name="eff:write3"))
+    assert materialized(db) == expected(db)
+    assert ("eff-2", "eff:write3") in materialized(db)
+
+    crud.delete_role(db, role_id=writer.role_id)
+    assert materialized(db) == expected(db) == {("eff-1", "eff:read")}
+
+def test_rebuild_effective_permissions_recovers_from_drift(db_session: Session):
+    db = db_session
+    role = crud.create_role(db, role_in=RoleCreate(role_name="Eff Drift"))
+    perm = crud.create_permission(db, permission_in=PermissionCreate(permission_name="eff:drift"))
+    crud.assign_permission_to_role(db, role=role, permission=perm)
+    crud.assign_role_to_user(db, user_id="eff-drift", role_id=role.role_id)
+    # Simulate drift: a stray row and a missing row
+    db.execute(insert(user_effective_permissions_table).values(user_id="ghost", permission_name="eff:drift"))
+    db.execute(user_effective_permissions_table.delete().where(user_effective_permissions_table.c.user_id == "eff-drift"))
+
+    rows = crud.rebuild_effective_permissions(db)
+
+    assert rows == 1
+    assert materialized(db) == expected(db) == {("eff-drift", "eff:drift")}
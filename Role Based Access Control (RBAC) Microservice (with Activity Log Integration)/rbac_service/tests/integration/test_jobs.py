@@ -0,0 +1,112 @@
+# tests/integration/test_jobs.py
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+from app.core.job_runner import job_runner
+from app.crud import jobs
+from app.models.rbac import user_effective_permissions_table as eff
+
+# client and db_session fixtures are automatically available from conftest.py
+
+USERS = [f"job-user-{i}" for i in range(5)]
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(job_runner, "chunk_rows", 2)
+
+def _role_with_holders(client: TestClient, name: str, user_ids=USERS) -> dict:
+    role = client.post("/api/v1/roles", json={"role_name": name}).json()
+    permission = client.post("/api/v1/permissions", json={"permission_name": f"jobs:{uuid4().hex[:8]}"}).json()
+    client.post(f"/api/v1/roles/{role['role_id']}/permissions", json={"permission_id": permission["permission_id"]})
+    if user_ids:
+        client.post(f"/api/v1/roles/{role['role_id']}/users:bulk", json={"user_ids": list(user_ids)})
+    return {"role_id": role["role_id"], "permission": permission["permission_name"]}
+
+def _allowed(client: TestClient, user_id: str, permission: str) -> bool:
+    return client.post("/api/v1/check", json={"user_id": user_id, "permission": permission}).json()["allowed"]
+
+def test_background_role_delete_runs_in_chunks(client: TestClient, db_session: Session, small_chunks):
+    seeded = _role_with_holders(client, "Job Delete")
+    since = client.get("/api/v1/check", params={"user_id": "x", "permission": "y"}).json()["epoch"]
+
+    response = client.delete(f"/api/v1/roles/{seeded['role_id']}", params={"background": "true"})
+    assert response.status_code == 202
+    job = response.json()
+    assert job["kind"] == "delete_role" and job["status"] == "queued" and job["progress_total"] == 5
+    assert _allowed(client, USERS[0], seeded["permission"]) is True # Nothing happens until a worker runs it
+
+    chunks_before = job_runner.chunks
+    assert str(job_runner.run_pending(db_session).job_id) == job["job_id"]
+
+    done = client.get(f"/api/v1/jobs/{job['job_id']}").json()
+    assert done["status"] == "succeeded" and done["progress_done"] == 5 and done["result"] == {"deleted": True}
+    assert done["started_at"] and done["finished_at"]
+    assert job_runner.chunks - chunks_before == 4 # 2 + 2 + 1 holders, then the role itself
+    assert client.get(f"/api/v1/roles/{seeded['role_id']}").status_code == 404
+    assert not any(_allowed(client, user_id, seeded["permission"]) for user_id in USERS)
+    changes = client.get("/api/v1/policy/changes", params={"since": since}).json()
+    assert changes["epoch"] == since + 4 # One short write per chunk
+    assert [c["entity"] for c in changes["changes"]].count("user_role") == 5
+    assert changes["changes"][-1]["entity"] == "role" and changes["changes"][-1]["op"] == "delete"
+
+def test_role_user_jobs_assign_and_revoke(client: TestClient, db_session: Session, small_chunks):
+    seeded = _role_with_holders(client, "Job Assign", user_ids=USERS[:1])
+
+    job = client.post("/api/v1/jobs", json={"kind": "assign_role_to_users", "role_id": seeded["role_id"], "user_ids": USERS}).json()
+    job_runner.run_pending(db_session)
+    done = client.get(f"/api/v1/jobs/{job['job_id']}").json()
+    assert (done["status"], done["progress_done"], done["result"]) == ("succeeded", 5, {"changed": 4})
+    assert all(_allowed(client, user_id, seeded["permission"]) for user_id in USERS)
+
+    client.post("/api/v1/jobs", json={"kind": "remove_role_from_users", "role_id": seeded["role_id"], "user_ids": USERS[:3]})
+    job_runner.run_pending(db_session)
+    assert [_allowed(client, user_id, seeded["permission"]) for user_id in USERS] == [False, False, False, True, True]
+
+def test_cancel_queued_and_running_jobs(client: TestClient, db_session: Session, small_chunks, monkeypatch):
+    seeded = _role_with_holders(client, "Job Cancel", user_ids=())
+    body = {"kind": "assign_role_to_users", "role_id": seeded["role_id"], "user_ids": USERS}
+
+    queued = client.post("/api/v1/jobs", json=body).json()
+    cancelled = client.post(f"/api/v1/jobs/{queued['job_id']}/cancel")
+    assert cancelled.status_code == 202 and cancelled.json()["status"] == "cancelled"
+    assert job_runner.run_pending(db_session) is None
+    assert client.post(f"/api/v1/jobs/{queued['job_id']}/cancel").status_code == 409
+
+    running = client.post("/api/v1/jobs", json=body).json()
+    run_chunk = jobs.run_chunk
+    def run_chunk_then_cancel(db, **kwargs):
+        finished = run_chunk(db, **kwargs)
+        client.post(f"/api/v1/jobs/{running['job_id']}/cancel") # Arrives while the job is running
+        return finished
+    monkeypatch.setattr(jobs, "run_chunk", run_chunk_then_cancel)
+    job_runner.run_pending(db_session)
+
+    stopped = client.get(f"/api/v1/jobs/{running['job_id']}").json()
+    assert stopped["status"] == "cancelled" and stopped["cancel_requested"] is True
+    assert stopped["progress_done"] == 2 # The first chunk stays applied
+    assert [_allowed(client, user_id, seeded["permission"]) for user_id in USERS[:3]] == [True, True, False]
+
+def test_rebuild_job_repairs_drift(client: TestClient, db_session: Session, small_chunks):
+    seeded = _role_with_holders(client, "Job Rebuild")
+    db_session.execute(delete(eff).where(eff.c.user_id == USERS[1]))
+    db_session.execute(insert(eff).values(user_id="ghost", permission_name=seeded["permission"]))
+
+    job = client.post("/api/v1/jobs", json={"kind": "rebuild_effective_permissions"}).json()
+    job_runner.run_pending(db_session)
+
+    done = client.get(f"/api/v1/jobs/{job['job_id']}").json()
+    assert done["status"] == "succeeded" and done["progress_done"] == 6 # 5 holders + the stray user
+    holders = db_session.execute(select(eff.c.user_id).where(eff.c.permission_name == seeded["permission"])).scalars().all()
+    assert sorted(holders) == USERS
+
+def test_job_validation(client: TestClient, db_session: Session):
+    assert client.post("/api/v1/jobs", json={"kind": "delete_role", "role_id": str(uuid4())}).status_code == 404
+    assert client.post(f"/api/v1/roles/{uuid4()}", params={"background": "true"}).status_code == 405
+    assert client.delete(f"/api/v1/roles/{uuid4()}", params={"background": "true"}).status_code == 404
+    assert client.post("/api/v1/jobs", json={"kind": "drop_everything"}).status_code == 422
+    assert client.post("/api/v1/jobs", json={"kind": "assign_role_to_users", "role_id": str(uuid4()), "user_ids": []}).status_code == 422
+    assert client.get(f"/api/v1/jobs/{uuid4()}").status_code == 404
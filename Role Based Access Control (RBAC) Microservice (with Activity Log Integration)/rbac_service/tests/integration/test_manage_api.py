@@ -1,6 +1,8 @@
 # tests/integration/test_manage_api.py
+import json
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 from uuid import UUID, uuid4
 # --- Updated Mocking Imports ---
@@ -12,6 +14,7 @@ from unittest.mock import patch, MagicMock # Keep patch and MagicMock
 from app.schemas.rbac import RoleResponse, PermissionResponse
 # Import models to help verify database state
 from app.models.rbac import Role, Permission
+from app.core.pagination import encode_cursor
 
 # client and db_session fixtures are automatically available from conftest.py
 
@@ -214,19 +217,21 @@ def test_check_api_endpoint(client: TestClient, db_session: Session):
     client.post(f"/api/v1/users/{user_id}/roles", json={"role_id": role_id})
     check_response_allowed = client.post("/api/v1/check", json={"user_id": user_id, "permission": perm_enabled["permission_name"]})
     assert check_response_allowed.status_code == 200
-    assert check_response_allowed.json() == {"allowed": True, "reason": None}
+    epoch = check_response_allowed.json()["epoch"]
+    assert epoch > 0 # Setup above wrote policy
+    assert check_response_allowed.json() == {"allowed": True, "reason": None, "epoch": epoch}
     check_response_disabled = client.post("/api/v1/check", json={"user_id": user_id, "permission": perm_disabled["permission_name"]})
     assert check_response_disabled.status_code == 200
-    assert check_response_disabled.json() == {"allowed": False, "reason": None}
+    assert check_response_disabled.json() == {"allowed": False, "reason": None, "epoch": epoch}
     check_response_unassigned = client.post("/api/v1/check", json={"user_id": user_id, "permission": perm_unassigned["permission_name"]})
     assert check_response_unassigned.status_code == 200
-    assert check_response_unassigned.json() == {"allowed": False, "reason": None}
+    assert check_response_unassigned.json() == {"allowed": False, "reason": None, "epoch": epoch}
     check_response_nouser = client.post("/api/v1/check", json={"user_id": "non-existent-user", "permission": perm_enabled["permission_name"]})
     assert check_response_nouser.status_code == 200
-    assert check_response_nouser.json() == {"allowed": False, "reason": None}
+    assert check_response_nouser.json() == {"allowed": False, "reason": None, "epoch": epoch}
     check_response_noperm = client.post("/api/v1/check", json={"user_id": user_id, "permission": "non:existent"})
     assert check_response_noperm.status_code == 200
-    assert check_response_noperm.json() == {"allowed": False, "reason": None}
+    assert check_response_noperm.json() == {"allowed": False, "reason": None, "epoch": epoch}
 
 
 # --- CORRECTED Mocked Test for Logging ---
@@ -267,4 +272,413 @@ def test_create_role_logs_activity(mock_add_task: MagicMock, client: TestClient)
     assert expected_kwargs_subset.items() <= call_kwargs.items()
 
 # TODO: Add more mocked tests for other actions (update role, delete role, assign role, etc.)
-#       verifying background_tasks.add_task is called with the correct arguments.
\ No newline at end of file
+#       verifying background_tasks.add_task is called with the correct arguments.
+
+# --- Permission Cache Integration Tests ---
+
+def test_check_cache_invalidated_by_assignments(client: TestClient):
+    role = create_role_via_api(client, "Cache Role", "")
+    perm = create_permission_via_api(client, "perm:cache_test", "", True)
+    role_id = role["role_id"]
+    user_id = f"cache-user-{uuid4()}"
+    check_body = {"user_id": user_id, "permission": perm["permission_name"]}
+
+    # Cached as "no permissions" first...
+    assert client.post("/api/v1/check", json=check_body).json()["allowed"] is False
+    # ...then each write must invalidate the affected entry
+    client.post(f"/api/v1/users/{user_id}/roles", json={"role_id": role_id})
+    assert client.post("/api/v1/check", json=check_body).json()["allowed"] is False
+    client.post(f"/api/v1/roles/{role_id}/permissions", json={"permission_id": perm["permission_id"]})
+    assert client.post("/api/v1/check", json=check_body).json()["allowed"] is True
+    client.put(f"/api/v1/permissions/{perm['permission_id']}", json={"is_enabled": False})
+    assert client.post("/api/v1/check", json=check_body).json()["allowed"] is False
+    client.put(f"/api/v1/permissions/{perm['permission_id']}", json={"is_enabled": True})
+    assert client.post("/api/v1/check", json=check_body).json()["allowed"] is True
+    client.delete(f"/api/v1/users/{user_id}/roles/{role_id}")
+    assert client.post("/api/v1/check", json=check_body).json()["allowed"] is False
+
+def test_check_cache_invalidated_by_role_delete(client: TestClient):
+    role = create_role_via_api(client, "Cache Delete Role", "")
+    perm = create_permission_via_api(client, "perm:cache_delete", "", True)
+    user_id = f"cache-user-{uuid4()}"
+    client.post(f"/api/v1/roles/{role['role_id']}/permissions", json={"permission_id": perm["permission_id"]})
+    client.post(f"/api/v1/users/{user_id}/roles", json={"role_id": role["role_id"]})
+    check_body = {"user_id": user_id, "permission": perm["permission_name"]}
+    assert client.post("/api/v1/check", json=check_body).json()["allowed"] is True
+    client.delete(f"/api/v1/roles/{role['role_id']}")
+    assert client.post("/api/v1/check", json=check_body).json()["allowed"] is False
+
+def test_permission_cache_stats_endpoint(client: TestClient):
+    body = {"user_id": f"stats-user-{uuid4()}", "permission": "perm:any"}
+    client.post("/api/v1/check", json=body)
+    client.post("/api/v1/check", json=body)
+    response = client.get("/api/v1/diagnostics/permission-cache")
+    assert response.status_code == 200
+    stats = response.json()
+    assert stats["misses"] >= 1
+    assert stats["hits"] >= 1
+
+
+# --- Batch Check Integration Tests ---
+
+def test_batch_check_endpoint(client: TestClient):
+    role = create_role_via_api(client, "Batch Check Role", "")
+    perm_a = create_permission_via_api(client, "perm:batch_a", "", True)
+    perm_b = create_permission_via_api(client, "perm:batch_b", "", True)
+    user_1 = f"batch-user-{uuid4()}"
+    user_2 = f"batch-user-{uuid4()}"
+    client.post(f"/api/v1/roles/{role['role_id']}/permissions", json={"permission_id": perm_a["permission_id"]})
+    client.post(f"/api/v1/users/{user_1}/roles", json={"role_id": role["role_id"]})
+
+    checks = [
+        {"user_id": user_1, "permission": "perm:batch_a"},
+        {"user_id": user_1, "permission": "perm:batch_b"},
+        {"user_id": user_2, "permission": "perm:batch_a"},
+        {"user_id": user_1, "permission": "non:existent"},
+        {"user_id": user_1, "permission": "perm:batch_a"}, # Duplicates are answered too
+    ]
+    response = client.post("/api/v1/check/batch", json={"checks": checks})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["allowed"] for r in results] == [True, False, False, False, True]
+    assert [(r["user_id"], r["permission"]) for r in results] == [(c["user_id"], c["permission"]) for c in checks]
+
+def test_batch_check_rejects_empty_batch(client: TestClient):
+    response = client.post("/api/v1/check/batch", json={"checks": []})
+    assert response.status_code == 422
+
+@patch("app.api.v1.endpoints.check.BackgroundTasks.add_task")
+def test_batch_check_logs_one_event(mock_add_task: MagicMock, client: TestClient):
+    checks = [{"user_id": "batch-log-user", "permission": f"perm:batch_log_{i}"} for i in range(5)]
+    response = client.post("/api/v1/check/batch", json={"checks": checks})
+    assert response.status_code == 200
+    mock_add_task.assert_called_once()
+    _, call_kwargs = mock_add_task.call_args
+    assert call_kwargs["action"] == "CHECK_PERMISSION_BATCH"
+    assert call_kwargs["user_id"] == "batch-log-user"
+    assert call_kwargs["details"]["checks"] == 5
+    assert call_kwargs["details"]["denied"] == 5
+
+
+# --- Bitset Engine Integration Tests ---
+
+def test_check_with_bitset_engine(client: TestClient, monkeypatch):
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "PERMISSION_ENGINE", "bitset")
+
+    role = create_role_via_api(client, "Bitset Role", "")
+    perm = create_permission_via_api(client, "perm:bitset", "", True)
+    user_id = f"bitset-user-{uuid4()}"
+    check_body = {"user_id": user_id, "permission": perm["permission_name"]}
+    client.post(f"/api/v1/users/{user_id}/roles", json={"role_id": role["role_id"]})
+    assert client.post("/api/v1/check", json=check_body).json()["allowed"] is False
+
+    # Role-level writes must mark the matrix stale so the next check reloads it
+    client.post(f"/api/v1/roles/{role['role_id']}/permissions", json={"permission_id": perm["permission_id"]})
+    assert client.post("/api/v1/check", json=check_body).json()["allowed"] is True
+    batch = client.post("/api/v1/check/batch", json={"checks": [check_body, {"user_id": "other", "permission": "perm:bitset"}]})
+    assert [r["allowed"] for r in batch.json()["results"]] == [True, False]
+
+    client.put(f"/api/v1/permissions/{perm['permission_id']}", json={"is_enabled": False})
+    assert client.post("/api/v1/check", json=check_body).json()["allowed"] is False
+
+
+# --- Policy epoch / cacheable GET /check ---
+
+def test_get_check_revalidates_by_policy_epoch(client: TestClient, db_session: Session):
+    role = create_role_via_api(client, "Epoch Role", "")
+    perm = create_permission_via_api(client, "perm:epoch_get", "", True)
+    user_id = f"epoch-user-{uuid4()}"
+    client.post(f"/api/v1/users/{user_id}/roles", json={"role_id": role["role_id"]})
+    params = {"user_id": user_id, "permission": perm["permission_name"]}
+
+    first = client.get("/api/v1/check", params=params)
+    assert first.status_code == 200
+    assert first.json()["allowed"] is False
+    etag = first.headers["etag"]
+    assert etag == f'"rbac-epoch-{first.json()["epoch"]}"'
+    assert first.headers["cache-control"] == "no-cache"
+
+    # Unchanged policy: cheap 304 revalidation
+    revalidated = client.get("/api/v1/check", params=params, headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == etag
+
+    # Any write bumps the epoch, so the cached copy no longer validates
+    client.post(f"/api/v1/roles/{role['role_id']}/permissions", json={"permission_id": perm["permission_id"]})
+    changed = client.get("/api/v1/check", params=params, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json()["allowed"] is True
+    assert changed.json()["epoch"] > first.json()["epoch"]
+    assert changed.headers["etag"] != etag
+
+
+def test_get_check_revalidation_sees_writes_from_other_workers(client: TestClient, db_session: Session):
+    from app.core import policy_bus
+    from app.core.policy_epoch import policy_epoch
+    role = create_role_via_api(client, "Other Worker Role", "")
+    perm = create_permission_via_api(client, "perm:other_worker", "", True)
+    user_id = f"epoch-user-{uuid4()}"
+    client.post(f"/api/v1/users/{user_id}/roles", json={"role_id": role["role_id"]})
+    params = {"user_id": user_id, "permission": perm["permission_name"]}
+
+    first = client.get("/api/v1/check", params=params)
+    assert first.json()["allowed"] is False # Now cached in this process
+
+    # Another worker's write: committed to the DB, but no notification reaches this process
+    with patch.object(policy_bus, "invalidate_policy"), patch.object(policy_epoch, "advance"):
+        client.post(f"/api/v1/roles/{role['role_id']}/permissions", json={"permission_id": perm["permission_id"]})
+    assert policy_epoch.get(db_session) == first.json()["epoch"] # The in-process epoch is stale
+
+    changed = client.get("/api/v1/check", params=params, headers={"If-None-Match": first.headers["etag"]})
+    assert changed.status_code == 200
+    assert changed.json()["allowed"] is True
+    assert changed.headers["etag"] != first.headers["etag"]
+    assert client.get("/api/v1/check", params=params, headers={"If-None-Match": changed.headers["etag"]}).status_code == 304
+
+def test_get_check_revalidation_ignores_a_lagging_replica(client: TestClient, db_session: Session):
+    from sqlalchemy import create_engine, insert
+    from sqlalchemy.pool import StaticPool
+    from app.db.base import Base
+    from app.db.session import get_read_db
+    from app.main import app
+    from app.models.rbac import policy_epoch_table
+    from app.core import policy_bus
+    from app.core.policy_epoch import policy_epoch
+    role = create_role_via_api(client, "Lagging Replica Role", "")
+    perm = create_permission_via_api(client, "perm:lagging_replica", "", True)
+    client.post(f"/api/v1/roles/{role['role_id']}/permissions", json={"permission_id": perm["permission_id"]})
+    user_id = f"epoch-user-{uuid4()}"
+    client.post(f"/api/v1/users/{user_id}/roles", json={"role_id": role["role_id"]})
+    params = {"user_id": user_id, "permission": perm["permission_name"]}
+    granted = client.get("/api/v1/check", params=params)
+    assert granted.json()["allowed"] is True
+
+    # Another worker revokes on the primary; the replica is still at the epoch the client cached
+    with patch.object(policy_bus, "invalidate_policy"), patch.object(policy_epoch, "advance"):
+        client.delete(f"/api/v1/users/{user_id}/roles/{role['role_id']}")
+    replica_engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(replica_engine)
+    replica = Session(replica_engine)
+    replica.execute(insert(policy_epoch_table).values(id=1, epoch=granted.json()["epoch"]))
+    replica.commit()
+    app.dependency_overrides[get_read_db] = lambda: replica
+    try:
+        revalidated = client.get("/api/v1/check", params=params, headers={"If-None-Match": granted.headers["etag"]})
+    finally:
+        del app.dependency_overrides[get_read_db]
+        replica.close()
+
+    assert revalidated.status_code == 200 # Not a 304 that would keep the revoked grant cached
+    assert revalidated.json()["allowed"] is False
+    assert revalidated.json()["epoch"] > granted.json()["epoch"]
+
+def test_get_check_max_age_setting(client: TestClient, db_session: Session, monkeypatch):
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "CHECK_HTTP_MAX_AGE_SECONDS", 5)
+    response = client.get("/api/v1/check", params={"user_id": "nobody", "permission": "perm:none"})
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "max-age=5, must-revalidate"
+
+# --- rbac_client SDK against the real app ---
+
+def test_rbac_client_end_to_end(client: TestClient, db_session: Session):
+    from rbac_client import RBACClient
+    sdk = RBACClient(http_client=client, cache_ttl_seconds=0) # Always revalidate
+    role = sdk.create_role("SDK Role")
+    perm = sdk.create_permission("perm:sdk_check")
+    sdk.assign_permission_to_role(role["role_id"], permission_id=perm["permission_id"])
+    user_id = f"sdk-user-{uuid4()}"
+
+    assert sdk.check(user_id, "perm:sdk_check") is False
+    sdk.assign_role_to_user(user_id, role_name="SDK Role")
+    assert [r["role_name"] for r in sdk.get_user_roles(user_id)] == ["SDK Role"]
+    decision = sdk.check_decision(user_id, "perm:sdk_check")
+    assert decision.allowed is True and decision.from_cache is False
+
+    # Unchanged policy: the expired entry is revalidated with a 304
+    assert sdk.check_decision(user_id, "perm:sdk_check").from_cache is True
+    sdk.remove_role_from_user(user_id, role["role_id"])
+    assert sdk.check(user_id, "perm:sdk_check") is False
+
+# --- Keyset pagination of role/permission listings ---
+
+def test_list_roles_pages_with_next_page_token(client: TestClient, db_session: Session):
+    names = [f"Paged Role {i:02d}" for i in range(5)]
+    for name in reversed(names):
+        create_role_via_api(client, name, "paged")
+
+    seen, params = [], {"limit": 2}
+    while True:
+        response = client.get("/api/v1/roles", params=params)
+        assert response.status_code == 200
+        assert len(response.json()) <= 2
+        seen.extend(role["role_name"] for role in response.json())
+        token = response.headers.get("x-next-page-token")
+        if token is None:
+            break
+        params["cursor"] = token
+    assert [name for name in seen if name.startswith("Paged Role")] == names
+    assert seen == sorted(seen)
+
+    from rbac_client import RBACClient
+    assert [role["role_name"] for role in RBACClient(http_client=client).iter_roles(page_size=2)] == seen
+
+def test_list_permissions_cursor_validation(client: TestClient, db_session: Session):
+    for i in range(3):
+        client.post("/api/v1/permissions", json={"permission_name": f"paged:perm{i}"})
+    first = client.get("/api/v1/permissions", params={"limit": 1})
+    token = first.headers["x-next-page-token"]
+    assert [p["permission_name"] for p in client.get("/api/v1/permissions", params={"limit": 5, "cursor": token}).json()] == [
+        "paged:perm1", "paged:perm2"
+    ]
+    assert client.get("/api/v1/permissions", params={"cursor": "not-a-cursor"}).status_code == 400
+    # A roles cursor is not valid for the permissions listing
+    roles_token = encode_cursor("roles", after="x")
+    assert client.get("/api/v1/permissions", params={"cursor": roles_token}).status_code == 400
+
+def test_list_roles_page_costs_two_queries(client: TestClient, db_session: Session):
+    from tests.conftest import engine
+    for i in range(4):
+        role = create_role_via_api(client, f"Eager Role {i}", "eager")
+        for j in range(3):
+            perm = client.post("/api/v1/permissions", json={"permission_name": f"eager:r{i}p{j}"}).json()
+            client.post(f"/api/v1/roles/{role['role_id']}/permissions", json={"permission_id": perm["permission_id"]})
+    db_session.expunge_all() # Nothing preloaded in the identity map
+
+    statements = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        response = client.get("/api/v1/roles", params={"limit": 3})
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert response.status_code == 200
+    assert all(len(role["permissions"]) == 3 for role in response.json())
+    # One query for the page of roles and one (selectinload) for all of their permissions
+    assert len([s for s in statements if s.lstrip().upper().startswith("SELECT")]) == 2
+
+# --- Bulk user-role assignment ---
+
+def _role_with_permission(client: TestClient, name: str) -> dict:
+    role = create_role_via_api(client, name, "bulk")
+    perm = create_permission_via_api(client, f"bulk:{name.lower().replace(' ', '_')}", "bulk")
+    client.post(f"/api/v1/roles/{role['role_id']}/permissions", json={"permission_id": perm["permission_id"]})
+    return {"role": role, "permission": perm["permission_name"]}
+
+def test_bulk_assign_and_revoke_role(client: TestClient, db_session: Session):
+    seeded = _role_with_permission(client, "Bulk Course")
+    role_id, permission = seeded["role"]["role_id"], seeded["permission"]
+    client.post("/api/v1/users/student-0/roles", json={"role_id": role_id})
+    # More users than one statement chunk, plus a repeat
+    user_ids = [f"student-{i}" for i in range(2500)] + ["student-7"]
+
+    response = client.post(f"/api/v1/roles/{role_id}/users:bulk", json={"user_ids": user_ids})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["changed"] == 2499 and body["unchanged"] == 1
+    assert len(body["results"]) == 2500
+    assert body["results"][0] == {"user_id": "student-0", "status": "already_assigned"}
+    assert body["results"][1] == {"user_id": "student-1", "status": "assigned"}
+    assert client.post("/api/v1/check", json={"user_id": "student-2499", "permission": permission}).json()["allowed"] is True
+
+    revoke = client.post(f"/api/v1/roles/{role_id}/users:bulk-revoke", json={"user_ids": ["student-1", "student-2", "nobody"]})
+    assert revoke.status_code == 200
+    assert [r["status"] for r in revoke.json()["results"]] == ["revoked", "revoked", "not_assigned"]
+    assert client.post("/api/v1/check", json={"user_id": "student-1", "permission": permission}).json()["allowed"] is False
+    assert client.post("/api/v1/check", json={"user_id": "student-3", "permission": permission}).json()["allowed"] is True
+    assert [r["role_name"] for r in client.get("/api/v1/users/student-3/roles").json()] == ["Bulk Course"]
+
+def test_bulk_assign_is_one_epoch_in_change_log(client: TestClient, db_session: Session):
+    seeded = _role_with_permission(client, "Bulk Epoch")
+    role_id = seeded["role"]["role_id"]
+    before = client.get("/api/v1/check", params={"user_id": "x", "permission": "y"}).json()["epoch"]
+
+    client.post(f"/api/v1/roles/{role_id}/users:bulk", json={"user_ids": ["a", "b", "c"]})
+    client.post(f"/api/v1/roles/{role_id}/users:bulk", json={"user_ids": ["a", "b"]}) # No-op: no new epoch
+
+    changes = client.get("/api/v1/policy/changes", params={"since": before}).json()
+    assert changes["epoch"] == before + 1
+    assert sorted((c["user_id"], c["op"]) for c in changes["changes"]) == [("a", "upsert"), ("b", "upsert"), ("c", "upsert")]
+
+def test_bulk_assign_validation(client: TestClient, db_session: Session):
+    assert client.post(f"/api/v1/roles/{uuid4()}/users:bulk", json={"user_ids": ["a"]}).status_code == 404
+    role_id = create_role_via_api(client, "Bulk Validation", "bulk")["role_id"]
+    assert client.post(f"/api/v1/roles/{role_id}/users:bulk", json={"user_ids": []}).status_code == 422
+    assert client.post(f"/api/v1/roles/{role_id}/users:bulk", json={"user_ids": ["a", " "]}).status_code == 422
+
+@patch("app.api.v1.endpoints.manage.BackgroundTasks.add_task")
+def test_bulk_assign_logs_one_aggregated_event(mock_add_task: MagicMock, client: TestClient, db_session: Session):
+    role_id = create_role_via_api(client, "Bulk Logged", "bulk")["role_id"]
+    mock_add_task.reset_mock()
+
+    client.post(f"/api/v1/roles/{role_id}/users:bulk", json={"user_ids": [f"u{i}" for i in range(150)]})
+
+    mock_add_task.assert_called_once()
+    call_kwargs = mock_add_task.call_args.kwargs
+    assert call_kwargs["action"] == "BULK_ASSIGN_ROLE_TO_USERS"
+    assert call_kwargs["resource_id"] == role_id
+    details = call_kwargs["details"]
+    assert details["requested"] == 150 and details["changed"] == 150
+    assert len(details["user_ids"]) == 100 and details["user_ids_truncated"] is True
+
+# --- Reverse Lookups ---
+
+def _ndjson(response) -> list:
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    return [json.loads(line) for line in response.text.splitlines()]
+
+def test_role_holders_stream_in_user_order_with_cursor(client: TestClient, db_session: Session):
+    seeded = _role_with_permission(client, "Holders")
+    role_id = seeded["role"]["role_id"]
+    client.post(f"/api/v1/roles/{role_id}/users:bulk", json={"user_ids": ["h-c", "h-a", "h-d", "h-b"]})
+
+    assert [line["user_id"] for line in _ndjson(client.get(f"/api/v1/roles/{role_id}/users"))] == ["h-a", "h-b", "h-c", "h-d"]
+
+    first = _ndjson(client.get(f"/api/v1/roles/{role_id}/users", params={"limit": 3}))
+    assert [line.get("user_id") for line in first[:3]] == ["h-a", "h-b", "h-c"] and first[0]["assigned_at"]
+    rest = _ndjson(client.get(f"/api/v1/roles/{role_id}/users", params={"limit": 3, "cursor": first[3]["next_cursor"]}))
+    assert rest == [{"user_id": "h-d", "assigned_at": rest[0]["assigned_at"]}] # Exhausted: no next_cursor line
+
+    assert client.get(f"/api/v1/roles/{uuid4()}/users").status_code == 404
+    wrong_kind = encode_cursor("permission_users", after="h-a")
+    assert client.get(f"/api/v1/roles/{role_id}/users", params={"cursor": wrong_kind}).status_code == 400
+
+def test_permission_holders_lists_granting_roles(client: TestClient, db_session: Session):
+    permission_id = create_permission_via_api(client, "holders:read", "reverse lookup")["permission_id"]
+    first, other = (create_role_via_api(client, name, "grants holders:read")["role_id"] for name in ("Holders A", "Holders B"))
+    for role_id in (first, other):
+        client.post(f"/api/v1/roles/{role_id}/permissions", json={"permission_id": permission_id})
+    client.post("/api/v1/users/p-1/roles", json={"role_id": first})
+    client.post("/api/v1/users/p-1/roles", json={"role_id": other})
+    client.post("/api/v1/users/p-2/roles", json={"role_id": other})
+
+    holders = _ndjson(client.get(f"/api/v1/permissions/{permission_id}/users"))
+    assert holders == [
+        {"user_id": "p-1", "role_ids": sorted([first, other])},
+        {"user_id": "p-2", "role_ids": [other]},
+    ]
+
+    from rbac_client import RBACClient
+    assert [h["user_id"] for h in RBACClient(http_client=client).iter_permission_holders(permission_id, page_size=1)] == ["p-1", "p-2"]
+
+    client.put(f"/api/v1/permissions/{permission_id}", json={"is_enabled": False})
+    assert _ndjson(client.get(f"/api/v1/permissions/{permission_id}/users")) == [] # Nobody can use a disabled permission
+
+def test_reverse_lookups_use_leading_indexes(db_session: Session):
+    from sqlalchemy import text
+    from app.crud import reverse_lookups
+    connection = db_session.connection()
+
+    def plan(statement) -> str:
+        compiled = statement.compile(connection, compile_kwargs={"literal_binds": True})
+        return " ".join(str(row[-1]) for row in connection.execute(text(f"EXPLAIN QUERY PLAN {compiled}")))
+
+    role_plan = plan(reverse_lookups.role_holders_statement(uuid4(), after_user_id="m", limit=10))
+    assert "ix_user_roles_role_id_user_id" in role_plan and "TEMP B-TREE" not in role_plan # No sort step
+    permission_plan = plan(reverse_lookups.permission_holders_statement("x:y", after_user_id="m", limit=10))
+    assert "ix_user_effective_permissions_permission_name_user_id" in permission_plan and "TEMP B-TREE" not in permission_plan
@@ -0,0 +1,52 @@
+# tests/integration/test_manage_async_api.py
+# Exercises the async role/permission read router (DATABASE_ASYNC_ENABLED) on aiosqlite.
+import httpx
+from fastapi import FastAPI
+
+from app.api.v1.endpoints import manage_async
+from app.db.session import get_async_db
+from app.schemas.rbac import RoleCreate, PermissionCreate
+from app.crud import rbac as crud
+from app.core.pagination import NEXT_PAGE_HEADER
+
+
+def build_async_manage_app(db) -> FastAPI:
+    async_app = FastAPI()
+    async_app.include_router(manage_async.router, prefix="/api/v1")
+
+    async def _override_get_async_db():
+        yield db
+    async_app.dependency_overrides[get_async_db] = _override_get_async_db
+    return async_app
+
+def test_async_read_endpoints(async_db_runner):
+    async def body(db):
+        def seed(session):
+            roles = [crud.create_role(session, role_in=RoleCreate(role_name=f"Async Read Role {i}")) for i in range(3)]
+            perm = crud.create_permission(session, permission_in=PermissionCreate(permission_name="async:read"))
+            crud.assign_role_to_user(session, user_id="async-read-user", role_id=roles[0].role_id)
+            return str(roles[0].role_id), str(perm.permission_id)
+        role_id, permission_id = await db.run_sync(seed)
+
+        transport = httpx.ASGITransport(app=build_async_manage_app(db))
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+            first = await client.get("/api/v1/roles", params={"limit": 2})
+            assert first.status_code == 200
+            assert [r["role_name"] for r in first.json()] == ["Async Read Role 0", "Async Read Role 1"]
+            rest = await client.get("/api/v1/roles", params={"limit": 2, "cursor": first.headers[NEXT_PAGE_HEADER]})
+            assert [r["role_name"] for r in rest.json()] == ["Async Read Role 2"]
+            assert NEXT_PAGE_HEADER not in rest.headers
+
+            role = await client.get(f"/api/v1/roles/{role_id}")
+            assert role.json()["role_name"] == "Async Read Role 0"
+            missing = await client.get("/api/v1/roles/00000000-0000-0000-0000-000000000000")
+            assert missing.status_code == 404
+
+            permissions = await client.get("/api/v1/permissions")
+            assert [p["permission_name"] for p in permissions.json()] == ["async:read"]
+            permission = await client.get(f"/api/v1/permissions/{permission_id}")
+            assert permission.json()["permission_name"] == "async:read"
+
+            user_roles = await client.get("/api/v1/users/async-read-user/roles")
+            assert [r["role_id"] for r in user_roles.json()] == [role_id]
+    async_db_runner(body)
@@ -0,0 +1,81 @@
+# tests/integration/test_metrics.py
+import time
+
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import QueuePool
+
+from app.core.activity_spool import ActivitySpool
+from app.core.logging_client import activity_log_shipper
+from app.core.metrics import instrument_engine
+from tests.conftest import engine
+
+# client and db_session fixtures are automatically available from conftest.py
+
+# The app's own engine isn't the one tests run on; instrument the test engine too
+instrument_engine(engine, "test")
+
+def _sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+def test_check_decisions_and_request_metrics(client: TestClient):
+    role = client.post("/api/v1/roles", json={"role_name": "Metrics Role"}).json()
+    permission = client.post("/api/v1/permissions", json={"permission_name": "metrics:read"}).json()
+    client.post(f"/api/v1/roles/{role['role_id']}/permissions", json={"permission_id": permission["permission_id"]})
+    client.post("/api/v1/users/metrics-user/roles", json={"role_id": role["role_id"]})
+
+    allowed_before = _sample("rbac_check_decisions_total", kind="single", allowed="true")
+    denied_before = _sample("rbac_check_decisions_total", kind="single", allowed="false")
+    batch_before = _sample("rbac_check_decisions_total", kind="batch", allowed="false")
+    route = {"method": "POST", "route": "/api/v1/check"}
+    requests_before = _sample("rbac_http_request_duration_seconds_count", status="200", **route)
+    queries_before = _sample("rbac_http_request_db_queries_sum", **route)
+
+    assert client.post("/api/v1/check", json={"user_id": "metrics-user", "permission": "metrics:read"}).json()["allowed"]
+    assert not client.post("/api/v1/check", json={"user_id": "metrics-user", "permission": "metrics:write"}).json()["allowed"]
+    client.post("/api/v1/check/batch", json={"checks": [{"user_id": "nobody", "permission": "metrics:read"}, {"user_id": "nobody", "permission": "metrics:write"}]})
+
+    assert _sample("rbac_check_decisions_total", kind="single", allowed="true") - allowed_before == 1
+    assert _sample("rbac_check_decisions_total", kind="single", allowed="false") - denied_before == 1
+    assert _sample("rbac_check_decisions_total", kind="batch", allowed="false") - batch_before == 2
+    # Labelled by route template, and the uncached first check had to query the database
+    assert _sample("rbac_http_request_duration_seconds_count", status="200", **route) - requests_before == 2
+    assert _sample("rbac_http_request_db_queries_sum", **route) - queries_before >= 1
+
+def test_metrics_endpoint_exposes_runtime_state(client: TestClient):
+    client.get(f"/api/v1/roles/{'0' * 32}")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'rbac_http_request_duration_seconds_count{method="GET",route="/api/v1/roles/{role_id}",status="404"}' in body
+    for name in ("rbac_activity_log_queue_depth", "rbac_activity_log_events_total", "rbac_activity_log_breaker_open",
+                 "rbac_db_query_duration_seconds_bucket", "rbac_permission_cache_requests_total"):
+        assert name in body
+
+def test_spool_depth_and_lag_gauges(tmp_path, monkeypatch):
+    spool = ActivitySpool(str(tmp_path), fsync=False)
+    monkeypatch.setattr(activity_log_shipper, "spool", spool)
+    assert _sample("rbac_activity_log_spool_depth") == 0
+    assert _sample("rbac_activity_log_spool_lag_seconds") == 0
+
+    spool.append([{"userId": "u1", "action": "other"}, {"userId": "u2", "action": "other"}])
+    time.sleep(0.05)
+    assert _sample("rbac_activity_log_spool_depth") == 2
+    assert _sample("rbac_activity_log_spool_lag_seconds") >= 0.05
+
+def test_pool_gauges_and_checkout_wait():
+    pooled = create_engine("sqlite://", poolclass=QueuePool, pool_size=2, max_overflow=0)
+    instrument_engine(pooled, "pool-test")
+    waits_before = _sample("rbac_db_pool_checkout_wait_seconds_count", engine="pool-test")
+    try:
+        with pooled.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            assert _sample("rbac_db_pool_checked_out", engine="pool-test") == 1
+            assert _sample("rbac_db_pool_size", engine="pool-test") == 2
+        assert _sample("rbac_db_pool_checked_out", engine="pool-test") == 0
+        assert _sample("rbac_db_pool_checkout_wait_seconds_count", engine="pool-test") - waits_before == 1
+        assert _sample("rbac_db_query_duration_seconds_count", engine="pool-test", operation="select") >= 1
+    finally:
+        pooled.dispose()
@@ -0,0 +1,139 @@
+# tests/integration/test_policy_export.py
+from uuid import UUID, uuid4
+
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.crud import policy_export
+from app.models.rbac import policy_epoch_table
+from rbac_client.snapshot import iter_frames, as_uuid
+
+# client and db_session fixtures are automatically available from conftest.py
+
+def _seed_policy(client: TestClient) -> dict:
+    role = client.post("/api/v1/roles", json={"role_name": "Export Role"}).json()
+    enabled = client.post("/api/v1/permissions", json={"permission_name": "export:read"}).json()
+    disabled = client.post("/api/v1/permissions", json={"permission_name": "export:off", "is_enabled": False}).json()
+    client.post(f"/api/v1/roles/{role['role_id']}/permissions", json={"permission_id": enabled["permission_id"]})
+    user_id = f"export-user-{uuid4()}"
+    client.post(f"/api/v1/users/{user_id}/roles", json={"role_id": role["role_id"]})
+    return {"role": role, "enabled": enabled, "disabled": disabled, "user_id": user_id}
+
+def _read_snapshot(client: TestClient) -> list:
+    response = client.get("/api/v1/policy/snapshot")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == policy_export.SNAPSHOT_MEDIA_TYPE
+    return list(iter_frames([response.content[i:i + 7] for i in range(0, len(response.content), 7)]))
+
+def test_snapshot_streams_enabled_policy_in_frames(client: TestClient, db_session: Session, monkeypatch):
+    seeded = _seed_policy(client)
+    monkeypatch.setattr("app.core.config.settings.POLICY_SNAPSHOT_CHUNK_ROWS", 1)
+
+    frames = _read_snapshot(client)
+
+    header, end = frames[0], frames[-1]
+    assert header["type"] == "header" and header["format"] == policy_export.SNAPSHOT_FORMAT
+    assert header["epoch"] == client.get(
+        "/api/v1/check", params={"user_id": "nobody", "permission": "x"}
+    ).json()["epoch"]
+    rows = {}
+    for frame in frames[1:-1]:
+        assert frame["type"] == "rows" and len(frame["rows"]) == 1 # One row per frame at chunk size 1
+        rows.setdefault(frame["section"], []).extend(frame["rows"])
+    role_id, perm_id = UUID(seeded["role"]["role_id"]), UUID(seeded["enabled"]["permission_id"])
+    assert [(as_uuid(r[0]), r[1]) for r in rows["roles"]] == [(role_id, "Export Role")]
+    assert [(as_uuid(p[0]), p[1]) for p in rows["permissions"]] == [(perm_id, "export:read")]
+    assert [(as_uuid(a), as_uuid(b)) for a, b in rows["role_permissions"]] == [(role_id, perm_id)]
+    assert [(u, as_uuid(r)) for u, r in rows["user_roles"]] == [(seeded["user_id"], role_id)]
+    assert end == {"type": "end", "counts": {"roles": 1, "permissions": 1, "role_permissions": 1, "user_roles": 1}}
+
+def test_changes_since_snapshot_epoch(client: TestClient, db_session: Session):
+    seeded = _seed_policy(client)
+    since = _read_snapshot(client)[0]["epoch"]
+    role_id, user_id = seeded["role"]["role_id"], seeded["user_id"]
+    disabled_id, enabled_id = seeded["disabled"]["permission_id"], seeded["enabled"]["permission_id"]
+
+    client.delete(f"/api/v1/users/{user_id}/roles/{role_id}")
+    client.put(f"/api/v1/permissions/{enabled_id}", json={"is_enabled": False})
+    client.put(f"/api/v1/permissions/{enabled_id}", json={"is_enabled": True})
+    client.put(f"/api/v1/permissions/{disabled_id}", json={"is_enabled": True})
+
+    body = client.get("/api/v1/policy/changes", params={"since": since}).json()
+
+    assert body["since"] == since and body["epoch"] == since + 4 and body["has_more"] is False
+    assert [(c["epoch"] - since, c["entity"], c["op"]) for c in body["changes"]] == [
+        (1, "user_role", "delete"),
+        (2, "permission", "delete"), # Disabled: drops out of the snapshot with its links
+        (3, "permission", "upsert"), # Re-enabled: comes back with its role links
+        (3, "role_permission", "upsert"),
+        (4, "permission", "upsert"),
+    ]
+    assert body["changes"][0]["user_id"] == user_id
+    assert body["changes"][3]["role_id"] == role_id and body["changes"][3]["permission_id"] == enabled_id
+    assert body["changes"][4]["name"] == "export:off"
+
+    caught_up = client.get("/api/v1/policy/changes", params={"since": body["epoch"]}).json()
+    assert caught_up["changes"] == [] and caught_up["epoch"] == body["epoch"]
+
+def test_changes_pages_end_on_write_boundary(client: TestClient, db_session: Session):
+    seeded = _seed_policy(client)
+    since = _read_snapshot(client)[0]["epoch"]
+    client.put(f"/api/v1/permissions/{seeded['enabled']['permission_id']}", json={"is_enabled": False})
+    client.put(f"/api/v1/permissions/{seeded['enabled']['permission_id']}", json={"is_enabled": True}) # 2 rows
+    client.post(f"/api/v1/users/other-{uuid4()}/roles", json={"role_id": seeded["role"]["role_id"]})
+
+    first = client.get("/api/v1/policy/changes", params={"since": since, "limit": 2}).json()
+    assert [c["epoch"] - since for c in first["changes"]] == [1]
+    assert first["has_more"] is True and first["epoch"] == since + 1
+
+    second = client.get("/api/v1/policy/changes", params={"since": first["epoch"], "limit": 1}).json()
+    assert [c["epoch"] - since for c in second["changes"]] == [2, 2] # One write is never split
+
+    rest = client.get("/api/v1/policy/changes", params={"since": second["epoch"], "limit": 2}).json()
+    assert [c["entity"] for c in rest["changes"]] == ["user_role"] and rest["has_more"] is False
+
+def test_changes_outside_retained_history_return_410(client: TestClient, db_session: Session):
+    _seed_policy(client)
+    epoch = _read_snapshot(client)[0]["epoch"]
+    db_session.execute(update(policy_epoch_table).values(changes_pruned_through=epoch - 1))
+
+    assert client.get("/api/v1/policy/changes", params={"since": epoch - 1}).status_code == 200
+    assert client.get("/api/v1/policy/changes", params={"since": epoch - 2}).status_code == 410
+    assert client.get("/api/v1/policy/changes", params={"since": epoch + 1}).status_code == 410
+
+def test_rbac_client_bootstraps_from_snapshot_and_follows_changes(client: TestClient, db_session: Session):
+    from rbac_client import RBACClient, RBACClientError
+    seeded = _seed_policy(client)
+    sdk = RBACClient(http_client=client)
+
+    frames = list(sdk.iter_snapshot())
+    assert frames[-1]["counts"]["user_roles"] == 1
+
+    sdk.remove_role_from_user(seeded["user_id"], seeded["role"]["role_id"])
+    changes = sdk.get_policy_changes(frames[0]["epoch"])
+    assert [(c["entity"], c["op"]) for c in changes["changes"]] == [("user_role", "delete")]
+    try:
+        sdk.get_policy_changes(changes["epoch"] + 10)
+    except RBACClientError as exc:
+        assert exc.status_code == 410
+    else:
+        raise AssertionError("expected 410 for an epoch ahead of the server")
+
+def test_embedded_evaluator_agrees_with_check_endpoint(client: TestClient, db_session: Session):
+    from rbac_client import PolicyEvaluator, RBACClient
+    seeded = _seed_policy(client)
+    sdk = RBACClient(http_client=client)
+    evaluator = PolicyEvaluator()
+    evaluator.sync(sdk)
+
+    users = [seeded["user_id"], f"other-{uuid4()}"]
+    sdk.assign_role_to_user(users[1], role_id=seeded["role"]["role_id"])
+    sdk.update_permission(seeded["disabled"]["permission_id"], is_enabled=True)
+    sdk.assign_permission_to_role(seeded["role"]["role_id"], permission_id=seeded["disabled"]["permission_id"])
+    sdk.remove_role_from_user(users[0], seeded["role"]["role_id"])
+    assert evaluator.sync(sdk) == sdk.check_decision(users[0], "export:read").epoch
+
+    for user_id in users:
+        for permission in ("export:read", "export:off", "export:none"):
+            assert evaluator.check(user_id, permission) == sdk.check(user_id, permission), (user_id, permission)
@@ -0,0 +1,97 @@
+# tests/integration/test_policy_import.py
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+# client and db_session fixtures are automatically available from conftest.py
+
+POLICY = """
+permissions:
+  - {name: "course:view", description: "View course"}
+  - {name: "course:grade"}
+  - {name: "course:archive", enabled: false}
+roles:
+  - {name: "Student", permissions: ["course:view"]}
+  - {name: "Grader", description: "TAs", permissions: ["course:view", "course:grade"]}
+users:
+  s1: [Student]
+  s2: [Student]
+  ta1: [Grader, Student]
+"""
+
+def _import(client: TestClient, body: str, content_type: str = "application/yaml", **params):
+    return client.post("/api/v1/policy/import", content=body, headers={"Content-Type": content_type}, params=params)
+
+def _allowed(client: TestClient, user_id: str, permission: str) -> bool:
+    return client.post("/api/v1/check", json={"user_id": user_id, "permission": permission}).json()["allowed"]
+
+def test_dry_run_reports_without_writing(client: TestClient, db_session: Session):
+    response = _import(client, POLICY, dry_run="true")
+
+    assert response.status_code == 200
+    report = response.json()
+    assert report["dry_run"] is True and report["epoch"] is None
+    assert report["counts"]["roles_created"] == 2
+    assert report["counts"]["permissions_created"] == 3
+    assert report["counts"]["links_added"] == 3
+    assert report["counts"]["assignments_added"] == 4
+    assert {"role_name": "Grader", "permission_name": "course:grade"} in report["changes"]["links_added"]
+    assert client.get("/api/v1/roles").json() == []
+    # Staging tables are gone again, so a second import can stage afresh
+    assert _import(client, POLICY, dry_run="true").status_code == 200
+
+def test_import_applies_then_reconciles_only_the_delta(client: TestClient, db_session: Session):
+    first = _import(client, POLICY).json()
+    assert first["epoch"] is not None
+    assert _allowed(client, "ta1", "course:grade") is True
+    assert _allowed(client, "s1", "course:grade") is False
+
+    # Unchanged file: nothing to do, no new epoch
+    again = _import(client, POLICY).json()
+    assert again["epoch"] is None and not any(again["counts"].values())
+
+    revised = POLICY.replace('["course:view", "course:grade"]', '["course:grade"]')\
+        .replace("  s2: [Student]\n", "")\
+        .replace('{name: "course:archive", enabled: false}', '{name: "course:archive", description: "Archive"}')
+    report = _import(client, revised).json()
+
+    assert report["counts"]["links_removed"] == 1
+    assert report["counts"]["assignments_removed"] == 1
+    assert report["changes"]["permissions_updated"] == [
+        {"permission_name": "course:archive", "description": "Archive", "is_enabled": True, "was_enabled": False}
+    ]
+    assert report["epoch"] == first["epoch"] + 1
+    assert _allowed(client, "s2", "course:view") is False
+    assert _allowed(client, "ta1", "course:view") is True # Still a Student
+
+    changes = client.get("/api/v1/policy/changes", params={"since": first["epoch"]}).json()["changes"]
+    assert sorted((c["entity"], c["op"]) for c in changes) == [
+        ("permission", "upsert"), ("role_permission", "delete"), ("user_role", "delete")
+    ]
+
+def test_prune_controls_deletions(client: TestClient, db_session: Session):
+    client.post("/api/v1/roles", json={"role_name": "Legacy Role"})
+    client.post("/api/v1/users/old-user/roles", json={"role_name": "Legacy Role"})
+
+    kept = _import(client, POLICY, prune="false").json()
+    assert kept["counts"]["roles_deleted"] == 0
+    assert any(r["role_name"] == "Legacy Role" for r in client.get("/api/v1/roles").json())
+
+    pruned = _import(client, POLICY).json()
+    assert pruned["changes"]["roles_deleted"] == [{"role_name": "Legacy Role"}]
+    assert pruned["counts"]["assignments_removed"] == 1
+    assert all(r["role_name"] != "Legacy Role" for r in client.get("/api/v1/roles").json())
+    assert client.get("/api/v1/users/old-user/roles").json() == []
+
+def test_csv_import_and_file_errors(client: TestClient, db_session: Session, monkeypatch):
+    csv_policy = "kind,role,permission,user_id\npermission,,csv:read,\nrole,CSV Role,,\nrole_permission,CSV Role,csv:read,\nuser_role,CSV Role,,csv-user\n"
+    assert _import(client, csv_policy, content_type="text/csv").status_code == 200
+    assert _allowed(client, "csv-user", "csv:read") is True
+
+    bad = _import(client, "roles: [{name: Orphan, permissions: [nope:nope]}]")
+    assert bad.status_code == 400
+    assert bad.json()["detail"] == ["permission 'nope:nope' (linked from 'Orphan') is not declared"]
+
+    monkeypatch.setattr(settings, "POLICY_IMPORT_MAX_BYTES", 10)
+    assert _import(client, POLICY).status_code == 413
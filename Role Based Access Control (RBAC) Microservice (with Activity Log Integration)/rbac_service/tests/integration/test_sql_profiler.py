@@ -0,0 +1,53 @@
+# tests/integration/test_sql_profiler.py
+import logging
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.crud import rbac as crud
+from app.models.rbac import Role
+
+# client, db_session and query_budget fixtures are automatically available from conftest.py
+
+def _roles_with_permissions(client: TestClient, count: int) -> None:
+    for index in range(count):
+        role = client.post("/api/v1/roles", json={"role_name": f"Profiled {index}"}).json()
+        permission = client.post("/api/v1/permissions", json={"permission_name": f"profiled:{index}"}).json()
+        client.post(f"/api/v1/roles/{role['role_id']}/permissions", json={"permission_id": permission["permission_id"]})
+        client.post("/api/v1/users/profiled-user/roles", json={"role_id": role["role_id"]})
+
+def test_list_endpoints_stay_within_query_budget(client: TestClient, query_budget):
+    _roles_with_permissions(client, 8)
+    # Constant in the number of roles: the page, then one SELECT ... IN for all their permissions
+    with query_budget(2) as profiles:
+        assert len(client.get("/api/v1/roles").json()) == 8
+        assert len(client.get("/api/v1/users/profiled-user/roles").json()) == 8
+    assert [profile.path for profile in profiles] == ["/api/v1/roles", "/api/v1/users/profiled-user/roles"]
+
+def test_lazy_loading_regression_is_caught(client: TestClient, query_budget, monkeypatch, caplog):
+    _roles_with_permissions(client, 8)
+    # What get_roles looked like without the eager load
+    def lazy_get_roles(db: Session, skip: int = 0, limit: int = 100, *, after_name=None):
+        return db.execute(select(Role).order_by(Role.role_name).offset(skip).limit(limit)).scalars().all()
+    monkeypatch.setattr(crud, "get_roles", lazy_get_roles)
+
+    with caplog.at_level(logging.WARNING, logger="app.core.sql_profiler"):
+        with pytest.raises(AssertionError, match="Query budget of 2 exceeded"):
+            with query_budget(2):
+                client.get("/api/v1/roles")
+    assert any("Possible N+1 in GET /api/v1/roles: statement ran 8 times" in message for message in caplog.messages)
+
+def test_profiling_headers_are_opt_in(client: TestClient, monkeypatch):
+    assert "X-SQL-Count" not in client.get("/api/v1/roles", headers={"X-SQL-Profile": "1"}).headers # Header not allowed by default
+
+    monkeypatch.setattr(settings, "SQL_PROFILER_ALLOW_HEADER", True)
+    assert "X-SQL-Count" not in client.get("/api/v1/roles").headers
+    response = client.get("/api/v1/roles", headers={"X-SQL-Profile": "1"})
+    assert response.status_code == 200
+    assert int(response.headers["X-SQL-Count"]) >= 1 and float(response.headers["X-SQL-Time"]) >= 0
+
+    monkeypatch.setattr(settings, "SQL_PROFILER_ENABLED", True)
+    assert "X-SQL-Count" in client.get("/api/v1/roles").headers
@@ -0,0 +1,97 @@
+# tests/integration/test_user_roles_partitioning.py
+# Runs migration c3a9e7f25d18 inside the test transaction (Postgres DDL is transactional,
+# so the rollback restores the plain table) and exercises the CRUD layer against it.
+import importlib.util
+from pathlib import Path
+
+import pytest
+from sqlalchemy import event, select, text
+from sqlalchemy.orm import Session
+
+from app.crud import rbac as crud
+from app.models.rbac import user_roles_table
+from app.schemas.rbac import RoleCreate
+from tests.conftest import engine
+
+pytestmark = pytest.mark.skipif(engine.dialect.name != "postgresql", reason="hash partitioning needs TEST_DATABASE_URL on Postgres")
+
+MIGRATION = Path(__file__).resolve().parents[2] / "app/db/migrations/versions/c3a9e7f25d18_partition_user_roles_by_user_id.py"
+
+
+def _run(db: Session, step: str) -> None:
+    from alembic.migration import MigrationContext
+    from alembic.operations import Operations
+
+    spec = importlib.util.spec_from_file_location("partition_user_roles", MIGRATION)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    with Operations.context(MigrationContext.configure(db.connection())):
+        getattr(migration, step)()
+
+def _cascades(db: Session) -> bool:
+    return db.execute(text(
+        "SELECT confdeltype = 'c' FROM pg_constraint WHERE conname = 'user_roles_role_id_fkey' AND conrelid = 'user_roles'::regclass"
+    )).scalar_one()
+
+@pytest.fixture
+def partitioned(db_session: Session) -> Session:
+    pytest.importorskip("alembic")
+    _run(db_session, "upgrade")
+    return db_session
+
+def test_upgrade_partitions_user_roles(partitioned: Session):
+    partitions = partitioned.execute(text(
+        "SELECT count(*) FROM pg_inherits WHERE inhparent = 'user_roles'::regclass"
+    )).scalar_one()
+    assert partitions == 16
+    assert _cascades(partitioned)
+    # Built as user_roles_new and swapped in: no temporary names survive the rename
+    names = partitioned.execute(text(
+        "SELECT relname FROM pg_class WHERE relname LIKE '%user_roles%' AND relname NOT LIKE '%effective%'"
+    )).scalars().all()
+    assert not [name for name in names if "new" in name]
+    assert {"user_roles_p0", "user_roles_p0_pkey", "user_roles_p0_role_id_user_id_idx", "ix_user_roles_role_id_user_id"} <= set(names)
+
+    plan = partitioned.execute(text("EXPLAIN SELECT role_id FROM user_roles WHERE user_id = 'part-1'")).scalars().all()
+    assert sum("user_roles_p" in line for line in plan) == 1
+
+def test_copy_leaves_user_roles_readable(db_session: Session):
+    pytest.importorskip("alembic")
+    connection = db_session.connection()
+    original = connection.execute(text("SELECT 'user_roles'::regclass::oid")).scalar_one()
+    held_during_copy = []
+
+    def _note_locks(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("INSERT INTO user_roles") and " SELECT " in statement:
+            probe = cursor.connection.cursor()
+            probe.execute("SELECT mode FROM pg_locks WHERE relation = %s AND pid = pg_backend_pid()", (original,))
+            held_during_copy.extend(mode for (mode,) in probe.fetchall())
+            probe.close()
+
+    event.listen(connection, "before_cursor_execute", _note_locks)
+    try:
+        _run(db_session, "upgrade")
+    finally:
+        event.remove(connection, "before_cursor_execute", _note_locks)
+    # Writers wait for the copy; readers (ACCESS SHARE) don't, until the final swap
+    assert "ShareRowExclusiveLock" in held_during_copy
+    assert "AccessExclusiveLock" not in held_during_copy
+
+def test_deleting_a_held_role_cascades_to_partitions(partitioned: Session):
+    db = partitioned
+    role = crud.create_role(db, role_in=RoleCreate(role_name="Partitioned Role"))
+    for user_id in ("part-1", "part-2", "part-3"):
+        crud.assign_role_to_user(db, user_id=user_id, role_id=role.role_id)
+    assert [r.role_name for r in crud.get_user_roles(db, user_id="part-2")] == ["Partitioned Role"]
+
+    assert crud.delete_role(db, role_id=role.role_id) is True
+    assert db.execute(select(user_roles_table).where(user_roles_table.c.role_id == role.role_id)).all() == []
+
+def test_downgrade_restores_a_plain_table(partitioned: Session):
+    role = crud.create_role(partitioned, role_in=RoleCreate(role_name="Downgraded Role"))
+    crud.assign_role_to_user(partitioned, user_id="part-1", role_id=role.role_id)
+    _run(partitioned, "downgrade")
+
+    assert partitioned.execute(text("SELECT relkind FROM pg_class WHERE relname = 'user_roles'")).scalar_one() == "r"
+    assert _cascades(partitioned)
+    assert crud.delete_role(partitioned, role_id=role.role_id) is True
@@ -0,0 +1,314 @@
+# tests/unit/test_activity_log_shipper.py
+import asyncio
+import json
+from datetime import datetime, timezone
+
+import httpx
+
+from app.core.activity_spool import ActivitySpool
+from app.core.circuit_breaker import CircuitBreaker
+from app.core.logging_client import (
+    ActivityLogShipper, build_activity_payload, ACTION_CREATE_ROLE, ACTION_CHECK_PERMISSION
+)
+
+BULK_URL = "http://activity-logs.test/api/activities/bulk"
+
+
+def make_shipper(handler, **kwargs) -> ActivityLogShipper:
+    options = {"batch_size": 100, "flush_interval": 60.0}
+    options.update(kwargs)
+    return ActivityLogShipper(bulk_url=BULK_URL, transport=httpx.MockTransport(handler), **options)
+
+
+def test_build_activity_payload_maps_action_and_drops_nones():
+    payload = build_activity_payload(ACTION_CREATE_ROLE, user_id="admin", resource_type="Role", details={"a": 1})
+    timestamp = datetime.fromisoformat(payload.pop("timestamp"))
+    assert timestamp.tzinfo is not None
+    assert abs((datetime.now(timezone.utc) - timestamp).total_seconds()) < 5
+    assert payload == {
+        "userId": "admin", "action": "other", "status": "success", "resourceType": "Role",
+        "details": {"a": 1, "rbac_action": ACTION_CREATE_ROLE}
+    }
+
+
+def test_shipper_sends_full_batches_and_flushes_remainder_on_stop():
+    batches = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        batches.append(json.loads(request.content))
+        return httpx.Response(201, json={"inserted": len(batches[-1])})
+
+    shipper = make_shipper(handler)
+
+    async def scenario():
+        await shipper.start()
+        for i in range(250):
+            shipper.enqueue({"userId": f"user-{i}", "action": "other"})
+        await shipper.stop()
+
+    asyncio.run(scenario())
+
+    assert [len(batch) for batch in batches] == [100, 100, 50]
+    assert batches[0][0]["userId"] == "user-0"
+    stats = shipper.stats()
+    assert stats["sent"] == 250
+    assert stats["batches_sent"] == 3
+    assert stats["queue_depth"] == 0
+    assert stats["running"] is False
+
+
+def test_shipper_flushes_partial_batch_on_interval():
+    batches = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        batches.append(json.loads(request.content))
+        return httpx.Response(201)
+
+    shipper = make_shipper(handler, flush_interval=0.01)
+
+    async def scenario():
+        await shipper.start()
+        shipper.enqueue({"userId": "u1", "action": "other"})
+        await asyncio.sleep(0.1)
+        sent_before_stop = shipper.sent
+        await shipper.stop()
+        return sent_before_stop
+
+    assert asyncio.run(scenario()) == 1
+    assert len(batches) == 1
+
+
+def test_shipper_counts_failed_batches_and_drops_oldest_when_full():
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(500, text="boom")
+
+    shipper = make_shipper(handler, max_queue_size=5)
+
+    async def scenario():
+        await shipper.start()
+        for i in range(8):
+            shipper.enqueue({"userId": f"user-{i}", "action": "other"})
+        await shipper.stop()
+
+    asyncio.run(scenario())
+
+    stats = shipper.stats()
+    assert stats["dropped"] == 3
+    assert stats["failed"] == 5
+    assert stats["sent"] == 0
+
+
+def test_shipper_spools_failed_batches_and_replays_in_order(tmp_path):
+    service_up = False
+    received = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if not service_up:
+            raise httpx.ConnectError("activity log service down", request=request)
+        received.extend(json.loads(request.content))
+        return httpx.Response(201)
+
+    spool = ActivitySpool(str(tmp_path), fsync=False)
+    # Batch larger than what is enqueued, so only the explicit flush() sends (no background wakeup)
+    shipper = make_shipper(handler, batch_size=20, spool=spool)
+
+    async def scenario():
+        nonlocal service_up
+        await shipper.start()
+        for i in range(15):
+            shipper.enqueue({"userId": f"user-{i}", "action": "other"})
+        await shipper.flush()
+        assert spool.depth == 15
+
+        service_up = True
+        for i in range(15, 20):
+            shipper.enqueue({"userId": f"user-{i}", "action": "other"})
+        await shipper.stop()
+
+    asyncio.run(scenario())
+
+    assert [event["userId"] for event in received] == [f"user-{i}" for i in range(20)]
+    assert spool.depth == 0
+    assert shipper.stats()["spool"]["replayed"] == 15
+
+
+def test_rejected_batch_is_dropped_not_spooled_or_retried(tmp_path):
+    received = []
+    attempts = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        batch = json.loads(request.content)
+        attempts.append([event["userId"] for event in batch])
+        if any(event["userId"] == "poison" for event in batch):
+            return httpx.Response(400, json={"error": "Entry 0: userId and action are required fields"})
+        received.extend(batch)
+        return httpx.Response(201)
+
+    spool = ActivitySpool(str(tmp_path), fsync=False)
+    # Left behind by an outage: a batch the service will reject, then a good one
+    spool.append([{"userId": "poison", "action": "other"}, {"userId": "user-0", "action": "other"}])
+    spool.append([{"userId": "user-1", "action": "other"}, {"userId": "user-2", "action": "other"}])
+    # Rejections must not count towards opening the breaker
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    shipper = make_shipper(handler, batch_size=2, spool=spool, breaker=breaker)
+
+    async def scenario():
+        await shipper.start()
+        assert await shipper.replay() == 4
+        for user_id in ("poison", "user-3", "user-4", "user-5"):
+            shipper.enqueue({"userId": user_id, "action": "other"})
+        await shipper.stop()
+
+    asyncio.run(scenario())
+
+    assert [event["userId"] for event in received] == ["user-1", "user-2", "user-4", "user-5"]
+    assert attempts == [["poison", "user-0"], ["user-1", "user-2"], ["poison", "user-3"], ["user-4", "user-5"]]
+    assert spool.depth == 0
+    stats = shipper.stats()
+    assert stats["rejected"] == 4 and stats["failed"] == 0
+    assert stats["breaker"]["state"] == "closed"
+
+
+def test_partial_failure_resends_only_retryable_entries(tmp_path):
+    attempts = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        batch = json.loads(request.content)
+        attempts.append([event["userId"] for event in batch])
+        if len(attempts) == 1:
+            return httpx.Response(207, json={"inserted": 1, "failed": [
+                {"index": 1, "error": "write conflict", "retryable": True},
+                {"index": 2, "error": "action: `bogus` is not a valid enum value", "retryable": False},
+            ]})
+        return httpx.Response(201, json={"inserted": len(batch), "failed": []})
+
+    spool = ActivitySpool(str(tmp_path), fsync=False)
+    # Batch larger than what is enqueued, so only the explicit flush() sends (no background wakeup)
+    shipper = make_shipper(handler, batch_size=4, spool=spool)
+
+    async def scenario():
+        await shipper.start()
+        for user_id in ("user-0", "user-1", "user-2"):
+            shipper.enqueue({"userId": user_id, "action": "other"})
+        await shipper.flush()
+        assert spool.depth == 1
+        assert await shipper.replay() == 1
+        await shipper.stop()
+
+    asyncio.run(scenario())
+
+    assert attempts == [["user-0", "user-1", "user-2"], ["user-1"]]
+    assert spool.depth == 0
+    stats = shipper.stats()
+    assert (stats["sent"], stats["failed"], stats["rejected"]) == (2, 1, 1)
+
+
+def test_open_breaker_short_circuits_sends():
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        raise httpx.ConnectError("down", request=request)
+
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    shipper = make_shipper(handler, batch_size=1, breaker=breaker)
+
+    async def scenario():
+        await shipper.start()
+        for i in range(5):
+            shipper.enqueue({"userId": f"user-{i}", "action": "other"})
+        await shipper.stop()
+
+    asyncio.run(scenario())
+
+    assert len(calls) == 2
+    stats = shipper.stats()
+    assert stats["breaker"]["state"] == "open"
+    assert stats["failed"] == 2
+    assert stats["short_circuited"] == 3
+
+
+def test_probe_raising_unexpected_error_reopens_breaker():
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30, clock=lambda: now[0])
+    breaker.record_failure() # Open
+    now[0] = 31.0 # Half-open: the next batch is the probe
+    service_ok = False
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if not service_ok:
+            raise ValueError("unexpected failure in the send path")
+        return httpx.Response(201)
+
+    shipper = make_shipper(handler, breaker=breaker)
+
+    async def scenario():
+        nonlocal service_ok
+        await shipper.start()
+        assert await shipper._send_batch([{"userId": "probe", "action": "other"}]) # Kept for resend
+        assert breaker.state == "open" # Not stuck half-open with the probe still marked in flight
+        now[0] = 62.0
+        service_ok = True
+        assert await shipper._send_batch([{"userId": "next", "action": "other"}]) == []
+        await shipper.stop()
+
+    asyncio.run(scenario())
+
+    assert breaker.state == "closed"
+    assert shipper.stats()["failed"] == 1
+    assert shipper.stats()["sent"] == 1
+
+
+def check_event(user_id: str) -> dict:
+    return build_activity_payload(ACTION_CHECK_PERMISSION, user_id=user_id)
+
+
+def audit_event(user_id: str) -> dict:
+    return build_activity_payload(ACTION_CREATE_ROLE, user_id=user_id)
+
+
+def test_overflow_drop_checks_first_keeps_audit_events():
+    shipper = make_shipper(lambda request: httpx.Response(201), max_queue_size=3, overflow_policy="drop_checks_first")
+    shipper.enqueue(check_event("c1"))
+    shipper.enqueue(audit_event("a1"))
+    shipper.enqueue(check_event("c2"))
+
+    shipper.enqueue(audit_event("a2")) # Evicts the oldest check event
+    shipper.enqueue(check_event("c3")) # Dropped itself: queue full
+    assert [event["userId"] for event in shipper._queue] == ["a1", "c2", "a2"]
+
+    shipper.enqueue(audit_event("a3"))
+    shipper.enqueue(audit_event("a4")) # No checks left: oldest goes
+    assert [event["userId"] for event in shipper._queue] == ["a2", "a3", "a4"]
+    stats = shipper.stats()
+    assert stats["dropped"] == 4
+    assert stats["dropped_checks"] == 3
+
+
+def test_overflow_spill_to_disk_keeps_every_event_in_order(tmp_path):
+    received = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        received.extend(json.loads(request.content))
+        return httpx.Response(201)
+
+    spool = ActivitySpool(str(tmp_path), fsync=False)
+    shipper = make_shipper(handler, batch_size=2, max_queue_size=4, spool=spool, overflow_policy="spill_to_disk")
+
+    for i in range(8): # Not started: nothing drains the queue while it overflows
+        shipper.enqueue({"userId": f"user-{i}", "action": "other"})
+
+    async def scenario():
+        await shipper.start()
+        await shipper.stop()
+
+    asyncio.run(scenario())
+
+    assert [event["userId"] for event in received] == [f"user-{i}" for i in range(8)]
+    assert shipper.stats()["dropped"] == 0
+    assert shipper.stats()["spilled"] == 4
+
+
+def test_spill_to_disk_without_spool_falls_back_to_drop_oldest():
+    shipper = make_shipper(lambda request: httpx.Response(201), overflow_policy="spill_to_disk")
+    assert shipper.overflow_policy == "drop_oldest"
@@ -0,0 +1,87 @@
+# tests/unit/test_activity_spool.py
+import os
+import time
+from datetime import datetime
+
+from app.core.activity_spool import ActivitySpool
+
+
+def drain(spool: ActivitySpool, batch_size: int = 10) -> list:
+    delivered = []
+    while spool.depth:
+        events, cursor = spool.read(batch_size)
+        delivered.extend(events)
+        spool.commit(cursor)
+    return delivered
+
+
+def test_spool_replays_in_order_across_segments(tmp_path):
+    spool = ActivitySpool(str(tmp_path), segment_max_bytes=200, fsync=False)
+    spool.append([{"n": i} for i in range(5)])
+    spool.append([{"n": i} for i in range(5, 12)])
+
+    assert spool.depth == 12
+    assert spool.stats()["segments"] > 1
+    assert [event["n"] for event in drain(spool, batch_size=4)] == list(range(12))
+    assert spool.depth == 0
+    assert spool.stats()["segments"] == 0
+    assert spool.lag_seconds() == 0.0
+
+
+def test_spool_resumes_from_checkpoint_after_reopen(tmp_path):
+    spool = ActivitySpool(str(tmp_path))
+    spool.append([{"n": i} for i in range(6)])
+    events, cursor = spool.read(4)
+    spool.commit(cursor)
+    spool.close()
+
+    reopened = ActivitySpool(str(tmp_path))
+    assert reopened.depth == 2
+    assert [event["n"] for event in drain(reopened)] == [4, 5]
+
+
+def test_spool_uncommitted_read_is_redelivered(tmp_path):
+    spool = ActivitySpool(str(tmp_path), fsync=False)
+    spool.append([{"n": 1}, {"n": 2}])
+    spool.read(10) # Delivery failed: no commit
+
+    assert spool.depth == 2
+    assert [event["n"] for event in drain(spool)] == [1, 2]
+
+
+def test_spool_size_cap_drops_oldest_segment(tmp_path):
+    spool = ActivitySpool(str(tmp_path), segment_max_bytes=100, max_total_bytes=250, fsync=False)
+    for i in range(20):
+        spool.append([{"n": i}])
+
+    stats = spool.stats()
+    assert stats["bytes"] <= 250
+    assert stats["dropped"] > 0
+    assert stats["dropped"] + spool.depth == 20
+    remaining = [event["n"] for event in drain(spool)]
+    assert remaining == list(range(20 - len(remaining), 20))
+
+
+def test_spool_ignores_torn_last_line(tmp_path):
+    spool = ActivitySpool(str(tmp_path), fsync=False)
+    spool.append([{"n": 1}])
+    spool.close()
+    segment = [name for name in os.listdir(tmp_path) if name.startswith("segment-")][0]
+    with open(tmp_path / segment, "ab") as handle:
+        handle.write(b'{"t":1,"e":{"n"') # Crash mid-write
+
+    reopened = ActivitySpool(str(tmp_path), fsync=False)
+    events, cursor = reopened.read(10)
+    assert [event["n"] for event in events] == [1]
+    assert cursor.records == 1
+
+
+def test_spool_replay_keeps_event_time(tmp_path):
+    spool = ActivitySpool(str(tmp_path), fsync=False)
+    spool.append([{"n": 1, "timestamp": "2026-01-01T00:00:00+00:00"}, {"n": 2}])
+    spooled_at = time.time()
+    time.sleep(0.01)
+
+    first, second = drain(spool)
+    assert first["timestamp"] == "2026-01-01T00:00:00+00:00" # Never restamped at replay
+    assert datetime.fromisoformat(second["timestamp"]).timestamp() <= spooled_at # Spool time, not replay time
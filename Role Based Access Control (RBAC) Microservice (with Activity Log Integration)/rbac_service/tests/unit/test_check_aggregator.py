@@ -0,0 +1,120 @@
+# tests/unit/test_check_aggregator.py
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+from fastapi import BackgroundTasks
+
+from app.api.v1.endpoints.check import log_check_result
+from app.core.check_aggregator import CheckEventAggregator
+from app.schemas.rbac import CheckRequest
+
+
+def run_started(aggregator: CheckEventAggregator, body):
+    """Runs `body(aggregator)` while the aggregator is started, then stops it."""
+    async def scenario():
+        await aggregator.start()
+        try:
+            return body(aggregator)
+        finally:
+            await aggregator.stop()
+    with patch("app.core.check_aggregator.log_activity", new_callable=AsyncMock):
+        return asyncio.run(scenario())
+
+
+def test_window_zero_keeps_per_call_events():
+    aggregator = CheckEventAggregator(window_seconds=0)
+    asyncio.run(aggregator.start())
+    assert aggregator.running is False
+    assert aggregator.record("u1", "read", True) is False
+
+
+def test_checks_roll_up_per_user_permission_and_decision():
+    aggregator = CheckEventAggregator(window_seconds=60)
+
+    def body(agg):
+        for _ in range(3):
+            assert agg.record("u1", "read", True) is True
+        agg.record("u1", "read", False)
+        agg.record("u2", "read", True)
+        return agg.drain()
+
+    summaries = run_started(aggregator, body)
+
+    by_key = {(s["user_id"], s["resource_id"], s["details"]["result_allowed"]): s for s in summaries}
+    assert len(by_key) == 3
+    read_allowed = by_key[("u1", "read", True)]
+    assert read_allowed["action"] == "CHECK_PERMISSION_SUMMARY"
+    assert read_allowed["status"] == "success"
+    assert read_allowed["details"]["count"] == 3
+    assert read_allowed["details"]["first_at"] <= read_allowed["details"]["last_at"]
+    assert by_key[("u1", "read", False)]["status"] == "failure"
+    assert aggregator.drain() == []
+
+
+def test_denials_pass_through_when_configured():
+    aggregator = CheckEventAggregator(window_seconds=60, pass_denials=True)
+
+    def body(agg):
+        return agg.record("u1", "read", False), agg.record("u1", "read", True)
+
+    assert run_started(aggregator, body) == (False, True)
+
+
+def test_key_limit_falls_back_to_per_call_events():
+    aggregator = CheckEventAggregator(window_seconds=60, max_keys=1)
+
+    def body(agg):
+        return agg.record("u1", "read", True), agg.record("u2", "read", True), agg.record("u1", "read", True)
+
+    assert run_started(aggregator, body) == (True, False, True)
+
+
+def test_log_check_result_skips_background_task_when_aggregated():
+    background_tasks = BackgroundTasks()
+    request_data = CheckRequest(user_id="u1", permission="read")
+    with patch("app.api.v1.endpoints.check.check_event_aggregator") as aggregator:
+        aggregator.record.return_value = True
+        log_check_result(background_tasks, request_data, True)
+        assert background_tasks.tasks == []
+
+        aggregator.record.return_value = False
+        log_check_result(background_tasks, request_data, True)
+        assert len(background_tasks.tasks) == 1
+
+
+def test_stop_emits_remaining_summaries():
+    aggregator = CheckEventAggregator(window_seconds=60)
+
+    async def scenario():
+        await aggregator.start()
+        aggregator.record("u1", "read", True)
+        aggregator.record("u1", "read", True)
+        await aggregator.stop()
+
+    with patch("app.core.check_aggregator.log_activity", new_callable=AsyncMock) as log_mock:
+        asyncio.run(scenario())
+
+    log_mock.assert_awaited_once()
+    assert log_mock.await_args.kwargs["details"]["count"] == 2
+    assert aggregator.stats()["summaries_emitted"] == 1
+
+
+def test_checks_during_stop_are_logged_per_call_not_lost():
+    aggregator = CheckEventAggregator(window_seconds=60)
+    during_stop = []
+
+    async def log_and_record(**summary):
+        # A check served while the final window is being emitted
+        during_stop.append(aggregator.record("u2", "write", True))
+
+    async def scenario():
+        await aggregator.start()
+        aggregator.record("u1", "read", True)
+        await aggregator.stop()
+
+    with patch("app.core.check_aggregator.log_activity", new=AsyncMock(side_effect=log_and_record)) as log_mock:
+        asyncio.run(scenario())
+
+    assert during_stop == [False] # The caller logs it itself
+    log_mock.assert_awaited_once()
+    assert aggregator.stats()["open_keys"] == 0
@@ -0,0 +1,52 @@
+# tests/unit/test_circuit_breaker.py
+from app.core.circuit_breaker import CircuitBreaker, STATE_CLOSED, STATE_OPEN, STATE_HALF_OPEN
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=10, clock=FakeClock())
+    for _ in range(2):
+        assert breaker.allow_request() is True
+        breaker.record_failure()
+    assert breaker.state == STATE_CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == STATE_OPEN
+    assert breaker.allow_request() is False
+    assert breaker.stats()["rejected"] == 1
+    assert breaker.stats()["opened"] == 1
+
+
+def test_success_resets_failure_count():
+    breaker = CircuitBreaker(failure_threshold=2, clock=FakeClock())
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == STATE_CLOSED
+
+
+def test_half_open_allows_one_probe_then_closes_or_reopens():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+    assert breaker.state == STATE_OPEN
+
+    clock.now = 10
+    assert breaker.state == STATE_HALF_OPEN
+    assert breaker.allow_request() is True
+    assert breaker.allow_request() is False # Only one probe in flight
+    breaker.record_failure()
+    assert breaker.state == STATE_OPEN
+
+    clock.now = 20
+    assert breaker.allow_request() is True
+    breaker.record_success()
+    assert breaker.state == STATE_CLOSED
+    assert breaker.allow_request() is True
@@ -1,6 +1,6 @@
 # tests/unit/test_crud.py
 import pytest
-from unittest.mock import MagicMock, create_autospec, ANY # Import ANY
+from unittest.mock import MagicMock, create_autospec, patch, ANY # Import ANY
 from uuid import uuid4, UUID
 from sqlalchemy.orm import Session
 from sqlalchemy import select, delete, insert, exists # Import necessary SQL elements
@@ -12,6 +12,12 @@ from app.models.rbac import Role, Permission, user_roles_table, role_permissions
 # Import the CRUD module we are testing
 from app.crud import rbac as crud
 
+# Every write bumps the policy epoch and stages it for the policy bus; keep the bus out of these unit tests
+@pytest.fixture(autouse=True)
+def staged_policy_changes():
+    with patch.object(crud, "stage_policy_change") as stage:
+        yield stage
+
 # --- Role CRUD Unit Tests ---
 
 def test_create_role():
@@ -137,7 +143,7 @@ def test_delete_permission_not_assigned():
     result = crud.delete_permission(db=mock_db, permission_id=test_id)
     assert result is True
     mock_db.get.assert_called_once_with(Permission, test_id)
-    assert mock_db.execute.call_count == 1
+    assert mock_db.execute.call_count == 3 # Assignment check, the epoch bump, then the change log
     mock_db.delete.assert_called_once_with(perm_to_delete)
     mock_db.commit.assert_called_once()
 
@@ -231,7 +237,8 @@ def test_assign_role_to_user():
 
     crud.assign_role_to_user(db=mock_db, user_id=user_id, role_id=role_id)
 
-    assert mock_db.execute.call_count == 2
+    # Select, insert, the user_effective_permissions grant, the epoch bump, then the change log
+    assert mock_db.execute.call_count == 5
     mock_db.commit.assert_called_once()
 
 def test_assign_role_to_user_already_assigned():
@@ -259,8 +266,8 @@ def test_remove_role_from_user():
 
     crud.remove_role_from_user(db=mock_db, user_id=user_id, role_id=role_id)
 
-    # Check execute called once (for delete)
-    mock_db.execute.assert_called_once()
+    # Delete, the user_effective_permissions revoke, the epoch bump, then the change log
+    assert mock_db.execute.call_count == 4
     # We can't easily assert the exact statement content without more complex mocking
     mock_db.commit.assert_called_once()
 
@@ -279,4 +286,31 @@ def test_get_user_roles():
     roles = crud.get_user_roles(db=mock_db, user_id=user_id)
 
     assert roles == expected_roles
-    mock_db.execute.assert_called_once()
\ No newline at end of file
+    mock_db.execute.assert_called_once()
+
+def test_writes_bump_policy_epoch(staged_policy_changes):
+    """Test that a write stages the bumped policy epoch for publication unit."""
+    mock_db = create_autospec(Session)
+    mock_db.execute.return_value.scalar_one_or_none.return_value = 42
+    crud.create_role(db=mock_db, role_in=RoleCreate(role_name="Epoch Role"))
+    staged_policy_changes.assert_called_once_with(mock_db, epoch=42)
+
+def test_bump_seeds_missing_epoch_row(staged_policy_changes):
+    """Test that the epoch row is created on first bump when no migration seeded it unit."""
+    mock_db = create_autospec(Session)
+    mock_db.execute.return_value.scalar_one_or_none.return_value = None
+    crud.remove_role_from_user(db=mock_db, user_id="u1", role_id=uuid4())
+    assert mock_db.execute.call_count == 5 # Delete, revoke, bump (no row), seed, change log
+    staged_policy_changes.assert_called_once_with(mock_db, epoch=1)
+
+def test_bump_prunes_change_log_on_schedule(monkeypatch):
+    """Test that old change-log history is pruned every PRUNE_EVERY_EPOCHS epochs unit."""
+    from app.crud import policy_changes as changelog
+    monkeypatch.setattr(crud.settings, "POLICY_CHANGE_LOG_RETENTION_EPOCHS", 10)
+    mock_db = create_autospec(Session)
+    mock_db.execute.return_value.scalar_one_or_none.return_value = changelog.PRUNE_EVERY_EPOCHS
+    crud.remove_role_from_user(db=mock_db, user_id="u1", role_id=uuid4())
+    # Delete, revoke, bump, change log, then the prune delete and watermark update
+    assert mock_db.execute.call_count == 6
+    watermark = mock_db.execute.call_args_list[-1].args[0]
+    assert watermark.compile().params["changes_pruned_through"] == changelog.PRUNE_EVERY_EPOCHS - 10
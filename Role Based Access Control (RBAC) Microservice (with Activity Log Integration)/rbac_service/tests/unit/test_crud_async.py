@@ -0,0 +1,94 @@
+# tests/unit/test_crud_async.py
+# Runs the async CRUD functions against aiosqlite (stand-in for asyncpg).
+from uuid import uuid4
+
+from app.schemas.rbac import RoleCreate, RoleUpdate, PermissionCreate, PermissionUpdate
+from app.crud import rbac_async as crud
+from app.core.permission_cache import permission_cache
+from app.core.security import check_user_permission_async, check_user_permission_cached_async
+
+
+def test_role_crud_async(async_db_runner):
+    async def body(db):
+        role = await crud.create_role(db, role_in=RoleCreate(role_name="Async Role", description="d"))
+        assert role.permissions == [] # Loaded eagerly, no lazy load under asyncio
+        assert (await crud.get_role_by_name(db, "Async Role")).role_id == role.role_id
+        updated = await crud.update_role(db, db_role=role, role_in=RoleUpdate(description="new"))
+        assert updated.description == "new"
+        assert [r.role_name for r in await crud.get_roles(db)] == ["Async Role"]
+        assert await crud.delete_role(db, role_id=role.role_id) is True
+        assert await crud.get_role(db, role.role_id) is None
+        assert await crud.delete_role(db, role_id=uuid4()) is False
+    async_db_runner(body)
+
+def test_permission_crud_async(async_db_runner):
+    async def body(db):
+        perm = await crud.create_permission(db, permission_in=PermissionCreate(permission_name="async:perm"))
+        perm = await crud.update_permission(db, db_permission=perm, permission_in=PermissionUpdate(is_enabled=False))
+        assert perm.is_enabled is False
+        role = await crud.create_role(db, role_in=RoleCreate(role_name="Async Perm Role"))
+        await crud.assign_permission_to_role(db, role=role, permission=perm)
+        # Assigned permissions can't be deleted
+        assert await crud.delete_permission(db, permission_id=perm.permission_id) is False
+        role = await crud.remove_permission_from_role(db, role=role, permission=perm)
+        assert role.permissions == []
+        assert await crud.delete_permission(db, permission_id=perm.permission_id) is True
+    async_db_runner(body)
+
+def test_bulk_user_roles_async(async_db_runner):
+    async def body(db):
+        role = await crud.create_role(db, role_in=RoleCreate(role_name="Async Bulk Role"))
+        perm = await crud.create_permission(db, permission_in=PermissionCreate(permission_name="async:bulk"))
+        await crud.assign_permission_to_role(db, role=role, permission=perm)
+        await crud.assign_role_to_user(db, user_id="u0", role_id=role.role_id)
+
+        assigned = await crud.bulk_assign_role_to_users(db, role_id=role.role_id, user_ids=["u0", "u1", "u2"])
+        assert sorted(assigned) == ["u1", "u2"]
+        assert await check_user_permission_async(db, user_id="u2", permission_name="async:bulk") is True
+
+        revoked = await crud.bulk_remove_role_from_users(db, role_id=role.role_id, user_ids=["u1", "u9"])
+        assert revoked == ["u1"]
+        assert await check_user_permission_async(db, user_id="u1", permission_name="async:bulk") is False
+    async_db_runner(body)
+
+def test_apply_changeset_async(async_db_runner):
+    from app.schemas.rbac import ChangesetRequest
+    async def body(db):
+        operations = ChangesetRequest.model_validate({"operations": [
+            {"op": "create_role", "role_name": "Async Changeset Role"},
+            {"op": "create_permission", "permission_name": "async:changeset"},
+            {"op": "assign_permission", "role_name": "Async Changeset Role", "permission_name": "async:changeset"},
+            {"op": "assign_role", "user_id": "cs-user", "role_name": "Async Changeset Role"},
+        ]}).operations
+        epoch, results = await crud.apply_changeset(db, operations=operations)
+        assert epoch >= 1 and len(results) == 4
+        assert await check_user_permission_async(db, user_id="cs-user", permission_name="async:changeset") is True
+    async_db_runner(body)
+
+def test_async_writes_invalidate_cached_permissions(async_db_runner):
+    async def body(db):
+        role = await crud.create_role(db, role_in=RoleCreate(role_name="Async Staged Role"))
+        perm = await crud.create_permission(db, permission_in=PermissionCreate(permission_name="async:staged"))
+        assert await check_user_permission_cached_async(db, user_id="staged-user", permission_name="async:staged") is False
+
+        # User-level write: the user's cached (empty) set is dropped on commit
+        await crud.assign_role_to_user(db, user_id="staged-user", role_id=role.role_id)
+        assert permission_cache.get("staged-user") is None
+        assert await check_user_permission_cached_async(db, user_id="staged-user", permission_name="async:staged") is False
+
+        # Role-level writes reach every cached holder of the role
+        role = await crud.get_role(db, role.role_id)
+        await crud.assign_permission_to_role(db, role=role, permission=perm)
+        assert await check_user_permission_cached_async(db, user_id="staged-user", permission_name="async:staged") is True
+        await crud.update_permission(db, db_permission=perm, permission_in=PermissionUpdate(is_enabled=False))
+        assert await check_user_permission_cached_async(db, user_id="staged-user", permission_name="async:staged") is False
+        await crud.update_permission(db, db_permission=perm, permission_in=PermissionUpdate(is_enabled=True))
+        assert await check_user_permission_cached_async(db, user_id="staged-user", permission_name="async:staged") is True
+
+        await crud.bulk_remove_role_from_users(db, role_id=role.role_id, user_ids=["staged-user"])
+        assert await check_user_permission_cached_async(db, user_id="staged-user", permission_name="async:staged") is False
+        await crud.bulk_assign_role_to_users(db, role_id=role.role_id, user_ids=["staged-user"])
+        assert await check_user_permission_cached_async(db, user_id="staged-user", permission_name="async:staged") is True
+        await crud.delete_role(db, role_id=role.role_id)
+        assert await check_user_permission_cached_async(db, user_id="staged-user", permission_name="async:staged") is False
+    async_db_runner(body)
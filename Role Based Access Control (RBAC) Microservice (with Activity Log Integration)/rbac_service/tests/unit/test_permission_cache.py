@@ -0,0 +1,53 @@
+# tests/unit/test_permission_cache.py
+import time
+from uuid import uuid4
+
+from app.core.permission_cache import PermissionCache
+
+
+def test_get_miss_then_hit():
+    cache = PermissionCache(max_size=10, ttl_seconds=60)
+    assert cache.get("user-1") is None
+    cache.put("user-1", {"doc:read"}, {uuid4()}, cache.generation)
+    assert cache.get("user-1") == frozenset({"doc:read"})
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+def test_lru_eviction():
+    cache = PermissionCache(max_size=2, ttl_seconds=60)
+    cache.put("user-1", {"a:a"}, set(), cache.generation)
+    cache.put("user-2", {"b:b"}, set(), cache.generation)
+    cache.get("user-1") # user-1 becomes most recently used
+    cache.put("user-3", {"c:c"}, set(), cache.generation)
+    assert cache.get("user-2") is None
+    assert cache.get("user-1") is not None
+    assert cache.get("user-3") is not None
+    assert cache.stats()["evictions"] == 1
+
+def test_ttl_expiry():
+    cache = PermissionCache(max_size=10, ttl_seconds=0.01)
+    cache.put("user-1", {"a:a"}, set(), cache.generation)
+    time.sleep(0.02)
+    assert cache.get("user-1") is None
+
+def test_invalidate_by_role_only_drops_holders():
+    cache = PermissionCache(max_size=10, ttl_seconds=60)
+    role_a, role_b = uuid4(), uuid4()
+    cache.put("user-a", {"a:a"}, {role_a}, cache.generation)
+    cache.put("user-b", {"b:b"}, {role_b}, cache.generation)
+    cache.invalidate(role_ids=[role_a])
+    assert cache.get("user-a") is None
+    assert cache.get("user-b") == frozenset({"b:b"})
+
+def test_put_after_concurrent_invalidation_is_dropped():
+    cache = PermissionCache(max_size=10, ttl_seconds=60)
+    generation = cache.generation # Load starts...
+    cache.invalidate(user_ids=["user-1"]) # ...a write lands before it finishes
+    cache.put("user-1", {"stale:perm"}, set(), generation)
+    assert cache.get("user-1") is None
+
+def test_disabled_cache_never_stores():
+    cache = PermissionCache(max_size=10, ttl_seconds=60, enabled=False)
+    cache.put("user-1", {"a:a"}, set(), cache.generation)
+    assert cache.get("user-1") is None
@@ -0,0 +1,48 @@
+# tests/unit/test_permission_matrix.py
+from uuid import uuid4
+
+from app.core.permission_matrix import PermissionMatrix
+
+READ, WRITE, ADMIN = uuid4(), uuid4(), uuid4()
+VIEWER, EDITOR = uuid4(), uuid4()
+
+def build_matrix() -> PermissionMatrix:
+    permissions = [
+        (READ, "doc:read", True),
+        (WRITE, "doc:write", True),
+        (ADMIN, "doc:admin", False), # Disabled
+    ]
+    role_permissions = [
+        (VIEWER, READ),
+        (EDITOR, READ),
+        (EDITOR, WRITE),
+        (EDITOR, ADMIN),
+    ]
+    return PermissionMatrix.from_rows(permissions, role_permissions)
+
+def test_has_permission_is_or_of_role_masks():
+    matrix = build_matrix()
+    assert matrix.has_permission([VIEWER], "doc:read") is True
+    assert matrix.has_permission([VIEWER], "doc:write") is False
+    assert matrix.has_permission([VIEWER, EDITOR], "doc:write") is True
+
+def test_disabled_and_unknown_permissions_are_denied():
+    matrix = build_matrix()
+    assert matrix.has_permission([EDITOR], "doc:admin") is False
+    assert matrix.has_permission([EDITOR], "doc:unknown") is False
+    assert matrix.has_permission([uuid4()], "doc:read") is False
+
+def test_permissions_of_user():
+    matrix = build_matrix()
+    assert matrix.permissions_of([EDITOR]) == frozenset({"doc:read", "doc:write"})
+    assert matrix.permissions_of([]) == frozenset()
+
+def test_which_of():
+    matrix = build_matrix()
+    assert matrix.which_of([VIEWER], ["doc:write", "doc:read", "nope"]) == [False, True, False]
+
+def test_invalidate_marks_stale():
+    matrix = build_matrix()
+    assert matrix.stats()["stale"] is False
+    matrix.invalidate()
+    assert matrix.stats()["stale"] is True
@@ -0,0 +1,131 @@
+# tests/unit/test_policy_bus.py
+import asyncio
+import json
+import uuid
+from unittest.mock import MagicMock, patch
+
+from app.core import policy_bus
+from app.core.permission_cache import permission_cache
+from app.core.policy_bus import (
+    PolicyChangeListener, apply_notification, build_notification, stage_policy_change, to_listener_dsn,
+    PROCESS_ID, MAX_PAYLOAD_BYTES
+)
+
+
+def test_build_notification_is_compact_and_falls_back_to_flush_when_too_big():
+    role_id = uuid.uuid4()
+    payload = json.loads(build_notification(["u1"], [role_id], 7))
+    assert payload == {"o": PROCESS_ID, "e": 7, "u": ["u1"], "r": [str(role_id)]}
+
+    many_users = [f"user-{i}" for i in range(MAX_PAYLOAD_BYTES // 5)]
+    assert json.loads(build_notification(many_users, [], 8)) == {"o": PROCESS_ID, "e": 8, "all": True}
+
+
+def test_apply_notification_invalidates_targets_and_skips_own_messages():
+    role_id = uuid.uuid4()
+    foreign = json.dumps({"o": "other-process", "u": ["u1"], "r": [str(role_id)]})
+    with patch.object(policy_bus, "invalidate_policy") as invalidate:
+        assert apply_notification(foreign) is True
+        invalidate.assert_called_once_with(user_ids=["u1"], role_ids=[role_id])
+
+        invalidate.reset_mock()
+        assert apply_notification(json.dumps({"o": PROCESS_ID, "u": ["u1"]})) is False
+        assert apply_notification("not json") is False
+        invalidate.assert_not_called()
+
+
+def test_apply_notification_full_flush():
+    permission_cache.put("u1", ["read"], [], permission_cache.generation)
+    assert apply_notification(json.dumps({"o": "other-process", "all": True})) is True
+    assert permission_cache.get("u1") is None
+
+
+def test_staged_change_invalidates_on_commit_only(db_session):
+    permission_cache.put("u1", ["read"], [], permission_cache.generation)
+    stage_policy_change(db_session, user_ids=["u1"])
+    db_session.rollback()
+    assert permission_cache.get("u1") == frozenset({"read"})
+
+    stage_policy_change(db_session, user_ids=["u1"])
+    db_session.commit()
+    assert permission_cache.get("u1") is None
+
+
+def test_pg_notify_issued_before_commit_on_postgres():
+    session = MagicMock()
+    session.info = {}
+    session.get_bind.return_value.dialect.name = "postgresql"
+    stage_policy_change(session, user_ids=["u1"])
+
+    policy_bus._publish_staged_changes(session)
+
+    session.execute.assert_called_once()
+    statement = str(session.execute.call_args.args[0])
+    assert "pg_notify" in statement
+
+
+def test_to_listener_dsn_strips_driver():
+    assert to_listener_dsn("postgresql+psycopg2://u:p@db:5432/rbac") == "postgresql://u:p@db:5432/rbac"
+
+
+class FakeConnection:
+    def __init__(self):
+        self.listeners = {}
+        self.on_terminate = None
+        self.closed = False
+
+    def add_termination_listener(self, callback):
+        self.on_terminate = callback
+
+    async def add_listener(self, channel, callback):
+        self.listeners[channel] = callback
+
+    def is_closed(self):
+        return self.closed
+
+    async def close(self):
+        self.closed = True
+
+
+def test_listener_applies_notifications_and_flushes_on_reconnect():
+    connections = []
+
+    async def connect(dsn):
+        connections.append(FakeConnection())
+        return connections[-1]
+
+    listener = PolicyChangeListener("postgresql://db/rbac", reconnect_delay=0.01, connect=connect)
+
+    async def scenario():
+        with patch.object(policy_bus, "flush_policy_caches") as flush, \
+                patch.object(policy_bus, "invalidate_policy") as invalidate:
+            await listener.start()
+            await asyncio.sleep(0.02)
+            callback = connections[0].listeners[policy_bus.POLICY_CHANNEL]
+            callback(connections[0], 1, policy_bus.POLICY_CHANNEL, json.dumps({"o": "other", "u": ["u1"]}))
+            invalidate.assert_called_once_with(user_ids=["u1"], role_ids=[])
+
+            connections[0].on_terminate(connections[0]) # Connection dropped
+            await asyncio.sleep(0.05)
+            await listener.stop()
+            return flush.call_count
+
+    flushes = asyncio.run(scenario())
+
+    assert len(connections) == 2
+    assert flushes == 2 # Initial connect + reconnect
+    assert listener.stats()["applied"] == 1
+    assert listener.stats()["connected"] is False
+
+
+def test_commit_advances_local_epoch_and_notification_carries_it(db_session):
+    from app.core.policy_epoch import policy_epoch
+    policy_epoch.advance(3)
+    stage_policy_change(db_session, epoch=5)
+    db_session.commit()
+    assert policy_epoch.get(db_session) == 5
+
+    apply_notification(json.dumps({"o": "other-process", "e": 9, "u": []}))
+    assert policy_epoch.get(db_session) == 9
+    apply_notification(json.dumps({"o": "other-process", "e": 4, "u": []})) # Late, older message
+    assert policy_epoch.get(db_session) == 9
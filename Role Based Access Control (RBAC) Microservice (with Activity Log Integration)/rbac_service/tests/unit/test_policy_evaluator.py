@@ -0,0 +1,178 @@
+# tests/unit/test_policy_evaluator.py
+import threading
+from uuid import UUID, uuid4
+
+import pytest
+
+from rbac_client import PolicyEvaluator, PolicyRefresher, RBACClientError
+from rbac_client.evaluator import StaleChangesError
+
+ADMIN, VIEWER = uuid4(), uuid4()
+READ, WRITE = uuid4(), uuid4()
+
+
+def snapshot(epoch=10):
+    return [
+        {"type": "header", "format": "rbac-policy-snapshot", "version": 1, "epoch": epoch, "sections": {}},
+        {"type": "rows", "section": "roles", "rows": [[ADMIN.bytes, "admin"], [VIEWER.bytes, "viewer"]]},
+        {"type": "rows", "section": "permissions", "rows": [[READ.bytes, "doc:read"], [WRITE.bytes, "doc:write"]]},
+        {"type": "rows", "section": "role_permissions", "rows": [
+            [ADMIN.bytes, READ.bytes], [ADMIN.bytes, WRITE.bytes], [VIEWER.bytes, READ.bytes]
+        ]},
+        {"type": "rows", "section": "user_roles", "rows": [["alice", ADMIN.bytes], ["bob", VIEWER.bytes]]},
+        {"type": "end", "counts": {}},
+    ]
+
+
+def changes(since, epoch, *items, has_more=False):
+    # IDs arrive as strings in the JSON change feed
+    rows = [{key: str(value) if isinstance(value, UUID) else value for key, value in item.items()} for item in items]
+    return {"since": since, "epoch": epoch, "has_more": has_more, "changes": [dict(row, epoch=epoch) for row in rows]}
+
+
+def loaded_evaluator() -> PolicyEvaluator:
+    evaluator = PolicyEvaluator()
+    evaluator.load_snapshot(snapshot())
+    return evaluator
+
+
+def test_checks_from_snapshot():
+    evaluator = loaded_evaluator()
+    assert evaluator.epoch == 10
+    assert evaluator.check("alice", "doc:write") is True
+    assert evaluator.check("bob", "doc:read") is True
+    assert evaluator.check("bob", "doc:write") is False
+    assert evaluator.check("carol", "doc:read") is False
+    assert evaluator.check("alice", "doc:delete") is False
+    assert evaluator.stats()["users"] == 2
+
+
+def test_truncated_or_foreign_snapshot_is_rejected_and_keeps_old_policy():
+    evaluator = loaded_evaluator()
+    with pytest.raises(ValueError):
+        evaluator.load_snapshot(snapshot()[:-1])
+    with pytest.raises(ValueError):
+        evaluator.load_snapshot([dict(snapshot()[0], version=99)])
+    assert evaluator.check("alice", "doc:write") is True
+
+
+def test_apply_changes_assignments_and_links():
+    evaluator = loaded_evaluator()
+    evaluator.apply_changes(changes(
+        10, 11,
+        {"entity": "user_role", "op": "upsert", "user_id": "carol", "role_id": VIEWER},
+        {"entity": "role_permission", "op": "delete", "role_id": ADMIN, "permission_id": WRITE},
+    ))
+    assert evaluator.epoch == 11
+    assert evaluator.check("carol", "doc:read") is True
+    assert evaluator.check("alice", "doc:write") is False
+
+    evaluator.apply_changes(changes(11, 12, {"entity": "user_role", "op": "delete", "user_id": "bob", "role_id": VIEWER}))
+    assert evaluator.check("bob", "doc:read") is False
+
+
+def test_disabling_permission_drops_links_until_relinked():
+    evaluator = loaded_evaluator()
+    evaluator.apply_changes(changes(10, 11, {"entity": "permission", "op": "delete", "permission_id": READ}))
+    assert evaluator.check("bob", "doc:read") is False
+
+    # Re-enabling logs the permission and its links again
+    evaluator.apply_changes(changes(
+        11, 12,
+        {"entity": "permission", "op": "upsert", "permission_id": READ, "name": "doc:view"},
+        {"entity": "role_permission", "op": "upsert", "role_id": VIEWER, "permission_id": READ},
+    ))
+    assert evaluator.check("bob", "doc:view") is True
+    assert evaluator.check("bob", "doc:read") is False # Renamed
+    assert evaluator.check("alice", "doc:view") is False # Admin's link was not re-logged
+
+
+def test_role_delete_removes_assignments():
+    evaluator = loaded_evaluator()
+    evaluator.apply_changes(changes(10, 11, {"entity": "role", "op": "delete", "role_id": ADMIN}))
+    assert evaluator.check("alice", "doc:read") is False
+    assert evaluator.stats()["users"] == 1
+
+
+def test_changes_must_start_at_current_epoch():
+    evaluator = loaded_evaluator()
+    with pytest.raises(StaleChangesError):
+        evaluator.apply_changes(changes(9, 11))
+    assert evaluator.epoch == 10
+
+
+class FakeClient:
+    def __init__(self):
+        self.snapshots = 0
+        self.pages = []
+
+    def iter_snapshot(self):
+        self.snapshots += 1
+        return iter(snapshot(epoch=20 if self.snapshots > 1 else 10))
+
+    def get_policy_changes(self, since, limit=1000):
+        page = self.pages.pop(0)
+        if isinstance(page, Exception):
+            raise page
+        return page
+
+
+def test_sync_bootstraps_then_follows_pages_then_resnapshots_on_410():
+    client = FakeClient()
+    evaluator = PolicyEvaluator()
+    assert evaluator.sync(client) == 10
+
+    client.pages = [
+        changes(10, 11, {"entity": "user_role", "op": "upsert", "user_id": "dave", "role_id": ADMIN}, has_more=True),
+        changes(11, 12),
+    ]
+    assert evaluator.sync(client) == 12
+    assert evaluator.check("dave", "doc:write") is True
+
+    client.pages = [RBACClientError(410, "pruned")]
+    assert evaluator.sync(client) == 20
+    assert client.snapshots == 2
+
+    client.pages = [RBACClientError(503, "down")]
+    with pytest.raises(RBACClientError):
+        evaluator.sync(client)
+    assert evaluator.epoch == 20 # Last good policy stays in place
+
+
+def test_hot_swap_is_atomic_for_concurrent_readers():
+    evaluator = loaded_evaluator()
+    stop = threading.Event()
+    inconsistent = []
+
+    def reader():
+        # Both grants come and go in the same change set, so a reader must never see just one
+        while not stop.is_set():
+            index = evaluator._index
+            if index.allows("erin", "doc:read") != index.allows("erin", "doc:write"):
+                inconsistent.append(index.epoch)
+
+    thread = threading.Thread(target=reader)
+    thread.start()
+    for epoch in range(10, 210):
+        op = "upsert" if epoch % 2 == 0 else "delete"
+        evaluator.apply_changes(changes(epoch, epoch + 1, {"entity": "user_role", "op": op, "user_id": "erin", "role_id": ADMIN}))
+    stop.set()
+    thread.join()
+    assert inconsistent == []
+
+
+def test_refresher_syncs_in_background():
+    client = FakeClient()
+    client.pages = [changes(10, 10)] * 1000
+    evaluator = PolicyEvaluator()
+    refresher = PolicyRefresher(evaluator, client, interval_seconds=0.01)
+    refresher.start()
+    try:
+        for _ in range(200):
+            if evaluator.loaded:
+                break
+            threading.Event().wait(0.01)
+    finally:
+        refresher.stop()
+    assert evaluator.epoch == 10
+    assert refresher.failures == 0
@@ -0,0 +1,63 @@
+# tests/unit/test_policy_import.py
+import pytest
+
+from app.crud.policy_import import PolicyFileError, parse_csv, parse_yaml
+
+POLICY_YAML = """
+permissions:
+  - {name: "doc:read", description: "Read documents"}
+  - {name: "doc:purge", enabled: false}
+roles:
+  - name: editor
+    description: Editors
+    permissions: ["doc:read"]
+users:
+  alice: [editor]
+  42: [editor]
+"""
+
+POLICY_CSV = """kind,role,permission,user_id,description,is_enabled
+permission,,doc:read,,Read documents,
+permission,,doc:purge,,,false
+role,editor,,,Editors,
+role_permission,editor,doc:read,,,
+user_role,editor,,alice,,
+user_role,editor,,42,,
+"""
+
+
+def test_yaml_and_csv_describe_the_same_policy():
+    from_yaml, from_csv = parse_yaml(POLICY_YAML), parse_csv(POLICY_CSV)
+    for policy in (from_yaml, from_csv):
+        assert policy.roles == {"editor": "Editors"}
+        assert policy.permissions == {"doc:read": ("Read documents", True), "doc:purge": (None, False)}
+        assert policy.role_permissions == {("editor", "doc:read")}
+        assert policy.user_roles == {("alice", "editor"), ("42", "editor")}
+
+
+def test_undeclared_references_are_reported_together():
+    with pytest.raises(PolicyFileError) as exc:
+        parse_yaml("""
+permissions: [{name: "doc:purge", enabled: false}]
+roles:
+  - {name: editor, permissions: ["doc:read", "doc:purge"]}
+users: {bob: [ghost]}
+""")
+    assert exc.value.errors == [
+        "role 'editor' links disabled permission 'doc:purge'",
+        "permission 'doc:read' (linked from 'editor') is not declared",
+        "role 'ghost' (assigned to 'bob') is not declared",
+    ]
+
+
+def test_schema_and_shape_errors():
+    with pytest.raises(PolicyFileError, match="declared more than once"):
+        parse_yaml("roles: [{name: editor}, {name: editor}]")
+    with pytest.raises(PolicyFileError, match="role_name"):
+        parse_yaml("roles: [{name: ab}]") # Shorter than RoleCreate allows
+    with pytest.raises(PolicyFileError, match="top level"):
+        parse_yaml("- just a list")
+    with pytest.raises(PolicyFileError, match="unknown kind"):
+        parse_csv("kind,role,permission,user_id\nteam,editor,,\n")
+    with pytest.raises(PolicyFileError, match="missing columns"):
+        parse_csv("role,permission\n")
@@ -0,0 +1,195 @@
+# tests/unit/test_rbac_client.py
+import asyncio
+import json
+import threading
+import time
+
+import httpx
+import pytest
+
+from rbac_client import AsyncRBACClient, DecisionCache, RBACClient, RBACClientError
+from rbac_client._common import epoch_from_etag
+
+BASE_URL = "http://rbac.test"
+
+
+class FakeCheckServer:
+    """Answers GET /check and POST /check/batch from a dict, honouring If-None-Match."""
+
+    def __init__(self, grants, epoch=1, delay=0.0):
+        self.grants = grants
+        self.epoch = epoch
+        self.delay = delay
+        self.requests = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if self.delay:
+            time.sleep(self.delay)
+        etag = f'"rbac-epoch-{self.epoch}"'
+        if request.url.path == "/api/v1/check/batch":
+            checks = json.loads(request.content)["checks"]
+            results = [dict(check, allowed=(check["user_id"], check["permission"]) in self.grants) for check in checks]
+            return httpx.Response(200, json={"results": results})
+        if request.headers.get("if-none-match") == etag:
+            return httpx.Response(304, headers={"ETag": etag})
+        key = (request.url.params["user_id"], request.url.params["permission"])
+        return httpx.Response(200, headers={"ETag": etag}, json={"allowed": key in self.grants, "epoch": self.epoch})
+
+
+def make_client(server: FakeCheckServer, **kwargs) -> RBACClient:
+    http = httpx.Client(base_url=BASE_URL, transport=httpx.MockTransport(server.handler))
+    return RBACClient(http_client=http, **kwargs)
+
+
+def test_epoch_from_etag():
+    assert epoch_from_etag('"rbac-epoch-42"') == 42
+    assert epoch_from_etag('W/"rbac-epoch-7"') == 7
+    assert epoch_from_etag('"something-else"') is None
+    assert epoch_from_etag(None) is None
+
+
+def test_decision_cache_ignores_entries_older_than_latest_epoch():
+    cache = DecisionCache(ttl_seconds=60)
+    cache.put(("u1", "doc:read"), True, epoch=3)
+    assert cache.get(("u1", "doc:read")).allowed is True
+    cache.observe_epoch(4)
+    assert cache.get(("u1", "doc:read")) is None
+    assert cache.peek(("u1", "doc:read")).epoch == 3 # Kept for revalidation
+
+
+def test_decision_cache_evicts_least_recently_used():
+    cache = DecisionCache(ttl_seconds=60, max_size=2)
+    cache.put(("u1", "a:b"), True, 1)
+    cache.put(("u2", "a:b"), True, 1)
+    cache.get(("u1", "a:b"))
+    cache.put(("u3", "a:b"), True, 1)
+    assert cache.peek(("u2", "a:b")) is None
+    assert cache.peek(("u1", "a:b")) is not None
+
+
+def test_check_is_served_from_cache_while_fresh():
+    server = FakeCheckServer({("u1", "doc:read")}, epoch=5)
+    client = make_client(server, cache_ttl_seconds=60)
+
+    first = client.check_decision("u1", "doc:read")
+    second = client.check_decision("u1", "doc:read")
+
+    assert (first.allowed, first.epoch, first.from_cache) == (True, 5, False)
+    assert second.from_cache is True
+    assert client.check("u1", "doc:write") is False
+    assert len(server.requests) == 2
+
+
+def test_expired_decision_is_revalidated_with_if_none_match():
+    server = FakeCheckServer({("u1", "doc:read")}, epoch=5)
+    client = make_client(server, cache_ttl_seconds=0)
+
+    client.check("u1", "doc:read")
+    decision = client.check_decision("u1", "doc:read")
+
+    assert decision.allowed is True and decision.from_cache is True
+    assert server.requests[1].headers["if-none-match"] == '"rbac-epoch-5"'
+
+    # After a policy change the server answers in full again
+    server.epoch = 6
+    server.grants.clear()
+    decision = client.check_decision("u1", "doc:read")
+    assert (decision.allowed, decision.epoch, decision.from_cache) == (False, 6, False)
+
+
+def test_newer_epoch_seen_on_one_key_invalidates_others():
+    server = FakeCheckServer({("u1", "doc:read"), ("u2", "doc:read")}, epoch=1)
+    client = make_client(server, cache_ttl_seconds=60)
+    client.check("u1", "doc:read")
+
+    server.epoch = 2
+    client.check("u2", "doc:read") # Reveals epoch 2
+    assert client.check_decision("u1", "doc:read").from_cache is False
+    assert len(server.requests) == 3
+
+
+def test_concurrent_identical_checks_share_one_request():
+    server = FakeCheckServer({("u1", "doc:read")}, delay=0.2)
+    client = make_client(server)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(client.check("u1", "doc:read"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [True] * 8
+    assert len(server.requests) == 1
+    assert client.stats()["coalesced"] == 7
+
+
+def test_check_many_only_sends_cache_misses():
+    server = FakeCheckServer({("u1", "doc:read"), ("u2", "doc:write")})
+    client = make_client(server, cache_ttl_seconds=60)
+    client.check("u1", "doc:read")
+
+    results = client.check_many([("u1", "doc:read"), ("u2", "doc:write"), ("u3", "doc:read")])
+
+    assert results == {("u1", "doc:read"): True, ("u2", "doc:write"): True, ("u3", "doc:read"): False}
+    batch = json.loads(server.requests[-1].content)["checks"]
+    assert [(c["user_id"], c["permission"]) for c in batch] == [("u2", "doc:write"), ("u3", "doc:read")]
+
+
+def test_error_status_raises_client_error_and_writes_clear_cache():
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/api/v1/roles" and request.method == "POST":
+            assert "authorization" not in request.headers # The service has no authentication
+            return httpx.Response(201, json={"role_name": "editor"})
+        return httpx.Response(404, json={"detail": "Role not found"})
+
+    client = RBACClient(http_client=httpx.Client(base_url=BASE_URL, transport=httpx.MockTransport(handler)))
+    client.cache.put(("u1", "doc:read"), True, 1)
+
+    assert client.create_role("editor")["role_name"] == "editor"
+    assert client.cache.peek(("u1", "doc:read")) is None
+    with pytest.raises(RBACClientError) as excinfo:
+        client.get_role("00000000-0000-0000-0000-000000000000")
+    assert excinfo.value.status_code == 404
+    assert excinfo.value.detail == "Role not found"
+
+
+def test_async_client_coalesces_and_caches():
+    server = FakeCheckServer({("u1", "doc:read")}, epoch=3)
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(0.05)
+        return server.handler(request)
+
+    async def scenario():
+        http = httpx.AsyncClient(base_url=BASE_URL, transport=httpx.MockTransport(handler))
+        async with AsyncRBACClient(http_client=http, cache_ttl_seconds=60) as client:
+            results = await asyncio.gather(*(client.check("u1", "doc:read") for _ in range(5)))
+            cached = await client.check_decision("u1", "doc:read")
+            stats = client.stats()
+        await http.aclose()
+        return results, cached, stats
+
+    results, cached, stats = asyncio.run(scenario())
+
+    assert results == [True] * 5
+    assert cached.from_cache is True and cached.epoch == 3
+    assert len(server.requests) == 1
+    assert stats["coalesced"] == 4
+
+
+def test_async_client_propagates_errors_to_all_waiters():
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(0.05)
+        return httpx.Response(503, json={"detail": "Database unavailable"})
+
+    async def scenario():
+        http = httpx.AsyncClient(base_url=BASE_URL, transport=httpx.MockTransport(handler))
+        client = AsyncRBACClient(http_client=http)
+        outcomes = await asyncio.gather(*(client.check("u1", "doc:read") for _ in range(3)), return_exceptions=True)
+        await http.aclose()
+        return outcomes
+
+    outcomes = asyncio.run(scenario())
+
+    assert all(isinstance(outcome, RBACClientError) and outcome.status_code == 503 for outcome in outcomes)
@@ -0,0 +1,145 @@
+# tests/unit/test_replica_router.py
+import asyncio
+
+import pytest
+from pydantic import ValidationError
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import Session
+
+from app.core.config import Settings
+from app.db.replicas import ReplicaRouter
+from app.db.session import get_read_db, replica_router
+from app.core.policy_bus import stage_policy_change
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+@pytest.fixture
+def router(tmp_path):
+    down = set() # Names of replicas whose connections currently fail
+
+    def fail_while_down(engine, name: str):
+        @event.listens_for(engine, "do_connect")
+        def _maybe_fail(dialect, conn_rec, cargs, cparams):
+            if name in down:
+                raise dialect.loaded_dbapi.OperationalError(f"{name} is down")
+
+    def engine_factory(name: str, url: str):
+        engine = create_engine(f"sqlite:///{tmp_path / name}.db")
+        fail_while_down(engine, name)
+        return engine
+
+    def async_engine_factory(name: str, url: str):
+        async_engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / name}.db")
+        fail_while_down(async_engine.sync_engine, name)
+        return async_engine
+
+    router = ReplicaRouter(
+        ["sqlite://a", "sqlite://b"], engine_factory, async_engine_factory=async_engine_factory,
+        read_your_writes_seconds=5.0, clock=FakeClock()
+    )
+    router.down = down
+    yield router
+    for replica in router.replicas:
+        replica.engine.dispose()
+
+def _replica_name(router: ReplicaRouter, db: Session) -> str:
+    name = next(replica.name for replica in router.replicas if replica.engine is db.get_bind())
+    db.close()
+    return name
+
+def test_round_robin_across_replicas(router: ReplicaRouter):
+    assert [_replica_name(router, router.session()) for _ in range(4)] == ["replica0", "replica1", "replica0", "replica1"]
+    assert [replica.reads for replica in router.replicas] == [2, 2]
+
+def test_reads_stay_on_primary_within_write_window(router: ReplicaRouter):
+    router.note_write()
+    assert router.session() is None
+    router.clock.now += 4.9
+    assert router.session() is None
+    router.clock.now += 0.2
+    assert router.session() is not None
+    assert router.primary_reads == 2 and router.fallbacks == 0
+
+def test_unreachable_replica_is_ejected_and_readmitted(router: ReplicaRouter):
+    for replica in router.replicas:
+        replica.engine.dispose()
+    router.down.add("replica0")
+
+    # The failed connect ejects replica0 and the read goes to replica1 instead
+    assert [_replica_name(router, router.session()) for _ in range(3)] == ["replica1"] * 3
+    assert router.replicas[0].healthy is False and router.replicas[0].ejections == 1
+
+    router.down.add("replica1")
+    router.replicas[1].engine.dispose()
+    router.check_health()
+    assert router.session() is None # Nothing healthy: fall back to the primary
+    assert router.fallbacks == 1
+
+    router.down.clear()
+    router.check_health()
+    assert all(replica.healthy for replica in router.replicas)
+    assert router.session() is not None
+
+def test_replica_lagging_past_the_write_window_is_ejected(router: ReplicaRouter, monkeypatch):
+    # 7s behind: under the old 10s threshold, but past the 5s read-your-writes window
+    lag = {"replica0": 7.0, "replica1": 0.0}
+    monkeypatch.setattr(router, "measure_lag", lambda conn: lag[_probed(router, conn)])
+    router.check_health()
+    router.note_write()
+    router.clock.now += 5.1
+    assert [_replica_name(router, router.session()) for _ in range(2)] == ["replica1"] * 2
+    assert router.replicas[0].healthy is False and router.replicas[0].lag_seconds == 7.0
+
+    lag["replica0"] = 0.5
+    router.check_health()
+    assert router.replicas[0].healthy is True
+
+def _probed(router: ReplicaRouter, conn) -> str:
+    return next(replica.name for replica in router.replicas if replica.engine is conn.engine)
+
+def test_settings_keep_replica_max_lag_below_the_write_window():
+    replicas = {"DATABASE_URL": "sqlite://", "DATABASE_REPLICA_URLS": ["postgresql://replica-1/rbac"]}
+    assert Settings(**replicas).REPLICA_MAX_LAG_SECONDS < Settings(**replicas).READ_YOUR_WRITES_SECONDS
+    with pytest.raises(ValidationError, match="REPLICA_MAX_LAG_SECONDS"):
+        Settings(**replicas, READ_YOUR_WRITES_SECONDS=5.0, REPLICA_MAX_LAG_SECONDS=10.0)
+    # Without replicas the two don't interact
+    Settings(DATABASE_URL="sqlite://", READ_YOUR_WRITES_SECONDS=5.0, REPLICA_MAX_LAG_SECONDS=10.0)
+
+def test_async_sessions_share_rotation_and_ejection(router: ReplicaRouter):
+    router.down.add("replica0")
+
+    async def scenario():
+        names = []
+        for _ in range(3):
+            db = await router.async_session()
+            names.append(next(replica.name for replica in router.replicas if replica.async_engine is db.bind))
+            await db.close()
+        router.note_write()
+        in_window = await router.async_session()
+        for replica in router.replicas:
+            if replica.async_engine is not None:
+                await replica.async_engine.dispose()
+        return names, in_window
+
+    names, in_window = asyncio.run(scenario())
+    assert names == ["replica1"] * 3
+    assert router.replicas[0].healthy is False and router.replicas[0].ejections == 1
+    assert in_window is None and router.primary_reads == 1
+
+def test_policy_commit_opens_the_write_window(db_session: Session, monkeypatch):
+    calls = []
+    monkeypatch.setattr(replica_router, "note_write", lambda: calls.append(True))
+    stage_policy_change(db_session, user_ids=["someone"])
+    db_session.commit()
+    assert calls == [True]
+
+def test_get_read_db_falls_back_to_primary_without_replicas(db_session: Session):
+    assert not replica_router.enabled
+    dependency = get_read_db(primary=db_session)
+    assert next(dependency) is db_session
@@ -5,7 +5,7 @@ from uuid import uuid4
 from sqlalchemy.orm import Session
 
 # Import the function to test
-from app.core.security import check_user_permission
+from app.core.security import check_user_permission, check_user_permissions_batch, get_user_effective_permissions
 
 # We need to mock the db.execute call which is central to this function
 def test_check_permission_allowed():
@@ -64,4 +64,57 @@ def test_check_permission_nonexistent_permission_name():
 # Note: Precisely unit testing the 'is_enabled' flag filtering within the subquery
 # without actually executing SQL or having very complex mocks is hard.
 # We rely on the integration tests (`test_check_api_endpoint`) to verify
-# that disabled permissions correctly result in 'allowed: false'.
\ No newline at end of file
+# that disabled permissions correctly result in 'allowed: false'.
+
+def test_check_permissions_batch_single_query():
+    """Test that a batch is resolved with one statement and answered in request order."""
+    mock_db = create_autospec(Session)
+    # The query returns only the granted pairs
+    mock_db.execute.return_value = iter([("user-1", "doc:read")])
+
+    checks = [("user-1", "doc:read"), ("user-1", "doc:write"), ("user-2", "doc:read")]
+    results = check_user_permissions_batch(db=mock_db, checks=checks)
+
+    assert results == [True, False, False]
+    mock_db.execute.assert_called_once()
+
+def test_check_permissions_batch_empty():
+    mock_db = create_autospec(Session)
+    assert check_user_permissions_batch(db=mock_db, checks=[]) == []
+    mock_db.execute.assert_not_called()
+
+def test_effective_permissions_read_from_denormalized_table():
+    """Test that a permission-cache miss loads names from user_effective_permissions, without the role joins."""
+    role_id = uuid4()
+    statements = []
+    def execute(statement):
+        statements.append(str(statement))
+        result = MagicMock()
+        if "user_effective_permissions" in statements[-1]:
+            result.scalars.return_value = iter(["doc:read", "doc:write"])
+        else:
+            result.scalars.return_value.all.return_value = [role_id] # The user's role IDs
+        return result
+    mock_db = create_autospec(Session)
+    mock_db.execute.side_effect = execute
+
+    names, role_ids = get_user_effective_permissions(mock_db, user_id="u")
+
+    assert names == {"doc:read", "doc:write"}
+    assert role_ids == {role_id}
+    assert not any("JOIN" in statement or "role_permissions" in statement for statement in statements)
+
+def test_check_permission_delegates_to_engine():
+    """Test that passing a bitset engine replaces the join with a role lookup + bit test."""
+    from app.core.permission_matrix import PermissionMatrix
+    role_id, permission_id = uuid4(), uuid4()
+    engine = PermissionMatrix.from_rows([(permission_id, "sec:read", True)], [(role_id, permission_id)])
+
+    mock_db = create_autospec(Session)
+    mock_execute = MagicMock()
+    mock_execute.scalars.return_value.all.return_value = [role_id] # The user's role IDs
+    mock_db.execute.return_value = mock_execute
+
+    assert check_user_permission(db=mock_db, user_id="u", permission_name="sec:read", engine=engine) is True
+    assert check_user_permission(db=mock_db, user_id="u", permission_name="sec:write", engine=engine) is False
+    assert mock_db.execute.call_count == 2 # One role lookup per check, matrix already loaded
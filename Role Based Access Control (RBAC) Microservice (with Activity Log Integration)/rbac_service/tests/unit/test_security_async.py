@@ -0,0 +1,32 @@
+# tests/unit/test_security_async.py
+# Runs the async check functions against aiosqlite (stand-in for asyncpg).
+# Policy is written with the sync CRUD module on the same connection (AsyncSession.run_sync).
+from app.schemas.rbac import RoleCreate, PermissionCreate
+from app.crud import rbac as crud
+from app.core.security import (
+    check_user_permission_async, check_user_permissions_batch_async, get_user_effective_permissions_async
+)
+
+
+def test_check_user_permission_async(async_db_runner):
+    async def body(db):
+        def seed(session):
+            role = crud.create_role(session, role_in=RoleCreate(role_name="Async Check Role"))
+            enabled = crud.create_permission(session, permission_in=PermissionCreate(permission_name="async:read"))
+            crud.assign_permission_to_role(session, role=role, permission=enabled)
+            crud.assign_role_to_user(session, user_id="async-user", role_id=role.role_id)
+            return role.role_id
+        role_id = await db.run_sync(seed)
+
+        assert await check_user_permission_async(db, user_id="async-user", permission_name="async:read") is True
+        assert await check_user_permission_async(db, user_id="async-user", permission_name="async:write") is False
+        assert await check_user_permissions_batch_async(
+            db, checks=[("async-user", "async:read"), ("other", "async:read")]
+        ) == [True, False]
+        names, role_ids = await get_user_effective_permissions_async(db, user_id="async-user")
+        assert names == frozenset({"async:read"})
+        assert role_ids == frozenset({role_id})
+
+        await db.run_sync(lambda session: crud.remove_role_from_user(session, user_id="async-user", role_id=role_id))
+        assert await check_user_permission_async(db, user_id="async-user", permission_name="async:read") is False
+    async_db_runner(body)